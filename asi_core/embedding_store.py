@@ -0,0 +1,561 @@
+"""
+ASI Core - Segmentierter Embedding-Speicher
+Append-only Binärsegmente mit Metadaten-Log, Tail-Recovery und Kompaktierung
+"""
+
+import json
+import logging
+import os
+import struct
+import threading
+import zlib
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_MAGIC = b"ASIVEC01"
+SEGMENT_HEADER = struct.Struct("<8sII")  # Magic, Record-Größe, reserviert
+MANIFEST_NAME = "MANIFEST.json"
+
+# Prozessweite Stores pro Verzeichnis (genau ein Writer pro Verzeichnis)
+_OPEN_STORES: Dict[str, "SegmentedEmbeddingStore"] = {}
+_OPEN_STORES_LOCK = threading.Lock()
+
+
+class EmbeddingStoreError(Exception):
+    """Fehler im segmentierten Embedding-Speicher"""
+
+    pass
+
+
+class _Segment:
+    """Ein Segment: Vektordatei mit festen Records plus Metadaten-Log"""
+
+    def __init__(self, directory: Path, segment_id: int, record_size: int):
+        self.segment_id = segment_id
+        self.record_size = record_size
+        self.vec_path = directory / f"segment-{segment_id:06d}.vec"
+        self.log_path = directory / f"segment-{segment_id:06d}.log"
+        self.num_records = 0
+        self._mmap: Optional[np.memmap] = None
+
+    def create(self):
+        """Legt leere Segmentdateien an"""
+        with open(self.vec_path, "wb") as f:
+            f.write(SEGMENT_HEADER.pack(SEGMENT_MAGIC, self.record_size, 0))
+        open(self.log_path, "wb").close()
+
+    def recover(self) -> List[Dict]:
+        """
+        Liest das Segment und verwirft unvollständige Einträge am Ende
+
+        Ein Eintrag gilt erst als geschrieben, wenn seine Log-Zeile vollständig
+        ist und der zugehörige Vektor existiert und zur Prüfsumme passt.
+
+        Returns:
+            List[Dict]: Gültige Log-Einträge in Schreibreihenfolge
+        """
+        with open(self.vec_path, "rb") as f:
+            header = f.read(SEGMENT_HEADER.size)
+        if len(header) < SEGMENT_HEADER.size:
+            raise EmbeddingStoreError(f"Segment-Header fehlt: {self.vec_path}")
+        magic, record_size, _ = SEGMENT_HEADER.unpack(header)
+        if magic != SEGMENT_MAGIC or record_size != self.record_size:
+            raise EmbeddingStoreError(f"Ungültiges Segment: {self.vec_path}")
+
+        stored_rows = (
+            self.vec_path.stat().st_size - SEGMENT_HEADER.size
+        ) // self.record_size
+
+        entries = []
+        line_lengths = []
+        with open(self.log_path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                if entry.get("row") != len(entries) or entry["row"] >= stored_rows:
+                    break
+                entries.append(entry)
+                line_lengths.append(len(line))
+
+        # Prüfsumme des letzten Eintrags kontrollieren (einziger unsicherer Record)
+        if entries and zlib.crc32(self._read_raw(entries[-1]["row"])) != entries[
+            -1
+        ].get("crc"):
+            entries.pop()
+            line_lengths.pop()
+
+        self.num_records = len(entries)
+        self._truncate(sum(line_lengths))
+        return entries
+
+    def append(
+        self, records: List[Tuple[bytes, Dict]], sync: bool = False
+    ) -> List[Dict]:
+        """
+        Hängt Records an (erst alle Vektoren, dann die Log-Zeilen als Commit)
+
+        Args:
+            records: Liste von (Vektor-Bytes fester Länge, Metadaten)
+            sync: fsync nach dem Schreiben
+
+        Returns:
+            List[Dict]: Geschriebene Log-Einträge mit row und crc
+        """
+        entries = [
+            dict(entry, row=self.num_records + i, crc=zlib.crc32(embedding_bytes))
+            for i, (embedding_bytes, entry) in enumerate(records)
+        ]
+        with open(self.vec_path, "ab") as f:
+            f.write(b"".join(embedding_bytes for embedding_bytes, _ in records))
+            f.flush()
+            if sync:
+                os.fsync(f.fileno())
+        with open(self.log_path, "ab") as f:
+            f.write(
+                "".join(
+                    json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries
+                ).encode("utf-8")
+            )
+            f.flush()
+            if sync:
+                os.fsync(f.fileno())
+        self.num_records += len(entries)
+        return entries
+
+    def rows(self) -> np.ndarray:
+        """Gibt alle Records als memory-mapped uint8-Matrix zurück"""
+        if self._mmap is None or self._mmap.shape[0] < self.num_records:
+            self._mmap = None
+            if self.num_records == 0:
+                return np.empty((0, self.record_size), dtype=np.uint8)
+            self._mmap = np.memmap(
+                self.vec_path,
+                dtype=np.uint8,
+                mode="r",
+                offset=SEGMENT_HEADER.size,
+                shape=(self.num_records, self.record_size),
+            )
+        return self._mmap[: self.num_records]
+
+    def read(self, row: int) -> bytes:
+        """Liest einen Record über die Memory-Map"""
+        return self.rows()[row].tobytes()
+
+    def close(self):
+        """Gibt die Memory-Map frei"""
+        self._mmap = None
+
+    def delete_files(self):
+        """Löscht die Segmentdateien"""
+        self.close()
+        for path in (self.vec_path, self.log_path):
+            path.unlink(missing_ok=True)
+
+    def _read_raw(self, row: int) -> bytes:
+        with open(self.vec_path, "rb") as f:
+            f.seek(SEGMENT_HEADER.size + row * self.record_size)
+            return f.read(self.record_size)
+
+    def _truncate(self, log_bytes: int):
+        """Kürzt Vektor- und Log-Datei auf den gültigen Stand"""
+        with open(self.vec_path, "r+b") as f:
+            f.truncate(SEGMENT_HEADER.size + self.num_records * self.record_size)
+        with open(self.log_path, "r+b") as f:
+            f.truncate(log_bytes)
+
+
+class SegmentedEmbeddingStore(Mapping):
+    """
+    Append-only Speicher für Embeddings fester Länge
+
+    Jedes Insert hängt einen Record an das aktive Segment an, statt den ganzen
+    Cache neu zu schreiben. Überschriebene Einträge werden durch eine
+    Kompaktierung im Hintergrund entfernt. Lesezugriffe laufen über mmap.
+
+    Verhält sich lesend wie ein Dict cid -> Embedding-Bytes. version zählt
+    jeden geschriebenen Record monoton hoch (auch Überschreibungen), damit
+    Leser veraltete Ableitungen erkennen, ohne den Inhalt zu vergleichen.
+    """
+
+    def __init__(
+        self,
+        directory,
+        record_size: Optional[int] = None,
+        segment_max_records: int = 65536,
+        compaction_threshold: float = 0.5,
+        compaction_min_dead: int = 1000,
+        background_compaction: bool = True,
+        sync: bool = False,
+    ):
+        """
+        Öffnet oder erstellt einen Speicher
+
+        Args:
+            directory: Verzeichnis der Segmente
+            record_size: Bytes pro Embedding (sonst beim ersten Insert festgelegt)
+            segment_max_records: Records pro Segment bis zum Wechsel
+            compaction_threshold: Anteil toter Records, ab dem kompaktiert wird
+            compaction_min_dead: Mindestanzahl toter Records für eine Kompaktierung
+            background_compaction: Kompaktierung in einem Hintergrund-Thread
+            sync: fsync nach jedem Insert
+        """
+        self.directory = Path(directory)
+        self.record_size = record_size
+        self.segment_max_records = segment_max_records
+        self.compaction_threshold = compaction_threshold
+        self.compaction_min_dead = compaction_min_dead
+        self.background_compaction = background_compaction
+        self.sync = sync
+
+        self.metadata: Dict[str, Dict] = {}
+        self.version = 0
+        self._locations: Dict[str, Tuple[int, int]] = {}
+        self._segments: Dict[int, _Segment] = {}
+        self._segment_order: List[int] = []
+        self._next_segment_id = 1
+        self._dead_records = 0
+
+        self._lock = threading.RLock()
+        self._compaction_lock = threading.Lock()
+        self._compaction_thread: Optional[threading.Thread] = None
+
+        self._open()
+
+    # === MAPPING INTERFACE ===
+
+    def __getitem__(self, cid: str) -> bytes:
+        with self._lock:
+            segment_id, row = self._locations[cid]
+            return self._segments[segment_id].read(row)
+
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            return iter(list(self._locations))
+
+    def __len__(self) -> int:
+        return len(self._locations)
+
+    def __contains__(self, cid) -> bool:
+        return cid in self._locations
+
+    # === PUBLIC INTERFACE ===
+
+    def append(self, cid: str, embedding_bytes: bytes, metadata: Optional[Dict] = None):
+        """
+        Speichert ein Embedding (überschreibt einen vorhandenen Eintrag logisch)
+
+        Args:
+            cid: Content ID
+            embedding_bytes: Embedding als Bytes
+            metadata: Zusätzliche Metadaten (text_preview, timestamp, ...)
+        """
+        self.append_many([(cid, embedding_bytes, metadata or {})])
+
+    def append_many(self, items: Iterable[Tuple[str, bytes, Dict]]):
+        """
+        Speichert mehrere Embeddings in einem Durchgang
+
+        Args:
+            items: Iterable von (cid, embedding_bytes, metadata)
+        """
+        with self._lock:
+            batch: List[Tuple[str, bytes, Dict]] = []
+            for cid, embedding_bytes, metadata in items:
+                if self.record_size is None:
+                    self.record_size = len(embedding_bytes)
+                if len(embedding_bytes) != self.record_size:
+                    raise EmbeddingStoreError(
+                        f"Embedding-Größe {len(embedding_bytes)} != "
+                        f"{self.record_size} Bytes"
+                    )
+                batch.append((cid, embedding_bytes, dict(metadata or {})))
+
+            while batch:
+                segment = self._active_segment_locked()
+                free = self.segment_max_records - segment.num_records
+                chunk, batch = batch[:free], batch[free:]
+                entries = segment.append(
+                    [(data, dict(meta, cid=cid)) for cid, data, meta in chunk],
+                    sync=self.sync,
+                )
+                for (cid, _, metadata), entry in zip(chunk, entries):
+                    if cid in self._locations:
+                        self._dead_records += 1
+                    self._locations[cid] = (segment.segment_id, entry["row"])
+                    self.metadata[cid] = metadata
+                self.version += len(chunk)
+
+        self._maybe_compact()
+
+    def vectors(self, dtype) -> Tuple[List[str], np.ndarray]:
+        """
+        Liefert alle lebenden Embeddings als zusammenhängende Matrix
+
+        Args:
+            dtype: Datentyp der Embedding-Elemente
+
+        Returns:
+            Tuple[List[str], np.ndarray]: CIDs und Matrix (eine Zeile pro CID)
+        """
+        dtype = np.dtype(dtype)
+        with self._lock:
+            if not self._locations:
+                return [], np.empty((0, 0), dtype=dtype)
+
+            cids: List[str] = []
+            blocks = []
+            for segment_id in self._segment_order:
+                segment = self._segments[segment_id]
+                live = [
+                    (cid, row)
+                    for cid, (seg, row) in self._locations.items()
+                    if seg == segment_id
+                ]
+                if not live:
+                    continue
+                live.sort(key=lambda item: item[1])
+                rows = np.fromiter((row for _, row in live), dtype=np.int64)
+                blocks.append(np.asarray(segment.rows()[rows]))
+                cids.extend(cid for cid, _ in live)
+
+            matrix = np.concatenate(blocks).view(dtype)
+            return cids, matrix.reshape(len(cids), -1)
+
+    def compact(self):
+        """
+        Schreibt alle lebenden Records der versiegelten Segmente neu
+
+        Das aktive Segment wird vorher versiegelt, so dass parallele Inserts
+        in ein frisches Segment laufen und nicht blockiert werden.
+        """
+        with self._compaction_lock:
+            self._compact_locked()
+
+    def _compact_locked(self):
+        with self._lock:
+            if not self._segment_order:
+                return
+            self._roll_segment_locked()
+            sealed = self._segment_order[:-1]
+            if not sealed:
+                return
+            target = _Segment(self.directory, self._next_segment_id, self.record_size)
+            self._next_segment_id += 1
+            snapshot = {
+                cid: location
+                for cid, location in self._locations.items()
+                if location[0] in sealed
+            }
+            metadata = {cid: dict(self.metadata.get(cid, {})) for cid in snapshot}
+            sources = {segment_id: self._segments[segment_id] for segment_id in sealed}
+
+        # Neues Segment außerhalb des Locks schreiben
+        target.create()
+        cids = list(snapshot)
+        entries = target.append(
+            [
+                (
+                    sources[snapshot[cid][0]].read(snapshot[cid][1]),
+                    dict(metadata[cid], cid=cid),
+                )
+                for cid in cids
+            ],
+            sync=True,
+        )
+        new_locations = {
+            cid: (target.segment_id, entry["row"]) for cid, entry in zip(cids, entries)
+        }
+
+        with self._lock:
+            # Nur Einträge umhängen, die nicht zwischenzeitlich überschrieben wurden
+            for cid, location in new_locations.items():
+                if self._locations.get(cid) == snapshot[cid]:
+                    self._locations[cid] = location
+
+            self._segments[target.segment_id] = target
+            remaining = [s for s in self._segment_order if s not in sealed]
+            self._segment_order = [target.segment_id] + remaining
+            self._write_manifest()
+
+            for segment_id in sealed:
+                self._segments.pop(segment_id).delete_files()
+
+            total_records = sum(
+                self._segments[segment_id].num_records
+                for segment_id in self._segment_order
+            )
+            self._dead_records = total_records - len(self._locations)
+
+        logger.info(
+            f"Embedding-Store kompaktiert: {len(sealed)} Segmente -> "
+            f"{target.num_records} Records"
+        )
+
+    def wait_for_compaction(self, timeout: Optional[float] = None):
+        """Wartet auf eine laufende Hintergrund-Kompaktierung"""
+        thread = self._compaction_thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def get_stats(self) -> Dict:
+        """
+        Gibt Statistiken über den Speicher zurück
+
+        Returns:
+            Dict: Speicher-Statistiken
+        """
+        with self._lock:
+            total_bytes = sum(
+                segment.vec_path.stat().st_size + segment.log_path.stat().st_size
+                for segment in self._segments.values()
+            )
+            return {
+                "entries": len(self._locations),
+                "segments": len(self._segment_order),
+                "dead_records": self._dead_records,
+                "record_size": self.record_size,
+                "size_bytes": total_bytes,
+            }
+
+    def close(self):
+        """Schließt alle Memory-Maps und wartet auf die Kompaktierung"""
+        self.wait_for_compaction()
+        with self._lock:
+            for segment in self._segments.values():
+                segment.close()
+
+    # === INTERNAL METHODS ===
+
+    def _open(self):
+        """Lädt Manifest und Segmente inklusive Tail-Recovery"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        manifest_path = self.directory / MANIFEST_NAME
+
+        if not manifest_path.exists():
+            return
+
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+
+        self.record_size = manifest["record_size"]
+        self._next_segment_id = manifest["next_segment_id"]
+
+        total_records = 0
+        for segment_id in manifest["segments"]:
+            segment = _Segment(self.directory, segment_id, self.record_size)
+            for entry in segment.recover():
+                cid = entry.pop("cid")
+                row = entry.pop("row")
+                entry.pop("crc", None)
+                self._locations[cid] = (segment_id, row)
+                self.metadata[cid] = entry
+            self._segments[segment_id] = segment
+            self._segment_order.append(segment_id)
+            total_records += segment.num_records
+
+        self._dead_records = total_records - len(self._locations)
+        self._remove_orphans()
+
+        logger.info(
+            f"Embedding-Store geladen: {len(self._locations)} Einträge in "
+            f"{len(self._segment_order)} Segmenten"
+        )
+
+    def _remove_orphans(self):
+        """Entfernt Segmentdateien, die nicht im Manifest stehen (abgebrochene Kompaktierung)"""
+        known = {
+            path
+            for segment in self._segments.values()
+            for path in (segment.vec_path, segment.log_path)
+        }
+        for path in self.directory.glob("segment-*"):
+            if path not in known:
+                path.unlink(missing_ok=True)
+
+    def _active_segment_locked(self) -> _Segment:
+        if (
+            not self._segment_order
+            or self._segments[self._segment_order[-1]].num_records
+            >= self.segment_max_records
+        ):
+            self._roll_segment_locked()
+        return self._segments[self._segment_order[-1]]
+
+    def _roll_segment_locked(self):
+        """Beginnt ein neues aktives Segment"""
+        segment = _Segment(self.directory, self._next_segment_id, self.record_size)
+        segment.create()
+        self._next_segment_id += 1
+        self._segments[segment.segment_id] = segment
+        self._segment_order.append(segment.segment_id)
+        self._write_manifest()
+
+    def _write_manifest(self):
+        """Schreibt das Manifest atomar"""
+        manifest = {
+            "version": 1,
+            "record_size": self.record_size,
+            "next_segment_id": self._next_segment_id,
+            "segments": self._segment_order,
+        }
+        tmp_path = self.directory / (MANIFEST_NAME + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.directory / MANIFEST_NAME)
+
+    def _maybe_compact(self):
+        """Startet eine Kompaktierung, wenn der Anteil toter Records zu hoch ist"""
+        total = len(self._locations) + self._dead_records
+        if (
+            self._dead_records < max(self.compaction_min_dead, 1)
+            or self._dead_records / total < self.compaction_threshold
+        ):
+            return
+
+        if not self.background_compaction:
+            self.compact()
+            return
+
+        if self._compaction_thread and self._compaction_thread.is_alive():
+            return
+        self._compaction_thread = threading.Thread(
+            target=self._compact_safely, name="asi-embedding-compaction", daemon=True
+        )
+        self._compaction_thread.start()
+
+    def _compact_safely(self):
+        try:
+            self.compact()
+        except Exception as e:
+            logger.error(f"Kompaktierung fehlgeschlagen: {e}")
+
+
+def open_embedding_store(directory, **kwargs) -> SegmentedEmbeddingStore:
+    """
+    Öffnet den prozessweit geteilten Store für ein Verzeichnis
+
+    Args:
+        directory: Verzeichnis der Segmente
+        **kwargs: Optionen für SegmentedEmbeddingStore
+
+    Returns:
+        SegmentedEmbeddingStore: Geteilte Instanz
+    """
+    key = os.path.abspath(directory)
+    with _OPEN_STORES_LOCK:
+        store = _OPEN_STORES.get(key)
+        if store is None:
+            store = SegmentedEmbeddingStore(directory, **kwargs)
+            _OPEN_STORES[key] = store
+        return store
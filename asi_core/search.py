@@ -3,22 +3,56 @@ ASI Core - Semantische Suche und Embedding-Generierung
 Implementierung von Vektor-Embeddings und semantischer Suche für das ASI-System
 """
 
+import argparse
 import json
 import logging
 import pickle
+import threading
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 
 import numpy as np
 from sentence_transformers import SentenceTransformer
 
+from .embedding_store import SegmentedEmbeddingStore, open_embedding_store
+
 # Logger konfigurieren
 logger = logging.getLogger(__name__)
 
 # Globaler Cache für Embeddings (simuliert lokale Speicherung)
 EMBEDDING_CACHE = {}
 EMBEDDING_METADATA = {}
+# Schreibzähler für EMBEDDING_CACHE als Dict (der Segment-Speicher zählt selbst)
+_DICT_CACHE_VERSION = 0
+
+# Prozessweite Modell-Registry: jedes Modell wird genau einmal geladen
+_MODEL_REGISTRY: Dict[str, Tuple[SentenceTransformer, int, np.dtype]] = {}
+_MODEL_REGISTRY_LOCK = threading.Lock()
+
+
+def get_sentence_transformer(
+    model_name: str,
+) -> Tuple[SentenceTransformer, int, np.dtype]:
+    """
+    Liefert ein geladenes Modell aus der prozessweiten Registry
+
+    Args:
+        model_name: Name des sentence-transformers Modells
+
+    Returns:
+        Tuple[SentenceTransformer, int, np.dtype]: Modell, Dimension und Datentyp
+    """
+    with _MODEL_REGISTRY_LOCK:
+        entry = _MODEL_REGISTRY.get(model_name)
+        if entry is None:
+            logger.info(f"Lade sentence-transformers Modell: {model_name}")
+            model = SentenceTransformer(model_name)
+            sample_embedding = model.encode("test", convert_to_numpy=True)
+            entry = (model, int(sample_embedding.shape[-1]), sample_embedding.dtype)
+            _MODEL_REGISTRY[model_name] = entry
+            logger.info("Modell erfolgreich geladen")
+        return entry
 
 
 class ASIEmbeddingGenerator:
@@ -33,14 +67,16 @@ class ASIEmbeddingGenerator:
         """
         self.model_name = model_name
         self.model = None
+        self.embedding_dim: Optional[int] = None
+        self.embedding_dtype: Optional[np.dtype] = None
         self._load_model()
 
     def _load_model(self):
-        """Lädt das sentence-transformers Modell"""
+        """Holt das sentence-transformers Modell aus der Registry"""
         try:
-            logger.info(f"Lade sentence-transformers Modell: {self.model_name}")
-            self.model = SentenceTransformer(self.model_name)
-            logger.info("Modell erfolgreich geladen")
+            self.model, self.embedding_dim, self.embedding_dtype = (
+                get_sentence_transformer(self.model_name)
+            )
         except Exception as e:
             logger.error(f"Fehler beim Laden des Modells: {e}")
             raise
@@ -77,6 +113,40 @@ class ASIEmbeddingGenerator:
             logger.error(f"Fehler bei Embedding-Generierung: {e}")
             raise
 
+    def generate_embeddings(
+        self, texts: List[str], batch_size: int = 32
+    ) -> List[bytes]:
+        """
+        Generiert Embeddings für mehrere Texte mit dem Batching des Modells
+
+        Args:
+            texts: Liste von Texten
+            batch_size: Anzahl Texte pro Modell-Durchlauf
+
+        Returns:
+            List[bytes]: Embeddings als Bytes, in der Reihenfolge von texts
+        """
+        if not texts:
+            return []
+
+        try:
+            if not self.model:
+                self._load_model()
+
+            cleaned_texts = [self._preprocess_text(text) for text in texts]
+            embeddings = self.model.encode(
+                cleaned_texts, batch_size=batch_size, convert_to_numpy=True
+            )
+
+            logger.debug(
+                f"{len(texts)} Embeddings in Batches zu {batch_size} generiert"
+            )
+            return [embedding.tobytes() for embedding in embeddings]
+
+        except Exception as e:
+            logger.error(f"Fehler bei Batch-Embedding-Generierung: {e}")
+            raise
+
     def _preprocess_text(self, text: str) -> str:
         """
         Preprocesst den Text für bessere Embeddings
@@ -108,18 +178,13 @@ class ASIEmbeddingGenerator:
             np.ndarray: Embedding als numpy array
         """
         try:
-            # Dimensionen des Modells abrufen
-            if not self.model:
+            # Dimension und Datentyp wurden beim Laden des Modells ermittelt
+            if self.embedding_dtype is None:
                 self._load_model()
 
-            # Beispiel-Embedding generieren um Dimensionen zu ermitteln
-            sample_embedding = self.model.encode("test", convert_to_numpy=True)
-            expected_shape = sample_embedding.shape
-            expected_dtype = sample_embedding.dtype
-
             # Bytes zu numpy array konvertieren
-            embedding = np.frombuffer(embedding_bytes, dtype=expected_dtype)
-            embedding = embedding.reshape(expected_shape)
+            embedding = np.frombuffer(embedding_bytes, dtype=self.embedding_dtype)
+            embedding = embedding.reshape(self.embedding_dim)
 
             return embedding
 
@@ -128,56 +193,88 @@ class ASIEmbeddingGenerator:
             raise
 
 
+def _embedding_cache_version() -> int:
+    """Monotoner Schreibzähler des aktuellen EMBEDDING_CACHE"""
+    if isinstance(EMBEDDING_CACHE, SegmentedEmbeddingStore):
+        return EMBEDDING_CACHE.version
+    return _DICT_CACHE_VERSION
+
+
+def _bump_dict_cache_version(count: int):
+    """Zählt Schreibzugriffe auf EMBEDDING_CACHE als Dict"""
+    global _DICT_CACHE_VERSION
+    _DICT_CACHE_VERSION += count
+
+
 class ASISemanticSearch:
     """Semantische Suchmaschine für ASI-Reflektionen"""
 
-    def __init__(self, embedding_generator: ASIEmbeddingGenerator):
+    def __init__(
+        self,
+        embedding_generator: ASIEmbeddingGenerator,
+        store_dir: str = "data/embedding_store",
+        ann_index=None,
+    ):
         """
         Initialisiert die Suchmaschine
 
         Args:
             embedding_generator: Instanz des Embedding-Generators
+            store_dir: Verzeichnis des segmentierten Embedding-Speichers
+            ann_index: Optionaler ANN-Index (add/add_many/keys/search, z.B.
+                src.ai.ann_index.IVFIndex) statt exakter Matrix-Suche
         """
         self.embedding_generator = embedding_generator
+        self.ann_index = ann_index
+        self.store_dir = Path(store_dir)
+        self.store: Optional[SegmentedEmbeddingStore] = None
+
+        # Alter Pickle-Cache, wird nur noch einmalig migriert
         self.cache_file = Path("data/embedding_cache.pkl")
+
+        # Gestapelte, normalisierte Embeddings für die vektorisierte Suche
+        self._matrix: Optional[np.ndarray] = None
+        self._matrix_cids: List[str] = []
+        self._matrix_rows: Dict[str, int] = {}
+        self._matrix_size = 0
+        # Stand von EMBEDDING_CACHE, den die Matrix abbildet
+        self._matrix_source = None
+        self._matrix_version = -1
+
         self._load_cache()
 
     def _load_cache(self):
-        """Lädt den Embedding-Cache aus der Datei"""
+        """Öffnet den Embedding-Speicher (mmap, ohne alles einzulesen)"""
         global EMBEDDING_CACHE, EMBEDDING_METADATA
 
         try:
-            if self.cache_file.exists():
-                with open(self.cache_file, "rb") as f:
-                    cache_data = pickle.load(f)
-                    EMBEDDING_CACHE = cache_data.get("embeddings", {})
-                    EMBEDDING_METADATA = cache_data.get("metadata", {})
-                logger.info(f"Embedding-Cache geladen: {len(EMBEDDING_CACHE)} Einträge")
-            else:
-                logger.info("Neuer Embedding-Cache erstellt")
+            self.store = open_embedding_store(self.store_dir)
+            if len(self.store) == 0 and self.cache_file.exists():
+                self._migrate_pickle_cache()
+
+            EMBEDDING_CACHE = self.store
+            EMBEDDING_METADATA = self.store.metadata
+            self._matrix = None
+            logger.info(f"Embedding-Store geöffnet: {len(self.store)} Einträge")
 
         except Exception as e:
             logger.error(f"Fehler beim Laden des Caches: {e}")
+            self.store = None
             EMBEDDING_CACHE = {}
             EMBEDDING_METADATA = {}
 
-    def _save_cache(self):
-        """Speichert den Embedding-Cache in eine Datei"""
-        try:
-            # Verzeichnis erstellen falls es nicht existiert
-            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+    def _migrate_pickle_cache(self):
+        """Übernimmt den alten Pickle-Cache einmalig in den Segment-Speicher"""
+        with open(self.cache_file, "rb") as f:
+            cache_data = pickle.load(f)
 
-            cache_data = {"embeddings": EMBEDDING_CACHE, "metadata": EMBEDDING_METADATA}
-
-            with open(self.cache_file, "wb") as f:
-                pickle.dump(cache_data, f)
-
-            logger.debug(
-                f"Embedding-Cache gespeichert: {len(EMBEDDING_CACHE)} Einträge"
-            )
-
-        except Exception as e:
-            logger.error(f"Fehler beim Speichern des Caches: {e}")
+        embeddings = cache_data.get("embeddings", {})
+        metadata = cache_data.get("metadata", {})
+        self.store.append_many(
+            (cid, embedding_bytes, metadata.get(cid, {}))
+            for cid, embedding_bytes in embeddings.items()
+        )
+        logger.info(f"Pickle-Cache migriert: {len(embeddings)} Einträge")
 
     def store_embedding(self, cid: str, embedding_bytes: bytes, text_preview: str = ""):
         """
@@ -188,29 +285,120 @@ class ASISemanticSearch:
             embedding_bytes: Embedding als Bytes
             text_preview: Kurze Textvorschau für die Anzeige
         """
-        global EMBEDDING_CACHE, EMBEDDING_METADATA
-
         try:
-            EMBEDDING_CACHE[cid] = embedding_bytes
-            EMBEDDING_METADATA[cid] = {
+            metadata = {
                 "text_preview": text_preview[:200],  # Erste 200 Zeichen
                 "timestamp": datetime.now().isoformat(),
                 "embedding_size": len(embedding_bytes),
             }
 
-            self._save_cache()
+            if self.store is not None:
+                # Append-only: nur der neue Record wird geschrieben
+                self.store.append(cid, embedding_bytes, metadata)
+            else:
+                EMBEDDING_CACHE[cid] = embedding_bytes
+                EMBEDDING_METADATA[cid] = metadata
+                _bump_dict_cache_version(1)
+
+            self._update_matrix(cid, embedding_bytes)
+            if self.ann_index is not None:
+                self.ann_index.add(
+                    cid, self.embedding_generator.bytes_to_embedding(embedding_bytes)
+                )
             logger.info(f"Embedding gespeichert für CID: {cid}")
 
         except Exception as e:
             logger.error(f"Fehler beim Speichern des Embeddings: {e}")
 
-    def search_ASI_memory(self, query_text: str, num_results: int = 5) -> List[Dict]:
+    def store_embeddings(self, items: Iterable[Tuple[str, bytes, str]]) -> int:
+        """
+        Speichert mehrere Embeddings in einem Bulk-Append
+
+        Args:
+            items: Iterable von (cid, embedding_bytes, text_preview)
+
+        Returns:
+            int: Anzahl gespeicherter Embeddings
+        """
+        timestamp = datetime.now().isoformat()
+        records = [
+            (
+                cid,
+                embedding_bytes,
+                {
+                    "text_preview": text_preview[:200],
+                    "timestamp": timestamp,
+                    "embedding_size": len(embedding_bytes),
+                },
+            )
+            for cid, embedding_bytes, text_preview in items
+        ]
+
+        if self.store is not None:
+            self.store.append_many(records)
+        else:
+            for cid, embedding_bytes, metadata in records:
+                EMBEDDING_CACHE[cid] = embedding_bytes
+                EMBEDDING_METADATA[cid] = metadata
+            _bump_dict_cache_version(len(records))
+
+        if self.ann_index is not None and records:
+            self.ann_index.add_many(
+                [cid for cid, _, _ in records],
+                np.stack(
+                    [
+                        self.embedding_generator.bytes_to_embedding(embedding_bytes)
+                        for _, embedding_bytes, _ in records
+                    ]
+                ),
+            )
+
+        # Matrix bei der nächsten Suche in einem Durchgang neu aufbauen
+        self._matrix = None
+        return len(records)
+
+    def reindex_from_database(
+        self, local_db, chunk_size: int = 512, batch_size: int = 64
+    ) -> int:
+        """
+        Erzeugt Embeddings für alle Reflexionen einer LocalDatabase neu
+
+        Die Reflexionen werden blockweise gelesen, pro Block in Batches
+        eingebettet und gesammelt in den Speicher geschrieben.
+
+        Args:
+            local_db: LocalDatabase (oder Objekt mit iter_reflection_batches)
+            chunk_size: Reflexionen pro Datenbank-Block
+            batch_size: Texte pro Modell-Durchlauf
+
+        Returns:
+            int: Anzahl indizierter Reflexionen
+        """
+        total = 0
+        for chunk in local_db.iter_reflection_batches(chunk_size):
+            texts = [row["content"] for row in chunk]
+            embeddings = self.embedding_generator.generate_embeddings(
+                texts, batch_size=batch_size
+            )
+            total += self.store_embeddings(
+                (row["hash"], embedding, row["content"])
+                for row, embedding in zip(chunk, embeddings)
+            )
+            logger.info(f"Re-Index: {total} Reflexionen verarbeitet")
+
+        return total
+
+    def search_ASI_memory(
+        self, query_text: str, num_results: int = 5, vectorized: bool = True
+    ) -> List[Dict]:
         """
         Sucht in den gespeicherten ASI-Reflektionen basierend auf semantischer Ähnlichkeit
 
         Args:
             query_text: Suchtext
             num_results: Anzahl der zurückzugebenden Ergebnisse
+            vectorized: Top-k über die gestapelte Embedding-Matrix (ein BLAS-Aufruf)
+                statt Einzelvergleich pro Eintrag
 
         Returns:
             List[Dict]: Liste der ähnlichsten Einträge mit CID, Vorschau und Ähnlichkeitswert
@@ -228,6 +416,14 @@ class ASISemanticSearch:
                 query_embedding_bytes
             )
 
+            if vectorized:
+                results = self._search_matrix(query_embedding, num_results)
+                logger.info(
+                    f"Semantische Suche abgeschlossen: {len(results)} "
+                    f"Ergebnisse für '{query_text}'"
+                )
+                return results
+
             # Ähnlichkeiten berechnen
             similarities = []
 
@@ -276,6 +472,158 @@ class ASISemanticSearch:
             logger.error(f"Fehler bei semantischer Suche: {e}")
             return []
 
+    def _search_matrix(
+        self, query_embedding: np.ndarray, num_results: int
+    ) -> List[Dict]:
+        """
+        Top-k Suche über die normalisierte Embedding-Matrix
+
+        Args:
+            query_embedding: Query-Embedding
+            num_results: Anzahl Ergebnisse
+
+        Returns:
+            List[Dict]: Ergebnisse im Format von search_ASI_memory
+        """
+        self._ensure_matrix()
+        if self._matrix_size == 0 or num_results <= 0:
+            return []
+
+        query = np.asarray(query_embedding, dtype=np.float32).reshape(-1)
+        query_norm = np.linalg.norm(query)
+        if query_norm > 0:
+            query = query / query_norm
+
+        if self.ann_index is not None:
+            self._ensure_ann_index()
+            return [
+                self._result_entry(cid, similarity)
+                for cid, similarity in self.ann_index.search(query, num_results)
+            ]
+
+        scores = self._matrix[: self._matrix_size] @ query
+
+        k = min(num_results, self._matrix_size)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+
+        return [
+            self._result_entry(self._matrix_cids[row], float(scores[row]))
+            for row in top
+        ]
+
+    def _result_entry(self, cid: str, similarity: float) -> Dict:
+        """Baut einen Ergebnis-Eintrag mit den Metadaten einer CID"""
+        metadata = EMBEDDING_METADATA.get(cid, {})
+        return {
+            "cid": cid,
+            "similarity": float(similarity),
+            "text_preview": metadata.get("text_preview", ""),
+            "timestamp": metadata.get("timestamp", ""),
+            "embedding_size": metadata.get("embedding_size", 0),
+        }
+
+    def _ensure_ann_index(self):
+        """Trägt Embeddings nach, die der ANN-Index noch nicht kennt"""
+        if len(self.ann_index) == self._matrix_size:
+            return
+
+        indexed = set(self.ann_index.keys())
+        missing = [
+            row for row, cid in enumerate(self._matrix_cids) if cid not in indexed
+        ]
+        if missing:
+            self.ann_index.add_many(
+                [self._matrix_cids[row] for row in missing], self._matrix[missing]
+            )
+            logger.info(f"ANN-Index ergänzt: {len(missing)} Einträge")
+
+    def _ensure_matrix(self):
+        """Baut die Embedding-Matrix bei Bedarf aus EMBEDDING_CACHE auf"""
+        # Andere Instanzen können den globalen Cache erweitert, überschrieben
+        # oder ersetzt haben
+        if (
+            self._matrix is not None
+            and self._matrix_source is EMBEDDING_CACHE
+            and self._matrix_version == _embedding_cache_version()
+        ):
+            return
+
+        source, version = EMBEDDING_CACHE, _embedding_cache_version()
+
+        dim = self.embedding_generator.embedding_dim
+        self._matrix = np.zeros((max(len(EMBEDDING_CACHE), 16), dim), dtype=np.float32)
+        self._matrix_cids = []
+        self._matrix_rows = {}
+        self._matrix_size = 0
+
+        if isinstance(EMBEDDING_CACHE, SegmentedEmbeddingStore):
+            # Ein sequentieller Lesevorgang über die Memory-Maps der Segmente
+            cids, vectors = EMBEDDING_CACHE.vectors(
+                self.embedding_generator.embedding_dtype
+            )
+            if cids:
+                vectors = vectors.astype(np.float32)
+                norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+                np.divide(vectors, norms, out=vectors, where=norms > 0)
+                self._matrix[: len(cids)] = vectors
+                self._matrix_cids = cids
+                self._matrix_rows = {cid: row for row, cid in enumerate(cids)}
+                self._matrix_size = len(cids)
+        else:
+            for cid, embedding_bytes in EMBEDDING_CACHE.items():
+                self._set_matrix_row(cid, embedding_bytes)
+        self._matrix_source = source
+        self._matrix_version = version
+
+        logger.debug(f"Embedding-Matrix aufgebaut: {self._matrix_size} Einträge")
+
+    def _update_matrix(self, cid: str, embedding_bytes: bytes):
+        """Übernimmt einen eigenen Schreibzugriff inkrementell in die Matrix"""
+        if self._matrix is None:
+            # Matrix wird bei der nächsten Suche vollständig aufgebaut
+            return
+
+        # Nur wenn seit dem letzten Abgleich ausschließlich dieser Record
+        # geschrieben wurde; sonst baut die nächste Suche die Matrix neu auf
+        version = _embedding_cache_version()
+        if (
+            self._matrix_source is not EMBEDDING_CACHE
+            or version != self._matrix_version + 1
+        ):
+            return
+        self._matrix_version = version
+        self._set_matrix_row(cid, embedding_bytes)
+
+    def _set_matrix_row(self, cid: str, embedding_bytes: bytes):
+        """Fügt ein Embedding normalisiert in die Matrix ein oder ersetzt es"""
+        try:
+            vector = self.embedding_generator.bytes_to_embedding(embedding_bytes)
+        except Exception as e:
+            logger.error(f"Embedding für CID {cid} nicht lesbar: {e}")
+            return
+
+        vector = vector.astype(np.float32, copy=False)
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector = vector / norm
+
+        row = self._matrix_rows.get(cid)
+        if row is None:
+            row = self._matrix_size
+            if row >= self._matrix.shape[0]:
+                grown = np.zeros(
+                    (self._matrix.shape[0] * 2, self._matrix.shape[1]),
+                    dtype=np.float32,
+                )
+                grown[: self._matrix.shape[0]] = self._matrix
+                self._matrix = grown
+            self._matrix_cids.append(cid)
+            self._matrix_rows[cid] = row
+            self._matrix_size += 1
+
+        self._matrix[row] = vector
+
     def _cosine_similarity(
         self, embedding1: np.ndarray, embedding2: np.ndarray
     ) -> float:
@@ -316,12 +664,13 @@ class ASISemanticSearch:
         Returns:
             Dict: Cache-Statistiken
         """
+        store_stats = self.store.get_stats() if self.store is not None else {}
         return {
             "total_embeddings": len(EMBEDDING_CACHE),
-            "cache_file_exists": self.cache_file.exists(),
-            "cache_file_size": (
-                self.cache_file.stat().st_size if self.cache_file.exists() else 0
-            ),
+            "cache_file_exists": self.store is not None,
+            "cache_file_size": store_stats.get("size_bytes", 0),
+            "segments": store_stats.get("segments", 0),
+            "dead_records": store_stats.get("dead_records", 0),
             "oldest_entry": min(
                 [meta.get("timestamp", "") for meta in EMBEDDING_METADATA.values()],
                 default="",
@@ -350,6 +699,48 @@ def generate_embedding(text: str) -> bytes:
     return generator.generate_embedding(text)
 
 
+def generate_embeddings(texts: List[str], batch_size: int = 32) -> List[bytes]:
+    """
+    Convenience-Funktion zur Batch-Embedding-Generierung
+
+    Args:
+        texts: Liste von Texten
+        batch_size: Anzahl Texte pro Modell-Durchlauf
+
+    Returns:
+        List[bytes]: Embeddings als Bytes
+    """
+    generator = ASIEmbeddingGenerator()
+    return generator.generate_embeddings(texts, batch_size=batch_size)
+
+
+def reindex_local_database(
+    db_path: str = "data/asi_local.db",
+    chunk_size: int = 512,
+    batch_size: int = 64,
+    model_name: str = "all-MiniLM-L6-v2",
+) -> int:
+    """
+    Convenience-Funktion für den Bulk-Re-Index einer lokalen Datenbank
+
+    Args:
+        db_path: Pfad zur SQLite-Datenbank
+        chunk_size: Reflexionen pro Datenbank-Block
+        batch_size: Texte pro Modell-Durchlauf
+        model_name: Name des sentence-transformers Modells
+
+    Returns:
+        int: Anzahl indizierter Reflexionen
+    """
+    from src.storage.local_db import LocalDatabase
+
+    generator = ASIEmbeddingGenerator(model_name)
+    search_engine = ASISemanticSearch(generator)
+    return search_engine.reindex_from_database(
+        LocalDatabase(db_path), chunk_size=chunk_size, batch_size=batch_size
+    )
+
+
 def search_ASI_memory(query_text: str, num_results: int = 5) -> List[Dict]:
     """
     Convenience-Funktion für semantische Suche
@@ -371,6 +762,23 @@ if __name__ == "__main__":
     # Logging konfigurieren
     logging.basicConfig(level=logging.INFO)
 
+    parser = argparse.ArgumentParser(description="ASI semantische Suche")
+    parser.add_argument(
+        "--reindex",
+        metavar="DB_PATH",
+        help="Alle Reflexionen der lokalen Datenbank neu einbetten",
+    )
+    parser.add_argument("--chunk-size", type=int, default=512)
+    parser.add_argument("--batch-size", type=int, default=64)
+    args = parser.parse_args()
+
+    if args.reindex:
+        count = reindex_local_database(
+            args.reindex, chunk_size=args.chunk_size, batch_size=args.batch_size
+        )
+        print(f"Re-Index abgeschlossen: {count} Reflexionen")
+        raise SystemExit(0)
+
     # Generator und Suchmaschine initialisieren
     generator = ASIEmbeddingGenerator()
     search_engine = ASISemanticSearch(generator)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+ASI Core - Benchmark: ASISemanticSearch.search_ASI_memory
+Vergleicht die Einzelvergleich-Schleife mit der vektorisierten Top-k Suche
+
+Das Modell wird durch eine deterministische Zufallsprojektion ersetzt, damit
+nur die Suchkosten gemessen werden (keine Modell-Inferenz pro Eintrag).
+
+Aufruf:
+    python benchmarks/bench_asi_memory_search.py [--sizes 10000 100000]
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import asi_core.search as asi_search
+
+
+class _RandomProjectionModel:
+    """Ersatzmodell mit fester Dimension für reproduzierbare Messungen"""
+
+    def __init__(self, dim: int):
+        self.dim = dim
+
+    def encode(self, text, convert_to_numpy=True):
+        seed = abs(hash(text)) % (2**32)
+        return np.random.default_rng(seed).standard_normal(self.dim).astype(np.float32)
+
+
+class _BenchmarkGenerator(asi_search.ASIEmbeddingGenerator):
+    """Embedding-Generator ohne sentence-transformers Download"""
+
+    def __init__(self, dim: int):
+        self._dim = dim
+        super().__init__(model_name="benchmark-random-projection")
+
+    def _load_model(self):
+        self.model = _RandomProjectionModel(self._dim)
+        self.embedding_dim = self._dim
+        self.embedding_dtype = np.dtype(np.float32)
+
+
+def _fill_store(search_engine, size: int, dim: int):
+    """Füllt den Embedding-Speicher in einem Bulk-Append"""
+    rng = np.random.default_rng(42)
+    vectors = rng.standard_normal((size, dim)).astype(np.float32)
+    search_engine.store.append_many(
+        (f"bench_cid_{i}", vectors[i].tobytes(), {"text_preview": f"bench {i}"})
+        for i in range(size)
+    )
+
+
+def _time_search(search_engine, vectorized: bool, repeats: int) -> float:
+    """Misst die mittlere Suchzeit in Millisekunden"""
+    start = time.perf_counter()
+    for i in range(repeats):
+        search_engine.search_ASI_memory(f"query {i}", 10, vectorized=vectorized)
+    return (time.perf_counter() - start) * 1000 / repeats
+
+
+def run_benchmark(sizes, dim: int = 384, repeats: int = 5):
+    """Führt den Benchmark für alle Cache-Größen aus"""
+    generator = _BenchmarkGenerator(dim)
+
+    print(
+        f"{'Einträge':>10} | {'Schleife (ms)':>14} | {'Vektorisiert (ms)':>18} | {'Speedup':>8}"
+    )
+    print("-" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in sizes:
+            search_engine = asi_search.ASISemanticSearch(
+                generator, store_dir=str(Path(tmp_dir) / f"store_{size}")
+            )
+            _fill_store(search_engine, size, dim)
+
+            # Matrix-Aufbau gehört nicht zur Query-Latenz
+            search_engine.search_ASI_memory("warmup", 10, vectorized=True)
+
+            loop_ms = _time_search(search_engine, vectorized=False, repeats=1)
+            vector_ms = _time_search(search_engine, vectorized=True, repeats=repeats)
+
+            print(
+                f"{size:>10} | {loop_ms:>14.1f} | {vector_ms:>18.2f} | "
+                f"{loop_ms / vector_ms:>7.0f}x"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[2])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    run_benchmark(args.sizes, dim=args.dim, repeats=args.repeats)
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+ASI Core - Benchmark: Stichwortsuche
+LIKE-Scan über full_content gegen BM25-Suche über den FTS5-Index
+
+Aufruf:
+    python benchmarks/bench_fts_search.py [--size 200000] [--queries 50]
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.storage.local_db import LocalDatabase
+
+WORDS = (
+    "arbeit stress projekt team familie urlaub garten sport lernen ruhe "
+    "meditation gespräch freunde abend morgen ziel plan erfolg sorge freude"
+).split()
+
+
+def run_benchmark(size: int, queries: int):
+    """Füllt eine Datenbank und vergleicht die Latenzen"""
+    rng = np.random.default_rng(0)
+    vocabulary = np.array(WORDS + [f"wort{i}" for i in range(50000)])
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        local_db = LocalDatabase(str(Path(tmp_dir) / "bench.db"))
+        start = time.perf_counter()
+        with local_db.get_connection() as conn:
+            rows = []
+            for i in range(size):
+                words = vocabulary[
+                    rng.integers(0, len(vocabulary), rng.integers(20, 80))
+                ]
+                content = " ".join(words)
+                rows.append((f"h{i}", content[:100], content, "2024-01-01T00:00:00"))
+            conn.executemany(
+                "INSERT INTO reflections (hash, content_preview, full_content, timestamp) "
+                "VALUES (?, ?, ?, ?)",
+                rows,
+            )
+        print(
+            f"{size:,} Reflexionen eingefügt ({time.perf_counter() - start:.1f}s, inkl. FTS-Trigger)"
+        )
+
+        # Selektive Begriffe: LIKE muss die ganze Tabelle lesen
+        terms = [str(t) for t in rng.choice(vocabulary, queries)]
+
+        start = time.perf_counter()
+        with local_db.get_connection() as conn:
+            for term in terms:
+                conn.execute(
+                    "SELECT hash FROM reflections WHERE full_content LIKE ? "
+                    "ORDER BY timestamp DESC LIMIT 10",
+                    (f"%{term}%",),
+                ).fetchall()
+        like_ms = (time.perf_counter() - start) * 1000 / queries
+
+        start = time.perf_counter()
+        for term in terms:
+            local_db.text_search(term, limit=10)
+        fts_ms = (time.perf_counter() - start) * 1000 / queries
+
+        print(f"LIKE-Scan:        {like_ms:8.2f} ms/Query")
+        print(f"FTS5 + BM25:      {fts_ms:8.2f} ms/Query")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[2])
+    parser.add_argument("--size", type=int, default=200000)
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+    run_benchmark(args.size, args.queries)
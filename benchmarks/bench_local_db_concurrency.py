@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+ASI Core - Benchmark: Nebenläufige Datenbankzugriffe
+Requests pro Sekunde eines Flask-Servers (threaded) mit und ohne Verbindungs-Pool
+
+Jeder Request ahmt /api/search nach: Stichwortsuche plus eine Abfrage pro
+Treffer (N+1) und die Statistik; jeder zehnte Request speichert eine
+Reflexion. Verglichen werden:
+
+- vorher:   neue Verbindung pro Aufruf, Rollback-Journal, keine Pragmas
+- per-call: neue Verbindung pro Aufruf, WAL + Pragmas (pooled=False)
+- pool:     Verbindung pro Thread mit Leerlauf-Vorrat (Standard)
+
+Aufruf:
+    python benchmarks/bench_local_db_concurrency.py [--size 5000] [--clients 8] [--seconds 5]
+"""
+
+import argparse
+import logging
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from itertools import count
+from pathlib import Path
+
+from flask import Flask, jsonify
+from werkzeug.serving import make_server
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.storage.local_db import LocalDatabase
+
+WORDS = "arbeit stress projekt team familie urlaub garten sport lernen ruhe".split()
+
+
+class LegacyDatabase(LocalDatabase):
+    """LocalDatabase mit dem Verbindungsaufbau vor Einführung des Pools"""
+
+    def get_connection(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+
+def create_app(local_db: LocalDatabase) -> Flask:
+    """Minimale Flask-App mit dem Zugriffsmuster der Such-API"""
+    app = Flask(__name__)
+    counter = count()
+
+    @app.route("/search/<term>")
+    def search(term):
+        request_no = next(counter)
+        if request_no % 10 == 0:
+            local_db.store_reflection(
+                {"hash": f"neu{request_no}", "content": f"{term} {request_no}"}
+            )
+        matches = local_db.text_search(term, limit=10)
+        details = [local_db.get_reflection_by_hash(r.hash) for r, _ in matches]
+        stats = local_db.get_statistics()
+        return jsonify({"results": len(details), "total": stats["total_reflections"]})
+
+    return app
+
+
+def fill(local_db: LocalDatabase, size: int):
+    """Füllt die Datenbank mit synthetischen Reflexionen"""
+    with local_db.get_connection() as conn:
+        conn.executemany(
+            "INSERT INTO reflections (hash, content_preview, full_content, timestamp) "
+            "VALUES (?, ?, ?, '2024-01-01T00:00:00')",
+            [
+                (f"h{i}", text, text)
+                for i in range(size)
+                for text in [" ".join(WORDS[(i + j) % len(WORDS)] for j in range(12))]
+            ],
+        )
+
+
+def measure(local_db: LocalDatabase, clients: int, seconds: float) -> float:
+    """Startet den Server und misst Requests pro Sekunde"""
+    server = make_server("127.0.0.1", 0, create_app(local_db), threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/search/"
+
+    done = []
+    deadline = time.perf_counter() + seconds
+
+    def client(worker: int):
+        requests = 0
+        while time.perf_counter() < deadline:
+            term = WORDS[(worker + requests) % len(WORDS)]
+            with urllib.request.urlopen(url + term) as response:
+                response.read()
+            requests += 1
+        done.append(requests)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(w,)) for w in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    server.shutdown()
+    local_db.close()
+    return sum(done) / elapsed
+
+
+def run_benchmark(size: int, clients: int, seconds: float):
+    """Vergleicht die Verbindungsvarianten nacheinander"""
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    variants = [
+        ("vorher", lambda path: LegacyDatabase(path)),
+        ("per-call", lambda path: LocalDatabase(path, pooled=False)),
+        ("pool", lambda path: LocalDatabase(path)),
+    ]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, factory in variants:
+            local_db = factory(str(Path(tmp_dir) / f"{name}.db"))
+            fill(local_db, size)
+            rps = measure(local_db, clients, seconds)
+            print(f"{name:10s} {rps:8.1f} Requests/s ({clients} Clients)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[2])
+    parser.add_argument("--size", type=int, default=5000)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+    run_benchmark(args.size, args.clients, args.seconds)
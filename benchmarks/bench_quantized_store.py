@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+ASI Core - Benchmark: Quantisierte Embedding-Matrix
+Speicherbedarf, Recall@k und Latenz von float32, float16 und int8 (mit Rescoring)
+
+Vergleichsbasis ist das JSON-Format von ReflectionEmbedding.save_embeddings
+(float64-Listen) sowie die exakte float32-Suche.
+
+Aufruf:
+    python benchmarks/bench_quantized_store.py [--size 100000] [--rescore 1 2 4]
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.ai.vector_store import EmbeddingMatrix, QuantizedEmbeddingMatrix
+
+
+def _measure(matrix, queries, truth, k):
+    """Recall@k und mittlere Latenz in Millisekunden"""
+    hits = 0
+    start = time.perf_counter()
+    for query, expected in zip(queries, truth):
+        found = matrix.search(query, k=k)
+        hits += len({key for key, _ in found} & expected)
+    latency = (time.perf_counter() - start) * 1000 / len(queries)
+    return hits / (len(queries) * k), latency
+
+
+def run_benchmark(size: int, dim: int, k: int, queries: int, rescore_factors):
+    """Führt den Vergleich für alle Codecs aus"""
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((max(16, size // 500), dim)).astype(np.float32)
+    data = centers[rng.integers(0, centers.shape[0], size)] + rng.standard_normal(
+        (size, dim), dtype=np.float32
+    )
+    keys = [f"r{i:08d}" for i in range(size)]
+    query_vectors = data[rng.choice(size, queries, replace=False)] + 0.1 * (
+        rng.standard_normal((queries, dim), dtype=np.float32)
+    )
+
+    json_bytes = len(
+        json.dumps(
+            {"combined_embedding": data[0].astype(np.float64).tolist()}, indent=2
+        )
+    )
+    print(f"JSON (float64-Listen, indent=2): ~{json_bytes * size / 2**20:,.0f} MiB")
+    print()
+    print(
+        f"{'Variante':>16} | {'RAM Vektoren':>12} | {'Recall@' + str(k):>9} | {'ms/Query':>9}"
+    )
+    print("-" * 56)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Schreibt vectors.f32, das die quantisierten Varianten wieder laden
+        exact = EmbeddingMatrix(dim, storage_dir=tmp_dir, initial_capacity=size)
+        for key, vector in zip(keys, data):
+            exact.add(key, vector)
+
+        truth = [{key for key, _ in exact.search(q, k=k)} for q in query_vectors]
+        _, exact_ms = _measure(exact, query_vectors, truth, k)
+        print(
+            f"{'float32':>16} | {size * dim * 4 / 2**20:>9.1f} MiB | {1.0:>9.3f} | {exact_ms:>9.2f}"
+        )
+
+        for codec in ("float16", "int8"):
+            for factor in rescore_factors:
+                matrix = QuantizedEmbeddingMatrix(
+                    dim, storage_dir=tmp_dir, codec=codec, rescore_factor=factor
+                )
+                recall, latency = _measure(matrix, query_vectors, truth, k)
+                memory = matrix.get_memory_stats()["code_bytes"] / 2**20
+                label = f"{codec} x{factor}"
+                print(
+                    f"{label:>16} | {memory:>9.1f} MiB | {recall:>9.3f} | {latency:>9.2f}"
+                )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[2])
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--rescore", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    run_benchmark(args.size, args.dim, args.k, args.queries, args.rescore)
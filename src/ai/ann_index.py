@@ -0,0 +1,513 @@
+"""
+ASI Core - ANN Index
+Approximative Nächste-Nachbarn-Suche (IVF-Flat) für große Reflexionsmengen
+"""
+
+import json
+import logging
+import os
+import struct
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.ai.journal import Journal, atomic_write
+from src.ai.vector_store import top_k_indices
+
+logger = logging.getLogger(__name__)
+
+# Journal-Record: Operation (1 Byte) + Länge des Schlüssels (4 Bytes)
+_JOURNAL_HEADER = struct.Struct("<BI")
+_OP_ADD = 1
+_OP_REMOVE = 2
+
+
+class _InvertedList:
+    """Zusammenhängender Vektorblock einer Zelle (Swap-with-last beim Löschen)"""
+
+    def __init__(self, embedding_dim: int, capacity: int = 16):
+        self.vectors = np.zeros((capacity, embedding_dim), dtype=np.float32)
+        self.keys: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def append(self, key: str, vector: np.ndarray) -> int:
+        row = len(self.keys)
+        if row >= self.vectors.shape[0]:
+            grown = np.zeros(
+                (max(16, row * 2), self.vectors.shape[1]), dtype=np.float32
+            )
+            grown[:row] = self.vectors[:row]
+            self.vectors = grown
+        self.vectors[row] = vector
+        self.keys.append(key)
+        return row
+
+    def pop(self, row: int) -> Optional[str]:
+        """Entfernt eine Zeile und gibt den Schlüssel zurück, der nachrückt"""
+        last = len(self.keys) - 1
+        moved_key = None
+        if row != last:
+            moved_key = self.keys[last]
+            self.vectors[row] = self.vectors[last]
+            self.keys[row] = moved_key
+        self.keys.pop()
+        return moved_key
+
+
+class IVFIndex:
+    """
+    IVF-Flat Index mit k-Means Grobquantisierer (Cosinus-Ähnlichkeit)
+
+    Die Vektoren werden normalisiert der Zelle ihres nächsten Zentroids
+    zugeordnet. Eine Suche vergleicht die Query mit allen Zentroiden und
+    durchsucht exakt nur die nprobe nächsten Zellen.
+
+    Stellschrauben:
+    - nlist: Anzahl Zellen (None = automatisch ~ sqrt(N))
+    - nprobe: durchsuchte Zellen pro Query (höher = besserer Recall, langsamer)
+    - min_train_size: unterhalb dieser Größe wird exakt gesucht
+    - retrain_factor: neu trainieren, wenn der Index um diesen Faktor wächst
+
+    Mit storage_dir wird ein Snapshot (index.npz, index.json) plus ein
+    append-only Journal (journal.bin) für Einfügungen und Löschungen geführt.
+    """
+
+    VERSION = 1
+
+    def __init__(
+        self,
+        embedding_dim: int,
+        nlist: Optional[int] = None,
+        nprobe: int = 8,
+        storage_dir: Optional[str] = None,
+        model_id: str = "",
+        min_train_size: int = 2048,
+        retrain_factor: float = 4.0,
+        kmeans_iterations: int = 10,
+        journal_compaction: int = 50000,
+        seed: int = 42,
+    ):
+        self.embedding_dim = embedding_dim
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.model_id = model_id
+        self.storage_dir = Path(storage_dir) if storage_dir else None
+        self.min_train_size = min_train_size
+        self.retrain_factor = retrain_factor
+        self.kmeans_iterations = kmeans_iterations
+        self.journal_compaction = journal_compaction
+        self.seed = seed
+
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: List[_InvertedList] = [_InvertedList(embedding_dim)]
+        self._location: Dict[str, Tuple[int, int]] = {}
+        self._trained_size = 0
+        self._journal: Optional[Journal] = None
+        self._lock = threading.RLock()
+
+        if self.storage_dir:
+            self._journal = Journal(self.storage_dir / "journal.bin", "ANN")
+            self._load()
+
+    # === PUBLIC INTERFACE ===
+
+    def __len__(self) -> int:
+        return len(self._location)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._location
+
+    @property
+    def is_trained(self) -> bool:
+        return self._centroids is not None
+
+    def keys(self) -> List[str]:
+        """Gibt alle indizierten Schlüssel zurück"""
+        with self._lock:
+            return list(self._location)
+
+    def add(self, key: str, vector) -> None:
+        """
+        Fügt einen Vektor ein oder ersetzt einen bestehenden
+
+        Args:
+            key: Schlüssel (z.B. Reflexions-Hash)
+            vector: Embedding der Länge embedding_dim
+        """
+        self.add_many([key], [vector])
+
+    def add_many(self, keys: Sequence[str], vectors) -> None:
+        """
+        Fügt mehrere Vektoren in einem Durchgang ein
+
+        Args:
+            keys: Schlüssel
+            vectors: Matrix oder Sequenz von Embeddings (gleiche Reihenfolge)
+        """
+        if len(keys) == 0:
+            return
+        matrix = self._normalize_rows(vectors)
+
+        with self._lock:
+            self._insert(keys, matrix)
+            self._journal_append(_OP_ADD, keys, matrix)
+            self._maybe_retrain()
+
+    def remove(self, key: str) -> bool:
+        """
+        Entfernt einen Vektor
+
+        Args:
+            key: Schlüssel
+
+        Returns:
+            bool: True wenn der Schlüssel vorhanden war
+        """
+        with self._lock:
+            if not self._delete(key):
+                return False
+            self._journal_append(_OP_REMOVE, [key], None)
+            return True
+
+    def search(
+        self,
+        query_vector,
+        k: int = 10,
+        min_score: Optional[float] = None,
+        nprobe: Optional[int] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        Sucht die (approximativ) ähnlichsten Vektoren
+
+        Args:
+            query_vector: Query-Embedding
+            k: Maximale Anzahl Treffer
+            min_score: Optionale Mindest-Cosinus-Ähnlichkeit
+            nprobe: Überschreibt die Anzahl durchsuchter Zellen
+
+        Returns:
+            List[Tuple[str, float]]: (Schlüssel, Cosinus-Ähnlichkeit), absteigend
+        """
+        query = np.asarray(query_vector, dtype=np.float32).reshape(-1)
+        norm = float(np.linalg.norm(query))
+        if norm == 0.0 or k <= 0:
+            return []
+        query = query / norm
+
+        with self._lock:
+            if self._centroids is None:
+                probe = [0]
+            else:
+                probe_count = min(nprobe or self.nprobe, len(self._lists))
+                probe = top_k_indices(self._centroids @ query, probe_count)
+
+            scores_parts = []
+            keys_parts: List[List[str]] = []
+            for list_id in probe:
+                inverted = self._lists[list_id]
+                if len(inverted):
+                    scores_parts.append(inverted.vectors[: len(inverted)] @ query)
+                    keys_parts.append(inverted.keys)
+
+            if not scores_parts:
+                return []
+
+            scores = np.concatenate(scores_parts)
+            if min_score is not None:
+                candidates = np.flatnonzero(scores >= min_score)
+            else:
+                candidates = np.arange(scores.shape[0])
+            order = candidates[top_k_indices(scores[candidates], k)]
+
+            offsets = np.cumsum([0] + [len(keys) for keys in keys_parts])
+            results = []
+            for position in order:
+                part = int(np.searchsorted(offsets, position, side="right")) - 1
+                key = keys_parts[part][position - offsets[part]]
+                results.append((key, float(scores[position])))
+            return results
+
+    def train(self, nlist: Optional[int] = None) -> None:
+        """
+        Trainiert den Grobquantisierer neu und verteilt alle Vektoren
+
+        Args:
+            nlist: Optionale Zellenanzahl (sonst Konstruktorwert oder ~ sqrt(N))
+        """
+        with self._lock:
+            keys, matrix = self._all_vectors()
+            if not keys:
+                return
+
+            cell_count = nlist or self.nlist or int(round(np.sqrt(len(keys))))
+            cell_count = max(1, min(cell_count, len(keys)))
+
+            self._centroids = self._kmeans(matrix, cell_count)
+            self._lists = [_InvertedList(self.embedding_dim) for _ in range(cell_count)]
+            self._location = {}
+            self._bulk_insert(keys, matrix)
+            self._trained_size = len(keys)
+            logger.info(
+                f"IVF-Index trainiert: {len(keys)} Vektoren, {cell_count} Zellen"
+            )
+
+            if self.storage_dir:
+                self.save()
+
+    def save(self) -> None:
+        """Schreibt einen vollständigen Snapshot und leert das Journal"""
+        if not self.storage_dir:
+            return
+        with self._lock:
+            keys, matrix = self._all_vectors()
+            self.storage_dir.mkdir(parents=True, exist_ok=True)
+
+            tmp_npz = self.storage_dir / "index.tmp.npz"
+            arrays = {"vectors": matrix}
+            if self._centroids is not None:
+                arrays["centroids"] = self._centroids
+            np.savez(tmp_npz, **arrays)
+            os.replace(tmp_npz, self._snapshot_file)
+
+            meta = {
+                "version": self.VERSION,
+                "embedding_dim": self.embedding_dim,
+                "model_id": self.model_id,
+                "trained_size": self._trained_size,
+                "keys": keys,
+            }
+            atomic_write(self._meta_file, json.dumps(meta).encode("utf-8"))
+            self._journal.clear()
+
+    def get_stats(self) -> Dict:
+        """
+        Liefert Kennzahlen des Index
+
+        Returns:
+            Dict: Größe, Zellen, Zellgrößen und Journal-Länge
+        """
+        with self._lock:
+            sizes = [len(inverted) for inverted in self._lists]
+            return {
+                "size": len(self._location),
+                "trained": self.is_trained,
+                "nlist": len(self._lists),
+                "nprobe": self.nprobe,
+                "max_list_size": max(sizes) if sizes else 0,
+                "journal_ops": self._journal.ops if self._journal else 0,
+            }
+
+    # === INTERNAL METHODS ===
+
+    def _normalize_rows(self, vectors) -> np.ndarray:
+        """Konvertiert zu float32 und normalisiert zeilenweise"""
+        matrix = np.array(vectors, dtype=np.float32, ndmin=2)
+        if matrix.shape[1] != self.embedding_dim:
+            raise ValueError(
+                f"Embedding-Dimension {matrix.shape[1]} != {self.embedding_dim}"
+            )
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        return matrix
+
+    def _assign(self, matrix: np.ndarray, chunk_size: int = 16384) -> np.ndarray:
+        """Ordnet Vektoren ihrem nächsten Zentroid zu (blockweise)"""
+        if self._centroids is None:
+            return np.zeros(matrix.shape[0], dtype=np.int64)
+        assignment = np.empty(matrix.shape[0], dtype=np.int64)
+        for start in range(0, matrix.shape[0], chunk_size):
+            end = start + chunk_size
+            block = matrix[start:end]
+            assignment[start:end] = np.argmax(block @ self._centroids.T, axis=1)
+        return assignment
+
+    def _insert(self, keys: Sequence[str], matrix: np.ndarray):
+        """Fügt normalisierte Vektoren in ihre Zellen ein (ohne Journal)"""
+        assignment = self._assign(matrix)
+        for key, vector, list_id in zip(keys, matrix, assignment):
+            self._delete(key)
+            if not vector.any():
+                continue  # Nullvektoren sind nie ähnlich
+            row = self._lists[list_id].append(key, vector)
+            self._location[key] = (int(list_id), row)
+
+    def _bulk_insert(self, keys: Sequence[str], matrix: np.ndarray):
+        """Befüllt leere Zellen in einem Durchgang (Training und Laden)"""
+        assignment = self._assign(matrix)
+        order = np.argsort(assignment, kind="stable")
+        bounds = np.concatenate(
+            ([0], np.cumsum(np.bincount(assignment, minlength=len(self._lists))))
+        )
+
+        for list_id, inverted in enumerate(self._lists):
+            first, last = bounds[list_id], bounds[list_id + 1]
+            rows = order[first:last]
+            if rows.size == 0:
+                continue
+            inverted.vectors = matrix[rows]
+            inverted.keys = [keys[i] for i in rows]
+            for row, key in enumerate(inverted.keys):
+                self._location[key] = (list_id, row)
+
+    def _delete(self, key: str) -> bool:
+        """Entfernt einen Schlüssel aus seiner Zelle (ohne Journal)"""
+        location = self._location.pop(key, None)
+        if location is None:
+            return False
+        list_id, row = location
+        moved_key = self._lists[list_id].pop(row)
+        if moved_key is not None:
+            self._location[moved_key] = (list_id, row)
+        return True
+
+    def _all_vectors(self) -> Tuple[List[str], np.ndarray]:
+        """Sammelt alle Schlüssel und Vektoren aus den Zellen"""
+        keys: List[str] = []
+        blocks = []
+        for inverted in self._lists:
+            if len(inverted):
+                keys.extend(inverted.keys)
+                blocks.append(inverted.vectors[: len(inverted)])
+        if not blocks:
+            return [], np.zeros((0, self.embedding_dim), dtype=np.float32)
+        return keys, np.concatenate(blocks)
+
+    def _maybe_retrain(self):
+        """Trainiert beim Erreichen der Mindestgröße bzw. nach starkem Wachstum"""
+        size = len(self._location)
+        if self._centroids is None:
+            if size >= self.min_train_size:
+                self.train()
+        elif size >= self._trained_size * self.retrain_factor:
+            self.train()
+
+    def _kmeans(self, matrix: np.ndarray, cell_count: int) -> np.ndarray:
+        """
+        Sphärisches k-Means auf einer Stichprobe
+
+        Args:
+            matrix: Normalisierte Vektoren
+            cell_count: Anzahl Zentroide
+
+        Returns:
+            np.ndarray: Normalisierte Zentroide (cell_count x embedding_dim)
+        """
+        rng = np.random.default_rng(self.seed)
+        sample_size = min(matrix.shape[0], max(cell_count * 64, 10000))
+        sample = matrix[rng.choice(matrix.shape[0], sample_size, replace=False)]
+        centroids = sample[rng.choice(sample_size, cell_count, replace=False)].copy()
+
+        for _ in range(self.kmeans_iterations):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            counts = np.bincount(assignment, minlength=cell_count)
+
+            # Leere Zellen mit zufälligen Stichprobenvektoren neu besetzen
+            empty = np.flatnonzero(counts == 0)
+            if empty.size:
+                sums[empty] = sample[rng.choice(sample_size, empty.size)]
+
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids = np.divide(sums, norms, out=sums, where=norms > 0)
+
+        return centroids.astype(np.float32)
+
+    @property
+    def _snapshot_file(self) -> Path:
+        return self.storage_dir / "index.npz"
+
+    @property
+    def _meta_file(self) -> Path:
+        return self.storage_dir / "index.json"
+
+    def _journal_append(
+        self, op: int, keys: Iterable[str], matrix: Optional[np.ndarray]
+    ):
+        """Hängt Operationen an das Journal an und kompaktiert bei Bedarf"""
+        if self._journal is None:
+            return
+
+        chunks = []
+        for i, key in enumerate(keys):
+            encoded = key.encode("utf-8")
+            chunks.append(_JOURNAL_HEADER.pack(op, len(encoded)))
+            chunks.append(encoded)
+            if op == _OP_ADD:
+                chunks.append(matrix[i].tobytes())
+
+        self._journal.append(b"".join(chunks), ops=len(keys))
+        if self._journal.due(self.journal_compaction, len(self._location)):
+            self.save()
+
+    def _apply_record(self, data: bytes, offset: int) -> Optional[int]:
+        """Wendet den Journal-Record ab offset an und liefert sein Ende"""
+        key_start = offset + _JOURNAL_HEADER.size
+        if key_start > len(data):
+            return None
+        op, key_length = _JOURNAL_HEADER.unpack_from(data, offset)
+        body_end = key_start + key_length
+        record_end = body_end + (self.embedding_dim * 4 if op == _OP_ADD else 0)
+        if op not in (_OP_ADD, _OP_REMOVE) or record_end > len(data):
+            return None
+
+        key = data[key_start:body_end].decode("utf-8")
+        if op == _OP_ADD:
+            vector = np.frombuffer(
+                data, dtype=np.float32, count=self.embedding_dim, offset=body_end
+            )
+            self._insert([key], vector.reshape(1, -1))
+        else:
+            self._delete(key)
+        return record_end
+
+    def _load(self):
+        """Lädt Snapshot und Journal, sofern zu Dimension und Modell passend"""
+        self.storage_dir.mkdir(parents=True, exist_ok=True)
+        if not self._meta_file.exists() or not self._snapshot_file.exists():
+            self._reset_storage()
+            self.save()
+            return
+
+        try:
+            with open(self._meta_file, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with np.load(self._snapshot_file) as arrays:
+                vectors = arrays["vectors"]
+                centroids = arrays["centroids"] if "centroids" in arrays else None
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"ANN-Index nicht lesbar, wird neu aufgebaut: {e}")
+            self._reset_storage()
+            self.save()
+            return
+
+        compatible = (
+            meta.get("version") == self.VERSION
+            and meta.get("embedding_dim") == self.embedding_dim
+            and meta.get("model_id") == self.model_id
+            and len(meta.get("keys", [])) == vectors.shape[0]
+        )
+        if not compatible:
+            self._reset_storage()
+            self.save()
+            return
+
+        if centroids is not None:
+            self._centroids = centroids.astype(np.float32)
+            self._lists = [
+                _InvertedList(self.embedding_dim) for _ in range(centroids.shape[0])
+            ]
+        self._bulk_insert(meta["keys"], vectors.astype(np.float32))
+        self._trained_size = meta.get("trained_size", 0)
+        self._journal.replay(self._apply_record)
+
+    def _reset_storage(self):
+        """Verwirft alle gespeicherten Dateien"""
+        for path in (self._snapshot_file, self._meta_file):
+            if path.exists():
+                path.unlink()
+        self._journal.delete()
@@ -0,0 +1,417 @@
+"""
+ASI Core - Clustering Module
+Vektorisiertes Mini-Batch k-Means für Themen-Cluster über Reflexionen
+"""
+
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def kmeans_plusplus(
+    data: np.ndarray, num_clusters: int, rng: np.random.Generator
+) -> np.ndarray:
+    """
+    k-Means++ Initialisierung (D²-Sampling, vollständig vektorisiert)
+
+    Args:
+        data: Datenmatrix (n x dim)
+        num_clusters: Anzahl Zentroide
+        rng: Lokaler Zufallsgenerator
+
+    Returns:
+        np.ndarray: Start-Zentroide (num_clusters x dim)
+    """
+    n = data.shape[0]
+    centroids = np.empty((num_clusters, data.shape[1]), dtype=np.float32)
+    centroids[0] = data[rng.integers(n)]
+
+    squared_norms = np.einsum("ij,ij->i", data, data)
+    closest = squared_norms - 2 * data @ centroids[0] + centroids[0] @ centroids[0]
+    np.maximum(closest, 0.0, out=closest)
+
+    for i in range(1, num_clusters):
+        total = closest.sum()
+        if total > 0:
+            index = rng.choice(n, p=closest / total)
+        else:
+            index = rng.integers(n)  # alle Punkte identisch mit Zentroiden
+        centroids[i] = data[index]
+        distances = (
+            squared_norms - 2 * data @ centroids[i] + centroids[i] @ centroids[i]
+        )
+        np.minimum(closest, np.maximum(distances, 0.0), out=closest)
+
+    return centroids
+
+
+class MiniBatchKMeans:
+    """
+    Mini-Batch k-Means (Sculley 2010) mit k-Means++ Start
+
+    Jeder Zentroid ist der laufende Mittelwert aller ihm zugeordneten
+    Punkte, daher kann das Modell mit partial_fit inkrementell weiterlernen.
+    Mit storage_dir werden Zentroide und Zähler als centroids.npz gespeichert.
+
+    Liegen beim Start weniger Punkte als angeforderte Cluster vor, sinkt
+    num_clusters auf die Zahl der Punkte; requested_clusters behält den
+    angeforderten Wert für fit() und das Wiederladen.
+    """
+
+    def __init__(
+        self,
+        num_clusters: int,
+        batch_size: int = 1024,
+        max_iter: int = 100,
+        init_sample_size: int = 20000,
+        seed: int = 42,
+        storage_dir: Optional[str] = None,
+        model_id: str = "",
+    ):
+        self.requested_clusters = num_clusters
+        self.num_clusters = num_clusters
+        self.batch_size = batch_size
+        self.max_iter = max_iter
+        self.init_sample_size = init_sample_size
+        self.model_id = model_id
+        self.storage_dir = Path(storage_dir) if storage_dir else None
+
+        self.centroids: Optional[np.ndarray] = None
+        self.counts = np.zeros(num_clusters, dtype=np.int64)
+        self._rng = np.random.default_rng(seed)
+        self._pending: List[np.ndarray] = []
+
+        if self.storage_dir:
+            self._load()
+
+    # === PUBLIC INTERFACE ===
+
+    @property
+    def is_fitted(self) -> bool:
+        return self.centroids is not None
+
+    def fit(self, data) -> "MiniBatchKMeans":
+        """
+        Trainiert das Modell neu auf einer Datenmatrix
+
+        Args:
+            data: Datenmatrix (n x dim)
+
+        Returns:
+            MiniBatchKMeans: self
+        """
+        matrix = np.asarray(data, dtype=np.float32)
+        self._initialize(matrix)
+
+        n = matrix.shape[0]
+        batch_size = min(self.batch_size, n)
+        for _ in range(self.max_iter):
+            self._update(matrix[self._rng.integers(0, n, batch_size)])
+
+        self.save()
+        return self
+
+    def partial_fit(self, data) -> "MiniBatchKMeans":
+        """
+        Lernt inkrementell aus neuen Punkten
+
+        Vor der Initialisierung werden Punkte gesammelt, bis mindestens
+        num_clusters vorliegen.
+
+        Args:
+            data: Neue Punkte (m x dim)
+
+        Returns:
+            MiniBatchKMeans: self
+        """
+        matrix = np.asarray(data, dtype=np.float32)
+        if matrix.ndim == 1:
+            matrix = matrix.reshape(1, -1)
+
+        if self.centroids is None:
+            self._pending.append(matrix)
+            buffered = sum(block.shape[0] for block in self._pending)
+            if buffered < self.requested_clusters:
+                return self
+            matrix = np.concatenate(self._pending)
+            self._pending = []
+            self._initialize(matrix)
+
+        self._update(matrix)
+        return self
+
+    def predict(self, data, chunk_size: int = 65536) -> np.ndarray:
+        """
+        Ordnet Punkte dem nächsten Zentroid zu (euklidisch)
+
+        Args:
+            data: Datenmatrix (n x dim)
+            chunk_size: Zeilen pro Block
+
+        Returns:
+            np.ndarray: Cluster-Index pro Zeile
+        """
+        matrix = np.asarray(data, dtype=np.float32)
+        labels = np.empty(matrix.shape[0], dtype=np.int64)
+        if self.centroids is None:
+            labels[:] = 0
+            return labels
+
+        # argmin ||x - c||² == argmax (x·c - ||c||²/2)
+        half_norms = 0.5 * np.einsum("ij,ij->i", self.centroids, self.centroids)
+        for start in range(0, matrix.shape[0], chunk_size):
+            end = start + chunk_size
+            labels[start:end] = np.argmax(
+                matrix[start:end] @ self.centroids.T - half_norms, axis=1
+            )
+        return labels
+
+    def save(self) -> None:
+        """Speichert Zentroide und Zähler atomar"""
+        if not self.storage_dir or self.centroids is None:
+            return
+        self.storage_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.storage_dir / "centroids.tmp.npz"
+        np.savez(
+            tmp_path,
+            centroids=self.centroids,
+            counts=self.counts,
+            model_id=np.array(self.model_id),
+            requested_clusters=np.array(self.requested_clusters),
+        )
+        os.replace(tmp_path, self.storage_dir / "centroids.npz")
+
+    # === INTERNAL METHODS ===
+
+    def _initialize(self, matrix: np.ndarray):
+        """Setzt die Start-Zentroide per k-Means++ auf einer Stichprobe"""
+        sample = matrix
+        if matrix.shape[0] > self.init_sample_size:
+            sample = matrix[
+                self._rng.choice(matrix.shape[0], self.init_sample_size, replace=False)
+            ]
+        self.num_clusters = min(self.requested_clusters, sample.shape[0])
+        self.centroids = kmeans_plusplus(sample, self.num_clusters, self._rng)
+        self.counts = np.zeros(self.num_clusters, dtype=np.int64)
+
+    def _update(self, batch: np.ndarray):
+        """Verschiebt die Zentroide zum laufenden Mittelwert ihrer Punkte"""
+        labels = self.predict(batch)
+        batch_counts = np.bincount(labels, minlength=self.num_clusters)
+        sums = np.zeros_like(self.centroids)
+        np.add.at(sums, labels, batch)
+
+        touched = batch_counts > 0
+        new_counts = self.counts + batch_counts
+        self.centroids[touched] = (
+            self.centroids[touched] * self.counts[touched, None] + sums[touched]
+        ) / new_counts[touched, None]
+        self.counts = new_counts
+
+    def _load(self):
+        """Lädt gespeicherte Zentroide, sofern Modell und Clusterzahl passen"""
+        path = self.storage_dir / "centroids.npz"
+        if not path.exists():
+            return
+        try:
+            with np.load(path) as arrays:
+                centroids = arrays["centroids"]
+                counts = arrays["counts"]
+                model_id = str(arrays["model_id"])
+                requested = int(arrays["requested_clusters"])
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Zentroide nicht lesbar, starte neu: {e}")
+            return
+
+        if model_id == self.model_id and requested == self.requested_clusters:
+            self.centroids = centroids.astype(np.float32)
+            self.counts = counts.astype(np.int64)
+            self.num_clusters = centroids.shape[0]
+
+
+class ReflectionClusterer:
+    """
+    Themen-Cluster über die Embedding-Matrix der Suchmaschine
+
+    Neue Reflexionen werden mit observe() inkrementell eingelernt; nicht
+    beobachtete Einträge der Matrix werden bei get_clusters() nachgeholt.
+    Die Cluster-Zusammenfassungen werden gecacht, bis sich die Datenbank
+    oder das Modell ändert.
+    """
+
+    def __init__(
+        self,
+        embedding_matrix,
+        local_db,
+        num_clusters: int = 8,
+        storage_dir: Optional[str] = None,
+        batch_size: int = 256,
+    ):
+        self.embedding_matrix = embedding_matrix
+        self.local_db = local_db
+        self.batch_size = batch_size
+        self.model = MiniBatchKMeans(
+            num_clusters,
+            batch_size=batch_size,
+            storage_dir=storage_dir,
+            model_id=getattr(embedding_matrix, "model_id", ""),
+        )
+
+        self._observed = set()
+        self._buffer_keys: List[str] = []
+        self._buffer_vectors: List[np.ndarray] = []
+        self._summary_cache: Optional[Tuple[Tuple, Dict]] = None
+        self._model_version = 0
+        self._lock = threading.RLock()
+
+        if self.model.is_fitted and self.storage_dir:
+            self._observed = self._load_observed()
+
+    @property
+    def storage_dir(self) -> Optional[Path]:
+        return self.model.storage_dir
+
+    # === PUBLIC INTERFACE ===
+
+    def observe(self, key: str, vector) -> None:
+        """
+        Nimmt eine neue Reflexion in den nächsten Mini-Batch auf
+
+        Args:
+            key: Reflexions-Hash
+            vector: Embedding der Reflexion
+        """
+        with self._lock:
+            if key in self._observed:
+                return
+            # Gleiche Normalisierung wie in der Embedding-Matrix
+            vector = np.asarray(vector, dtype=np.float32)
+            norm = float(np.linalg.norm(vector))
+            if norm == 0.0:
+                return
+            self._buffer_keys.append(key)
+            self._buffer_vectors.append(vector / norm)
+            if len(self._buffer_keys) >= self.batch_size:
+                self._flush()
+
+    def get_clusters(self, top_themes: int = 3, representatives: int = 3) -> Dict:
+        """
+        Liefert Themen-Cluster mit Größe, Top-Themen und repräsentativen Hashes
+
+        Args:
+            top_themes: Anzahl Themen pro Cluster
+            representatives: Anzahl zentroidnaher Reflexionen pro Cluster
+
+        Returns:
+            Dict: cluster_id -> {size, top_themes, representatives}
+        """
+        with self._lock:
+            self._learn_unobserved()
+            if not self.model.is_fitted:
+                return {}
+
+            cache_key = (
+                self.local_db.get_change_signature(),
+                len(self.embedding_matrix),
+                self._model_version,
+                top_themes,
+                representatives,
+            )
+            if self._summary_cache and self._summary_cache[0] == cache_key:
+                return self._summary_cache[1]
+
+            keys = self.embedding_matrix.keys()
+            if not keys:
+                return {}
+            vectors = np.stack([self.embedding_matrix.get(key) for key in keys])
+            summary = self._summarize(keys, vectors, top_themes, representatives)
+            self._summary_cache = (cache_key, summary)
+            return summary
+
+    # === INTERNAL METHODS ===
+
+    def _flush(self):
+        """Lernt den gesammelten Mini-Batch ein und speichert das Modell"""
+        if not self._buffer_keys:
+            return
+        self.model.partial_fit(np.stack(self._buffer_vectors))
+        self._observed.update(self._buffer_keys)
+        self._buffer_keys = []
+        self._buffer_vectors = []
+        self._model_version += 1
+        if self.model.is_fitted:
+            self.model.save()
+            self._save_observed()
+
+    def _learn_unobserved(self):
+        """Holt Einträge der Matrix nach, die observe() nicht gesehen hat"""
+        buffered = set(self._buffer_keys)
+        missing = [
+            key
+            for key in self.embedding_matrix.keys()
+            if key not in self._observed and key not in buffered
+        ]
+        for key in missing:
+            vector = self.embedding_matrix.get(key)
+            if vector is not None:
+                self._buffer_keys.append(key)
+                self._buffer_vectors.append(vector)
+        self._flush()
+
+    def _summarize(
+        self,
+        keys: Sequence[str],
+        vectors: np.ndarray,
+        top_themes: int,
+        representatives: int,
+    ) -> Dict:
+        """Erstellt die Zusammenfassung aller Cluster in einem Durchgang"""
+        labels = self.model.predict(vectors)
+        distances = np.linalg.norm(vectors - self.model.centroids[labels], axis=1)
+
+        themes_by_hash = self.local_db.get_themes_by_hashes(list(keys))
+
+        summary = {}
+        for cluster_id in np.unique(labels):
+            members = np.flatnonzero(labels == cluster_id)
+            theme_counts: Dict[str, int] = {}
+            for row in members:
+                for theme in themes_by_hash.get(keys[row], []):
+                    theme_counts[theme] = theme_counts.get(theme, 0) + 1
+            closest = members[np.argsort(distances[members], kind="stable")]
+
+            summary[int(cluster_id)] = {
+                "size": int(members.size),
+                "top_themes": [
+                    theme
+                    for theme, _ in sorted(
+                        theme_counts.items(), key=lambda x: x[1], reverse=True
+                    )[:top_themes]
+                ],
+                "representatives": [keys[row] for row in closest[:representatives]],
+            }
+        return summary
+
+    def _save_observed(self):
+        """Speichert die bereits eingelernten Hashes"""
+        if not self.storage_dir:
+            return
+        tmp_path = self.storage_dir / "observed.json.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(sorted(self._observed), f)
+        os.replace(tmp_path, self.storage_dir / "observed.json")
+
+    def _load_observed(self) -> set:
+        """Lädt die bereits eingelernten Hashes"""
+        try:
+            with open(self.storage_dir / "observed.json", "r", encoding="utf-8") as f:
+                return set(json.load(f))
+        except (OSError, ValueError):
+            return set()
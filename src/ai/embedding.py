@@ -4,115 +4,78 @@ Vektor-Erstellung mit lokalen Modellen für semantische Suche
 """
 
 import numpy as np
-import hashlib
 import json
+import threading
+import zlib
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 import re
 
+from src.ai.clustering import MiniBatchKMeans
+
+# Prozessweite Projektionstabellen, eine pro (Dimension, Buckets, Seed)
+_PROJECTION_TABLES: Dict[Tuple[int, int, int], np.ndarray] = {}
+_PROJECTION_LOCK = threading.Lock()
+
+
+def _get_projection_table(
+    embedding_dim: int, num_buckets: int, seed: int
+) -> np.ndarray:
+    """
+    Liefert die feste, zeilenweise normalisierte Projektionstabelle
+
+    Die Tabelle wird einmal pro Prozess erzeugt und danach nur gelesen,
+    daher ist sie ohne weitere Synchronisation thread-sicher.
+
+    Args:
+        embedding_dim: Dimension der Vektoren
+        num_buckets: Anzahl der Hash-Buckets (Zeilen)
+        seed: Seed des lokalen Zufallsgenerators
+
+    Returns:
+        np.ndarray: Schreibgeschützte Tabelle (num_buckets x embedding_dim)
+    """
+    key = (embedding_dim, num_buckets, seed)
+    with _PROJECTION_LOCK:
+        table = _PROJECTION_TABLES.get(key)
+        if table is None:
+            rng = np.random.default_rng(seed)
+            table = rng.standard_normal((num_buckets, embedding_dim), dtype=np.float32)
+            table /= np.linalg.norm(table, axis=1, keepdims=True)
+            table.setflags(write=False)
+            _PROJECTION_TABLES[key] = table
+        return table
+
 
 class LocalEmbeddingModel:
-    """Einfaches lokales Embedding-Modell für Prototyping"""
+    """Einfaches lokales Embedding-Modell für Prototyping (Feature Hashing)"""
 
-    def __init__(self, embedding_dim: int = 384):
+    TOKEN_PATTERN = re.compile(r"[^\w\s]")
+    WHITESPACE_PATTERN = re.compile(r"\s+")
+    STOPWORDS = frozenset({"der", "die", "das", "und", "oder", "aber", "ist", "sind"})
+
+    def __init__(
+        self, embedding_dim: int = 384, num_buckets: int = 8192, seed: int = 42
+    ):
         self.embedding_dim = embedding_dim
-        self.vocabulary = {}
-        self.word_vectors = {}
-        self.idf_scores = {}
-
-        # Initialisiere mit deutschen Grundwörtern
-        self._init_basic_vocabulary()
-
-    def _init_basic_vocabulary(self):
-        """Initialisiert grundlegendes deutsches Vokabular"""
-        # Emotionswörter
-        emotion_words = [
-            "glücklich",
-            "traurig",
-            "ängstlich",
-            "wütend",
-            "froh",
-            "müde",
-            "entspannt",
-            "gestresst",
-            "hoffnungsvoll",
-            "enttäuscht",
-            "begeistert",
-            "frustriert",
-            "ruhig",
-            "aufgeregt",
-            "zufrieden",
-        ]
-
-        # Themen-Wörter
-        theme_words = [
-            "arbeit",
-            "familie",
-            "freunde",
-            "gesundheit",
-            "zukunft",
-            "vergangenheit",
-            "beziehung",
-            "geld",
-            "ziele",
-            "träume",
-            "probleme",
-            "erfolg",
-            "lernen",
-            "wachstum",
-            "veränderung",
-        ]
-
-        # Häufige Wörter
-        common_words = [
-            "ich",
-            "mich",
-            "mir",
-            "mein",
-            "heute",
-            "gestern",
-            "morgen",
-            "denken",
-            "fühlen",
-            "sein",
-            "haben",
-            "machen",
-            "gehen",
-            "sehen",
-            "wissen",
-            "können",
-            "wollen",
-            "müssen",
-            "sollen",
-        ]
-
-        all_words = emotion_words + theme_words + common_words
-
-        for i, word in enumerate(all_words):
-            self.vocabulary[word] = i
-            # Einfache Vektor-Generierung (in Realität: trainierte Embeddings)
-            self.word_vectors[word] = self._generate_word_vector(word, i)
-
-    def _generate_word_vector(self, word: str, index: int) -> np.ndarray:
+        self.num_buckets = num_buckets
+        self.model_id = f"local-hashed-v2-{embedding_dim}-{num_buckets}-{seed}"
+
+        # Feste Tabelle statt wachsendem Vokabular: Speicher bleibt konstant
+        self.projection = _get_projection_table(embedding_dim, num_buckets, seed)
+
+    def _token_bucket(self, token: str) -> int:
         """
-        Generiert einen Vektor für ein Wort
+        Bestimmt den Hash-Bucket eines Tokens
 
         Args:
-            word: Das Wort
-            index: Index im Vokabular
+            token: Das Token
 
         Returns:
-            np.ndarray: Embedding-Vektor
+            int: Zeilenindex in der Projektionstabelle
         """
-        # Deterministische Vektor-Generierung basierend auf Wort
-        seed = int(hashlib.md5(word.encode()).hexdigest()[:8], 16)
-        np.random.seed(seed)
-
-        # Normalisierter zufälliger Vektor
-        vector = np.random.normal(0, 1, self.embedding_dim)
-        vector = vector / np.linalg.norm(vector)
-
-        return vector
+        # crc32 ist prozessübergreifend stabil (anders als hash())
+        return zlib.crc32(token.encode("utf-8")) % self.num_buckets
 
     def preprocess_text(self, text: str) -> List[str]:
         """
@@ -124,23 +87,12 @@ class LocalEmbeddingModel:
         Returns:
             List[str]: Liste der Tokens
         """
-        # Kleinbuchstaben
-        text = text.lower()
-
-        # Satzzeichen entfernen
-        text = re.sub(r"[^\w\s]", " ", text)
+        # Kleinbuchstaben, Satzzeichen entfernen, Leerzeichen reduzieren
+        text = self.TOKEN_PATTERN.sub(" ", text.lower())
+        text = self.WHITESPACE_PATTERN.sub(" ", text)
 
-        # Mehrere Leerzeichen reduzieren
-        text = re.sub(r"\s+", " ", text)
-
-        # Tokenisierung
-        tokens = text.strip().split()
-
-        # Stopwörter entfernen (vereinfacht)
-        stopwords = {"der", "die", "das", "und", "oder", "aber", "ist", "sind"}
-        tokens = [token for token in tokens if token not in stopwords]
-
-        return tokens
+        # Tokenisierung und Stopwörter entfernen (vereinfacht)
+        return [token for token in text.strip().split() if token not in self.STOPWORDS]
 
     def get_word_embedding(self, word: str) -> Optional[np.ndarray]:
         """
@@ -152,15 +104,8 @@ class LocalEmbeddingModel:
         Returns:
             Optional[np.ndarray]: Embedding-Vektor oder None
         """
-        if word in self.word_vectors:
-            return self.word_vectors[word]
-
-        # Für unbekannte Wörter: generiere neuen Vektor
         if len(word) > 2:  # Nur für sinnvolle Wörter
-            vector = self._generate_word_vector(word, len(self.vocabulary))
-            self.vocabulary[word] = len(self.vocabulary)
-            self.word_vectors[word] = vector
-            return vector
+            return self.projection[self._token_bucket(word)]
 
         return None
 
@@ -174,30 +119,48 @@ class LocalEmbeddingModel:
         Returns:
             np.ndarray: Text-Embedding
         """
-        tokens = self.preprocess_text(text)
+        return self.encode_many([text])[0]
 
-        if not tokens:
-            return np.zeros(self.embedding_dim)
+    def encode_many(self, texts: List[str]) -> np.ndarray:
+        """
+        Erstellt Embeddings für mehrere Texte in einem Durchgang
 
-        # Sammle Wort-Embeddings
-        embeddings = []
-        for token in tokens:
-            embedding = self.get_word_embedding(token)
-            if embedding is not None:
-                embeddings.append(embedding)
+        Die Token-Vektoren aller Texte werden mit einem Gather aus der
+        Projektionstabelle geholt und per reduceat pro Text summiert.
 
-        if not embeddings:
-            return np.zeros(self.embedding_dim)
+        Args:
+            texts: Liste von Eingabetexten
 
-        # Durchschnitt der Wort-Embeddings
-        text_embedding = np.mean(embeddings, axis=0)
+        Returns:
+            np.ndarray: Matrix (len(texts) x embedding_dim), normalisiert;
+                Texte ohne verwertbare Tokens ergeben Nullzeilen
+        """
+        result = np.zeros((len(texts), self.embedding_dim), dtype=np.float32)
+
+        buckets: List[int] = []
+        starts: List[int] = []
+        rows: List[int] = []
+        for row, text in enumerate(texts):
+            token_buckets = [
+                self._token_bucket(token)
+                for token in self.preprocess_text(text or "")
+                if len(token) > 2
+            ]
+            if token_buckets:
+                rows.append(row)
+                starts.append(len(buckets))
+                buckets.extend(token_buckets)
+
+        if not rows:
+            return result
 
-        # Normalisierung
-        norm = np.linalg.norm(text_embedding)
-        if norm > 0:
-            text_embedding = text_embedding / norm
+        # Summe statt Mittelwert: nach der Normalisierung identisch
+        sums = np.add.reduceat(self.projection[buckets], starts, axis=0)
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        np.divide(sums, norms, out=sums, where=norms > 0)
+        result[rows] = sums
 
-        return text_embedding
+        return result
 
 
 class ReflectionEmbedding:
@@ -235,10 +198,9 @@ class ReflectionEmbedding:
         sentiment_embedding = self.model.encode_text(sentiment)
 
         # Kombiniertes Embedding
-        combined_embedding = content_embedding
-        if theme_embeddings:
-            theme_avg = np.mean(theme_embeddings, axis=0)
-            combined_embedding = 0.7 * content_embedding + 0.3 * theme_avg
+        combined_embedding = self._combine_embeddings(
+            content_embedding, theme_embeddings
+        )
 
         embedding_info = {
             "hash": reflection_hash,
@@ -255,6 +217,41 @@ class ReflectionEmbedding:
 
         return embedding_info
 
+    def embed_reflection(
+        self, reflection_data: Dict, content_embedding: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Berechnet nur das kombinierte Embedding einer Reflexion
+
+        Im Gegensatz zu create_reflection_embedding werden keine Listen
+        erzeugt und nichts in reflection_embeddings abgelegt.
+
+        Args:
+            reflection_data: Reflexionsdaten mit content und themes
+            content_embedding: Optional bereits berechnetes Inhalts-Embedding
+
+        Returns:
+            np.ndarray: Kombiniertes Embedding
+        """
+        themes = reflection_data.get("themes", [])
+        if content_embedding is None:
+            encoded = self.model.encode_many(
+                [reflection_data.get("content", "")] + themes
+            )
+            return self._combine_embeddings(encoded[0], list(encoded[1:]))
+
+        theme_embeddings = list(self.model.encode_many(themes)) if themes else []
+        return self._combine_embeddings(content_embedding, theme_embeddings)
+
+    def _combine_embeddings(
+        self, content_embedding: np.ndarray, theme_embeddings: List[np.ndarray]
+    ) -> np.ndarray:
+        """Gewichtet Inhalt (0.7) und Themen-Durchschnitt (0.3)"""
+        if not theme_embeddings:
+            return content_embedding
+        theme_avg = np.mean(theme_embeddings, axis=0)
+        return 0.7 * content_embedding + 0.3 * theme_avg
+
     def compute_similarity(
         self, embedding1: List[float], embedding2: List[float]
     ) -> float:
@@ -323,12 +320,43 @@ class ReflectionEmbedding:
 
         return similar_reflections
 
+    def embed_reflections(self, reflections: List[Dict]) -> np.ndarray:
+        """
+        Berechnet die kombinierten Embeddings vieler Reflexionen als Matrix
+
+        Inhalte und Themen werden jeweils in einem encode_many-Aufruf kodiert.
+
+        Args:
+            reflections: Reflexionsdaten mit content und themes
+
+        Returns:
+            np.ndarray: Kombinierte Embeddings (n x embedding_dim)
+        """
+        combined = self.model.encode_many([r.get("content", "") for r in reflections])
+
+        theme_lists = [r.get("themes") or [] for r in reflections]
+        themed_rows = [i for i, themes in enumerate(theme_lists) if themes]
+        if themed_rows:
+            theme_embeddings = self.model.encode_many(
+                [theme for i in themed_rows for theme in theme_lists[i]]
+            )
+            lengths = np.array([len(theme_lists[i]) for i in themed_rows])
+            offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+            theme_sums = np.add.reduceat(theme_embeddings, offsets, axis=0)
+            theme_avg = theme_sums / lengths[:, None]
+            combined[themed_rows] = 0.7 * combined[themed_rows] + 0.3 * theme_avg
+
+        return combined
+
     def cluster_reflections(
         self, reflections: List[Dict], num_clusters: int = 5
     ) -> Dict:
         """
         Clustert Reflexionen basierend auf Ähnlichkeit
 
+        Nutzt Mini-Batch k-Means mit k-Means++ Start auf den normalisierten
+        kombinierten Embeddings (euklidisch entspricht dann Cosinus).
+
         Args:
             reflections: Liste der Reflexionen
             num_clusters: Anzahl gewünschter Cluster
@@ -336,60 +364,36 @@ class ReflectionEmbedding:
         Returns:
             Dict: Cluster-Informationen
         """
+        if not reflections:
+            return {}
         if len(reflections) < num_clusters:
             num_clusters = len(reflections)
 
-        # Embeddings erstellen
-        embeddings = []
-        for reflection in reflections:
-            embedding_info = self.create_reflection_embedding(reflection)
-            embeddings.append(embedding_info["combined_embedding"])
+        embeddings = self.embed_reflections(reflections)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        np.divide(embeddings, norms, out=embeddings, where=norms > 0)
 
-        # Einfaches K-Means Clustering (vereinfacht)
-        embeddings_array = np.array(embeddings)
-
-        # Zufällige Zentroide initialisieren
-        np.random.seed(42)
-        centroids = embeddings_array[
-            np.random.choice(len(embeddings_array), num_clusters, replace=False)
-        ]
-
-        clusters = {i: [] for i in range(num_clusters)}
-
-        # Reflexionen zu nächstem Zentroid zuordnen
-        for i, embedding in enumerate(embeddings):
-            distances = [
-                1 - self.compute_similarity(embedding, centroid.tolist())
-                for centroid in centroids
-            ]
-            closest_cluster = np.argmin(distances)
-            clusters[closest_cluster].append(
-                {"reflection": reflections[i], "embedding": embedding}
-            )
+        model = MiniBatchKMeans(num_clusters).fit(embeddings)
+        labels = model.predict(embeddings)
 
         # Cluster-Beschreibungen generieren
         cluster_info = {}
-        for cluster_id, cluster_items in clusters.items():
-            if cluster_items:
-                # Häufige Themen im Cluster
-                all_themes = []
-                for item in cluster_items:
-                    themes = item["reflection"].get("themes", [])
-                    all_themes.extend(themes)
-
-                theme_counts = {}
-                for theme in all_themes:
+        for cluster_id in np.unique(labels):
+            members = [reflections[i] for i in np.flatnonzero(labels == cluster_id)]
+
+            theme_counts = {}
+            for reflection in members:
+                for theme in reflection.get("themes", []):
                     theme_counts[theme] = theme_counts.get(theme, 0) + 1
 
-                top_themes = sorted(
-                    theme_counts.items(), key=lambda x: x[1], reverse=True
-                )[:3]
+            ranked = sorted(theme_counts.items(), key=lambda x: x[1], reverse=True)
+            top_themes = ranked[:3]
 
-                cluster_info[cluster_id] = {
-                    "size": len(cluster_items),
-                    "top_themes": [theme for theme, _ in top_themes],
-                    "reflections": [item["reflection"] for item in cluster_items],
-                }
+            cluster_info[int(cluster_id)] = {
+                "size": len(members),
+                "top_themes": [theme for theme, _ in top_themes],
+                "reflections": members,
+            }
 
         return cluster_info
 
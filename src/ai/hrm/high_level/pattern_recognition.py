@@ -46,7 +46,8 @@ class PatternRecognizer:
             # Importiere Search hier um zirkuläre Importe zu vermeiden
             from src.ai.search import SemanticSearchEngine
 
-            self.search = SemanticSearchEngine(self.embedding_system, self.local_db)
+            if not hasattr(self, "search"):
+                self.search = SemanticSearchEngine(self.embedding_system, self.local_db)
 
             # Debug: Zeige verfügbare Reflexionen
             if self.local_db:
@@ -0,0 +1,148 @@
+"""
+ASI Core - Snapshot-Journal
+Atomares Schreiben und append-only Journale für persistente Indizes
+"""
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def atomic_write(path: Path, data: bytes):
+    """
+    Schreibt eine Datei atomar über eine temporäre Datei
+
+    Args:
+        path: Zieldatei
+        data: Vollständiger neuer Inhalt
+    """
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+class Journal:
+    """
+    Append-only Journal neben einem Snapshot
+
+    Der Besitzer hängt jede Änderung als Record an und schreibt einen
+    Snapshot, sobald due() zutrifft; clear() leert danach das Journal.
+    Kompaktiert wird erst nach max(minimum, Größe) Operationen, damit die
+    Snapshot-Kosten amortisiert O(1) pro Operation bleiben.
+
+    replay() spielt beim Laden alle vollständigen Records ein. Ein Ende,
+    das ein Absturz während des Schreibens abgeschnitten hat, wird
+    verworfen und aus der Datei gekürzt. Ein Journal gehört immer zu genau
+    einem Snapshot: ohne passenden Snapshot muss der Besitzer neu beginnen
+    (save()), statt das Journal einzuspielen.
+    """
+
+    def __init__(self, path: Path, label: str):
+        """
+        Args:
+            path: Journal-Datei
+            label: Bezeichnung für Log-Meldungen (z.B. "kNN")
+        """
+        self.path = path
+        self.label = label
+        self.ops = 0
+
+    def append(self, data: bytes, ops: int = 1):
+        """
+        Hängt bereits kodierte Records an
+
+        Args:
+            data: Records in einem Block
+            ops: Anzahl der enthaltenen Operationen
+        """
+        with open(self.path, "ab") as f:
+            f.write(data)
+        self.ops += ops
+
+    def append_json(self, record: Dict):
+        """
+        Hängt einen Record als JSON-Zeile an
+
+        Args:
+            record: JSON-serialisierbarer Record
+        """
+        self.append((json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8"))
+
+    def due(self, minimum: int, size: int) -> bool:
+        """
+        Gibt an, ob ein Snapshot fällig ist
+
+        Args:
+            minimum: Mindestanzahl Operationen zwischen zwei Snapshots
+            size: Aktuelle Größe des Besitzers (Einträge)
+
+        Returns:
+            bool: True, wenn der Besitzer save() aufrufen sollte
+        """
+        return self.ops >= max(minimum, size)
+
+    def clear(self):
+        """Leert das Journal nach einem Snapshot"""
+        atomic_write(self.path, b"")
+        self.ops = 0
+
+    def delete(self):
+        """Entfernt die Journal-Datei"""
+        if self.path.exists():
+            self.path.unlink()
+        self.ops = 0
+
+    def replay(self, read_record: Callable[[bytes, int], Optional[int]]):
+        """
+        Spielt das Journal ein; ein abgeschnittenes Ende wird verworfen
+
+        Args:
+            read_record: Wendet den Record ab offset an und liefert das Ende
+                des Records, oder None, wenn dort kein vollständiger Record
+                beginnt
+        """
+        if not self.path.exists():
+            return
+
+        data = self.path.read_bytes()
+        offset = 0
+        while offset < len(data):
+            end = read_record(data, offset)
+            if end is None:
+                break
+            self.ops += 1
+            offset = end
+
+        if offset != len(data):
+            logger.warning(
+                f"{self.label}-Journal mit unvollständigem Ende, wird gekürzt"
+            )
+            with open(self.path, "r+b") as f:
+                f.truncate(offset)
+
+    def replay_json(self, apply: Callable[[Dict], None]):
+        """
+        Spielt ein Journal aus JSON-Zeilen ein
+
+        Args:
+            apply: Wendet einen dekodierten Record an
+        """
+
+        def read_line(data: bytes, offset: int) -> Optional[int]:
+            newline = data.find(b"\n", offset)
+            if newline < 0:
+                return None
+            end = newline + 1
+            try:
+                record = json.loads(data[offset:end])
+            except ValueError:
+                return None
+            apply(record)
+            return end
+
+        self.replay(read_line)
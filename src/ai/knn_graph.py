@@ -0,0 +1,254 @@
+"""
+ASI Core - kNN Graph
+Inkrementell gepflegter k-Nächste-Nachbarn-Graph für verwandte Reflexionen
+"""
+
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from src.ai.journal import Journal, atomic_write
+
+logger = logging.getLogger(__name__)
+
+Neighbour = Tuple[str, float]
+
+
+class KNNGraph:
+    """
+    Gerichteter kNN-Graph mit Cosinus-Gewichten
+
+    Beim Einfügen erhält der neue Knoten seine k besten Nachbarn, und jeder
+    dieser Nachbarn nimmt den neuen Knoten in seine eigene Liste auf, falls
+    er dort unter die k besten fällt. Verwandte Reflexionen sind damit ein
+    Lookup statt einer Suche über alle Vektoren.
+
+    Knoten, die durch ein Löschen einen Nachbarn verloren haben, werden als
+    veraltet markiert und vom Aufrufer bei Bedarf neu berechnet.
+
+    Mit storage_dir wird ein Snapshot (graph.json) plus ein append-only
+    Journal (journal.jsonl) geführt; das Journal wird mit derselben Logik
+    wieder eingespielt und amortisiert in den Snapshot kompaktiert.
+    """
+
+    VERSION = 1
+
+    def __init__(
+        self,
+        k: int = 10,
+        storage_dir: Optional[str] = None,
+        model_id: str = "",
+        journal_compaction: int = 10000,
+    ):
+        self.k = k
+        self.model_id = model_id
+        self.journal_compaction = journal_compaction
+        self.storage_dir = Path(storage_dir) if storage_dir else None
+
+        self._neighbours: Dict[str, List[Neighbour]] = {}
+        self._reverse: Dict[str, Set[str]] = {}
+        self._stale: Set[str] = set()
+        self._journal: Optional[Journal] = None
+        self._lock = threading.RLock()
+
+        if self.storage_dir:
+            self._journal = Journal(self.storage_dir / "journal.jsonl", "kNN")
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self._neighbours)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._neighbours
+
+    # === PUBLIC INTERFACE ===
+
+    def keys(self) -> List[str]:
+        """Gibt alle Knoten zurück"""
+        with self._lock:
+            return list(self._neighbours)
+
+    def insert(self, key: str, neighbours: Sequence[Neighbour]) -> None:
+        """
+        Fügt einen Knoten ein (oder ersetzt ihn) und aktualisiert seine Nachbarn
+
+        Args:
+            key: Reflexions-Hash
+            neighbours: (Hash, Cosinus) der nächsten Nachbarn, absteigend
+        """
+        neighbours = [(n, float(score)) for n, score in neighbours if n != key]
+        with self._lock:
+            self._insert(key, neighbours)
+            self._journal_append({"op": "insert", "key": key, "neighbours": neighbours})
+
+    def remove(self, key: str) -> bool:
+        """
+        Entfernt einen Knoten samt aller Kanten
+
+        Args:
+            key: Reflexions-Hash
+
+        Returns:
+            bool: True wenn der Knoten vorhanden war
+        """
+        with self._lock:
+            if not self._remove(key):
+                return False
+            self._journal_append({"op": "remove", "key": key})
+            return True
+
+    def neighbours(
+        self, key: str, limit: Optional[int] = None
+    ) -> Optional[List[Neighbour]]:
+        """
+        Liefert die gespeicherten Nachbarn eines Knotens
+
+        Args:
+            key: Reflexions-Hash
+            limit: Maximale Anzahl (Standard: k)
+
+        Returns:
+            Optional[List[Neighbour]]: Nachbarn absteigend nach Cosinus oder
+            None, wenn der Knoten fehlt oder veraltet ist
+        """
+        with self._lock:
+            if key not in self._neighbours or key in self._stale:
+                return None
+            return list(self._neighbours[key][: limit or self.k])
+
+    def is_stale(self, key: str) -> bool:
+        """Gibt an, ob ein Knoten durch ein Löschen Nachbarn verloren hat"""
+        with self._lock:
+            return key in self._stale
+
+    def save(self) -> None:
+        """Schreibt einen Snapshot und leert das Journal"""
+        if not self.storage_dir:
+            return
+        with self._lock:
+            snapshot = {
+                "version": self.VERSION,
+                "k": self.k,
+                "model_id": self.model_id,
+                "neighbours": self._neighbours,
+                "stale": sorted(self._stale),
+            }
+            atomic_write(
+                self._snapshot_file,
+                json.dumps(snapshot, ensure_ascii=False).encode("utf-8"),
+            )
+            self._journal.clear()
+
+    def get_stats(self) -> Dict:
+        """
+        Liefert Kennzahlen des Graphen
+
+        Returns:
+            Dict: Knoten, Kanten, veraltete Knoten, Journal-Länge
+        """
+        with self._lock:
+            return {
+                "nodes": len(self._neighbours),
+                "edges": sum(len(n) for n in self._neighbours.values()),
+                "stale_nodes": len(self._stale),
+                "k": self.k,
+                "journal_ops": self._journal.ops if self._journal else 0,
+            }
+
+    # === INTERNAL METHODS ===
+
+    def _insert(self, key: str, neighbours: List[Neighbour]):
+        """Setzt die Nachbarliste und trägt Rückkanten bei den Nachbarn ein"""
+        if key in self._neighbours:
+            self._remove(key)
+
+        own = [(n, score) for n, score in neighbours if n in self._neighbours][: self.k]
+        self._neighbours[key] = own
+        self._reverse.setdefault(key, set())
+        self._stale.discard(key)
+
+        for neighbour, score in own:
+            self._reverse[neighbour].add(key)
+            self._offer(neighbour, key, score)
+
+    def _offer(self, node: str, candidate: str, score: float):
+        """Nimmt candidate in die Liste von node auf, falls unter den k besten"""
+        entries = self._neighbours[node]
+        if len(entries) >= self.k and score <= entries[-1][1]:
+            return
+
+        position = len(entries)
+        while position > 0 and entries[position - 1][1] < score:
+            position -= 1
+        entries.insert(position, (candidate, score))
+        self._reverse[candidate].add(node)
+
+        if len(entries) > self.k:
+            dropped, _ = entries.pop()
+            self._reverse[dropped].discard(node)
+
+    def _remove(self, key: str) -> bool:
+        """Entfernt einen Knoten; Knoten mit Kante auf ihn werden veraltet"""
+        entries = self._neighbours.pop(key, None)
+        if entries is None:
+            return False
+
+        for neighbour, _ in entries:
+            self._reverse[neighbour].discard(key)
+        for node in self._reverse.pop(key, set()):
+            node_entries = self._neighbours.get(node)
+            if node_entries is not None:
+                node_entries[:] = [(n, s) for n, s in node_entries if n != key]
+                self._stale.add(node)
+        self._stale.discard(key)
+        return True
+
+    @property
+    def _snapshot_file(self) -> Path:
+        return self.storage_dir / "graph.json"
+
+    def _journal_append(self, record: Dict):
+        """Hängt eine Operation an das Journal an und kompaktiert bei Bedarf"""
+        if self._journal is None:
+            return
+        self._journal.append_json(record)
+        if self._journal.due(self.journal_compaction, len(self._neighbours)):
+            self.save()
+
+    def _apply_record(self, record: Dict):
+        """Wendet einen Journal-Record an"""
+        if record.get("op") == "insert":
+            self._insert(record["key"], [tuple(n) for n in record["neighbours"]])
+        elif record.get("op") == "remove":
+            self._remove(record["key"])
+
+    def _load(self):
+        """Lädt Snapshot und Journal, sofern k und Modell passen"""
+        self.storage_dir.mkdir(parents=True, exist_ok=True)
+        try:
+            with open(self._snapshot_file, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError) as e:
+            if self._snapshot_file.exists():
+                logger.warning(f"kNN-Graph nicht lesbar, wird neu aufgebaut: {e}")
+            snapshot = {}
+
+        compatible = (
+            snapshot.get("version") == self.VERSION
+            and snapshot.get("k") == self.k
+            and snapshot.get("model_id") == self.model_id
+        )
+        if not compatible:
+            self.save()
+            return
+
+        for key, entries in snapshot["neighbours"].items():
+            self._neighbours[key] = [(n, float(s)) for n, s in entries]
+            self._reverse.setdefault(key, set())
+        for key, entries in self._neighbours.items():
+            for neighbour, _ in entries:
+                self._reverse.setdefault(neighbour, set()).add(key)
+        self._stale = set(snapshot.get("stale", []))
+        self._journal.replay_json(self._apply_record)
@@ -0,0 +1,159 @@
+"""
+ASI Core - Query Embedding Cache
+Prozessweiter, größenbegrenzter LRU-Cache für Query-Embeddings
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+
+class QueryEmbeddingCache:
+    """
+    LRU-Cache für Query-Embeddings mit Byte-Budget
+
+    Schlüssel ist (Modell-Kennung, normalisierter Text), so dass verschiedene
+    Modelle sich keine Einträge teilen. Gespeicherte Vektoren sind
+    schreibgeschützt, Aufrufer erhalten also nie veränderbare Cache-Objekte.
+    """
+
+    def __init__(self, max_entries: int = 10000, max_bytes: int = 32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self._entries: "OrderedDict[Tuple[str, str], np.ndarray]" = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    # === PUBLIC INTERFACE ===
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """
+        Normalisiert einen Query-Text für den Cache-Schlüssel
+
+        Args:
+            text: Eingabetext
+
+        Returns:
+            str: Kleingeschriebener Text mit einfachen Leerzeichen
+        """
+        return " ".join((text or "").lower().split())
+
+    def get(self, text: str, model_id: str) -> Optional[np.ndarray]:
+        """
+        Liest ein Embedding und markiert es als zuletzt verwendet
+
+        Args:
+            text: Query-Text
+            model_id: Kennung des Embedding-Modells
+
+        Returns:
+            Optional[np.ndarray]: Embedding oder None
+        """
+        key = (model_id, self.normalize(text))
+        with self._lock:
+            embedding = self._entries.get(key)
+            if embedding is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return embedding
+
+    def put(self, text: str, model_id: str, embedding) -> np.ndarray:
+        """
+        Legt ein Embedding ab und verdrängt bei Bedarf die ältesten Einträge
+
+        Args:
+            text: Query-Text
+            model_id: Kennung des Embedding-Modells
+            embedding: Vektor
+
+        Returns:
+            np.ndarray: Schreibgeschützte, gecachte Kopie
+        """
+        key = (model_id, self.normalize(text))
+        stored = np.array(embedding, copy=True)
+        stored.setflags(write=False)
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.nbytes
+
+            if stored.nbytes > self.max_bytes:
+                return stored
+
+            self._entries[key] = stored
+            self._bytes += stored.nbytes
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes
+                self._evictions += 1
+
+        return stored
+
+    def get_or_compute(
+        self, text: str, model_id: str, compute: Callable[[str], np.ndarray]
+    ) -> np.ndarray:
+        """
+        Liefert ein gecachtes Embedding oder berechnet und speichert es
+
+        Args:
+            text: Query-Text (wird unverändert an compute übergeben)
+            model_id: Kennung des Embedding-Modells
+            compute: Funktion Text -> Embedding
+
+        Returns:
+            np.ndarray: Schreibgeschütztes Embedding
+        """
+        embedding = self.get(text, model_id)
+        if embedding is None:
+            embedding = self.put(text, model_id, compute(text))
+        return embedding
+
+    def clear(self) -> None:
+        """Leert den Cache (Zähler bleiben erhalten)"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def get_stats(self) -> Dict:
+        """
+        Liefert Cache-Kennzahlen
+
+        Returns:
+            Dict: Einträge, Bytes, Treffer, Fehlzugriffe, Verdrängungen, Trefferquote
+        """
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+            }
+
+
+# Prozessweite Instanz für Suche, Mustererkennung und AI-Modul
+_SHARED_CACHE = QueryEmbeddingCache()
+
+
+def get_query_cache() -> QueryEmbeddingCache:
+    """
+    Liefert den prozessweit geteilten Query-Embedding-Cache
+
+    Returns:
+        QueryEmbeddingCache: Geteilte Instanz
+    """
+    return _SHARED_CACHE
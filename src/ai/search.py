@@ -10,6 +10,38 @@ from datetime import datetime, timedelta
 from dataclasses import dataclass
 import re
 
+from src.ai.ann_index import IVFIndex
+from src.ai.clustering import ReflectionClusterer
+from src.ai.knn_graph import KNNGraph
+from src.ai.query_cache import QueryEmbeddingCache, get_query_cache
+from src.ai.suggestions import SuggestionIndex
+from src.ai.vector_store import EmbeddingMatrix, get_shared_matrix
+from src.storage.query_planner import ReflectionFilter
+from src.storage.rollups import bucket_key, iso_week_label
+
+
+def reciprocal_rank_fusion(
+    rankings: List[List[str]], k: int = 60
+) -> List[Tuple[str, float]]:
+    """
+    Verschmilzt mehrere Rankings per Reciprocal Rank Fusion
+
+    Jeder Eintrag erhält pro Ranking 1 / (k + Rang); die Scores der
+    einzelnen Verfahren müssen dafür nicht vergleichbar sein.
+
+    Args:
+        rankings: Listen von Schlüsseln, jeweils bestes Ergebnis zuerst
+        k: Dämpfung, größere Werte gewichten spätere Ränge stärker
+
+    Returns:
+        List[Tuple[str, float]]: (Schlüssel, RRF-Score) absteigend
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking, start=1):
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda x: x[1], reverse=True)
+
 
 @dataclass
 class SearchResult:
@@ -29,11 +61,288 @@ class SearchResult:
 class SemanticSearchEngine:
     """Semantische Suchmaschine für Reflexionen"""
 
-    def __init__(self, embedding_system, local_db):
+    def __init__(
+        self,
+        embedding_system,
+        local_db,
+        embedding_matrix: Optional[EmbeddingMatrix] = None,
+        index_dir: str = "data/embeddings/reflections",
+        ann_index: Optional[IVFIndex] = None,
+        quantization: Optional[str] = None,
+        query_cache: Optional[QueryEmbeddingCache] = None,
+        num_clusters: int = 8,
+        cluster_dir: Optional[str] = None,
+        knn_k: int = 10,
+        knn_dir: Optional[str] = None,
+        suggestion_dir: Optional[str] = None,
+    ):
         self.embedding_system = embedding_system
         self.local_db = local_db
         self.search_history = []
 
+        # Vorberechnete Embedding-Matrix (persistiert, inkrementell gepflegt);
+        # quantization="int8"/"float16" hält nur kompakte Codes im Speicher
+        model = embedding_system.model
+        self.model_id = getattr(model, "model_id", type(model).__name__)
+        if embedding_matrix is None:
+            embedding_matrix = get_shared_matrix(
+                index_dir,
+                model.embedding_dim,
+                model_id=self.model_id,
+                quantization=quantization,
+            )
+        self.embedding_matrix = embedding_matrix
+        self._index_signature = None
+
+        # Optionaler ANN-Index für ungefilterte Top-k Anfragen
+        self.ann_index = ann_index
+
+        # Prozessweit geteilter Cache für Query-Embeddings
+        self.query_cache = query_cache if query_cache is not None else get_query_cache()
+
+        # kNN-Graph für verwandte Reflexionen, beim Indizieren gepflegt
+        self.knn_graph = KNNGraph(k=knn_k, storage_dir=knn_dir, model_id=self.model_id)
+
+        # Themen-Cluster, inkrementell mit jeder indizierten Reflexion gelernt
+        self.clusterer = ReflectionClusterer(
+            self.embedding_matrix,
+            local_db,
+            num_clusters=num_clusters,
+            storage_dir=cluster_dir,
+        )
+
+        # Präfix-Index für Suchvorschläge (Themen, Tags, Suchanfragen)
+        self.suggestions = SuggestionIndex(storage_dir=suggestion_dir)
+
+    def encode_query(self, text: str) -> np.ndarray:
+        """
+        Erstellt das Embedding eines Query-Texts über den geteilten Cache
+
+        Args:
+            text: Query-Text
+
+        Returns:
+            np.ndarray: Schreibgeschütztes Text-Embedding
+        """
+        return self.query_cache.get_or_compute(
+            text, self.model_id, self.embedding_system.model.encode_text
+        )
+
+    def embed_reflection(self, reflection_data: Dict) -> np.ndarray:
+        """
+        Berechnet das kombinierte Embedding einer Reflexion
+
+        Der Inhalt läuft über den Cache: eine folgende Ähnlichkeitssuche mit
+        dem gleichen Text (z.B. Mustererkennung) bettet ihn nicht erneut ein.
+
+        Args:
+            reflection_data: Reflexionsdaten mit content und themes
+
+        Returns:
+            np.ndarray: Kombiniertes Embedding
+        """
+        return self.embedding_system.embed_reflection(
+            reflection_data,
+            content_embedding=self.encode_query(reflection_data.get("content", "")),
+        )
+
+    def index_reflection(
+        self, reflection_data: Dict, embedding: Optional[np.ndarray] = None
+    ):
+        """
+        Nimmt eine gespeicherte Reflexion in die Embedding-Matrix auf
+
+        Args:
+            reflection_data: Reflexionsdaten mit hash, content und themes
+            embedding: Bereits berechnetes Embedding (z.B. mitgespeichert)
+        """
+        reflection_hash = reflection_data.get("hash")
+        if not reflection_hash:
+            return
+
+        if embedding is None:
+            embedding = self.embed_reflection(reflection_data)
+        self._index_embedding(reflection_hash, embedding)
+        self.suggestions.add_reflection(
+            reflection_hash,
+            (reflection_data.get("themes") or []) + (reflection_data.get("tags") or []),
+        )
+
+        # Die eigene Einfügung erspart dem nächsten sync_index den Abgleich
+        if self._index_signature is not None:
+            count, max_id = self._index_signature
+            signature = self.local_db.get_change_signature()
+            if signature[0] == count + 1 and self.local_db.get_reflection_hashes(
+                after_id=max_id
+            ) == [reflection_hash]:
+                self._index_signature = signature
+
+    def _index_embedding(self, reflection_hash: str, embedding: np.ndarray):
+        """Trägt ein Embedding in Matrix, ANN-Index, kNN-Graph und Cluster ein"""
+        self.embedding_matrix.add(reflection_hash, embedding)
+        if self.ann_index is not None:
+            self.ann_index.add(reflection_hash, embedding)
+        self.knn_graph.insert(reflection_hash, self._nearest_neighbours(embedding))
+        self.clusterer.observe(reflection_hash, embedding)
+
+    def remove_from_index(self, reflection_hash: str) -> bool:
+        """
+        Entfernt eine Reflexion aus der Embedding-Matrix
+
+        Args:
+            reflection_hash: Hash der Reflexion
+
+        Returns:
+            bool: True wenn die Reflexion indiziert war
+        """
+        removed = self._remove_embedding(reflection_hash)
+
+        # Eine bereits gelöschte Zeile erspart dem nächsten sync_index den Abgleich
+        if removed and self._index_signature is not None:
+            count, max_id = self._index_signature
+            signature = self.local_db.get_change_signature()
+            if (
+                signature[0] == count - 1
+                and signature[1] <= max_id
+                and self.local_db.get_reflection_by_hash(reflection_hash) is None
+            ):
+                self._index_signature = signature
+        return removed
+
+    def _remove_embedding(self, reflection_hash: str) -> bool:
+        """Entfernt einen Hash aus Matrix, ANN-Index, kNN-Graph und Vorschlägen"""
+        if self.ann_index is not None:
+            self.ann_index.remove(reflection_hash)
+        self.knn_graph.remove(reflection_hash)
+        self.suggestions.remove_reflection(reflection_hash)
+        return self.embedding_matrix.remove(reflection_hash)
+
+    def sync_index(self, force: bool = False) -> int:
+        """
+        Gleicht die Embedding-Matrix mit der Datenbank ab
+
+        Der Abgleich läuft nur, wenn sich Anzahl oder höchste ID der
+        Reflexionen seit dem letzten Aufruf geändert haben; Schreibzugriffe
+        über index_reflection/remove_from_index schreiben die Signatur
+        selbst fort. Kamen seitdem nur Reflexionen hinzu, werden nur die
+        neuen IDs gelesen, sonst alle Hashes verglichen. Fehlende
+        Embeddings werden zuerst in einem Rutsch aus der Datenbank geladen;
+        nur Reflexionen ohne gespeichertes Embedding dieses Modells werden
+        neu berechnet und anschließend in der Datenbank nachgetragen.
+
+        Args:
+            force: Abgleich unabhängig von der Signatur erzwingen
+
+        Returns:
+            int: Anzahl neu indizierter Reflexionen
+        """
+        signature = self.local_db.get_change_signature()
+        if not force and signature == self._index_signature:
+            return 0
+
+        previous = None if force else self._index_signature
+        new_hashes = None
+        if previous is not None:
+            new_hashes = self.local_db.get_reflection_hashes(after_id=previous[1])
+            # Alle Neuzugänge erklären die Differenz: nichts wurde gelöscht
+            if len(new_hashes) != signature[0] - previous[0]:
+                new_hashes = None
+
+        if new_hashes is not None:
+            db_hashes = None
+            missing = [h for h in new_hashes if h not in self.embedding_matrix]
+        else:
+            db_hashes = set(self.local_db.get_reflection_hashes())
+            indexed_hashes = set(self.embedding_matrix.keys())
+            for stale_hash in indexed_hashes - db_hashes:
+                self._remove_embedding(stale_hash)
+            missing = list(db_hashes - indexed_hashes)
+
+        added = 0
+        if missing:
+            stored_hashes, vectors = self.local_db.load_embedding_matrix(
+                self.model_id, self.embedding_matrix.embedding_dim, hashes=missing
+            )
+            for reflection_hash, embedding in zip(stored_hashes, vectors):
+                self._index_embedding(reflection_hash, embedding)
+
+            computed = []
+            for missing_hash in set(missing).difference(stored_hashes):
+                reflection_data = self.local_db.get_reflection_by_hash(missing_hash)
+                if reflection_data:
+                    embedding = self.embed_reflection(reflection_data)
+                    self._index_embedding(missing_hash, embedding)
+                    computed.append((missing_hash, embedding))
+            if computed:
+                self.local_db.store_embeddings(computed, self.model_id)
+            added = len(stored_hashes) + len(computed)
+
+        if db_hashes is None:
+            # Neue Einträge haben Matrix, ANN-Index und kNN-Graph schon erreicht
+            for record in self.local_db.get_reflections_by_hashes(new_hashes):
+                terms = record.themes + record.tags
+                self.suggestions.add_reflection(record.hash, terms)
+        else:
+            self._sync_ann_index()
+            # Danach halten Einfügen und Löschen den Graphen selbst aktuell
+            if previous is None:
+                self._sync_knn_graph()
+            self._sync_suggestions(db_hashes)
+        self._index_signature = signature
+        return added
+
+    def _sync_suggestions(self, db_hashes: set):
+        """Gleicht den Vorschlags-Index mit den Reflexionen ab"""
+        suggestion_hashes = set(self.suggestions.reflection_keys())
+
+        for stale_hash in suggestion_hashes - db_hashes:
+            self.suggestions.remove_reflection(stale_hash)
+
+        missing = list(db_hashes - suggestion_hashes)
+        if missing:
+            self.suggestions.add_reflections(
+                (record.hash, record.themes + record.tags)
+                for record in self.local_db.get_reflections_by_hashes(missing)
+            )
+
+    def _sync_ann_index(self):
+        """Gleicht den ANN-Index mit der Embedding-Matrix ab"""
+        if self.ann_index is None:
+            return
+
+        matrix_hashes = set(self.embedding_matrix.keys())
+        ann_hashes = set(self.ann_index.keys())
+
+        for stale_hash in ann_hashes - matrix_hashes:
+            self.ann_index.remove(stale_hash)
+
+        missing = list(matrix_hashes - ann_hashes)
+        if missing:
+            self.ann_index.add_many(
+                missing, np.stack([self.embedding_matrix.get(h) for h in missing])
+            )
+
+    def _sync_knn_graph(self):
+        """Gleicht den kNN-Graphen mit der Embedding-Matrix ab"""
+        matrix_hashes = set(self.embedding_matrix.keys())
+        graph_hashes = set(self.knn_graph.keys())
+
+        for stale_hash in graph_hashes - matrix_hashes:
+            self.knn_graph.remove(stale_hash)
+
+        for missing_hash in matrix_hashes - graph_hashes:
+            self.knn_graph.insert(
+                missing_hash,
+                self._nearest_neighbours(self.embedding_matrix.get(missing_hash)),
+            )
+
+    def _nearest_neighbours(
+        self, embedding, k: Optional[int] = None
+    ) -> List[Tuple[str, float]]:
+        """Sucht die k nächsten Nachbarn (Cosinus, inkl. Vektor selbst) eines Vektors"""
+        index = self.ann_index if self.ann_index is not None else self.embedding_matrix
+        return index.search(embedding, k=(k or self.knn_graph.k) + 1)
+
     def search_by_text(
         self,
         query_text: str,
@@ -55,70 +364,145 @@ class SemanticSearchEngine:
         Returns:
             List[SearchResult]: Suchergebnisse
         """
-        # Query-Embedding erstellen
-        query_embedding = self.embedding_system.model.encode_text(query_text)
-
-        # Reflexionen aus Datenbank laden
-        db_reflections = self.local_db.get_reflections(
-            limit=1000,  # Große Anzahl für umfassende Suche
-            privacy_level=privacy_filter,
-        )
+        # Query-Embedding erstellen (gecacht)
+        query_embedding = self.encode_query(query_text)
+
+        # Neue oder gelöschte Reflexionen in die Matrix übernehmen
+        self.sync_index()
+
+        # Ähnlichkeit (0-1) auf Cosinus-Schwelle (-1 bis 1) umrechnen
+        min_cosine = 2 * min_similarity - 1
+        filters = ReflectionFilter(date_range=date_range, privacy_level=privacy_filter)
+
+        if filters.is_empty():
+            index = self.ann_index
+            if index is None:
+                index = self.embedding_matrix
+            ranked = index.search(query_embedding, k=limit, min_score=min_cosine)
+        else:
+            # Filter in SQL auswerten, dann nur die Kandidaten bewerten
+            ranked = self.embedding_matrix.search(
+                query_embedding,
+                k=limit,
+                min_score=min_cosine,
+                candidates=self.local_db.get_candidate_hashes(filters),
+            )
 
-        # Datumsfilter anwenden
-        if date_range:
-            start_date, end_date = date_range
-            db_reflections = [
-                r for r in db_reflections if start_date <= r.timestamp <= end_date
-            ]
+        records = self.local_db.get_reflections_by_hashes([h for h, _ in ranked])
+        records_by_hash = {record.hash: record for record in records}
 
         search_results = []
+        for reflection_hash, cosine in ranked:
+            db_reflection = records_by_hash.get(reflection_hash)
+            if db_reflection is None:
+                continue
+
+            # Matching themes finden
+            matching_themes = self._find_matching_themes(
+                query_text, db_reflection.themes
+            )
 
-        for db_reflection in db_reflections:
-            # Reflexion für Embedding vorbereiten
-            reflection_data = {
-                "hash": db_reflection.hash,
-                "content": self.local_db.get_reflection_by_hash(db_reflection.hash)[
-                    "content"
-                ],
-                "themes": db_reflection.themes,
-                "sentiment": db_reflection.sentiment,
-            }
-
-            # Embedding für Reflexion erstellen
-            reflection_embedding_info = (
-                self.embedding_system.create_reflection_embedding(reflection_data)
+            result = SearchResult(
+                reflection_hash=db_reflection.hash,
+                content_preview=db_reflection.content_preview,
+                similarity_score=(cosine + 1) / 2,
+                matching_themes=matching_themes,
+                timestamp=db_reflection.timestamp,
+                privacy_level=db_reflection.privacy_level,
             )
-            reflection_embedding = reflection_embedding_info["combined_embedding"]
 
-            # Ähnlichkeit berechnen
-            similarity = self.embedding_system.compute_similarity(
-                query_embedding.tolist(), reflection_embedding
+            search_results.append(result)
+
+        search_results = search_results[:limit]
+
+        # Suchanfrage speichern
+        self._save_search_query(query_text, len(search_results))
+
+        return search_results
+
+    def search_hybrid(
+        self,
+        query_text: str,
+        limit: int = 10,
+        privacy_filter: str = None,
+        date_range: Tuple[datetime, datetime] = None,
+        rrf_k: int = 60,
+    ) -> List[SearchResult]:
+        """
+        Hybride Suche aus BM25-Stichwortsuche und Embedding-Ähnlichkeit
+
+        Beide Rankings werden per Reciprocal Rank Fusion kombiniert. Der
+        similarity_score ist der RRF-Score relativ zum Höchstwert (0-1).
+
+        Args:
+            query_text: Suchtext
+            limit: Maximale Anzahl Ergebnisse
+            privacy_filter: Filter nach Privacy-Level
+            date_range: Optionaler Datumsbereich
+            rrf_k: Dämpfung der Reciprocal Rank Fusion
+
+        Returns:
+            List[SearchResult]: Suchergebnisse
+        """
+        query_embedding = self.encode_query(query_text)
+        self.sync_index()
+
+        candidates = max(limit * 4, 50)
+        filters = ReflectionFilter(date_range=date_range, privacy_level=privacy_filter)
+        if filters.is_empty():
+            index = self.ann_index
+            if index is None:
+                index = self.embedding_matrix
+            semantic = index.search(query_embedding, k=candidates)
+        else:
+            semantic = self.embedding_matrix.search(
+                query_embedding,
+                k=candidates,
+                candidates=self.local_db.get_candidate_hashes(filters),
             )
+        lexical = self.local_db.text_search(
+            query_text, limit=candidates, privacy_level=privacy_filter
+        )
 
-            if similarity >= min_similarity:
-                # Matching themes finden
-                matching_themes = self._find_matching_themes(
-                    query_text, db_reflection.themes
-                )
+        fused = reciprocal_rank_fusion(
+            [[h for h, _ in semantic], [record.hash for record, _ in lexical]], k=rrf_k
+        )
+        records_by_hash = {record.hash: record for record, _ in lexical}
+        missing = [h for h, _ in fused if h not in records_by_hash]
+        for record in self.local_db.get_reflections_by_hashes(missing):
+            records_by_hash[record.hash] = record
 
-                result = SearchResult(
+        max_score = 2.0 / (rrf_k + 1)
+        search_results = []
+        for reflection_hash, score in fused:
+            db_reflection = records_by_hash.get(reflection_hash)
+            if db_reflection is None:
+                continue
+            if privacy_filter and db_reflection.privacy_level != privacy_filter:
+                continue
+            if date_range and not (
+                date_range[0] <= db_reflection.timestamp <= date_range[1]
+            ):
+                continue
+
+            search_results.append(
+                SearchResult(
                     reflection_hash=db_reflection.hash,
                     content_preview=db_reflection.content_preview,
-                    similarity_score=similarity,
-                    matching_themes=matching_themes,
+                    similarity_score=score / max_score,
+                    matching_themes=self._find_matching_themes(
+                        query_text, db_reflection.themes
+                    ),
                     timestamp=db_reflection.timestamp,
                     privacy_level=db_reflection.privacy_level,
+                    tags=db_reflection.tags,
                 )
+            )
+            if len(search_results) >= limit:
+                break
 
-                search_results.append(result)
-
-        # Nach Ähnlichkeit sortieren
-        search_results.sort(key=lambda x: x.similarity_score, reverse=True)
-
-        # Suchanfrage speichern
         self._save_search_query(query_text, len(search_results))
-
-        return search_results[:limit]
+        return search_results
 
     def search_by_themes(
         self,
@@ -137,39 +521,28 @@ class SemanticSearchEngine:
         Returns:
             List[SearchResult]: Suchergebnisse
         """
-        # Reflexionen aus Datenbank laden
-        db_reflections = self.local_db.get_reflections(limit=1000)
+        if not themes:
+            return []
 
-        # Datumsfilter anwenden
-        if date_range:
-            start_date, end_date = date_range
-            db_reflections = [
-                r for r in db_reflections if start_date <= r.timestamp <= end_date
-            ]
+        # Themen- und Datumsfilter samt Ranking laufen in SQL
+        matches = self.local_db.find_by_themes(
+            themes, limit=limit, filters=ReflectionFilter(date_range=date_range)
+        )
 
         search_results = []
-
-        for db_reflection in db_reflections:
-            # Themen-Überschneidung berechnen
+        for db_reflection, _ in matches:
             common_themes = set(themes) & set(db_reflection.themes)
-            theme_score = len(common_themes) / len(themes) if themes else 0
-
-            if theme_score > 0:
-                result = SearchResult(
-                    reflection_hash=db_reflection.hash,
-                    content_preview=db_reflection.content_preview,
-                    similarity_score=theme_score,
-                    matching_themes=list(common_themes),
-                    timestamp=db_reflection.timestamp,
-                    privacy_level=db_reflection.privacy_level,
-                )
-
-                search_results.append(result)
-
-        # Nach Theme-Score sortieren
-        search_results.sort(key=lambda x: x.similarity_score, reverse=True)
+            result = SearchResult(
+                reflection_hash=db_reflection.hash,
+                content_preview=db_reflection.content_preview,
+                similarity_score=len(common_themes) / len(themes),
+                matching_themes=list(common_themes),
+                timestamp=db_reflection.timestamp,
+                privacy_level=db_reflection.privacy_level,
+            )
+            search_results.append(result)
 
-        return search_results[:limit]
+        return search_results
 
     def search_by_sentiment(
         self,
@@ -188,47 +561,33 @@ class SemanticSearchEngine:
         Returns:
             List[SearchResult]: Suchergebnisse
         """
-        # Reflexionen aus Datenbank laden
-        db_reflections = self.local_db.get_reflections(limit=1000)
-
-        # Datumsfilter anwenden
-        if date_range:
-            start_date, end_date = date_range
-            db_reflections = [
-                r for r in db_reflections if start_date <= r.timestamp <= end_date
-            ]
+        # Sentiment- und Datumsfilter samt Konfidenz-Ranking laufen in SQL
+        matches = self.local_db.find_by_sentiment(
+            sentiment_type, limit=limit, filters=ReflectionFilter(date_range=date_range)
+        )
 
         search_results = []
+        for db_reflection, confidence in matches:
+            result = SearchResult(
+                reflection_hash=db_reflection.hash,
+                content_preview=db_reflection.content_preview,
+                similarity_score=confidence,
+                matching_themes=[],
+                timestamp=db_reflection.timestamp,
+                privacy_level=db_reflection.privacy_level,
+            )
+            search_results.append(result)
 
-        for db_reflection in db_reflections:
-            if db_reflection.sentiment and sentiment_type in db_reflection.sentiment:
-                # Konfidenz aus Sentiment extrahieren
-                try:
-                    confidence_str = db_reflection.sentiment.split("(")[1].split(")")[0]
-                    confidence = float(confidence_str)
-                except (IndexError, ValueError):
-                    confidence = 0.5
-
-                result = SearchResult(
-                    reflection_hash=db_reflection.hash,
-                    content_preview=db_reflection.content_preview,
-                    similarity_score=confidence,
-                    matching_themes=[],
-                    timestamp=db_reflection.timestamp,
-                    privacy_level=db_reflection.privacy_level,
-                )
-
-                search_results.append(result)
-
-        # Nach Konfidenz sortieren
-        search_results.sort(key=lambda x: x.similarity_score, reverse=True)
-
-        return search_results[:limit]
+        return search_results
 
     def search_timeline(self, query_text: str, days_back: int = 30) -> Dict:
         """
         Erstellt eine Timeline-Suche
 
+        Anzahl, Sentiment-Verteilung und Top-Themen je Woche stammen aus den
+        materialisierten Wochen-Rollups; die Anfrage selbst wird nur gegen
+        Reflexionen des angezeigten Zeitraums bewertet.
+
         Args:
             query_text: Suchtext
             days_back: Tage zurück
@@ -239,36 +598,46 @@ class SemanticSearchEngine:
         end_date = datetime.now()
         start_date = end_date - timedelta(days=days_back)
 
+        timeline = {
+            "query": query_text,
+            "period": f"{days_back} Tage",
+            "total_results": 0,
+            "weeks": {},
+        }
+
+        rollups = self.local_db.get_rollups("week", start_date, end_date)
+        if not rollups:
+            return timeline
+
         # Suche in Zeitraum
         results = self.search_by_text(
             query_text, limit=100, min_similarity=0.5, date_range=(start_date, end_date)
         )
+        timeline["total_results"] = len(results)
 
-        # Gruppierung nach Wochen
+        # Gruppierung nach Wochen (ISO-Woche)
         weekly_groups = {}
         for result in results:
-            # Woche berechnen (ISO-Woche)
-            year, week, _ = result.timestamp.isocalendar()
-            week_key = f"{year}-W{week:02d}"
-
-            if week_key not in weekly_groups:
-                weekly_groups[week_key] = []
-
-            weekly_groups[week_key].append(result)
-
-        # Timeline-Struktur erstellen
-        timeline = {
-            "query": query_text,
-            "period": f"{days_back} Tage",
-            "total_results": len(results),
-            "weeks": {},
-        }
+            week_key = iso_week_label(bucket_key("week", result.timestamp))
+            weekly_groups.setdefault(week_key, []).append(result)
+
+        for rollup in rollups:
+            week_key = iso_week_label(rollup["bucket"])
+            week_results = weekly_groups.get(week_key, [])
+            top_themes = sorted(
+                rollup["themes"].items(), key=lambda x: x[1], reverse=True
+            )[:3]
 
-        for week_key, week_results in weekly_groups.items():
             timeline["weeks"][week_key] = {
                 "count": len(week_results),
-                "avg_similarity": np.mean([r.similarity_score for r in week_results]),
-                "top_themes": self._get_top_themes_from_results(week_results),
+                "reflection_count": rollup["reflection_count"],
+                "avg_similarity": (
+                    float(np.mean([r.similarity_score for r in week_results]))
+                    if week_results
+                    else 0.0
+                ),
+                "top_themes": [theme for theme, _ in top_themes],
+                "sentiments": rollup["sentiments"],
                 "results": [
                     {
                         "hash": r.reflection_hash,
@@ -282,46 +651,21 @@ class SemanticSearchEngine:
 
         return timeline
 
-    def get_search_suggestions(self, partial_query: str) -> List[str]:
+    def get_search_suggestions(self, partial_query: str, limit: int = 10) -> List[str]:
         """
         Gibt Suchvorschläge basierend auf partieller Eingabe
 
+        Die Vorschläge kommen aus dem inkrementell gepflegten Präfix-Index
+        über Themen, Tags und frühere Suchanfragen, ohne Datenbankzugriff.
+
         Args:
             partial_query: Teilweise eingegebene Suchanfrage
+            limit: Maximale Anzahl Vorschläge
 
         Returns:
-            List[str]: Suchvorschläge
-        """
-        suggestions = []
-
-        # Vorschläge aus häufigen Themen
-        db_reflections = self.local_db.get_reflections(limit=100)
-        all_themes = []
-        for reflection in db_reflections:
-            all_themes.extend(reflection.themes)
-
-        # Häufigste Themen
-        theme_counts = {}
-        for theme in all_themes:
-            theme_counts[theme] = theme_counts.get(theme, 0) + 1
-
-        # Passende Themen finden
-        for theme, count in sorted(
-            theme_counts.items(), key=lambda x: x[1], reverse=True
-        ):
-            if partial_query.lower() in theme.lower():
-                suggestions.append(theme)
-                if len(suggestions) >= 5:
-                    break
-
-        # Vorschläge aus Suchhistorie
-        for search_query in self.search_history:
-            if partial_query.lower() in search_query["query"].lower():
-                suggestions.append(search_query["query"])
-                if len(suggestions) >= 10:
-                    break
-
-        return list(set(suggestions))  # Duplikate entfernen
+            List[str]: Suchvorschläge, häufigste zuerst
+        """
+        return self.suggestions.suggest(partial_query, limit=limit)
 
     def get_related_reflections(
         self, reflection_hash: str, limit: int = 5
@@ -336,49 +680,41 @@ class SemanticSearchEngine:
         Returns:
             List[SearchResult]: Verwandte Reflexionen
         """
-        # Referenz-Reflexion laden
-        ref_reflection_data = self.local_db.get_reflection_by_hash(reflection_hash)
-        if not ref_reflection_data:
-            return []
+        self.sync_index()
+
+        # Nachbarn aus dem kNN-Graphen; veraltete Knoten werden neu berechnet
+        neighbours = None
+        if limit <= self.knn_graph.k:
+            neighbours = self.knn_graph.neighbours(reflection_hash, limit)
+        if neighbours is None:
+            ref_embedding = self.embedding_matrix.get(reflection_hash)
+            if ref_embedding is None:
+                return []
+            neighbours = self._nearest_neighbours(
+                ref_embedding, k=max(limit, self.knn_graph.k)
+            )
+            self.knn_graph.insert(reflection_hash, neighbours)
 
-        # Alle anderen Reflexionen laden
-        all_reflections = self.local_db.get_reflections(limit=1000)
-        other_reflections = [r for r in all_reflections if r.hash != reflection_hash]
+        # Ähnlichkeit 0.6 (0-1) entspricht Cosinus 0.2
+        min_cosine = 2 * 0.6 - 1
+        ranked = [
+            (related_hash, cosine)
+            for related_hash, cosine in neighbours
+            if related_hash != reflection_hash and cosine >= min_cosine
+        ][:limit]
 
-        # Ähnlichkeit zu Referenz-Reflexion berechnen
-        ref_reflection = {
-            "hash": ref_reflection_data["hash"],
-            "content": ref_reflection_data["content"],
-            "themes": ref_reflection_data["themes"],
-            "sentiment": ref_reflection_data["sentiment"],
-        }
-
-        similar_reflections = self.embedding_system.find_similar_reflections(
-            ref_reflection,
-            [
-                {
-                    "hash": r.hash,
-                    "content": self.local_db.get_reflection_by_hash(r.hash)["content"],
-                    "themes": r.themes,
-                    "sentiment": r.sentiment,
-                }
-                for r in other_reflections
-            ],
-            threshold=0.6,
-        )
+        records = self.local_db.get_reflections_by_hashes([h for h, _ in ranked])
+        records_by_hash = {record.hash: record for record in records}
 
         # In SearchResult-Format konvertieren
         results = []
-        for reflection_data, similarity in similar_reflections[:limit]:
-            db_reflection = next(
-                (r for r in other_reflections if r.hash == reflection_data["hash"]),
-                None,
-            )
+        for related_hash, cosine in ranked:
+            db_reflection = records_by_hash.get(related_hash)
             if db_reflection:
                 result = SearchResult(
                     reflection_hash=db_reflection.hash,
                     content_preview=db_reflection.content_preview,
-                    similarity_score=similarity,
+                    similarity_score=(cosine + 1) / 2,
                     matching_themes=db_reflection.themes,
                     timestamp=db_reflection.timestamp,
                     privacy_level=db_reflection.privacy_level,
@@ -387,6 +723,16 @@ class SemanticSearchEngine:
 
         return results
 
+    def get_topic_clusters(self) -> Dict:
+        """
+        Liefert die Themen-Cluster aller indizierten Reflexionen
+
+        Returns:
+            Dict: cluster_id -> {size, top_themes, representatives}
+        """
+        self.sync_index()
+        return self.clusterer.get_clusters()
+
     def _find_matching_themes(
         self, query_text: str, reflection_themes: List[str]
     ) -> List[str]:
@@ -410,31 +756,6 @@ class SemanticSearchEngine:
 
         return matching_themes
 
-    def _get_top_themes_from_results(self, results: List[SearchResult]) -> List[str]:
-        """
-        Extrahiert die häufigsten Themen aus Suchergebnissen
-
-        Args:
-            results: Suchergebnisse
-
-        Returns:
-            List[str]: Top-Themen
-        """
-        all_themes = []
-        for result in results:
-            all_themes.extend(result.matching_themes)
-
-        theme_counts = {}
-        for theme in all_themes:
-            theme_counts[theme] = theme_counts.get(theme, 0) + 1
-
-        return [
-            theme
-            for theme, _ in sorted(
-                theme_counts.items(), key=lambda x: x[1], reverse=True
-            )[:3]
-        ]
-
     def _save_search_query(self, query: str, result_count: int):
         """
         Speichert Suchanfrage in Historie
@@ -450,6 +771,7 @@ class SemanticSearchEngine:
         }
 
         self.search_history.append(search_entry)
+        self.suggestions.record_query(query)
 
         # Historie begrenzen
         if len(self.search_history) > 100:
@@ -468,35 +790,17 @@ class SemanticSearchEngine:
         """
         print(f"🔍 Suche Reflexionen mit State {state_value} ±{tolerance}")
         
-        db_reflections = self.local_db.get_reflections(limit=200)
+        # Bereichsabfrage über den State-Index
+        records = self.local_db.find_by_state_range(
+            state_value - tolerance, state_value + tolerance
+        )
         results = []
         
-        for db_ref in db_reflections:
-            reflection_data = self.local_db.get_reflection_by_hash(db_ref.hash)
-            if reflection_data and 'state_value' in reflection_data:
-                ref_state = reflection_data['state_value']
-                
-                # Prüfe ob im Toleranzbereich
-                if abs(ref_state - state_value) <= tolerance:
-                    # Ähnlichkeit basierend auf Abstand berechnen
-                    distance = abs(ref_state - state_value)
-                    similarity = 1.0 - (distance / max(tolerance, 1))
-                    
-                    content = reflection_data.get('content', '')
-                    preview = content[:200] + '...' if len(content) > 200 else content
-                    
-                    result = SearchResult(
-                        reflection_hash=db_ref.hash,
-                        content_preview=preview,
-                        similarity_score=similarity,
-                        matching_themes=db_ref.themes,
-                        timestamp=db_ref.timestamp,
-                        privacy_level=reflection_data.get('privacy_level', 'private'),
-                        tags=db_ref.tags,
-                        state_value=ref_state,
-                        state_name=reflection_data.get('state_name', f"State {ref_state}")
-                    )
-                    results.append(result)
+        for db_ref in records:
+            # Ähnlichkeit basierend auf Abstand berechnen
+            distance = abs(db_ref.state_value - state_value)
+            similarity = 1.0 - (distance / max(tolerance, 1))
+            results.append(self._state_result(db_ref, similarity))
         
         # Nach Ähnlichkeit sortieren
         results.sort(key=lambda x: x.similarity_score, reverse=True)
@@ -517,90 +821,79 @@ class SemanticSearchEngine:
         """
         print(f"🔍 Suche Reflexionen zwischen State {min_state} und {max_state}")
         
-        db_reflections = self.local_db.get_reflections(limit=200)
+        # Bereichsabfrage über den State-Index, bereits nach State sortiert
+        records = self.local_db.find_by_state_range(min_state, max_state)
         results = []
         
-        for db_ref in db_reflections:
-            reflection_data = self.local_db.get_reflection_by_hash(db_ref.hash)
-            if reflection_data and 'state_value' in reflection_data:
-                ref_state = reflection_data['state_value']
-                
-                # Prüfe ob im Bereich
-                if min_state <= ref_state <= max_state:
-                    # Relative Position im Bereich als Score
-                    range_size = max_state - min_state
-                    if range_size > 0:
-                        position = (ref_state - min_state) / range_size
-                        similarity = 1.0 - abs(position - 0.5) * 2  # Höher in der Mitte
-                    else:
-                        similarity = 1.0
-                    
-                    content = reflection_data.get('content', '')
-                    preview = content[:200] + '...' if len(content) > 200 else content
-                    
-                    result = SearchResult(
-                        reflection_hash=db_ref.hash,
-                        content_preview=preview,
-                        similarity_score=similarity,
-                        matching_themes=db_ref.themes,
-                        timestamp=db_ref.timestamp,
-                        privacy_level=reflection_data.get('privacy_level', 'private'),
-                        tags=db_ref.tags,
-                        state_value=ref_state,
-                        state_name=reflection_data.get('state_name', f"State {ref_state}")
-                    )
-                    results.append(result)
-        
-        # Nach State-Wert sortieren
-        results.sort(key=lambda x: x.state_value)
+        range_size = max_state - min_state
+        for db_ref in records:
+            # Relative Position im Bereich als Score
+            if range_size > 0:
+                position = (db_ref.state_value - min_state) / range_size
+                similarity = 1.0 - abs(position - 0.5) * 2  # Höher in der Mitte
+            else:
+                similarity = 1.0
+            results.append(self._state_result(db_ref, similarity))
         
         print(f"✅ Gefunden: {len(results)} Reflexionen im Bereich")
         return results
 
+    def _state_result(self, db_ref, similarity: float) -> SearchResult:
+        """Erstellt ein SearchResult mit Zustandsinformationen"""
+        return SearchResult(
+            reflection_hash=db_ref.hash,
+            content_preview=db_ref.content_preview,
+            similarity_score=similarity,
+            matching_themes=db_ref.themes,
+            timestamp=db_ref.timestamp,
+            privacy_level=db_ref.privacy_level,
+            tags=db_ref.tags,
+            state_value=db_ref.state_value,
+            state_name=db_ref.state_name or f"State {db_ref.state_value}",
+        )
+
     def get_state_distribution(self) -> Dict:
         """
         Analysiert die Verteilung der Zustandswerte.
         
+        Alle Kennzahlen werden aus dem Histogramm (eine Aggregat-Abfrage,
+        höchstens 256 Zeilen) abgeleitet.
+
         Returns:
             Dictionary mit Verteilungsstatistiken
         """
-        db_reflections = self.local_db.get_reflections(limit=1000)
-        state_values = []
-        state_counts = {}
+        state_counts = self.local_db.get_state_counts()
         
-        for db_ref in db_reflections:
-            reflection_data = self.local_db.get_reflection_by_hash(db_ref.hash)
-            if reflection_data and 'state_value' in reflection_data:
-                state_value = reflection_data['state_value']
-                state_values.append(state_value)
-                state_counts[state_value] = state_counts.get(state_value, 0) + 1
-        
-        if not state_values:
+        if not state_counts:
             return {"message": "Keine State-Daten verfügbar"}
         
-        # Statistiken berechnen
-        mean_state = np.mean(state_values)
-        std_state = np.std(state_values)
-        min_state = min(state_values)
-        max_state = max(state_values)
+        # Statistiken aus dem Histogramm berechnen
+        values = np.array(list(state_counts.keys()), dtype=np.float64)
+        counts = np.array(list(state_counts.values()), dtype=np.float64)
+        total = int(counts.sum())
+        mean_state = float(np.dot(values, counts) / total)
+        std_state = float(np.sqrt(np.dot(counts, (values - mean_state) ** 2) / total))
         
         # Häufigste States
         top_states = sorted(state_counts.items(), key=lambda x: x[1], reverse=True)[:10]
         
         # Bereiche definieren
+        def count_between(low: int, high: int) -> int:
+            return sum(c for s, c in state_counts.items() if low <= s <= high)
+
         ranges = {
-            "Low (0-63)": sum(1 for s in state_values if 0 <= s <= 63),
-            "Medium-Low (64-127)": sum(1 for s in state_values if 64 <= s <= 127),
-            "Medium-High (128-191)": sum(1 for s in state_values if 128 <= s <= 191),
-            "High (192-255)": sum(1 for s in state_values if 192 <= s <= 255)
+            "Low (0-63)": count_between(0, 63),
+            "Medium-Low (64-127)": count_between(64, 127),
+            "Medium-High (128-191)": count_between(128, 191),
+            "High (192-255)": count_between(192, 255)
         }
         
         return {
-            "total_reflections": len(state_values),
+            "total_reflections": total,
             "mean_state": round(mean_state, 2),
             "std_state": round(std_state, 2),
-            "min_state": min_state,
-            "max_state": max_state,
+            "min_state": min(state_counts),
+            "max_state": max(state_counts),
             "unique_states": len(state_counts),
             "top_states": top_states,
             "range_distribution": ranges,
@@ -633,6 +926,7 @@ class SemanticSearchEngine:
             "top_queries": top_queries,
             "average_results": avg_results,
             "recent_searches": self.search_history[-5:],
+            "query_cache": self.query_cache.get_stats(),
         }
 
 
@@ -0,0 +1,357 @@
+"""
+ASI Core - Suchvorschläge
+Häufigkeitsgewichteter Präfix-Trie über Themen, Tags und Suchanfragen
+"""
+
+import heapq
+import json
+import logging
+import re
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from src.ai.journal import Journal, atomic_write
+
+logger = logging.getLogger(__name__)
+
+_WORD_START = re.compile(r"(?:^|\s)(?=\S)")
+
+
+class _TrieNode:
+    """Knoten mit vorberechneten Top-Begriffen seines Teilbaums"""
+
+    __slots__ = ("children", "terms", "top")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.terms: Set[str] = set()  # Begriffe, deren Pfad hier endet
+        self.top: List[str] = []
+
+
+class SuggestionIndex:
+    """
+    Präfix-Trie für Autovervollständigung
+
+    Jeder Knoten hält die top_k Begriffe seines Teilbaums nach Gewicht, so
+    dass eine Vervollständigung nur den Präfix entlangläuft. Das Gewicht
+    eines Begriffs ist die Anzahl der Reflexionen, die ihn als Thema oder
+    Tag tragen, plus die Anzahl der Suchanfragen mit genau diesem Text.
+    Mehrwortige Begriffe sind zusätzlich ab jedem Wortanfang erreichbar.
+
+    Änderungen aktualisieren nur die Pfade des betroffenen Begriffs. Mit
+    storage_dir wird wie beim KNNGraph ein Snapshot (suggestions.json) plus
+    ein append-only Journal (journal.jsonl) geführt.
+    """
+
+    VERSION = 1
+
+    def __init__(
+        self,
+        top_k: int = 10,
+        storage_dir: Optional[str] = None,
+        journal_compaction: int = 10000,
+    ):
+        self.top_k = top_k
+        self.journal_compaction = journal_compaction
+        self.storage_dir = Path(storage_dir) if storage_dir else None
+
+        self._root = _TrieNode()
+        self._weights: Dict[str, int] = {}
+        self._display: Dict[str, str] = {}
+        self._reflection_terms: Dict[str, List[str]] = {}
+        self._query_counts: Dict[str, int] = {}
+        self._journal: Optional[Journal] = None
+        self._lock = threading.RLock()
+
+        if self.storage_dir:
+            self._journal = Journal(self.storage_dir / "journal.jsonl", "Vorschlags")
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self._weights)
+
+    # === PUBLIC INTERFACE ===
+
+    def reflection_keys(self) -> List[str]:
+        """Gibt die Hashes aller erfassten Reflexionen zurück"""
+        with self._lock:
+            return list(self._reflection_terms)
+
+    def add_reflection(self, key: str, terms: Iterable[str]) -> None:
+        """
+        Erfasst Themen und Tags einer Reflexion (ersetzt frühere Angaben)
+
+        Args:
+            key: Reflexions-Hash
+            terms: Themen und Tags
+        """
+        terms = list(dict.fromkeys(t.strip() for t in terms if t and t.strip()))
+        with self._lock:
+            if self._reflection_terms.get(key) == terms:
+                return
+            self._add_reflection(key, terms)
+            self._journal_append({"op": "add", "key": key, "terms": terms})
+
+    def add_reflections(self, items: Iterable[Tuple[str, Iterable[str]]]) -> None:
+        """
+        Erfasst viele Reflexionen auf einmal
+
+        Statt jeden Pfad einzeln nachzuführen, werden die Gewichte gezählt
+        und der Trie einmal neu aufgebaut; danach wird ein Snapshot geschrieben.
+
+        Args:
+            items: (Reflexions-Hash, Themen und Tags)
+        """
+        with self._lock:
+            for key, terms in items:
+                for term in self._reflection_terms.pop(key, []):
+                    self._count(term, -1)
+                terms = list(dict.fromkeys(t.strip() for t in terms if t and t.strip()))
+                self._reflection_terms[key] = terms
+                for term in terms:
+                    self._count(term, 1)
+            self._build()
+            self.save()
+
+    def remove_reflection(self, key: str) -> bool:
+        """
+        Nimmt die Begriffe einer Reflexion wieder heraus
+
+        Args:
+            key: Reflexions-Hash
+
+        Returns:
+            bool: True wenn die Reflexion erfasst war
+        """
+        with self._lock:
+            if not self._remove_reflection(key):
+                return False
+            self._journal_append({"op": "remove", "key": key})
+            return True
+
+    def record_query(self, query: str) -> None:
+        """
+        Zählt eine ausgeführte Suchanfrage
+
+        Args:
+            query: Suchtext
+        """
+        query = query.strip()
+        if not query:
+            return
+        with self._lock:
+            self._record_query(query)
+            self._journal_append({"op": "query", "text": query})
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[str]:
+        """
+        Liefert die gewichtigsten Begriffe, die mit dem Präfix beginnen
+
+        Args:
+            prefix: Eingegebener Text (Groß-/Kleinschreibung egal)
+            limit: Maximale Anzahl (höchstens top_k)
+
+        Returns:
+            List[str]: Vorschläge absteigend nach Gewicht
+        """
+        with self._lock:
+            node = self._root
+            for char in self._normalize(prefix):
+                node = node.children.get(char)
+                if node is None:
+                    return []
+            return [self._display[term] for term in node.top[:limit]]
+
+    def save(self) -> None:
+        """Schreibt einen Snapshot und leert das Journal"""
+        if not self.storage_dir:
+            return
+        with self._lock:
+            snapshot = {
+                "version": self.VERSION,
+                "reflections": self._reflection_terms,
+                "queries": {
+                    self._display[term]: count
+                    for term, count in self._query_counts.items()
+                },
+            }
+            atomic_write(
+                self._snapshot_file,
+                json.dumps(snapshot, ensure_ascii=False).encode("utf-8"),
+            )
+            self._journal.clear()
+
+    def get_stats(self) -> Dict:
+        """
+        Liefert Kennzahlen des Index
+
+        Returns:
+            Dict: Begriffe, Reflexionen, Suchanfragen, Journal-Länge
+        """
+        with self._lock:
+            return {
+                "terms": len(self._weights),
+                "reflections": len(self._reflection_terms),
+                "queries": sum(self._query_counts.values()),
+                "journal_ops": self._journal.ops if self._journal else 0,
+            }
+
+    # === INTERNAL METHODS ===
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        return " ".join(text.lower().split())
+
+    def _add_reflection(self, key: str, terms: List[str]):
+        self._remove_reflection(key)
+        self._reflection_terms[key] = terms
+        for term in terms:
+            self._change_weight(term, 1)
+
+    def _remove_reflection(self, key: str) -> bool:
+        terms = self._reflection_terms.pop(key, None)
+        if terms is None:
+            return False
+        for term in terms:
+            self._change_weight(term, -1)
+        return True
+
+    def _record_query(self, query: str):
+        term = self._normalize(query)
+        self._query_counts[term] = self._query_counts.get(term, 0) + 1
+        self._change_weight(query, 1)
+
+    def _change_weight(self, text: str, delta: int):
+        """Ändert das Gewicht eines Begriffs und aktualisiert seine Pfade"""
+        term = self._normalize(text)
+        if not term:
+            return
+
+        weight = self._weights.get(term, 0) + delta
+        if weight > 0:
+            self._weights[term] = weight
+            self._display.setdefault(term, " ".join(text.split()))
+        else:
+            self._weights.pop(term, None)
+            self._display.pop(term, None)
+
+        for match in _WORD_START.finditer(term):
+            start = match.end()
+            self._update_path(term[start:], term, weight > 0)
+
+    def _update_path(self, path: str, term: str, present: bool):
+        """Berechnet die Top-Listen entlang eines Pfades von unten neu"""
+        nodes = [self._root]
+        for char in path:
+            child = nodes[-1].children.get(char)
+            if child is None:
+                if not present:
+                    return
+                child = nodes[-1].children[char] = _TrieNode()
+            nodes.append(child)
+
+        if present:
+            nodes[-1].terms.add(term)
+        else:
+            nodes[-1].terms.discard(term)
+
+        for depth in range(len(nodes) - 1, -1, -1):
+            node = nodes[depth]
+            self._compute_top(node)
+            # Leere Knoten abhängen
+            if depth and not node.top:
+                del nodes[depth - 1].children[path[depth - 1]]
+
+    def _compute_top(self, node: _TrieNode):
+        """Top-Begriffe eines Knotens aus eigenen Begriffen und Kind-Listen"""
+        # Weitere Pfade eines geänderten Begriffs sind evtl. noch alt, z.B.
+        # endet "gut gut" auch im Knoten "gut", der auf dem ersten Pfad liegt
+        candidates = {t for t in node.terms if t in self._weights}
+        for child in node.children.values():
+            candidates.update(t for t in child.top if t in self._weights)
+        node.top = heapq.nsmallest(
+            self.top_k, candidates, key=lambda t: (-self._weights[t], t)
+        )
+
+    def _build(self):
+        """Baut den Trie aus den Gewichten vollständig neu auf"""
+        self._root = _TrieNode()
+        for term in self._weights:
+            for match in _WORD_START.finditer(term):
+                node = self._root
+                start = match.end()
+                for char in term[start:]:
+                    node = node.children.setdefault(char, _TrieNode())
+                node.terms.add(term)
+
+        # Post-Order: Kinder vor ihren Eltern
+        stack = [(self._root, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if expanded:
+                self._compute_top(node)
+            else:
+                stack.append((node, True))
+                stack.extend((child, False) for child in node.children.values())
+
+    @property
+    def _snapshot_file(self) -> Path:
+        return self.storage_dir / "suggestions.json"
+
+    def _journal_append(self, record: Dict):
+        """Hängt eine Operation an das Journal an und kompaktiert bei Bedarf"""
+        if self._journal is None:
+            return
+        self._journal.append_json(record)
+        if self._journal.due(self.journal_compaction, len(self._reflection_terms)):
+            self.save()
+
+    def _apply_record(self, record: Dict):
+        """Wendet einen Journal-Record an"""
+        if record.get("op") == "add":
+            self._add_reflection(record["key"], record["terms"])
+        elif record.get("op") == "remove":
+            self._remove_reflection(record["key"])
+        elif record.get("op") == "query":
+            self._record_query(record["text"])
+
+    def _load(self):
+        """Lädt Snapshot und Journal"""
+        self.storage_dir.mkdir(parents=True, exist_ok=True)
+        try:
+            with open(self._snapshot_file, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError) as e:
+            if self._snapshot_file.exists():
+                logger.warning(
+                    f"Vorschlags-Index nicht lesbar, wird neu aufgebaut: {e}"
+                )
+            snapshot = {}
+
+        if snapshot.get("version") != self.VERSION:
+            self.save()
+            return
+
+        # Gewichte direkt zählen und den Trie einmal aufbauen
+        for key, terms in snapshot["reflections"].items():
+            self._reflection_terms[key] = terms
+            for term in terms:
+                self._count(term, 1)
+        for query, count in snapshot["queries"].items():
+            self._query_counts[self._normalize(query)] = count
+            self._count(query, count)
+        self._build()
+        self._journal.replay_json(self._apply_record)
+
+    def _count(self, text: str, delta: int):
+        """Erhöht das Gewicht eines Begriffs ohne den Trie anzufassen"""
+        term = self._normalize(text)
+        if term:
+            weight = self._weights.get(term, 0) + delta
+            if weight > 0:
+                self._weights[term] = weight
+                self._display.setdefault(term, " ".join(text.split()))
+            else:
+                self._weights.pop(term, None)
+                self._display.pop(term, None)
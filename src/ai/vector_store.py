@@ -0,0 +1,674 @@
+"""
+ASI Core - Vector Store
+Persistente, zusammenhängende Embedding-Matrix für schnelle semantische Suche
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from src.ai.journal import atomic_write
+
+# Prozessweite Matrizen pro Speicherverzeichnis (verhindert konkurrierende Writer)
+_SHARED_MATRICES: Dict[str, "EmbeddingMatrix"] = {}
+_SHARED_LOCK = threading.Lock()
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Liefert die Indizes der k höchsten Scores, absteigend sortiert
+
+    Nutzt argpartition (O(N)) und sortiert nur die k Kandidaten.
+
+    Args:
+        scores: Eindimensionales Score-Array
+        k: Anzahl gewünschter Treffer
+
+    Returns:
+        np.ndarray: Indizes der Top-k Scores
+    """
+    n = scores.shape[0]
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.int64)
+    if k < n:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(n)
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+class EmbeddingMatrix:
+    """
+    Float32-Embedding-Matrix mit Hash-Index
+
+    Alle Vektoren liegen normalisiert in einem zusammenhängenden Array, so dass
+    eine Suche aus einem Matrix-Vektor-Produkt und einer Top-k-Partition besteht.
+    Mit storage_dir werden Änderungen inkrementell auf die Festplatte geschrieben:
+
+    - vectors.f32: Rohdaten der Zeilen (float32, row-major)
+    - keys.txt: Reflexions-Hash pro Zeile
+    - meta.json: Dimension und Modell-Kennung
+    """
+
+    VERSION = 1
+
+    # Datentyp der Zeilen im Arbeitsspeicher
+    _storage_dtype = np.float32
+
+    def __init__(
+        self,
+        embedding_dim: int,
+        storage_dir: Optional[str] = None,
+        model_id: str = "",
+        initial_capacity: int = 1024,
+    ):
+        self.embedding_dim = embedding_dim
+        self.model_id = model_id
+        self.storage_dir = Path(storage_dir) if storage_dir else None
+
+        self._vectors = np.zeros(
+            (initial_capacity, embedding_dim), dtype=self._storage_dtype
+        )
+        self._valid = np.zeros(initial_capacity, dtype=bool)
+        self._keys: List[str] = []
+        self._index: Dict[str, int] = {}
+        self._lock = threading.RLock()
+
+        if self.storage_dir:
+            self._load()
+
+    # === PUBLIC INTERFACE ===
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._index
+
+    def keys(self) -> List[str]:
+        """Gibt die gespeicherten Hashes in Zeilenreihenfolge zurück"""
+        with self._lock:
+            return list(self._keys)
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """
+        Gibt den normalisierten Vektor zu einem Hash zurück
+
+        Args:
+            key: Reflexions-Hash
+
+        Returns:
+            Optional[np.ndarray]: Kopie des Vektors oder None
+        """
+        with self._lock:
+            row = self._index.get(key)
+            if row is None:
+                return None
+            return self._full_row(row).copy()
+
+    def add(self, key: str, vector) -> None:
+        """
+        Fügt einen Vektor hinzu oder ersetzt einen bestehenden
+
+        Args:
+            key: Reflexions-Hash
+            vector: Embedding (beliebige Sequenz der Länge embedding_dim)
+        """
+        row_vector, valid = self._normalize(vector)
+
+        with self._lock:
+            row = self._index.get(key)
+            if row is None:
+                row = len(self._keys)
+                self._ensure_capacity(row + 1)
+                self._keys.append(key)
+                self._index[key] = row
+                self._set_row(row, row_vector, valid)
+                self._append_to_disk(key, row_vector)
+            else:
+                self._set_row(row, row_vector, valid)
+                self._write_row_to_disk(row, row_vector)
+
+    def remove(self, key: str) -> bool:
+        """
+        Entfernt einen Vektor (letzte Zeile rückt in die Lücke)
+
+        Args:
+            key: Reflexions-Hash
+
+        Returns:
+            bool: True wenn der Hash vorhanden war
+        """
+        with self._lock:
+            row = self._index.pop(key, None)
+            if row is None:
+                return False
+
+            last = len(self._keys) - 1
+            if row != last:
+                moved_key = self._keys[last]
+                self._write_row_to_disk(row, self._full_row(last))
+                self._move_row(last, row)
+                self._keys[row] = moved_key
+                self._index[moved_key] = row
+
+            self._keys.pop()
+            self._set_row(last, np.zeros(self.embedding_dim, dtype=np.float32), False)
+            self._truncate_disk()
+            return True
+
+    def scores(self, query_vector) -> np.ndarray:
+        """
+        Berechnet die Cosinus-Ähnlichkeit der Query zu allen Zeilen
+
+        Nullvektoren (Zeile oder Query) erhalten den Score -1.0.
+
+        Args:
+            query_vector: Query-Embedding
+
+        Returns:
+            np.ndarray: Scores in Zeilenreihenfolge
+        """
+        query, query_valid = self._normalize(query_vector)
+
+        with self._lock:
+            n = len(self._keys)
+            if not query_valid:
+                return np.full(n, -1.0, dtype=np.float32)
+            scores = self._vectors[:n] @ query
+            scores[~self._valid[:n]] = -1.0
+            return scores
+
+    def search(
+        self,
+        query_vector,
+        k: Optional[int] = 10,
+        min_score: Optional[float] = None,
+        candidates: Optional[Iterable[str]] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        Sucht die ähnlichsten Vektoren
+
+        Args:
+            query_vector: Query-Embedding
+            k: Maximale Anzahl Treffer (None = alle)
+            min_score: Optionale Mindest-Cosinus-Ähnlichkeit
+            candidates: Optional nur diese Hashes bewerten (vorgefilterte Suche)
+
+        Returns:
+            List[Tuple[str, float]]: (Hash, Cosinus-Ähnlichkeit), absteigend sortiert
+        """
+        if candidates is not None:
+            return self._search_candidates(query_vector, candidates, k, min_score)
+
+        with self._lock:
+            scores = self.scores(query_vector)
+
+            if min_score is not None:
+                candidates = np.flatnonzero(scores >= min_score)
+            else:
+                candidates = np.arange(scores.shape[0])
+
+            limit = candidates.shape[0] if k is None else k
+            order = candidates[top_k_indices(scores[candidates], limit)]
+            keys = self._keys
+            return [(keys[i], float(scores[i])) for i in order]
+
+    def clear(self) -> None:
+        """Entfernt alle Vektoren (auch auf der Festplatte)"""
+        with self._lock:
+            self._keys = []
+            self._index = {}
+            self._vectors[:] = 0.0
+            self._valid[:] = False
+            if self.storage_dir:
+                self._reset_storage()
+
+    # === INTERNAL METHODS ===
+
+    def _search_candidates(
+        self,
+        query_vector,
+        candidates: Iterable[str],
+        k: Optional[int],
+        min_score: Optional[float],
+    ) -> List[Tuple[str, float]]:
+        """Bewertet nur die Zeilen der Kandidaten exakt (Kosten ~ Kandidatenzahl)"""
+        query, query_valid = self._normalize(query_vector)
+
+        with self._lock:
+            index = self._index
+            rows = np.fromiter(
+                (index[key] for key in candidates if key in index), dtype=np.int64
+            )
+            if rows.size == 0:
+                return []
+
+            if query_valid:
+                scores = self._full_rows(rows) @ query
+                scores[~self._valid[rows]] = -1.0
+            else:
+                scores = np.full(rows.size, -1.0, dtype=np.float32)
+
+            if min_score is not None:
+                keep = scores >= min_score
+                rows, scores = rows[keep], scores[keep]
+
+            limit = rows.shape[0] if k is None else k
+            order = top_k_indices(scores, limit)
+            return [(self._keys[rows[i]], float(scores[i])) for i in order]
+
+    def _normalize(self, vector) -> Tuple[np.ndarray, bool]:
+        """Konvertiert zu float32 und normalisiert auf Einheitslänge"""
+        array = np.asarray(vector, dtype=np.float32).reshape(-1)
+        if array.shape[0] != self.embedding_dim:
+            raise ValueError(
+                f"Embedding-Dimension {array.shape[0]} != {self.embedding_dim}"
+            )
+        norm = float(np.linalg.norm(array))
+        if norm == 0.0:
+            return np.zeros(self.embedding_dim, dtype=np.float32), False
+        return array / norm, True
+
+    def _set_row(self, row: int, row_vector: np.ndarray, valid: bool):
+        """Schreibt eine normalisierte Zeile in den Speicher"""
+        self._vectors[row] = row_vector
+        self._valid[row] = valid
+
+    def _move_row(self, source: int, target: int):
+        """Kopiert eine Zeile an eine andere Position"""
+        self._vectors[target] = self._vectors[source]
+        self._valid[target] = self._valid[source]
+
+    def _full_row(self, row: int) -> np.ndarray:
+        """Gibt eine Zeile in voller Genauigkeit (float32) zurück"""
+        return self._full_rows(np.array([row]))[0]
+
+    def _full_rows(self, rows: np.ndarray) -> np.ndarray:
+        """Gibt mehrere Zeilen in voller Genauigkeit (float32) zurück"""
+        return self._vectors[rows]
+
+    def _load_rows(self, vectors: np.ndarray):
+        """Übernimmt geladene Zeilen (float32, normalisiert) in den Speicher"""
+        count = vectors.shape[0]
+        self._vectors[:count] = vectors
+        self._valid[:count] = np.any(vectors != 0.0, axis=1)
+
+    def _ensure_capacity(self, required: int):
+        """Vergrößert die Matrix bei Bedarf (amortisiert O(1))"""
+        capacity = self._vectors.shape[0]
+        if required <= capacity:
+            return
+
+        new_capacity = max(required, capacity * 2, 16)
+        vectors = np.zeros(
+            (new_capacity, self.embedding_dim), dtype=self._storage_dtype
+        )
+        vectors[:capacity] = self._vectors
+        valid = np.zeros(new_capacity, dtype=bool)
+        valid[:capacity] = self._valid
+        self._vectors = vectors
+        self._valid = valid
+
+    @property
+    def _vectors_file(self) -> Path:
+        return self.storage_dir / "vectors.f32"
+
+    @property
+    def _keys_file(self) -> Path:
+        return self.storage_dir / "keys.txt"
+
+    @property
+    def _meta_file(self) -> Path:
+        return self.storage_dir / "meta.json"
+
+    def _load(self):
+        """Lädt Matrix von der Festplatte oder legt den Speicher neu an"""
+        self.storage_dir.mkdir(parents=True, exist_ok=True)
+
+        meta = {}
+        if self._meta_file.exists():
+            try:
+                with open(self._meta_file, "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                meta = {}
+
+        compatible = (
+            meta.get("version") == self.VERSION
+            and meta.get("embedding_dim") == self.embedding_dim
+            and meta.get("model_id") == self.model_id
+        )
+        if not compatible or not self._keys_file.exists():
+            self._reset_storage()
+            return
+
+        with open(self._keys_file, "r", encoding="utf-8") as f:
+            keys = [line.rstrip("\n") for line in f if line.strip()]
+
+        row_bytes = self.embedding_dim * 4
+        stored_rows = (
+            self._vectors_file.stat().st_size // row_bytes
+            if self._vectors_file.exists()
+            else 0
+        )
+
+        # Nur vollständig geschriebene Zeilen übernehmen
+        count = min(len(keys), stored_rows)
+        self._ensure_capacity(count)
+        if count:
+            vectors = np.memmap(
+                self._vectors_file,
+                dtype=np.float32,
+                mode="r",
+                shape=(count, self.embedding_dim),
+            )
+            self._load_rows(vectors)
+            del vectors
+        self._keys = keys[:count]
+        self._index = {key: row for row, key in enumerate(self._keys)}
+
+        if count != len(keys) or count != stored_rows:
+            self._rewrite_storage()
+
+    def _reset_storage(self):
+        """Legt leere Speicherdateien mit aktuellen Metadaten an"""
+        self.storage_dir.mkdir(parents=True, exist_ok=True)
+        meta = {
+            "version": self.VERSION,
+            "embedding_dim": self.embedding_dim,
+            "model_id": self.model_id,
+        }
+        atomic_write(self._meta_file, json.dumps(meta).encode("utf-8"))
+        atomic_write(self._vectors_file, b"")
+        atomic_write(self._keys_file, b"")
+
+    def _rewrite_storage(self):
+        """Schreibt Vektoren und Schlüssel vollständig neu"""
+        n = len(self._keys)
+        atomic_write(self._vectors_file, self._full_rows(np.arange(n)).tobytes())
+        atomic_write(
+            self._keys_file,
+            "".join(f"{key}\n" for key in self._keys).encode("utf-8"),
+        )
+
+    def _append_to_disk(self, key: str, row_vector: np.ndarray):
+        """Hängt eine neue Zeile an (Vektor zuerst, dann Schlüssel)"""
+        if not self.storage_dir:
+            return
+        with open(self._vectors_file, "ab") as f:
+            f.write(row_vector.tobytes())
+        with open(self._keys_file, "a", encoding="utf-8") as f:
+            f.write(f"{key}\n")
+
+    def _write_row_to_disk(self, row: int, row_vector: np.ndarray):
+        """Überschreibt eine bestehende Zeile an ihrer Position"""
+        if not self.storage_dir:
+            return
+        with open(self._vectors_file, "r+b") as f:
+            f.seek(row * self.embedding_dim * 4)
+            f.write(np.asarray(row_vector, dtype=np.float32).tobytes())
+
+    def _truncate_disk(self):
+        """Kürzt die Dateien nach dem Entfernen einer Zeile"""
+        if not self.storage_dir:
+            return
+        with open(self._vectors_file, "r+b") as f:
+            f.truncate(len(self._keys) * self.embedding_dim * 4)
+        atomic_write(
+            self._keys_file,
+            "".join(f"{key}\n" for key in self._keys).encode("utf-8"),
+        )
+
+
+class QuantizedEmbeddingMatrix(EmbeddingMatrix):
+    """
+    Embedding-Matrix mit kompakten Codes (int8 oder float16) im Arbeitsspeicher
+
+    Gesucht wird auf den Codes (int8 mit Skalierungsfaktor pro Vektor), die
+    besten k * rescore_factor Kandidaten werden anschließend in voller
+    Genauigkeit neu bewertet. Die float32-Zeilen liegen dafür in vectors.f32
+    und werden nur für die Kandidaten per Memory-Map gelesen; ohne
+    storage_dir bleibt eine float32-Kopie im Speicher.
+
+    Das Dateiformat ist identisch mit EmbeddingMatrix.
+    """
+
+    CODECS = {"int8": np.int8, "float16": np.float16}
+
+    # Zeilen pro Block beim Dekodieren (begrenzt temporären Speicher)
+    SCORE_BLOCK_ROWS = 16384
+
+    def __init__(
+        self,
+        embedding_dim: int,
+        storage_dir: Optional[str] = None,
+        model_id: str = "",
+        initial_capacity: int = 1024,
+        codec: str = "int8",
+        rescore_factor: int = 4,
+    ):
+        if codec not in self.CODECS:
+            raise ValueError(f"Unbekannter Codec: {codec}")
+        self.codec = codec
+        self.rescore_factor = rescore_factor
+        self._storage_dtype = self.CODECS[codec]
+        self._scales = np.zeros(initial_capacity, dtype=np.float32)
+        self._full = (
+            None
+            if storage_dir
+            else np.zeros((initial_capacity, embedding_dim), dtype=np.float32)
+        )
+        super().__init__(embedding_dim, storage_dir, model_id, initial_capacity)
+
+    # === PUBLIC INTERFACE ===
+
+    def scores(self, query_vector) -> np.ndarray:
+        """
+        Berechnet approximative Cosinus-Ähnlichkeiten auf den Codes
+
+        Args:
+            query_vector: Query-Embedding
+
+        Returns:
+            np.ndarray: Approximative Scores in Zeilenreihenfolge
+        """
+        query, query_valid = self._normalize(query_vector)
+
+        with self._lock:
+            n = len(self._keys)
+            if not query_valid:
+                return np.full(n, -1.0, dtype=np.float32)
+
+            scores = np.empty(n, dtype=np.float32)
+            for start in range(0, n, self.SCORE_BLOCK_ROWS):
+                end = min(n, start + self.SCORE_BLOCK_ROWS)
+                block = self._vectors[start:end].astype(np.float32)
+                scores[start:end] = block @ query
+            if self.codec == "int8":
+                scores *= self._scales[:n]
+            scores[~self._valid[:n]] = -1.0
+            return scores
+
+    def search(
+        self,
+        query_vector,
+        k: Optional[int] = 10,
+        min_score: Optional[float] = None,
+        candidates: Optional[Iterable[str]] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        Sucht auf den Codes und bewertet die Kandidaten exakt neu
+
+        Args:
+            query_vector: Query-Embedding
+            k: Maximale Anzahl Treffer (None = alle über min_score)
+            min_score: Optionale Mindest-Cosinus-Ähnlichkeit (exakt geprüft)
+            candidates: Optional nur diese Hashes bewerten (exakt, ohne Codes)
+
+        Returns:
+            List[Tuple[str, float]]: (Hash, exakte Cosinus-Ähnlichkeit), absteigend
+        """
+        if candidates is not None:
+            return self._search_candidates(query_vector, candidates, k, min_score)
+
+        query, query_valid = self._normalize(query_vector)
+        if not query_valid:
+            return super().search(query_vector, k=k, min_score=min_score)
+
+        with self._lock:
+            approx = self.scores(query)
+            n = approx.shape[0]
+
+            if k is None:
+                # Quantisierungsfehler bei der Vorauswahl großzügig abfangen
+                slack = 0.05
+                threshold = -1.0 if min_score is None else min_score - slack
+                candidates = np.flatnonzero(approx >= threshold)
+            else:
+                candidates = top_k_indices(approx, min(n, k * self.rescore_factor))
+
+            if candidates.size == 0:
+                return []
+
+            exact = self._full_rows(candidates) @ query
+            exact[~self._valid[candidates]] = -1.0
+            if min_score is not None:
+                keep = exact >= min_score
+                candidates, exact = candidates[keep], exact[keep]
+
+            limit = candidates.shape[0] if k is None else k
+            order = top_k_indices(exact, limit)
+            return [(self._keys[candidates[i]], float(exact[i])) for i in order]
+
+    def get_memory_stats(self) -> Dict:
+        """
+        Liefert den Speicherbedarf der Codes im Vergleich zu float32
+
+        Returns:
+            Dict: Bytes der Codes und Skalierungen sowie float32-Äquivalent
+        """
+        n = len(self._keys)
+        code_bytes = n * self.embedding_dim * np.dtype(self._storage_dtype).itemsize
+        return {
+            "codec": self.codec,
+            "vectors": n,
+            "code_bytes": code_bytes + n * self._scales.itemsize,
+            "float32_bytes": n * self.embedding_dim * 4,
+        }
+
+    # === INTERNAL METHODS ===
+
+    def _encode(self, row_vector: np.ndarray) -> Tuple[np.ndarray, float]:
+        """Quantisiert eine normalisierte Zeile"""
+        if self.codec == "float16":
+            return row_vector.astype(np.float16), 1.0
+        peak = float(np.max(np.abs(row_vector)))
+        if peak == 0.0:
+            return np.zeros(self.embedding_dim, dtype=np.int8), 0.0
+        scale = peak / 127.0
+        return np.round(row_vector / scale).astype(np.int8), scale
+
+    def _set_row(self, row: int, row_vector: np.ndarray, valid: bool):
+        self._vectors[row], self._scales[row] = self._encode(row_vector)
+        self._valid[row] = valid
+        if self._full is not None:
+            self._full[row] = row_vector
+
+    def _move_row(self, source: int, target: int):
+        super()._move_row(source, target)
+        self._scales[target] = self._scales[source]
+        if self._full is not None:
+            self._full[target] = self._full[source]
+
+    def _full_rows(self, rows: np.ndarray) -> np.ndarray:
+        """Liest Zeilen in voller Genauigkeit (Speicher oder Memory-Map)"""
+        if self._full is not None:
+            return self._full[rows]
+        vectors = np.memmap(
+            self._vectors_file,
+            dtype=np.float32,
+            mode="r",
+            shape=(len(self._keys), self.embedding_dim),
+        )
+        try:
+            return np.array(vectors[rows])
+        finally:
+            del vectors
+
+    def _load_rows(self, vectors: np.ndarray):
+        count = vectors.shape[0]
+        for start in range(0, count, self.SCORE_BLOCK_ROWS):
+            end = min(start + self.SCORE_BLOCK_ROWS, count)
+            block = np.asarray(vectors[start:end])
+            if self.codec == "float16":
+                self._vectors[start:end] = block.astype(np.float16)
+                self._scales[start:end] = 1.0
+            else:
+                peaks = np.max(np.abs(block), axis=1)
+                scales = np.where(peaks > 0, peaks / 127.0, 1.0).astype(np.float32)
+                self._vectors[start:end] = np.round(block / scales[:, None])
+                self._scales[start:end] = np.where(peaks > 0, scales, 0.0)
+            self._valid[start:end] = np.any(block != 0.0, axis=1)
+
+    def _ensure_capacity(self, required: int):
+        capacity = self._vectors.shape[0]
+        if required > capacity:
+            new_capacity = max(required, capacity * 2, 16)
+            scales = np.zeros(new_capacity, dtype=np.float32)
+            scales[:capacity] = self._scales[:capacity]
+            self._scales = scales
+            if self._full is not None:
+                full = np.zeros((new_capacity, self.embedding_dim), dtype=np.float32)
+                full[:capacity] = self._full[:capacity]
+                self._full = full
+        super()._ensure_capacity(required)
+
+
+def get_shared_matrix(
+    storage_dir: str,
+    embedding_dim: int,
+    model_id: str = "",
+    quantization: Optional[str] = None,
+) -> EmbeddingMatrix:
+    """
+    Liefert die prozessweite Matrix für ein Speicherverzeichnis
+
+    Mehrere Suchmaschinen im selben Prozess teilen sich so eine Instanz,
+    statt parallel an dieselben Dateien anzuhängen.
+
+    Args:
+        storage_dir: Speicherverzeichnis der Matrix
+        embedding_dim: Embedding-Dimension
+        model_id: Kennung des Embedding-Modells
+        quantization: Optional "int8" oder "float16" (QuantizedEmbeddingMatrix)
+
+    Returns:
+        EmbeddingMatrix: Geteilte Instanz
+    """
+    key = os.path.abspath(storage_dir)
+    with _SHARED_LOCK:
+        matrix = _SHARED_MATRICES.get(key)
+        if (
+            matrix is None
+            or matrix.embedding_dim != embedding_dim
+            or matrix.model_id != model_id
+            or getattr(matrix, "codec", None) != quantization
+        ):
+            if quantization:
+                matrix = QuantizedEmbeddingMatrix(
+                    embedding_dim,
+                    storage_dir=storage_dir,
+                    model_id=model_id,
+                    codec=quantization,
+                )
+            else:
+                matrix = EmbeddingMatrix(
+                    embedding_dim, storage_dir=storage_dir, model_id=model_id
+                )
+            _SHARED_MATRICES[key] = matrix
+        return matrix
@@ -11,11 +11,23 @@ from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional
 
+import numpy as np
+
+from .hamming import (
+    BinaryQuantizedIndex,
+    binary_quantize,
+    hamming_distances,
+    hamming_top_k,
+    pack_embeddings,
+)
+
 logger = logging.getLogger(__name__)
 
 __all__ = [
     'ASIEmbeddingGenerator',
-    'ASISemanticSearch'
+    'ASISemanticSearch',
+    'BinaryQuantizedIndex',
+    'binary_quantize'
 ]
 
 
@@ -97,6 +109,12 @@ class ASISemanticSearch:
         else:
             self.cache_file = Path(cache_file)
             
+        # Gepackte Embedding-Matrix (uint64) für die Popcount-Suche
+        words = (self.embedding_generator.embedding_size + 7) // 8
+        self._packed = np.zeros((0, words), dtype=np.uint64)
+        self._packed_cids: List[str] = []
+        self._packed_rows: Dict[str, int] = {}
+
         # Lade bestehenden Cache
         self._load_cache()
         
@@ -117,6 +135,43 @@ class ASISemanticSearch:
             self.cache = {}
             self.metadata = {}
             
+        self._rebuild_packed()
+
+    def _rebuild_packed(self):
+        """Parst die Hex-Embeddings einmalig in die gepackte Matrix."""
+        cids = []
+        embeddings = []
+        for cid, entry in self.cache.items():
+            try:
+                embeddings.append(bytes.fromhex(entry['embedding']))
+                cids.append(cid)
+            except Exception as e:
+                logger.warning(f"Fehler bei CID {cid}: {e}")
+
+        self._packed = pack_embeddings(
+            embeddings, self.embedding_generator.embedding_size
+        )
+        self._packed_cids = cids
+        self._packed_rows = {cid: row for row, cid in enumerate(cids)}
+
+    def _update_packed(self, cid: str, embedding: bytes):
+        """Fügt ein Embedding in die gepackte Matrix ein oder ersetzt es."""
+        packed_row = pack_embeddings(
+            [embedding], self.embedding_generator.embedding_size
+        )
+        row = self._packed_rows.get(cid)
+        if row is None:
+            # Amortisiert wachsender Puffer, genutzt wird nur [:len(cids)]
+            row = len(self._packed_cids)
+            if row >= self._packed.shape[0]:
+                capacity = max(16, row * 2)
+                grown = np.zeros((capacity, self._packed.shape[1]), dtype=np.uint64)
+                grown[:row] = self._packed[:row]
+                self._packed = grown
+            self._packed_cids.append(cid)
+            self._packed_rows[cid] = row
+        self._packed[row] = packed_row[0]
+
     def _save_cache(self):
         """Speichert den Embedding Cache auf die Festplatte."""
         try:
@@ -157,6 +212,8 @@ class ASISemanticSearch:
             'size_bytes': len(embedding)
         }
         
+        self._update_packed(cid, embedding)
+
         # Aktualisiere Metadaten
         self.metadata['total_embeddings'] = len(self.cache)
         self.metadata['last_added'] = cid
@@ -180,32 +237,27 @@ class ASISemanticSearch:
             
         # Generiere Query Embedding
         query_embedding = self.embedding_generator.generate_embedding(query)
+        query_packed = pack_embeddings(
+            [query_embedding], self.embedding_generator.embedding_size
+        )[0]
         
-        results = []
+        # Hamming Top-k über alle Embeddings in einem XOR/Popcount-Durchgang
+        size = len(self._packed_cids)
+        rows, distances = hamming_top_k(self._packed[:size], query_packed, num_results)
         
-        for cid, entry in self.cache.items():
-            try:
-                # Konvertiere hex string zurück zu bytes
-                stored_embedding = bytes.fromhex(entry['embedding'])
-                
-                # Berechne Similarity (vereinfacht: Hamming Distance)
-                similarity = self._calculate_similarity(query_embedding, stored_embedding)
-                
-                results.append({
-                    'cid': cid,
-                    'similarity': similarity,
-                    'text_preview': entry['text_preview'],
-                    'created_at': entry['created_at']
-                })
-                
-            except Exception as e:
-                logger.warning(f"Fehler bei CID {cid}: {e}")
-                continue
-        
-        # Sortiere nach Similarity (höher = ähnlicher)
-        results.sort(key=lambda x: x['similarity'], reverse=True)
-        
-        return results[:num_results]
+        total_bits = self.embedding_generator.embedding_size * 8
+        results = []
+        for row, distance in zip(rows, distances):
+            cid = self._packed_cids[row]
+            entry = self.cache[cid]
+            results.append({
+                'cid': cid,
+                'similarity': 1.0 - float(distance) / total_bits,
+                'text_preview': entry['text_preview'],
+                'created_at': entry['created_at']
+            })
+
+        return results
     
     def _calculate_similarity(self, embedding1: bytes, embedding2: bytes) -> float:
         """
@@ -221,13 +273,12 @@ class ASISemanticSearch:
         if len(embedding1) != len(embedding2):
             return 0.0
             
-        # Hamming Distance basierte Similarity
-        matching_bits = sum(
-            bin(b1 ^ b2).count('0') for b1, b2 in zip(embedding1, embedding2)
-        )
+        # Hamming Distance basierte Similarity (Anteil übereinstimmender Bits)
+        packed = pack_embeddings([embedding1, embedding2], len(embedding1))
+        distance = int(hamming_distances(packed[:1], packed[1])[0])
         
         total_bits = len(embedding1) * 8
-        similarity = matching_bits / total_bits
+        similarity = (total_bits - distance) / total_bits
         
         return similarity
     
@@ -239,7 +290,7 @@ class ASISemanticSearch:
             Dictionary mit Cache-Statistiken
         """
         total_size = sum(
-            len(bytes.fromhex(entry['embedding'])) 
+            entry.get('size_bytes', len(entry['embedding']) // 2)
             for entry in self.cache.values()
         )
         
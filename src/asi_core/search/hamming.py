@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+ASI Core - Hamming Search
+Bit-gepackte Embeddings (uint64) mit vektorisierter XOR/Popcount-Suche
+"""
+
+import logging
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "pack_embeddings",
+    "popcount",
+    "hamming_distances",
+    "hamming_top_k",
+    "binary_quantize",
+    "BinaryQuantizedIndex",
+]
+
+# Bitanzahl pro Byte für NumPy-Versionen ohne np.bitwise_count
+_POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def pack_embeddings(embeddings: Sequence[bytes], embedding_size: int) -> np.ndarray:
+    """
+    Packt Byte-Embeddings in eine uint64-Matrix.
+
+    Args:
+        embeddings: Embeddings gleicher Länge
+        embedding_size: Länge in Bytes (wird auf 8 Bytes aufgefüllt)
+
+    Returns:
+        Matrix der Form (n, ceil(embedding_size / 8)) vom Typ uint64
+    """
+    words = (embedding_size + 7) // 8
+    buffer = np.zeros((len(embeddings), words * 8), dtype=np.uint8)
+    for row, embedding in enumerate(embeddings):
+        buffer[row, : len(embedding)] = np.frombuffer(embedding, dtype=np.uint8)
+    return buffer.view(np.uint64)
+
+
+def popcount(words: np.ndarray) -> np.ndarray:
+    """
+    Zählt gesetzte Bits pro Zeile einer uint64-Matrix.
+
+    Args:
+        words: Matrix (n, w) vom Typ uint64
+
+    Returns:
+        Anzahl gesetzter Bits pro Zeile
+    """
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(words).sum(axis=1, dtype=np.int64)
+
+    as_bytes = np.ascontiguousarray(words).view(np.uint8)
+    return _POPCOUNT_TABLE[as_bytes].sum(axis=1, dtype=np.int64)
+
+
+def hamming_distances(packed: np.ndarray, query: np.ndarray) -> np.ndarray:
+    """
+    Berechnet die Hamming-Distanz der Query zu allen Zeilen in einem Durchgang.
+
+    Args:
+        packed: Gepackte Embeddings (n, w) uint64
+        query: Gepackte Query (w,) uint64
+
+    Returns:
+        Distanzen (Anzahl unterschiedlicher Bits) pro Zeile
+    """
+    return popcount(np.bitwise_xor(packed, query))
+
+
+def hamming_top_k(
+    packed: np.ndarray, query: np.ndarray, k: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Findet die k Zeilen mit der kleinsten Hamming-Distanz.
+
+    Args:
+        packed: Gepackte Embeddings (n, w) uint64
+        query: Gepackte Query (w,) uint64
+        k: Anzahl Treffer
+
+    Returns:
+        (Zeilenindizes, Distanzen), aufsteigend nach Distanz
+    """
+    n = packed.shape[0]
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    distances = hamming_distances(packed, query)
+    if k < n:
+        candidates = np.argpartition(distances, k - 1)[:k]
+    else:
+        candidates = np.arange(n)
+    order = candidates[np.argsort(distances[candidates], kind="stable")]
+    return order, distances[order]
+
+
+def binary_quantize(vectors) -> np.ndarray:
+    """
+    Binäre Quantisierung von Float-Vektoren (ein Vorzeichenbit pro Dimension).
+
+    Args:
+        vectors: Float-Matrix (n, dim) oder einzelner Vektor (dim,)
+
+    Returns:
+        Gepackte Vorzeichenbits (n, ceil(dim / 64)) uint64
+    """
+    matrix = np.asarray(vectors, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+
+    bits = np.packbits(matrix > 0, axis=1)
+    words = (matrix.shape[1] + 63) // 64
+    buffer = np.zeros((matrix.shape[0], words * 8), dtype=np.uint8)
+    buffer[:, : bits.shape[1]] = bits
+    return buffer.view(np.uint64)
+
+
+class BinaryQuantizedIndex:
+    """
+    Float-Vektorindex mit binärem Hamming-Vorfilter und exakter Nachbewertung.
+
+    Jeder Vektor wird zusätzlich als Vorzeichenbit-Code gespeichert. Eine
+    Suche wählt per Popcount die k * oversample Kandidaten mit der kleinsten
+    Hamming-Distanz und bewertet nur diese mit der exakten Cosinus-Ähnlichkeit.
+    Die Schnittstelle (add, add_many, remove, keys, search) entspricht den
+    übrigen Vektorindizes und kann z.B. als ann_index übergeben werden.
+    """
+
+    def __init__(
+        self, embedding_dim: int, oversample: int = 8, initial_capacity: int = 1024
+    ):
+        """
+        Initialisiert den Index.
+
+        Args:
+            embedding_dim: Dimension der Float-Vektoren
+            oversample: Faktor für die Kandidatenmenge des Vorfilters
+            initial_capacity: Anfangskapazität in Zeilen
+        """
+        self.embedding_dim = embedding_dim
+        self.oversample = oversample
+
+        words = (embedding_dim + 63) // 64
+        self._codes = np.zeros((initial_capacity, words), dtype=np.uint64)
+        self._vectors = np.zeros((initial_capacity, embedding_dim), dtype=np.float32)
+        self._keys: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._rows
+
+    def keys(self) -> List[str]:
+        """Gibt alle indizierten Schlüssel zurück."""
+        with self._lock:
+            return list(self._keys)
+
+    def add(self, key: str, vector) -> None:
+        """
+        Fügt einen Vektor ein oder ersetzt einen bestehenden.
+
+        Args:
+            key: Schlüssel (z.B. CID oder Reflexions-Hash)
+            vector: Float-Embedding
+        """
+        self.add_many([key], [vector])
+
+    def add_many(self, keys: Sequence[str], vectors) -> None:
+        """
+        Fügt mehrere Vektoren in einem Durchgang ein.
+
+        Args:
+            keys: Schlüssel
+            vectors: Float-Matrix in gleicher Reihenfolge
+        """
+        matrix = np.array(vectors, dtype=np.float32, ndmin=2)
+        if matrix.shape[1] != self.embedding_dim:
+            raise ValueError(
+                f"Embedding-Dimension {matrix.shape[1]} != {self.embedding_dim}"
+            )
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        codes = binary_quantize(matrix)
+
+        with self._lock:
+            for key, vector, code in zip(keys, matrix, codes):
+                row = self._rows.get(key)
+                if row is None:
+                    row = len(self._keys)
+                    self._ensure_capacity(row + 1)
+                    self._keys.append(key)
+                    self._rows[key] = row
+                self._vectors[row] = vector
+                self._codes[row] = code
+
+    def remove(self, key: str) -> bool:
+        """
+        Entfernt einen Vektor (letzte Zeile rückt nach).
+
+        Args:
+            key: Schlüssel
+
+        Returns:
+            True wenn der Schlüssel vorhanden war
+        """
+        with self._lock:
+            row = self._rows.pop(key, None)
+            if row is None:
+                return False
+            last = len(self._keys) - 1
+            if row != last:
+                moved_key = self._keys[last]
+                self._vectors[row] = self._vectors[last]
+                self._codes[row] = self._codes[last]
+                self._keys[row] = moved_key
+                self._rows[moved_key] = row
+            self._keys.pop()
+            return True
+
+    def search(
+        self, query_vector, k: int = 10, min_score: Optional[float] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Sucht per Hamming-Vorfilter und exakter Cosinus-Nachbewertung.
+
+        Args:
+            query_vector: Float-Query
+            k: Anzahl Treffer
+            min_score: Optionale Mindest-Cosinus-Ähnlichkeit
+
+        Returns:
+            Liste von (Schlüssel, Cosinus-Ähnlichkeit), absteigend sortiert
+        """
+        query = np.asarray(query_vector, dtype=np.float32).reshape(-1)
+        norm = float(np.linalg.norm(query))
+        if norm == 0.0 or k <= 0:
+            return []
+        query = query / norm
+
+        with self._lock:
+            n = len(self._keys)
+            candidates, _ = hamming_top_k(
+                self._codes[:n], binary_quantize(query)[0], k * self.oversample
+            )
+            if candidates.size == 0:
+                return []
+
+            scores = self._vectors[candidates] @ query
+            order = np.argsort(-scores, kind="stable")[:k]
+            return [
+                (self._keys[candidates[i]], float(scores[i]))
+                for i in order
+                if min_score is None or scores[i] >= min_score
+            ]
+
+    def _ensure_capacity(self, required: int):
+        """Vergrößert Code- und Vektormatrix bei Bedarf."""
+        capacity = self._vectors.shape[0]
+        if required <= capacity:
+            return
+        new_capacity = max(required, capacity * 2, 16)
+        self._vectors = np.concatenate(
+            [
+                self._vectors,
+                np.zeros(
+                    (new_capacity - capacity, self.embedding_dim), dtype=np.float32
+                ),
+            ]
+        )
+        self._codes = np.concatenate(
+            [
+                self._codes,
+                np.zeros(
+                    (new_capacity - capacity, self._codes.shape[1]), dtype=np.uint64
+                ),
+            ]
+        )
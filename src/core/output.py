@@ -25,8 +25,10 @@ class Insight:
 class OutputGenerator:
     """Hauptklasse für die Ausgabe und Hinweis-Generierung"""
 
-    def __init__(self, data_dir: str = "data/local"):
+    def __init__(self, data_dir: str = "data/local", local_db=None):
         self.data_dir = data_dir
+        # Optional: LocalDatabase mit materialisierten Tages-Rollups
+        self.local_db = local_db
         self.ensure_data_dir()
 
         # Muster für Erkenntnisse
@@ -106,16 +108,25 @@ class OutputGenerator:
 
         return sorted(reflections, key=lambda x: x.get("timestamp", ""))
 
-    def analyze_emotional_trends(self, reflections: List[Dict]) -> Optional[Insight]:
+    def analyze_emotional_trends(
+        self, reflections: Optional[List[Dict]] = None, days_back: int = 7
+    ) -> Optional[Insight]:
         """
         Analysiert emotionale Trends
 
+        Ohne übergebene Reflexionen werden die Tages-Rollups der Datenbank
+        gelesen; jeder Tag zählt dann mit seiner häufigsten Emotion.
+
         Args:
-            reflections: Liste der Reflexionen
+            reflections: Liste der Reflexionen (optional)
+            days_back: Betrachtete Tage bei Nutzung der Rollups
 
         Returns:
             Optional[Insight]: Erkenntnisse zu emotionalen Trends
         """
+        if reflections is None:
+            return self._emotional_trend_from_rollups(days_back)
+
         if len(reflections) < 3:
             return None
 
@@ -126,6 +137,28 @@ class OutputGenerator:
                 emotion_type = sentiment.split("(")[0]
                 emotions.append(emotion_type)
 
+        return self._emotional_trend_insight(emotions)
+
+    def _emotional_trend_from_rollups(self, days_back: int) -> Optional[Insight]:
+        """Emotionaler Trend aus den Tages-Rollups der letzten Tage"""
+        if self.local_db is None:
+            return None
+
+        rollups = self.local_db.get_rollups(
+            "day", datetime.now() - timedelta(days=days_back - 1)
+        )
+        if sum(r["reflection_count"] for r in rollups) < 3:
+            return None
+
+        emotions = [
+            max(r["sentiments"].items(), key=lambda x: x[1])[0]
+            for r in rollups
+            if r["sentiments"]
+        ]
+        return self._emotional_trend_insight(emotions)
+
+    def _emotional_trend_insight(self, emotions: List[str]) -> Optional[Insight]:
+        """Leitet aus chronologischen Emotionen eine Erkenntnis ab"""
         if not emotions:
             return None
 
@@ -225,16 +258,38 @@ class OutputGenerator:
             "Welche Erkenntnisse nimmst du mit?"
         )
 
-    def create_daily_summary(self, reflections: List[Dict]) -> Dict:
+    def create_daily_summary(
+        self, reflections: Optional[List[Dict]] = None, day: Optional[datetime] = None
+    ) -> Dict:
         """
         Erstellt eine Tages-Zusammenfassung
 
+        Ohne übergebene Reflexionen wird der Tages-Rollup der Datenbank
+        gelesen, statt die Einträge des Tages erneut auszuwerten.
+
         Args:
-            reflections: Reflexionen des Tages
+            reflections: Reflexionen des Tages (optional)
+            day: Tag der Zusammenfassung (Standard: heute)
 
         Returns:
             Dict: Tages-Zusammenfassung
         """
+        day = day or datetime.now()
+
+        if reflections is None:
+            rollups = []
+            if self.local_db:
+                rollups = self.local_db.get_rollups("day", day, day)
+            if not rollups:
+                return {"message": "Keine Reflexionen heute erfasst."}
+            return self._daily_summary(
+                day,
+                rollups[0]["reflection_count"],
+                rollups[0]["word_total"],
+                rollups[0]["themes"],
+                list(rollups[0]["sentiments"]),
+            )
+
         if not reflections:
             return {"message": "Keine Reflexionen heute erfasst."}
 
@@ -242,29 +297,39 @@ class OutputGenerator:
             r.get("structure", {}).get("word_count", 0) for r in reflections
         )
 
-        all_themes = []
+        theme_counts = {}
         emotions = []
 
         for reflection in reflections:
-            all_themes.extend(reflection.get("themes", []))
+            for theme in reflection.get("themes", []):
+                theme_counts[theme] = theme_counts.get(theme, 0) + 1
             sentiment = reflection.get("sentiment", "")
             if sentiment:
                 emotions.append(sentiment.split("(")[0])
 
-        # Häufigste Themen
-        theme_counts = {}
-        for theme in all_themes:
-            theme_counts[theme] = theme_counts.get(theme, 0) + 1
+        return self._daily_summary(
+            day, len(reflections), total_words, theme_counts, list(set(emotions))
+        )
 
+    def _daily_summary(
+        self,
+        day: datetime,
+        reflection_count: int,
+        total_words: int,
+        theme_counts: Dict[str, int],
+        emotions: List[str],
+    ) -> Dict:
+        """Baut das Ergebnis-Dict der Tages-Zusammenfassung"""
+        # Häufigste Themen
         top_themes = sorted(theme_counts.items(), key=lambda x: x[1], reverse=True)[:3]
 
         return {
-            "date": datetime.now().strftime("%Y-%m-%d"),
-            "reflection_count": len(reflections),
+            "date": day.strftime("%Y-%m-%d"),
+            "reflection_count": reflection_count,
             "total_words": total_words,
             "top_themes": [theme for theme, _ in top_themes],
-            "emotions": list(set(emotions)),
-            "message": f"Du hast heute {len(reflections)} Reflexion(en) "
+            "emotions": emotions,
+            "message": f"Du hast heute {reflection_count} Reflexion(en) "
             f"mit {total_words} Wörtern erfasst.",
         }
 
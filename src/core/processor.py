@@ -9,7 +9,7 @@ import json
 import re
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 
 # HRM Integration
 try:
@@ -332,6 +332,36 @@ class ReflectionProcessor:
         """
         return [self.process_reflection(ref) for ref in reflections]
 
+    def batch_store(self, reflections: Iterable[Dict], local_db, batch_size: int = 500):
+        """
+        Verarbeitet Reflexionen und speichert sie blockweise
+
+        Die Verarbeitung läuft als Generator in den Massenimport der
+        Datenbank; ein vorhandener Zeitstempel der Rohdaten (z.B. aus einem
+        Tagebuch-Import) bleibt erhalten.
+
+        Args:
+            reflections: Rohdaten der Reflexionen (auch Generator)
+            local_db: LocalDatabase
+            batch_size: Reflexionen pro Transaktion
+
+        Returns:
+            BulkInsertResult: IDs in Eingabereihenfolge und Konflikte
+        """
+
+        def exported():
+            for reflection in reflections:
+                data = self.export_processed(self.process_reflection(reflection))
+                timestamp = reflection.get("timestamp")
+                if timestamp:
+                    # Einheitlich ISO mit "T", sonst stimmt die Sortierung nicht
+                    if not isinstance(timestamp, str):
+                        timestamp = timestamp.isoformat()
+                    data["timestamp"] = timestamp
+                yield data
+
+        return local_db.store_reflections_bulk(exported(), batch_size=batch_size)
+
     def export_processed(self, processed_entry: ProcessedEntry) -> Dict:
         """
         Exportiert verarbeitete Daten
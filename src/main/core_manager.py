@@ -26,6 +26,7 @@ class ASICoreManager:
         self._api_router: Optional[Any] = None
         self._running = False
         self._health_status = "unknown"
+        self._retention_db: Optional[Any] = None
 
         # Initialisierung
         self._setup_logging()
@@ -95,10 +96,16 @@ class ASICoreManager:
                 'id': self._generate_reflection_id()
             }
 
-            # Storage speichern
+            # Storage speichern (Embedding in derselben Transaktion)
             if 'storage' in self.modules:
+                embedding = None
+                embedding_model = None
+                if 'ai' in self.modules:
+                    embedding = self.modules['ai'].embed_text(content)
+                    embedding_model = self.modules['ai'].model_id
                 stored_reflection = self.modules['storage'].store_reflection(
-                    reflection_data)
+                    reflection_data, embedding=embedding,
+                    embedding_model=embedding_model)
 
                 # Blockchain optional
                 if 'blockchain' in self.modules:
@@ -162,10 +169,44 @@ class ASICoreManager:
         finally:
             self.shutdown()
 
+    def schedule_retention(self, local_db, **options):
+        """
+        Plant die Aufbewahrungs-Bereinigung einer LocalDatabase ein
+
+        Die Einstellungen kommen aus config['storage']['retention']
+        (days_to_keep, batch_size, pause, vacuum_pages, interval_seconds)
+        und können über options überschrieben werden. shutdown() beendet
+        den Job wieder.
+
+        Args:
+            local_db: LocalDatabase, die bereinigt wird
+            **options: Überschreibt einzelne Einstellungen
+
+        Returns:
+            Gestarteter RetentionJob (Fortschritt über get_stats())
+        """
+        settings = dict(self.config.get('storage', {}).get('retention', {}))
+        settings.pop('enabled', None)
+        settings.update(options)
+        interval_seconds = settings.pop('interval_seconds', 24 * 3600)
+
+        if self._retention_db is not None and self._retention_db is not local_db:
+            self._retention_db.stop_retention()
+        self._retention_db = local_db
+        job = local_db.schedule_retention(interval_seconds, **settings)
+        logger.warning(
+            f"🧹 Retention enabled: deleting unarchived reflections older than "
+            f"{job.days_to_keep} days every {interval_seconds:.0f}s"
+        )
+        return job
+
     def shutdown(self):
         """Beendet den Core Manager sauber"""
         logger.info("🛑 Shutting down ASI Core Manager")
         self._running = False
+        if self._retention_db is not None:
+            self._retention_db.stop_retention()
+            self._retention_db = None
         logger.info("✅ ASI Core Manager shut down complete")
 
     def health_check(self) -> Dict[str, Any]:
@@ -174,7 +215,11 @@ class ASICoreManager:
             'status': self._health_status,
             'running': self._running,
             'timestamp': datetime.now().isoformat(),
-            'modules': list(self.modules.keys())
+            'modules': list(self.modules.keys()),
+            'retention': (
+                self._retention_db.get_retention_stats()
+                if self._retention_db is not None else None
+            )
         }
 
     def _generate_reflection_id(self) -> str:
@@ -28,8 +28,8 @@ class AIModule:
         self._embedding_model = None
         self._state_analyzer = None
 
-        # Performance Cache
-        self._embedding_cache: Dict[str, Any] = {}
+        # Performance Cache (Query-Embeddings prozessweit geteilt)
+        self._query_cache = None
         self._state_cache: Dict[str, int] = {}
 
         # Batch Processing
@@ -56,6 +56,52 @@ class AIModule:
             self._initialized = True
             logger.warning("⚠️ AI Module running in degraded mode")
 
+    def _load_embedding_model(self):
+        """Lädt das lokale Embedding-Modell und den geteilten Query-Cache"""
+        try:
+            from src.ai.embedding import LocalEmbeddingModel
+            from src.ai.query_cache import get_query_cache
+        except ImportError:
+            logger.warning("⚠️ Embedding model not available")
+            return None
+
+        if self.cache_enabled:
+            self._query_cache = get_query_cache()
+        return LocalEmbeddingModel()
+
+    def _create_fallback_analyzer(self):
+        """Regelbasierter State Analyzer für den Degraded Mode"""
+        return self._fallback_state_detection
+
+    @property
+    def model_id(self) -> Optional[str]:
+        """Modell-ID des Embedding-Modells (None ohne Modell)"""
+        if self._embedding_model is None:
+            return None
+        return self._embedding_model.model_id
+
+    def embed_text(self, text: str) -> Optional[Any]:
+        """
+        Erstellt ein Text-Embedding (über den geteilten Query-Cache)
+
+        Args:
+            text: Eingabetext
+
+        Returns:
+            Embedding-Vektor oder None ohne Embedding-Modell
+        """
+        if self._embedding_model is None:
+            return None
+
+        if self._query_cache is None:
+            return self._embedding_model.encode_text(text)
+
+        return self._query_cache.get_or_compute(
+            text,
+            self._embedding_model.model_id,
+            self._embedding_model.encode_text,
+        )
+
     def _create_state_analyzer(self):
         """Erstellt State Analyzer"""
         # Import hier um Optional Dependencies zu handhaben
@@ -162,7 +208,9 @@ class AIModule:
                 'state_detection_working': isinstance(test_state, int),
                 'cache_stats': {
                     'state_cache': len(self._state_cache),
-                    'embedding_cache': len(self._embedding_cache)
+                    'embedding_cache': (
+                        self._query_cache.get_stats() if self._query_cache else None
+                    )
                 }
             }
 
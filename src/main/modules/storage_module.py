@@ -4,14 +4,25 @@
 Hochperformante, sichere Datenspeicherung
 """
 
+import copy
 import sqlite3
 import json
 import logging
+import queue
+from collections import Counter
+from concurrent.futures import Future
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 import hashlib
 
+import numpy as np
+
+from src.storage.fts import build_match_query, create_fts_index
+from src.storage.group_commit import GroupCommitWriter
+from src.storage.lru_cache import LRUCache
+from src.storage.term_tables import create_term_table
+
 logger = logging.getLogger(__name__)
 
 
@@ -34,18 +45,40 @@ class StorageModule:
         self.db_path = Path(config.get('storage', {}).get(
             'database_path', 'data/asi_local.db'))
         self.db_connection: Optional[sqlite3.Connection] = None
+        self._write_connection: Optional[sqlite3.Connection] = None
+        self._writer: Optional[GroupCommitWriter] = None
         self._initialized = False
+        self._fts_enabled = False
 
         # Performance Settings
         self.batch_size = config.get('storage', {}).get('batch_size', 100)
+        self.commit_delay = config.get('storage', {}).get('commit_delay_ms', 2) / 1000
+        self.write_queue_size = config.get('storage', {}).get('write_queue_size', 1000)
+        self.write_timeout = config.get('storage', {}).get('write_timeout', 30.0)
         self.cache_size = config.get('storage', {}).get('cache_size', 1000)
-        self._cache: Dict[str, Any] = {}
+        cache_max_bytes = config.get('storage', {}).get(
+            'cache_max_bytes', 16 * 1024 * 1024)
+
+        # In-Process-Caches: Reflexionen nach ID (unveränderlich) und
+        # Suchergebnisse, invalidiert über die Schreib-Generation
+        self._cache = LRUCache(self.cache_size, cache_max_bytes)
+        self._search_cache = LRUCache(self.cache_size, cache_max_bytes)
 
     def initialize(self):
         """Initialisiert Storage-System"""
         try:
             self._setup_database()
             self._optimize_database()
+
+            # Schreib-Thread mit eigener Verbindung: Gruppen-Commits aus
+            # einer begrenzten Queue (batch_size oder commit_delay_ms)
+            self._write_connection = self._open_connection()
+            self._writer = GroupCommitWriter(
+                self._store_batch,
+                batch_size=self.batch_size,
+                max_delay=self.commit_delay,
+                max_queue=self.write_queue_size,
+                name="asi-storage-writer")
             self._initialized = True
             logger.info("💾 Storage Module initialized")
 
@@ -59,46 +92,64 @@ class StorageModule:
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
 
         # Connection mit Performance-Optimierungen
-        self.db_connection = sqlite3.connect(
+        self.db_connection = self._open_connection()
+        self.db_connection.execute("PRAGMA journal_mode=WAL")
+
+        # Tabellen erstellen
+        self._create_tables()
+
+        logger.debug("✅ Database setup complete")
+
+    def _open_connection(self) -> sqlite3.Connection:
+        """Öffnet eine Verbindung mit Performance-Pragmas und Row Factory"""
+        conn = sqlite3.connect(
             self.db_path,
             check_same_thread=False,
             timeout=30.0
         )
 
         # Performance Settings
-        self.db_connection.execute("PRAGMA journal_mode=WAL")
-        self.db_connection.execute("PRAGMA synchronous=NORMAL")
-        self.db_connection.execute("PRAGMA cache_size=10000")
-        self.db_connection.execute("PRAGMA temp_store=memory")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA cache_size=10000")
+        conn.execute("PRAGMA temp_store=memory")
 
         # Row Factory für Dict-Output
-        self.db_connection.row_factory = sqlite3.Row
-
-        # Tabellen erstellen
-        self._create_tables()
-
-        logger.debug("✅ Database setup complete")
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    # seq ist Alias der rowid und bleibt auch nach VACUUM stabil
+    _REFLECTIONS_TABLE = """
+        CREATE TABLE IF NOT EXISTS reflections (
+            seq INTEGER PRIMARY KEY,  -- stabiler Schlüssel des FTS-Index
+            id TEXT NOT NULL UNIQUE,
+            content TEXT NOT NULL,
+            content_hash TEXT NOT NULL,
+            tags TEXT NOT NULL DEFAULT '[]',
+            state INTEGER NOT NULL DEFAULT 0,
+            timestamp TEXT NOT NULL,
+            created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            metadata TEXT DEFAULT '{}',
+            vector_id TEXT,  -- Modell-ID des Embeddings
+            ipfs_hash TEXT,
+            arweave_id TEXT,
+            embedding BLOB  -- float32 little-endian
+        )
+    """
 
     def _create_tables(self):
         """Erstellt alle notwendigen Tabellen"""
         cursor = self.db_connection.cursor()
 
         # Reflexionen Tabelle
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS reflections (
-                id TEXT PRIMARY KEY,
-                content TEXT NOT NULL,
-                content_hash TEXT NOT NULL,
-                tags TEXT NOT NULL DEFAULT '[]',
-                state INTEGER NOT NULL DEFAULT 0,
-                timestamp TEXT NOT NULL,
-                created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
-                metadata TEXT DEFAULT '{}',
-                vector_id TEXT,
-                ipfs_hash TEXT,
-                arweave_id TEXT
-            )
-        """)
+        cursor.execute(self._REFLECTIONS_TABLE)
+
+        # Spalten späterer Versionen in bestehenden Datenbanken ergänzen
+        cursor.execute("PRAGMA table_info(reflections)")
+        columns = {row['name'] for row in cursor.fetchall()}
+        if 'embedding' not in columns:
+            cursor.execute("ALTER TABLE reflections ADD COLUMN embedding BLOB")
+        if 'seq' not in columns:
+            self._add_sequence_key(cursor)
 
         # Performance Indices
         cursor.execute(
@@ -108,6 +159,16 @@ class StorageModule:
         cursor.execute(
             "CREATE INDEX IF NOT EXISTS idx_reflections_hash ON reflections(content_hash)")
 
+        # Volltextindex (FTS5) für text_search, per Trigger synchron
+        self._fts_enabled = create_fts_index(
+            self.db_connection, "reflections", ["content", "tags"],
+            content_rowid="seq")
+
+        # Normalisierte Tags, per Trigger synchron mit reflections
+        create_term_table(
+            self.db_connection, "reflections", "tags", "reflection_tags", "tag",
+            id_type="TEXT")
+
         # State Statistics Tabelle
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS state_stats (
@@ -118,20 +179,35 @@ class StorageModule:
             )
         """)
 
-        # Search Cache Tabelle
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS search_cache (
-                query_hash TEXT PRIMARY KEY,
-                query TEXT NOT NULL,
-                results TEXT NOT NULL,
-                timestamp TEXT NOT NULL,
-                hit_count INTEGER DEFAULT 1
-            )
-        """)
-
         self.db_connection.commit()
         logger.debug("✅ Database tables created")
 
+    def _add_sequence_key(self, cursor: sqlite3.Cursor):
+        """
+        Baut reflections mit expliziter INTEGER PRIMARY KEY Spalte neu auf
+
+        Ältere Datenbanken hatten nur id TEXT PRIMARY KEY; der FTS-Index
+        hing damit an der impliziten rowid, die VACUUM neu nummerieren darf.
+        Die bisherigen rowids werden als seq übernommen, Indizes, Trigger
+        und der FTS-Index anschließend neu angelegt.
+        """
+        logger.info("🔧 Migrating reflections to explicit seq key")
+        cursor.execute("BEGIN")
+        column_list = ", ".join(
+            row['name'] for row in cursor.execute("PRAGMA table_info(reflections)"))
+        for (trigger,) in cursor.execute(
+                "SELECT name FROM sqlite_master "
+                "WHERE type = 'trigger' AND tbl_name = 'reflections'").fetchall():
+            cursor.execute(f"DROP TRIGGER {trigger}")
+        cursor.execute("DROP TABLE IF EXISTS reflections_fts")
+        cursor.execute("ALTER TABLE reflections RENAME TO reflections_old")
+
+        cursor.execute(self._REFLECTIONS_TABLE)
+        cursor.execute(
+            f"INSERT INTO reflections (seq, {column_list}) "
+            f"SELECT rowid, {column_list} FROM reflections_old")
+        cursor.execute("DROP TABLE reflections_old")
+
     def _optimize_database(self):
         """Optimiert Database Performance"""
         cursor = self.db_connection.cursor()
@@ -149,71 +225,69 @@ class StorageModule:
 
     # === PUBLIC INTERFACE ===
 
-    def store_reflection(self, reflection_data: Dict[str, Any]) -> Dict[str, Any]:
+    def store_reflection(self, reflection_data: Dict[str, Any],
+                         embedding: Optional[np.ndarray] = None,
+                         embedding_model: Optional[str] = None) -> Dict[str, Any]:
         """
         Speichert Reflexion mit Performance-Optimierung
 
+        Wartet auf den Gruppen-Commit des Schreib-Threads; parallele
+        Aufrufer teilen sich so eine Transaktion.
+
         Args:
             reflection_data: Reflexionsdaten
+            embedding: Optionales Embedding, in derselben Transaktion gespeichert
+            embedding_model: Modell-ID des Embeddings (Spalte vector_id)
 
         Returns:
             Gespeicherte Reflexion mit ID
         """
+        future = self.store_reflection_async(
+            reflection_data, embedding, embedding_model)
         try:
-            if not self._initialized:
-                raise StorageError("Storage not initialized")
-
-            # Content Hash für Deduplizierung
-            content_hash = self._generate_content_hash(
-                reflection_data['content'])
-
-            # Prüfe auf Duplikate
-            if self._is_duplicate(content_hash):
-                logger.warning(
-                    f"⚠️ Duplicate content detected: {content_hash[:8]}...")
-                return self._get_by_hash(content_hash)
-
-            # Reflexion speichern
-            cursor = self.db_connection.cursor()
-
-            cursor.execute("""
-                INSERT INTO reflections 
-                (id, content, content_hash, tags, state, timestamp, metadata)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (
-                reflection_data['id'],
-                reflection_data['content'],
-                content_hash,
-                json.dumps(reflection_data.get('tags', [])),
-                reflection_data.get('state', 0),
-                reflection_data['timestamp'],
-                json.dumps(reflection_data.get('metadata', {}))
-            ))
-
-            # State Statistics updaten
-            self._update_state_stats(reflection_data.get('state', 0))
+            return future.result()
+        except StorageError:
+            raise
+        except Exception as e:
+            raise StorageError(f"Storage failed: {e}")
 
-            self.db_connection.commit()
+    def store_reflection_async(self, reflection_data: Dict[str, Any],
+                               embedding: Optional[np.ndarray] = None,
+                               embedding_model: Optional[str] = None) -> Future:
+        """
+        Reiht eine Reflexion zum Speichern ein, ohne auf den Commit zu warten
 
-            # Cache invalidieren
-            self._invalidate_search_cache()
+        Bei voller Queue blockiert der Aufruf bis zu write_timeout Sekunden
+        (Backpressure).
 
-            logger.debug(f"✅ Reflection {reflection_data['id']} stored")
+        Args:
+            reflection_data: Reflexionsdaten
+            embedding: Optionales Embedding
+            embedding_model: Modell-ID des Embeddings
 
-            return reflection_data
+        Returns:
+            Future mit der gespeicherten Reflexion (bzw. dem Duplikat)
+        """
+        if not self._initialized:
+            raise StorageError("Storage not initialized")
 
-        except Exception as e:
-            logger.error(f"❌ Failed to store reflection: {e}")
-            if self.db_connection:
-                self.db_connection.rollback()
+        try:
+            return self._writer.submit(
+                (reflection_data, embedding, embedding_model),
+                timeout=self.write_timeout)
+        except queue.Full:
+            raise StorageError(
+                f"Write queue full ({self.write_queue_size} pending)")
+        except RuntimeError as e:
             raise StorageError(f"Storage failed: {e}")
 
     def get_reflection(self, reflection_id: str) -> Optional[Dict[str, Any]]:
         """Holt Reflexion nach ID"""
         try:
-            # Cache prüfen
-            if reflection_id in self._cache:
-                return self._cache[reflection_id]
+            # Cache prüfen (tiefe Kopie, tags/metadata sind veränderlich)
+            cached = self._cache.get(reflection_id)
+            if cached is not None:
+                return copy.deepcopy(cached)
 
             cursor = self.db_connection.cursor()
             cursor.execute(
@@ -224,14 +298,7 @@ class StorageModule:
             row = cursor.fetchone()
             if row:
                 reflection = self._row_to_dict(row)
-
-                # Cache mit LRU-Strategie
-                if len(self._cache) >= self.cache_size:
-                    # Ältesten Eintrag entfernen
-                    oldest_key = next(iter(self._cache))
-                    del self._cache[oldest_key]
-
-                self._cache[reflection_id] = reflection
+                self._cache.put(reflection_id, copy.deepcopy(reflection))
                 return reflection
 
             return None
@@ -242,7 +309,7 @@ class StorageModule:
 
     def text_search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
         """
-        Text-basierte Suche mit Caching
+        Text-basierte Suche (BM25 über FTS5) mit Caching
 
         Args:
             query: Suchanfrage
@@ -252,27 +319,43 @@ class StorageModule:
             Liste von Suchergebnissen
         """
         try:
-            # Query Hash für Cache
-            query_hash = self._generate_content_hash(query.lower())
+            # Cache prüfen (Schreibzugriffe machen ihn über die Generation ungültig)
+            cache_key = (" ".join(query.lower().split()), limit)
+            generation = self._search_cache.generation
+            cached_results = self._search_cache.get(cache_key)
+            if cached_results is not None:
+                # Tiefe Kopien, damit Aufrufer den Cache nicht verändern
+                return copy.deepcopy(cached_results)
+
+            # Database Suche: BM25 über FTS5, sonst LIKE-Scan
+            match_query = build_match_query(query)
+            if not match_query:
+                return []
 
-            # Cache prüfen
-            cached_results = self._get_cached_search(query_hash)
-            if cached_results:
-                return cached_results[:limit]
-
-            # Database Suche
             cursor = self.db_connection.cursor()
-            cursor.execute("""
-                SELECT * FROM reflections 
-                WHERE content LIKE ? OR tags LIKE ?
-                ORDER BY timestamp DESC
-                LIMIT ?
-            """, (f"%{query}%", f"%{query}%", limit))
+            if self._fts_enabled:
+                cursor.execute("""
+                    SELECT r.* FROM reflections_fts
+                    JOIN reflections r ON r.seq = reflections_fts.rowid
+                    WHERE reflections_fts MATCH ?
+                    ORDER BY bm25(reflections_fts, 2.0, 1.0)
+                    LIMIT ?
+                """, (match_query, limit))
+            else:
+                cursor.execute("""
+                    SELECT * FROM reflections
+                    WHERE content LIKE ?
+                       OR id IN (
+                           SELECT reflection_id FROM reflection_tags WHERE tag = ?
+                       )
+                    ORDER BY timestamp DESC
+                    LIMIT ?
+                """, (f"%{query}%", query.strip(), limit))
 
             results = [self._row_to_dict(row) for row in cursor.fetchall()]
 
-            # Cache speichern
-            self._cache_search_results(query_hash, query, results)
+            # Cache speichern (verworfen, falls inzwischen geschrieben wurde)
+            self._search_cache.put(cache_key, copy.deepcopy(results), generation)
 
             return results
 
@@ -315,19 +398,103 @@ class StorageModule:
         """Generiert Content Hash für Deduplizierung"""
         return hashlib.sha256(content.encode('utf-8')).hexdigest()
 
-    def _is_duplicate(self, content_hash: str) -> bool:
-        """Prüft auf Duplikate"""
-        cursor = self.db_connection.cursor()
-        cursor.execute(
-            "SELECT COUNT(*) FROM reflections WHERE content_hash = ?",
-            (content_hash,)
+    def _store_batch(self, items: List[Tuple]) -> List[Any]:
+        """
+        Schreibt einen Block von Reflexionen in einer Transaktion (Schreib-Thread)
+
+        Args:
+            items: (reflection_data, embedding, embedding_model) je Auftrag
+
+        Returns:
+            Je Auftrag gespeicherte Reflexion, Duplikat oder StorageError
+        """
+        conn = self._write_connection
+        results: List[Any] = [None] * len(items)
+        rows = []
+        duplicates = []
+        state_counts: Counter = Counter()
+
+        try:
+            # Content Hash für Deduplizierung (gegen Bestand und Block)
+            hashes = {}
+            for position, (reflection_data, _, _) in enumerate(items):
+                try:
+                    hashes[position] = self._generate_content_hash(
+                        reflection_data['content'])
+                except (KeyError, TypeError, AttributeError) as e:
+                    results[position] = StorageError(f"Storage failed: {e}")
+            existing = self._existing_hashes(conn, set(hashes.values()))
+
+            for position, content_hash in hashes.items():
+                if content_hash in existing:
+                    duplicates.append((position, content_hash))
+                    continue
+                existing.add(content_hash)
+
+                reflection_data, embedding, embedding_model = items[position]
+                rows.append((
+                    reflection_data['id'],
+                    reflection_data['content'],
+                    content_hash,
+                    json.dumps(reflection_data.get('tags', [])),
+                    reflection_data.get('state', 0),
+                    reflection_data['timestamp'],
+                    json.dumps(reflection_data.get('metadata', {})),
+                    embedding_model if embedding is not None else None,
+                    np.ascontiguousarray(embedding, dtype='<f4').tobytes()
+                    if embedding is not None else None
+                ))
+                state_counts[reflection_data.get('state', 0)] += 1
+                results[position] = reflection_data
+
+            conn.executemany("""
+                INSERT INTO reflections
+                (id, content, content_hash, tags, state, timestamp, metadata,
+                 vector_id, embedding)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+
+            # State Statistics updaten
+            self._update_state_stats(conn, state_counts)
+
+            conn.commit()
+
+        except Exception as e:
+            conn.rollback()
+            if len(items) > 1:
+                # Fehlerhafte Einträge isolieren: einzeln erneut schreiben
+                return [self._store_batch([item])[0] for item in items]
+            logger.error(f"❌ Failed to store reflection: {e}")
+            return [StorageError(f"Storage failed: {e}")]
+
+        if rows:
+            # Suchergebnisse invalidieren (neue Generation, O(1))
+            self._search_cache.bump_generation()
+            logger.debug(f"✅ {len(rows)} reflections stored in one commit")
+
+        for position, content_hash in duplicates:
+            logger.warning(
+                f"⚠️ Duplicate content detected: {content_hash[:8]}...")
+            results[position] = self._get_by_hash(conn, content_hash)
+
+        return results
+
+    def _existing_hashes(self, conn: sqlite3.Connection, hashes: set) -> set:
+        """Ermittelt, welche Content Hashes bereits gespeichert sind"""
+        if not hashes:
+            return set()
+        cursor = conn.execute(
+            "SELECT content_hash FROM reflections "
+            "WHERE content_hash IN (SELECT value FROM json_each(?))",
+            (json.dumps(list(hashes)),)
         )
-        return cursor.fetchone()[0] > 0
+        return {row[0] for row in cursor}
 
-    def _get_by_hash(self, content_hash: str) -> Dict[str, Any]:
+    def _get_by_hash(
+        self, conn: sqlite3.Connection, content_hash: str
+    ) -> Dict[str, Any]:
         """Holt Reflexion nach Hash"""
-        cursor = self.db_connection.cursor()
-        cursor.execute(
+        cursor = conn.execute(
             "SELECT * FROM reflections WHERE content_hash = ? LIMIT 1",
             (content_hash,)
         )
@@ -346,76 +513,16 @@ class StorageModule:
             'created_at': row['created_at']
         }
 
-    def _update_state_stats(self, state: int):
-        """Aktualisiert State Statistics"""
-        cursor = self.db_connection.cursor()
-
-        # Upsert State Statistics
-        cursor.execute("""
-            INSERT OR REPLACE INTO state_stats (state, count, last_used)
-            VALUES (?, 
-                    COALESCE((SELECT count FROM state_stats WHERE state = ?), 0) + 1,
-                    ?)
-        """, (state, state, datetime.now().isoformat()))
-
-    def _get_cached_search(self, query_hash: str) -> Optional[List[Dict[str, Any]]]:
-        """Holt gecachte Suchergebnisse"""
-        try:
-            cursor = self.db_connection.cursor()
-            cursor.execute(
-                "SELECT results FROM search_cache WHERE query_hash = ?",
-                (query_hash,)
-            )
-
-            row = cursor.fetchone()
-            if row:
-                # Hit Count erhöhen
-                cursor.execute(
-                    "UPDATE search_cache SET hit_count = hit_count + 1 WHERE query_hash = ?",
-                    (query_hash,)
-                )
-                self.db_connection.commit()
-
-                return json.loads(row['results'])
-
-            return None
-
-        except Exception as e:
-            logger.error(f"❌ Cache lookup failed: {e}")
-            return None
-
-    def _cache_search_results(self, query_hash: str, query: str, results: List[Dict[str, Any]]):
-        """Cached Suchergebnisse"""
-        try:
-            cursor = self.db_connection.cursor()
-            cursor.execute("""
-                INSERT OR REPLACE INTO search_cache 
-                (query_hash, query, results, timestamp)
-                VALUES (?, ?, ?, ?)
-            """, (
-                query_hash,
-                query,
-                json.dumps(results),
-                datetime.now().isoformat()
-            ))
-            self.db_connection.commit()
-
-        except Exception as e:
-            logger.error(f"❌ Cache store failed: {e}")
-
-    def _invalidate_search_cache(self):
-        """Invalidiert Search Cache bei neuen Daten"""
-        try:
-            cursor = self.db_connection.cursor()
-            # Nur ältere Cache-Einträge löschen (letzte 5 Minuten behalten)
-            cursor.execute("""
-                DELETE FROM search_cache 
-                WHERE timestamp < datetime('now', '-5 minutes')
-            """)
-            self.db_connection.commit()
-
-        except Exception as e:
-            logger.error(f"❌ Cache invalidation failed: {e}")
+    def _update_state_stats(self, conn: sqlite3.Connection, state_counts: Counter):
+        """Aktualisiert State Statistics (ein Upsert pro Zustand im Block)"""
+        now = datetime.now().isoformat()
+        conn.executemany("""
+            INSERT INTO state_stats (state, count, last_used)
+            VALUES (?, ?, ?)
+            ON CONFLICT (state) DO UPDATE SET
+                count = count + excluded.count,
+                last_used = excluded.last_used
+        """, [(state, count, now) for state, count in state_counts.items()])
 
     # === HEALTH & MAINTENANCE ===
 
@@ -440,6 +547,9 @@ class StorageModule:
                 'reflection_count': reflection_count,
                 'database_size_mb': round(db_size_mb, 2),
                 'cache_entries': len(self._cache),
+                'cache': self._cache.get_stats(),
+                'search_cache': self._search_cache.get_stats(),
+                'writer': self._writer.get_stats() if self._writer else None,
                 'database_path': str(self.db_path)
             }
 
@@ -453,10 +563,19 @@ class StorageModule:
     def shutdown(self):
         """Beendet Storage sauber"""
         try:
+            # Eingereihte Schreibaufträge zuerst festschreiben
+            if self._writer:
+                self._writer.close()
+                self._writer = None
+            self._initialized = False
+
+            if self._write_connection:
+                self._write_connection.close()
             if self.db_connection:
                 self.db_connection.close()
 
             self._cache.clear()
+            self._search_cache.clear()
             logger.info("💾 Storage Module shut down")
 
         except Exception as e:
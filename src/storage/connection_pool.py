@@ -0,0 +1,169 @@
+"""
+ASI Core - Connection Pool
+Threadlokale SQLite-Verbindungen mit WAL-Modus und abgestimmten Pragmas
+"""
+
+import logging
+import sqlite3
+import threading
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Wartezeit auf Sperren anderer Verbindungen, bevor "database is locked" fällt
+BUSY_TIMEOUT_MS = 5000
+
+# Größe des Prepared-Statement-Caches pro Verbindung
+STATEMENT_CACHE_SIZE = 256
+
+DEFAULT_MMAP_SIZE = 256 * 1024 * 1024
+DEFAULT_CACHE_SIZE_KB = 16 * 1024
+
+
+class SQLiteConnectionPool:
+    """
+    Verwaltet eine SQLite-Verbindung pro Thread
+
+    Jeder Thread erhält beim ersten Zugriff eine eigene Verbindung, die er
+    danach wiederverwendet; Prepared Statements bleiben so über Aufrufe
+    hinweg im Cache. Verbindungen beendeter Threads (z.B. Request-Threads
+    des Flask-Servers) gehen zurück in einen begrenzten Leerlauf-Vorrat und
+    werden an neue Threads weitergegeben. close() schließt alle.
+
+    Die Datenbank läuft im WAL-Modus mit synchronous=NORMAL: Leser blockieren
+    Schreiber nicht mehr, und ein Commit kostet kein fsync der Hauptdatei.
+
+    Mit pooled=False wird wie bisher für jeden Aufruf eine neue Verbindung
+    geöffnet (mit denselben Pragmas).
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        pooled: bool = True,
+        mmap_size: int = DEFAULT_MMAP_SIZE,
+        cache_size_kb: int = DEFAULT_CACHE_SIZE_KB,
+        max_idle: int = 8,
+    ):
+        self.db_path = db_path
+        self.pooled = pooled
+        self.mmap_size = mmap_size
+        self.cache_size_kb = cache_size_kb
+        self.max_idle = max_idle
+
+        self._local = threading.local()
+        self._connections: Dict[int, Tuple[threading.Thread, sqlite3.Connection]] = {}
+        self._idle: List[sqlite3.Connection] = []
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._wal_checked = False
+
+    # === PUBLIC INTERFACE ===
+
+    def get_connection(self) -> sqlite3.Connection:
+        """
+        Liefert die Verbindung des aktuellen Threads
+
+        Als Kontextmanager (with) begrenzt sie eine Transaktion, schließt
+        die Verbindung im Pool-Modus aber nicht.
+
+        Returns:
+            sqlite3.Connection: Datenbankverbindung
+        """
+        if not self.pooled:
+            return self._connect()
+
+        cached = getattr(self._local, "connection", None)
+        if cached is not None and cached[0] == self._generation:
+            return cached[1]
+
+        with self._lock:
+            self._reclaim_dead_threads()
+            conn = self._idle.pop() if self._idle else None
+            generation = self._generation
+
+        if conn is None:
+            conn = self._connect()
+
+        thread = threading.current_thread()
+        with self._lock:
+            self._connections[thread.ident] = (thread, conn)
+            self._local.connection = (generation, conn)
+        return conn
+
+    def close(self):
+        """Schließt alle Verbindungen; spätere Zugriffe verbinden neu"""
+        with self._lock:
+            self._generation += 1
+            for _, conn in self._connections.values():
+                self._close_quietly(conn)
+            for conn in self._idle:
+                self._close_quietly(conn)
+            self._connections.clear()
+            self._idle.clear()
+
+    def get_stats(self) -> Dict:
+        """
+        Liefert Kennzahlen des Pools
+
+        Returns:
+            Dict: Modus, belegte und freie Verbindungen
+        """
+        with self._lock:
+            return {
+                "pooled": self.pooled,
+                "thread_connections": len(self._connections),
+                "idle_connections": len(self._idle),
+            }
+
+    # === INTERNAL METHODS ===
+
+    def _connect(self) -> sqlite3.Connection:
+        """Öffnet eine Verbindung und setzt die Pragmas"""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=BUSY_TIMEOUT_MS / 1000,
+            cached_statements=STATEMENT_CACHE_SIZE,
+            check_same_thread=False,  # close() läuft im aufrufenden Thread
+        )
+        conn.row_factory = sqlite3.Row  # Ermöglicht dict-ähnlichen Zugriff
+        conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+        conn.execute(f"PRAGMA cache_size = -{int(self.cache_size_kb)}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+
+        # Der Journal-Modus ist in der Datei persistent, einmal genügt
+        if not self._wal_checked:
+            # Freigegebene Seiten schrittweise zurückgeben (incremental_vacuum);
+            # wirkt nur vor der ersten Tabelle, Bestandsdateien erst nach VACUUM
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            mode = conn.execute("PRAGMA journal_mode = WAL").fetchone()[0]
+            if mode.lower() != "wal":
+                logger.warning(f"WAL nicht verfügbar, Journal-Modus: {mode}")
+            self._wal_checked = True
+        return conn
+
+    def _reclaim_dead_threads(self):
+        """Gibt Verbindungen beendeter Threads in den Leerlauf-Vorrat zurück"""
+        for ident, (thread, conn) in list(self._connections.items()):
+            if thread.is_alive():
+                continue
+            del self._connections[ident]
+            if len(self._idle) >= self.max_idle:
+                self._close_quietly(conn)
+                continue
+            try:
+                # Eine vom Thread offen gelassene Transaktion verwerfen
+                if conn.in_transaction:
+                    conn.rollback()
+                self._idle.append(conn)
+            except sqlite3.Error:
+                self._close_quietly(conn)
+
+    @staticmethod
+    def _close_quietly(conn: sqlite3.Connection):
+        try:
+            conn.close()
+        except sqlite3.Error as e:
+            logger.debug(f"Verbindung ließ sich nicht schließen: {e}")
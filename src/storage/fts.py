@@ -0,0 +1,108 @@
+"""
+ASI Core - Volltextindex
+SQLite FTS5 Hilfsfunktionen für BM25-gerankte Stichwortsuche
+"""
+
+import logging
+import re
+import sqlite3
+from typing import Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Umlaute und Akzente werden für die Suche gleich behandelt (ä == a)
+FTS_TOKENIZER = "unicode61 remove_diacritics 2"
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def build_match_query(text: str, operator: str = "OR") -> Optional[str]:
+    """
+    Übersetzt freien Suchtext in eine sichere FTS5 MATCH-Abfrage
+
+    Jedes Wort wird als Phrase zitiert, so dass FTS5-Syntax im Suchtext
+    (AND, NEAR, Anführungszeichen, Spaltenfilter) keine Wirkung hat.
+
+    Args:
+        text: Suchtext des Nutzers
+        operator: Verknüpfung der Wörter ("OR" oder "AND")
+
+    Returns:
+        Optional[str]: MATCH-Ausdruck oder None ohne verwertbare Wörter
+    """
+    tokens = _TOKEN_PATTERN.findall(text or "")
+    if not tokens:
+        return None
+    return f" {operator} ".join(f'"{token}"' for token in tokens)
+
+
+def create_fts_index(
+    conn: sqlite3.Connection,
+    table: str,
+    columns: Sequence[str],
+    content_rowid: str = "rowid",
+) -> bool:
+    """
+    Legt einen FTS5-Index über einer Tabelle samt Sync-Triggern an
+
+    Der Index ist eine External-Content-Tabelle (<table>_fts): Texte werden
+    nicht doppelt gespeichert, Trigger halten ihn bei INSERT, UPDATE und
+    DELETE synchron. Ein neu angelegter Index wird aus dem Bestand gefüllt.
+
+    Args:
+        conn: Offene Datenbankverbindung
+        table: Name der Inhaltstabelle
+        columns: Zu indizierende Textspalten
+        content_rowid: Integer-Schlüssel der Inhaltstabelle
+
+    Returns:
+        bool: False wenn SQLite ohne FTS5 gebaut ist
+    """
+    fts_table = f"{table}_fts"
+    column_list = ", ".join(columns)
+    new_values = ", ".join(f"new.{column}" for column in columns)
+    old_values = ", ".join(f"old.{column}" for column in columns)
+
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (fts_table,)
+    ).fetchone()
+
+    try:
+        conn.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5(
+                {column_list},
+                content='{table}',
+                content_rowid='{content_rowid}',
+                tokenize='{FTS_TOKENIZER}'
+            )
+        """)
+    except sqlite3.OperationalError as e:
+        logger.warning(f"FTS5 nicht verfügbar, Stichwortsuche ohne Index: {e}")
+        return False
+
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {fts_table}_ai AFTER INSERT ON {table} BEGIN
+            INSERT INTO {fts_table} (rowid, {column_list})
+            VALUES (new.{content_rowid}, {new_values});
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE ON {table} BEGIN
+            INSERT INTO {fts_table} ({fts_table}, rowid, {column_list})
+            VALUES ('delete', old.{content_rowid}, {old_values});
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {fts_table}_au
+        AFTER UPDATE OF {column_list} ON {table} BEGIN
+            INSERT INTO {fts_table} ({fts_table}, rowid, {column_list})
+            VALUES ('delete', old.{content_rowid}, {old_values});
+            INSERT INTO {fts_table} (rowid, {column_list})
+            VALUES (new.{content_rowid}, {new_values});
+        END
+    """)
+
+    if not exists:
+        conn.execute(f"INSERT INTO {fts_table} ({fts_table}) VALUES ('rebuild')")
+
+    return True
@@ -0,0 +1,182 @@
+"""
+ASI Core - Group Commit
+Schreib-Thread, der Aufträge aus einer begrenzten Queue gebündelt festschreibt
+"""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Markiert das Ende der Queue beim Schließen
+_STOP = object()
+
+
+class GroupCommitWriter:
+    """
+    Bündelt Schreibaufträge mehrerer Threads zu gemeinsamen Commits
+
+    submit() legt einen Auftrag in eine begrenzte Queue und liefert sofort
+    ein Future. Ein eigener Thread nimmt den ältesten Auftrag, sammelt
+    weitere bis batch_size erreicht oder max_delay seit dem ersten
+    verstrichen ist, und übergibt den Block an apply_batch – eine
+    Transaktion, ein fsync für alle. Ist die Queue voll, blockiert submit()
+    (Backpressure) statt unbegrenzt Speicher zu belegen.
+
+    apply_batch erhält die Aufträge und liefert je Auftrag ein Ergebnis in
+    gleicher Reihenfolge; eine Exception als Ergebnis wird am jeweiligen
+    Future gesetzt, eine geworfene Exception an allen Futures des Blocks.
+    """
+
+    def __init__(
+        self,
+        apply_batch: Callable[[List[Any]], List[Any]],
+        batch_size: int = 100,
+        max_delay: float = 0.002,
+        max_queue: int = 1000,
+        name: str = "asi-group-commit",
+    ):
+        self.apply_batch = apply_batch
+        self.batch_size = max(1, batch_size)
+        self.max_delay = max_delay
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._closed = False
+        self._close_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._largest_batch = 0
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    # === PUBLIC INTERFACE ===
+
+    def submit(self, item: Any, timeout: Optional[float] = None) -> Future:
+        """
+        Reiht einen Schreibauftrag ein
+
+        Args:
+            item: Auftrag für apply_batch
+            timeout: Maximale Wartezeit bei voller Queue (None: unbegrenzt)
+
+        Returns:
+            Future: Liefert das Ergebnis von apply_batch für diesen Auftrag
+
+        Raises:
+            queue.Full: Queue blieb bis zum Timeout voll
+            RuntimeError: Writer wurde bereits geschlossen
+        """
+        if self._closed:
+            raise RuntimeError("GroupCommitWriter ist geschlossen")
+        future: Future = Future()
+        self._queue.put((item, future), timeout=timeout)
+        return future
+
+    def close(self, timeout: Optional[float] = None):
+        """
+        Schreibt alle eingereihten Aufträge und beendet den Thread
+
+        Args:
+            timeout: Maximale Wartezeit auf den Thread
+        """
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            return
+
+        # Während des Schließens eingereihte Aufträge nicht hängen lassen
+        while True:
+            try:
+                entry = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is not _STOP:
+                entry[1].set_exception(
+                    RuntimeError("GroupCommitWriter ist geschlossen")
+                )
+
+    def get_stats(self) -> Dict:
+        """
+        Liefert Kennzahlen des Writers
+
+        Returns:
+            Dict: Queue-Tiefe, Blöcke, Aufträge, größter und mittlerer Block
+        """
+        with self._stats_lock:
+            return {
+                "queued": self._queue.qsize(),
+                "batches": self._batches,
+                "items": self._items,
+                "largest_batch": self._largest_batch,
+                "avg_batch": self._items / self._batches if self._batches else 0.0,
+                "closed": self._closed,
+            }
+
+    # === INTERNAL METHODS ===
+
+    def _run(self):
+        """Schreib-Schleife: Block sammeln, festschreiben, Futures erfüllen"""
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+
+            batch: List[Tuple[Any, Future]] = [first]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    if remaining > 0:
+                        entry = self._queue.get(timeout=remaining)
+                    else:
+                        entry = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if entry is _STOP:
+                    stopping = True
+                    break
+                batch.append(entry)
+
+            self._commit(batch)
+
+    def _commit(self, batch: List[Tuple[Any, Future]]):
+        """Übergibt einen Block an apply_batch und verteilt die Ergebnisse"""
+        # Abgebrochene Futures werden nicht mehr geschrieben
+        active = [
+            (item, future)
+            for item, future in batch
+            if future.set_running_or_notify_cancel()
+        ]
+        if not active:
+            return
+        items = [item for item, _ in active]
+        futures = [future for _, future in active]
+
+        try:
+            results = self.apply_batch(items)
+        except Exception as e:
+            logger.error(f"Gruppen-Commit fehlgeschlagen: {e}")
+            for future in futures:
+                future.set_exception(e)
+            return
+
+        for future, result in zip(futures, results):
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+        with self._stats_lock:
+            self._batches += 1
+            self._items += len(items)
+            self._largest_batch = max(self._largest_batch, len(items))
@@ -6,33 +6,158 @@ SQLite für temporäre Daten und Metadaten
 import sqlite3
 import json
 import os
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
 from datetime import datetime, timedelta
-from dataclasses import dataclass
+from dataclasses import dataclass, field, replace
+
+import numpy as np
+
+from src.storage.connection_pool import SQLiteConnectionPool
+from src.storage.fts import build_match_query, create_fts_index
+from src.storage.query_planner import ReflectionFilter, decode_cursor, encode_cursor
+from src.storage.retention import RetentionJob
+from src.storage.rollups import ROLLUP_PERIODS, bucket_key, create_rollup_tables
+from src.storage.statistics import create_statistics_table, read_counters
+from src.storage.term_tables import create_term_table
 
 
-@dataclass
 class ReflectionRecord:
-    """Datenbank-Record für Reflexionen"""
+    """
+    Datenbank-Record für Reflexionen
+
+    Kompakt über __slots__; tags, themes und timestamp dürfen als Rohwerte
+    aus der Datenbank (JSON- bzw. ISO-String) übergeben werden und werden
+    erst beim ersten Zugriff dekodiert. Listen, die nur Hash und Vorschau
+    anzeigen, zahlen so kein json.loads pro Zeile.
+    """
+
+    __slots__ = (
+        "id",
+        "hash",
+        "content_preview",
+        "privacy_level",
+        "ipfs_hash",
+        "arweave_tx",
+        "sentiment",
+        "state_value",
+        "state_name",
+        "content",
+        "_timestamp",
+        "_tags",
+        "_themes",
+    )
+
+    def __init__(
+        self,
+        id: int,
+        hash: str,
+        content_preview: str,
+        timestamp: Union[datetime, str],
+        privacy_level: str,
+        ipfs_hash: Optional[str],
+        arweave_tx: Optional[str],
+        tags: Union[List[str], str, None],
+        themes: Union[List[str], str, None],
+        sentiment: Optional[str],
+        state_value: Optional[int] = None,
+        state_name: Optional[str] = None,
+        content: Optional[str] = None,
+    ):
+        self.id = id
+        self.hash = hash
+        self.content_preview = content_preview
+        self.privacy_level = privacy_level
+        self.ipfs_hash = ipfs_hash
+        self.arweave_tx = arweave_tx
+        self.sentiment = sentiment
+        self.state_value = state_value
+        self.state_name = state_name
+        self.content = content  # Volltext, nur wenn angefordert
+        self._timestamp = timestamp
+        self._tags = tags
+        self._themes = themes
+
+    @property
+    def timestamp(self) -> datetime:
+        if isinstance(self._timestamp, str):
+            self._timestamp = datetime.fromisoformat(self._timestamp)
+        return self._timestamp
+
+    @timestamp.setter
+    def timestamp(self, value: Union[datetime, str]):
+        self._timestamp = value
+
+    @property
+    def tags(self) -> List[str]:
+        if not isinstance(self._tags, list):
+            self._tags = json.loads(self._tags) if self._tags else []
+        return self._tags
+
+    @tags.setter
+    def tags(self, value: Union[List[str], str, None]):
+        self._tags = value
+
+    @property
+    def themes(self) -> List[str]:
+        if not isinstance(self._themes, list):
+            self._themes = json.loads(self._themes) if self._themes else []
+        return self._themes
+
+    @themes.setter
+    def themes(self, value: Union[List[str], str, None]):
+        self._themes = value
+
+    def _fields(self) -> Tuple:
+        return (
+            self.id,
+            self.hash,
+            self.content_preview,
+            self.timestamp,
+            self.privacy_level,
+            self.ipfs_hash,
+            self.arweave_tx,
+            self.tags,
+            self.themes,
+            self.sentiment,
+            self.state_value,
+            self.state_name,
+        )
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, ReflectionRecord):
+            return NotImplemented
+        return self._fields() == other._fields()
+
+    def __repr__(self) -> str:
+        return f"ReflectionRecord(id={self.id!r}, hash={self.hash!r})"
+
 
-    id: int
-    hash: str
-    content_preview: str
-    timestamp: datetime
-    privacy_level: str
-    ipfs_hash: Optional[str]
-    arweave_tx: Optional[str]
-    tags: List[str]
-    themes: List[str]
-    sentiment: Optional[str]
+@dataclass
+class BulkInsertResult:
+    """Ergebnis eines Massenimports"""
+
+    # ID je Eingabezeile, None bei Konflikt
+    ids: List[Optional[int]] = field(default_factory=list)
+    # (Position in der Eingabe, Hash) der übersprungenen Zeilen
+    conflicts: List[Tuple[int, str]] = field(default_factory=list)
+
+    @property
+    def inserted(self) -> int:
+        return len(self.ids) - len(self.conflicts)
 
 
 class LocalDatabase:
     """SQLite-Datenbank für lokale ASI-Daten"""
 
-    def __init__(self, db_path: str = "data/asi_local.db"):
+    # SQLite erlaubt standardmäßig höchstens 999 gebundene Parameter
+    MAX_QUERY_PARAMS = 900
+
+    def __init__(self, db_path: str = "data/asi_local.db", pooled: bool = True):
         self.db_path = db_path
         self.ensure_db_directory()
+        # Eine wiederverwendete Verbindung pro Thread (pooled=False: pro Aufruf)
+        self.pool = SQLiteConnectionPool(db_path, pooled=pooled)
+        self._retention_job: Optional[RetentionJob] = None
         self.init_database()
 
     def ensure_db_directory(self):
@@ -43,14 +168,17 @@ class LocalDatabase:
 
     def get_connection(self) -> sqlite3.Connection:
         """
-        Erstellt eine Datenbankverbindung
+        Liefert die Datenbankverbindung des aktuellen Threads
 
         Returns:
             sqlite3.Connection: Datenbankverbindung
         """
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row  # Ermöglicht dict-ähnlichen Zugriff
-        return conn
+        return self.pool.get_connection()
+
+    def close(self):
+        """Beendet die Aufbewahrung und schließt alle offenen Verbindungen"""
+        self.stop_retention()
+        self.pool.close()
 
     def init_database(self):
         """Initialisiert die Datenbank-Tabellen"""
@@ -71,6 +199,10 @@ class LocalDatabase:
                     themes TEXT,  -- JSON array
                     sentiment TEXT,
                     word_count INTEGER,
+                    state_value INTEGER,  -- ASI-Zustand 0-255
+                    state_name TEXT,
+                    embedding BLOB,  -- float32 little-endian
+                    embedding_model TEXT,
                     created_at DATETIME DEFAULT CURRENT_TIMESTAMP
                 )
             """
@@ -111,6 +243,18 @@ class LocalDatabase:
             """
             )
 
+            # Spalten späterer Versionen in bestehenden Datenbanken ergänzen
+            self._migrate_columns(
+                conn,
+                "reflections",
+                {
+                    "state_value": "INTEGER",
+                    "state_name": "TEXT",
+                    "embedding": "BLOB",
+                    "embedding_model": "TEXT",
+                },
+            )
+
             # Indizes für bessere Performance
             conn.execute(
                 "CREATE INDEX IF NOT EXISTS idx_reflections_timestamp ON reflections (timestamp)"
@@ -119,53 +263,267 @@ class LocalDatabase:
                 "CREATE INDEX IF NOT EXISTS idx_reflections_privacy ON reflections (privacy_level)"
             )
             conn.execute(
-                "CREATE INDEX IF NOT EXISTS idx_upload_status_reflection ON upload_status (reflection_hash)"
+                "CREATE INDEX IF NOT EXISTS idx_reflections_privacy_timestamp "
+                "ON reflections (privacy_level, timestamp)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_reflections_sentiment "
+                "ON reflections (sentiment)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_reflections_state "
+                "ON reflections (state_value)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_upload_status_reflection "
+                "ON upload_status (reflection_hash)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_upload_status_created "
+                "ON upload_status (created_at)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_insights_created "
+                "ON insights (created_at)"
+            )
+
+            # Volltextindex (FTS5), per Trigger synchron mit reflections
+            self.fts_enabled = create_fts_index(
+                conn, "reflections", ["full_content", "tags", "themes"], "id"
             )
 
+            # Tages-/Wochen-Rollups, per Trigger synchron mit reflections
+            create_rollup_tables(conn)
+
+            # Normalisierte Themen und Tags, per Trigger synchron mit reflections
+            create_term_table(
+                conn, "reflections", "themes", "reflection_themes", "theme"
+            )
+            create_term_table(conn, "reflections", "tags", "reflection_tags", "tag")
+
+            # Statistik-Zähler, per Trigger synchron mit reflections/upload_status
+            create_statistics_table(conn)
+
             conn.commit()
 
-    def store_reflection(self, processed_reflection: Dict) -> int:
+    @staticmethod
+    def _migrate_columns(conn: sqlite3.Connection, table: str, columns: Dict[str, str]):
+        """Fügt fehlende Spalten per ALTER TABLE hinzu"""
+        existing = {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}
+        for name, column_type in columns.items():
+            if name not in existing:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {column_type}")
+
+    # Spalten eines ReflectionRecord: ohne Volltext und Embedding-BLOB
+    _RECORD_COLUMNS = (
+        "id", "hash", "content_preview", "timestamp", "privacy_level", "ipfs_hash",
+        "arweave_tx", "tags", "themes", "sentiment", "state_value", "state_name",
+    )
+
+    @classmethod
+    def _record_columns(cls, alias: str = "") -> str:
+        """Spaltenliste für SELECTs, die ReflectionRecords liefern"""
+        prefix = f"{alias}." if alias else ""
+        return ", ".join(prefix + column for column in cls._RECORD_COLUMNS)
+
+    _INSERT_REFLECTION = """
+        INSERT INTO reflections (
+            hash, content_preview, full_content, timestamp,
+            privacy_level, tags, themes, sentiment, word_count,
+            state_value, state_name, embedding, embedding_model
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+
+    def store_reflection(
+        self,
+        processed_reflection: Dict,
+        embedding: Optional[np.ndarray] = None,
+        embedding_model: Optional[str] = None,
+    ) -> int:
         """
         Speichert eine verarbeitete Reflexion
 
         Args:
             processed_reflection: Verarbeitete Reflexionsdaten
+            embedding: Optionales Embedding, in derselben Transaktion gespeichert
+            embedding_model: Modell-ID des Embeddings
 
         Returns:
             int: ID des gespeicherten Records
         """
         with self.get_connection() as conn:
-            # Content-Preview erstellen (erste 100 Zeichen)
-            full_content = processed_reflection.get("content", "")
-            preview = (
-                full_content[:100] + "..." if len(full_content) > 100 else full_content
+            cursor = conn.execute(
+                self._INSERT_REFLECTION,
+                self._reflection_row(processed_reflection, embedding, embedding_model),
             )
+            return cursor.lastrowid
 
-            # Tags und Themes als JSON speichern
-            tags_json = json.dumps(processed_reflection.get("tags", []))
-            themes_json = json.dumps(processed_reflection.get("themes", []))
+    def store_embeddings(
+        self, embeddings: Iterable[Tuple[str, np.ndarray]], embedding_model: str
+    ) -> int:
+        """
+        Speichert Embeddings bestehender Reflexionen (eine Transaktion)
 
-            cursor = conn.execute(
-                """
-                INSERT INTO reflections (
-                    hash, content_preview, full_content, timestamp,
-                    privacy_level, tags, themes, sentiment, word_count
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-                (
-                    processed_reflection.get("hash", ""),
-                    preview,
-                    full_content,
-                    processed_reflection.get("timestamp", datetime.now().isoformat()),
-                    processed_reflection.get("privacy", "private"),
-                    tags_json,
-                    themes_json,
-                    processed_reflection.get("sentiment", ""),
-                    processed_reflection.get("structure", {}).get("word_count", 0),
-                ),
+        Args:
+            embeddings: Paare (Hash, Embedding)
+            embedding_model: Modell-ID der Embeddings
+
+        Returns:
+            int: Anzahl aktualisierter Reflexionen
+        """
+        rows = [
+            (self._embedding_blob(vector), embedding_model, reflection_hash)
+            for reflection_hash, vector in embeddings
+        ]
+        with self.get_connection() as conn:
+            cursor = conn.executemany(
+                "UPDATE reflections SET embedding = ?, embedding_model = ? "
+                "WHERE hash = ?",
+                rows,
             )
+            return cursor.rowcount
+
+    def load_embedding_matrix(
+        self,
+        embedding_model: str,
+        embedding_dim: int,
+        hashes: Optional[List[str]] = None,
+    ) -> Tuple[List[str], np.ndarray]:
+        """
+        Lädt gespeicherte Embeddings als zusammenhängende Matrix
 
-            return cursor.lastrowid
+        Eine sequentielle Abfrage liefert alle BLOBs; sie werden einmal
+        aneinandergehängt und per np.frombuffer ohne weitere Kopie als
+        (n x embedding_dim) float32-Matrix interpretiert. Embeddings eines
+        anderen Modells oder falscher Länge werden übergangen.
+
+        Args:
+            embedding_model: Modell-ID der gewünschten Embeddings
+            embedding_dim: Dimension der Embeddings
+            hashes: Nur diese Reflexionen laden (None: alle)
+
+        Returns:
+            Tuple[List[str], np.ndarray]: Hashes und schreibgeschützte Matrix
+            in gleicher Reihenfolge
+        """
+        query = (
+            "SELECT hash, embedding FROM reflections "
+            "WHERE embedding_model = ? AND length(embedding) = ?"
+        )
+        params: List = [embedding_model, embedding_dim * 4]
+        if hashes is not None:
+            query += " AND hash IN (SELECT value FROM json_each(?))"
+            params.append(json.dumps(list(hashes)))
+        query += " ORDER BY id"
+
+        with self.get_connection() as conn:
+            rows = conn.execute(query, params).fetchall()
+
+        if not rows:
+            return [], np.zeros((0, embedding_dim), dtype=np.float32)
+
+        stored_hashes = [row[0] for row in rows]
+        matrix = np.frombuffer(b"".join(row[1] for row in rows), dtype="<f4")
+        return stored_hashes, matrix.reshape(len(rows), embedding_dim)
+
+    def store_reflections_bulk(
+        self, processed_reflections: Iterable[Dict], batch_size: int = 500
+    ) -> BulkInsertResult:
+        """
+        Speichert viele Reflexionen blockweise per executemany
+
+        Jeder Block läuft in einer eigenen Transaktion (ein Commit statt
+        einem pro Reflexion). Bereits vorhandene Hashes – auch doppelte
+        innerhalb der Eingabe – werden übersprungen und gemeldet, ohne den
+        Block abzubrechen.
+
+        Args:
+            processed_reflections: Verarbeitete Reflexionsdaten (auch Generator)
+            batch_size: Reflexionen pro Transaktion
+
+        Returns:
+            BulkInsertResult: IDs in Eingabereihenfolge und Konflikte
+        """
+        result = BulkInsertResult()
+        batch: List[Tuple] = []
+        for processed_reflection in processed_reflections:
+            batch.append(self._reflection_row(processed_reflection))
+            if len(batch) >= batch_size:
+                self._store_batch(batch, result)
+                batch = []
+        if batch:
+            self._store_batch(batch, result)
+        return result
+
+    def _store_batch(self, rows: List[Tuple], result: BulkInsertResult):
+        """Fügt einen Block in einer Transaktion ein und ordnet die IDs zu"""
+        offset = len(result.ids)
+        hashes = list({row[0] for row in rows})
+
+        with self.get_connection() as conn:
+            # Schreibsperre vor dem Lesen der höchsten ID: neue Zeilen sind
+            # danach genau die mit größerer ID
+            conn.execute("BEGIN IMMEDIATE")
+            max_id = conn.execute(
+                "SELECT COALESCE(MAX(id), 0) FROM reflections"
+            ).fetchone()[0]
+            conn.executemany(
+                self._INSERT_REFLECTION.replace("INSERT", "INSERT OR IGNORE", 1), rows
+            )
+
+            new_ids = {}
+            for start in range(0, len(hashes), self.MAX_QUERY_PARAMS):
+                end = start + self.MAX_QUERY_PARAMS
+                chunk = hashes[start:end]
+                placeholders = ",".join("?" * len(chunk))
+                cursor = conn.execute(
+                    f"SELECT hash, id FROM reflections "
+                    f"WHERE id > ? AND hash IN ({placeholders})",
+                    [max_id] + chunk,
+                )
+                new_ids.update((row["hash"], row["id"]) for row in cursor)
+
+        for position, row in enumerate(rows):
+            reflection_id = new_ids.pop(row[0], None)
+            result.ids.append(reflection_id)
+            if reflection_id is None:
+                result.conflicts.append((offset + position, row[0]))
+
+    @staticmethod
+    def _embedding_blob(vector) -> bytes:
+        """Serialisiert ein Embedding als float32 little-endian"""
+        return np.ascontiguousarray(vector, dtype="<f4").tobytes()
+
+    @classmethod
+    def _reflection_row(
+        cls,
+        processed_reflection: Dict,
+        embedding: Optional[np.ndarray] = None,
+        embedding_model: Optional[str] = None,
+    ) -> Tuple:
+        """Baut die Spaltenwerte einer Reflexion für INSERT"""
+        # Content-Preview erstellen (erste 100 Zeichen)
+        full_content = processed_reflection.get("content", "")
+        preview = full_content
+        if len(full_content) > 100:
+            preview = full_content[:100] + "..."
+
+        return (
+            processed_reflection.get("hash", ""),
+            preview,
+            full_content,
+            processed_reflection.get("timestamp", datetime.now().isoformat()),
+            processed_reflection.get("privacy", "private"),
+            # Tags und Themes als JSON speichern
+            json.dumps(processed_reflection.get("tags", [])),
+            json.dumps(processed_reflection.get("themes", [])),
+            processed_reflection.get("sentiment", ""),
+            processed_reflection.get("structure", {}).get("word_count", 0),
+            processed_reflection.get("state_value"),
+            processed_reflection.get("state_name"),
+            cls._embedding_blob(embedding) if embedding is not None else None,
+            embedding_model if embedding is not None else None,
+        )
 
     def update_storage_reference(
         self, reflection_hash: str, storage_type: str, storage_hash: str
@@ -203,55 +561,575 @@ class LocalDatabase:
             conn.commit()
 
     def get_reflections(
-        self, limit: int = 50, privacy_level: str = None, days_back: int = None
+        self,
+        limit: int = 50,
+        privacy_level: str = None,
+        days_back: int = None,
+        cursor: Optional[str] = None,
     ) -> List[ReflectionRecord]:
         """
-        Ruft Reflexionen ab
+        Ruft Reflexionen ab (neueste zuerst)
 
         Args:
             limit: Maximale Anzahl
             privacy_level: Filter nach Privacy-Level
             days_back: Nur Reflexionen der letzten X Tage
+            cursor: Fortsetzungsmarke aus get_reflections_page (optional)
 
         Returns:
             List[ReflectionRecord]: Liste der Reflexionen
         """
+        records, _ = self.get_reflections_page(
+            limit, privacy_level=privacy_level, days_back=days_back, cursor=cursor
+        )
+        return records
+
+    def get_reflections_page(
+        self,
+        limit: int = 50,
+        privacy_level: str = None,
+        days_back: int = None,
+        cursor: Optional[str] = None,
+        include_content: bool = False,
+    ) -> Tuple[List[ReflectionRecord], Optional[str]]:
+        """
+        Ruft eine Seite von Reflexionen per Keyset-Pagination ab
+
+        Sortiert wird nach (timestamp, id) absteigend; die nächste Seite
+        setzt hinter dem letzten Eintrag über den Index fort, statt wie
+        OFFSET alle vorherigen Zeilen zu überspringen. Aufwand und Speicher
+        bleiben damit O(Seite), unabhängig von der Tabellengröße.
+
+        Args:
+            limit: Einträge pro Seite
+            privacy_level: Filter nach Privacy-Level
+            days_back: Nur Reflexionen der letzten X Tage
+            cursor: Fortsetzungsmarke der vorherigen Seite (None: erste Seite)
+            include_content: Volltext in record.content mitladen
+
+        Returns:
+            Tuple[List[ReflectionRecord], Optional[str]]: Records und Marke
+            für die nächste Seite (None auf der letzten Seite)
+
+        Raises:
+            ValueError: Bei ungültiger Fortsetzungsmarke
+        """
+        columns = self._record_columns() + (", full_content" if include_content else "")
+        query = f"SELECT {columns} FROM reflections WHERE 1=1"
+        params: List = []
+
+        if privacy_level:
+            query += " AND privacy_level = ?"
+            params.append(privacy_level)
+
+        if days_back:
+            cutoff_date = datetime.now() - timedelta(days=days_back)
+            query += " AND timestamp >= ?"
+            params.append(cutoff_date.isoformat())
+
+        if cursor:
+            query += " AND (timestamp, id) < (?, ?)"
+            params.extend(decode_cursor(cursor))
+
+        # Eine Zeile mehr verrät, ob es eine weitere Seite gibt
+        query += " ORDER BY timestamp DESC, id DESC LIMIT ?"
+        params.append(limit + 1)
+
+        with self.get_connection() as conn:
+            rows = conn.execute(query, params).fetchall()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1]["timestamp"], rows[-1]["id"])
+
+        records = [self._row_to_record(row) for row in rows]
+        if include_content:
+            for record, row in zip(records, rows):
+                record.content = row["full_content"]
+        return records, next_cursor
+
+    def text_search(
+        self, query: str, limit: int = 10, privacy_level: str = None
+    ) -> List[Tuple[ReflectionRecord, float]]:
+        """
+        Stichwortsuche mit BM25-Ranking über den Volltextindex
+
+        Inhalt zählt doppelt so stark wie Tags und Themen. Ohne FTS5 wird
+        auf eine LIKE-Suche über den Inhalt zurückgefallen (Score 0).
+
+        Args:
+            query: Suchtext
+            limit: Maximale Anzahl
+            privacy_level: Filter nach Privacy-Level
+
+        Returns:
+            List[Tuple[ReflectionRecord, float]]: Records mit Score (höher = besser)
+        """
+        match_query = build_match_query(query)
+        if not match_query:
+            return []
+
+        params = []
+        if self.fts_enabled:
+            sql = f"""
+                SELECT {self._record_columns("r")},
+                    -bm25(reflections_fts, 2.0, 1.0, 1.0) AS score
+                FROM reflections_fts
+                JOIN reflections r ON r.id = reflections_fts.rowid
+                WHERE reflections_fts MATCH ?
+            """
+            params.append(match_query)
+        else:
+            sql = (
+                f"SELECT {self._record_columns('r')}, 0.0 AS score "
+                f"FROM reflections r WHERE r.full_content LIKE ?"
+            )
+            params.append(f"%{query}%")
+
+        if privacy_level:
+            sql += " AND r.privacy_level = ?"
+            params.append(privacy_level)
+
+        sql += " ORDER BY score DESC LIMIT ?"
+        params.append(limit)
+
+        with self.get_connection() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [(self._row_to_record(row), row["score"]) for row in rows]
+
+    def get_candidate_hashes(self, filters: ReflectionFilter) -> List[str]:
+        """
+        Ermittelt die Hashes aller Reflexionen, die einen Filter erfüllen
+
+        Dient als Kandidatenmenge für vorgefilterte Vektorsuchen.
+
+        Args:
+            filters: Such-Filter
+
+        Returns:
+            List[str]: Hashes der passenden Reflexionen
+        """
+        where, params = filters.to_sql()
+        with self.get_connection() as conn:
+            cursor = conn.execute(
+                f"SELECT r.hash FROM reflections r WHERE {where}", params
+            )
+            return [row["hash"] for row in cursor.fetchall()]
+
+    def find_by_themes(
+        self, themes: List[str], limit: int = 10, filters: ReflectionFilter = None
+    ) -> List[Tuple[ReflectionRecord, int]]:
+        """
+        Sucht Reflexionen mit gemeinsamen Themen, sortiert nach Überschneidung
+
+        Args:
+            themes: Suchthemen
+            limit: Maximale Anzahl
+            filters: Zusätzliche Filter (Datum, Privacy-Level, ...)
+
+        Returns:
+            List[Tuple[ReflectionRecord, int]]: Records mit Anzahl gemeinsamer Themen
+        """
+        themes = list(dict.fromkeys(themes))
+        if not themes:
+            return []
+
+        where, params = replace(filters or ReflectionFilter(), themes=None).to_sql()
+        placeholders = ",".join("?" * len(themes))
+
+        with self.get_connection() as conn:
+            cursor = conn.execute(
+                f"""
+                SELECT {self._record_columns("r")}, m.common_count FROM (
+                    SELECT reflection_id, COUNT(*) AS common_count
+                    FROM reflection_themes WHERE theme IN ({placeholders})
+                    GROUP BY reflection_id
+                ) m
+                JOIN reflections r ON r.id = m.reflection_id
+                WHERE {where}
+                ORDER BY m.common_count DESC, r.timestamp DESC
+                LIMIT ?
+            """,
+                [*themes, *params, limit],
+            )
+            return [(self._row_to_record(row), row["common_count"]) for row in cursor]
+
+    def get_top_themes(
+        self, limit: int = 10, filters: ReflectionFilter = None
+    ) -> List[Tuple[str, int]]:
+        """
+        Zählt die häufigsten Themen über den Themen-Index
+
+        Args:
+            limit: Maximale Anzahl
+            filters: Einschränkung der Reflexionen (optional)
+
+        Returns:
+            List[Tuple[str, int]]: (Thema, Anzahl Reflexionen) absteigend
+        """
+        return self._top_terms("reflection_themes", "theme", limit, filters)
+
+    def get_top_tags(
+        self, limit: int = 10, filters: ReflectionFilter = None
+    ) -> List[Tuple[str, int]]:
+        """
+        Zählt die häufigsten Tags über den Tag-Index
+
+        Args:
+            limit: Maximale Anzahl
+            filters: Einschränkung der Reflexionen (optional)
+
+        Returns:
+            List[Tuple[str, int]]: (Tag, Anzahl Reflexionen) absteigend
+        """
+        return self._top_terms("reflection_tags", "tag", limit, filters)
+
+    def get_theme_cooccurrence(
+        self, theme: str, limit: int = 10
+    ) -> List[Tuple[str, int]]:
+        """
+        Ermittelt Themen, die gemeinsam mit einem Thema auftreten
+
+        Args:
+            theme: Ausgangsthema
+            limit: Maximale Anzahl
+
+        Returns:
+            List[Tuple[str, int]]: (Thema, gemeinsame Reflexionen) absteigend
+        """
+        with self.get_connection() as conn:
+            cursor = conn.execute(
+                """
+                SELECT b.theme, COUNT(*) AS count
+                FROM reflection_themes a
+                JOIN reflection_themes b
+                    ON b.reflection_id = a.reflection_id AND b.theme <> a.theme
+                WHERE a.theme = ?
+                GROUP BY b.theme
+                ORDER BY count DESC, b.theme
+                LIMIT ?
+            """,
+                (theme, limit),
+            )
+            return [(row["theme"], row["count"]) for row in cursor]
+
+    def get_themes_by_hashes(self, hashes: List[str]) -> Dict[str, List[str]]:
+        """
+        Liest die Themen mehrerer Reflexionen aus dem Themen-Index
+
+        Args:
+            hashes: Liste von Reflexions-Hashes
+
+        Returns:
+            Dict[str, List[str]]: Hash -> Themen (nur Reflexionen mit Themen)
+        """
+        themes_by_hash: Dict[str, List[str]] = {}
+        with self.get_connection() as conn:
+            for start in range(0, len(hashes), self.MAX_QUERY_PARAMS):
+                end = start + self.MAX_QUERY_PARAMS
+                chunk = hashes[start:end]
+                placeholders = ",".join("?" * len(chunk))
+                cursor = conn.execute(
+                    f"""
+                    SELECT r.hash, t.theme FROM reflections r
+                    JOIN reflection_themes t ON t.reflection_id = r.id
+                    WHERE r.hash IN ({placeholders})
+                """,
+                    chunk,
+                )
+                for row in cursor:
+                    themes_by_hash.setdefault(row["hash"], []).append(row["theme"])
+        return themes_by_hash
+
+    def _top_terms(
+        self,
+        term_table: str,
+        term_column: str,
+        limit: int,
+        filters: Optional[ReflectionFilter],
+    ) -> List[Tuple[str, int]]:
+        """Häufigste Begriffe einer Begriffstabelle, optional gefiltert"""
+        if filters is None or filters.is_empty():
+            query = (
+                f"SELECT {term_column} AS term, COUNT(*) AS count FROM {term_table} "
+                f"GROUP BY {term_column} ORDER BY count DESC, term LIMIT ?"
+            )
+            params: List = [limit]
+        else:
+            where, params = filters.to_sql()
+            query = (
+                f"SELECT t.{term_column} AS term, COUNT(*) AS count "
+                f"FROM {term_table} t JOIN reflections r ON r.id = t.reflection_id "
+                f"WHERE {where} "
+                f"GROUP BY t.{term_column} ORDER BY count DESC, term LIMIT ?"
+            )
+            params = params + [limit]
+
+        with self.get_connection() as conn:
+            return [(row["term"], row["count"]) for row in conn.execute(query, params)]
+
+    def find_by_sentiment(
+        self, sentiment: str, limit: int = 10, filters: ReflectionFilter = None
+    ) -> List[Tuple[ReflectionRecord, float]]:
+        """
+        Sucht Reflexionen eines Sentiments, sortiert nach Konfidenz
+
+        Das Label wird als "emotion(konfidenz)" gespeichert; ohne Konfidenz
+        gilt 0.5.
+
+        Args:
+            sentiment: Sentiment-Label, z.B. 'positive'
+            limit: Maximale Anzahl
+            filters: Zusätzliche Filter (Datum, Privacy-Level, ...)
+
+        Returns:
+            List[Tuple[ReflectionRecord, float]]: Records mit Konfidenz
+        """
+        where, params = replace(
+            filters or ReflectionFilter(), sentiment=sentiment
+        ).to_sql()
+
         with self.get_connection() as conn:
-            query = "SELECT * FROM reflections WHERE 1=1"
-            params = []
+            cursor = conn.execute(
+                f"""
+                SELECT {self._record_columns("r")}, CASE
+                    WHEN instr(r.sentiment, '(') > 0
+                    THEN CAST(substr(r.sentiment, instr(r.sentiment, '(') + 1) AS REAL)
+                    ELSE 0.5
+                END AS confidence
+                FROM reflections r
+                WHERE {where}
+                ORDER BY confidence DESC, r.timestamp DESC
+                LIMIT ?
+            """,
+                [*params, limit],
+            )
+            return [(self._row_to_record(row), row["confidence"]) for row in cursor]
 
-            if privacy_level:
-                query += " AND privacy_level = ?"
-                params.append(privacy_level)
+    def find_by_state_range(
+        self, min_state: int, max_state: int, limit: int = None
+    ) -> List[ReflectionRecord]:
+        """
+        Ruft Reflexionen in einem Zustandsbereich über den State-Index ab
 
-            if days_back:
-                cutoff_date = datetime.now() - timedelta(days=days_back)
-                query += " AND timestamp >= ?"
-                params.append(cutoff_date.isoformat())
+        Args:
+            min_state: Minimaler Zustandswert (inklusive)
+            max_state: Maximaler Zustandswert (inklusive)
+            limit: Optionale Maximalanzahl
 
-            query += " ORDER BY timestamp DESC LIMIT ?"
+        Returns:
+            List[ReflectionRecord]: Records aufsteigend nach Zustandswert
+        """
+        query = f"""
+            SELECT {self._record_columns()} FROM reflections
+            WHERE state_value BETWEEN ? AND ?
+            ORDER BY state_value, timestamp DESC
+        """
+        params = [min_state, max_state]
+        if limit is not None:
+            query += " LIMIT ?"
             params.append(limit)
 
-            cursor = conn.execute(query, params)
-            rows = cursor.fetchall()
+        with self.get_connection() as conn:
+            return [self._row_to_record(row) for row in conn.execute(query, params)]
 
-            records = []
-            for row in rows:
-                record = ReflectionRecord(
-                    id=row["id"],
-                    hash=row["hash"],
-                    content_preview=row["content_preview"],
-                    timestamp=datetime.fromisoformat(row["timestamp"]),
-                    privacy_level=row["privacy_level"],
-                    ipfs_hash=row["ipfs_hash"],
-                    arweave_tx=row["arweave_tx"],
-                    tags=json.loads(row["tags"]) if row["tags"] else [],
-                    themes=json.loads(row["themes"]) if row["themes"] else [],
-                    sentiment=row["sentiment"],
+    def get_state_counts(self) -> Dict[int, int]:
+        """
+        Zählt Reflexionen pro Zustandswert in einer Aggregat-Abfrage
+
+        Returns:
+            Dict[int, int]: Zustandswert -> Anzahl (höchstens 256 Einträge)
+        """
+        with self.get_connection() as conn:
+            cursor = conn.execute(
+                """
+                SELECT state_value, COUNT(*) AS count FROM reflections
+                WHERE state_value IS NOT NULL
+                GROUP BY state_value
+            """
+            )
+            return {row["state_value"]: row["count"] for row in cursor}
+
+    def get_rollups(
+        self,
+        period: str = "day",
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> List[Dict]:
+        """
+        Liest materialisierte Tages- oder Wochenaggregate
+
+        Args:
+            period: "day" oder "week"
+            start: Erster einzuschließender Zeitpunkt (optional)
+            end: Letzter einzuschließender Zeitpunkt (optional)
+
+        Returns:
+            List[Dict]: Buckets aufsteigend mit reflection_count, word_total,
+            sentiments und themes (Label -> Anzahl)
+        """
+        if period not in ROLLUP_PERIODS:
+            raise ValueError(f"Unbekannte Rollup-Periode: {period}")
+
+        where = "period = ?"
+        params: List = [period]
+        if start is not None:
+            where += " AND bucket >= ?"
+            params.append(bucket_key(period, start))
+        if end is not None:
+            where += " AND bucket <= ?"
+            params.append(bucket_key(period, end))
+
+        with self.get_connection() as conn:
+            buckets = {
+                row["bucket"]: {
+                    "period": period,
+                    "bucket": row["bucket"],
+                    "reflection_count": row["reflection_count"],
+                    "word_total": row["word_total"],
+                    "sentiments": {},
+                    "themes": {},
+                }
+                for row in conn.execute(
+                    f"SELECT * FROM reflection_rollups WHERE {where} ORDER BY bucket",
+                    params,
+                )
+            }
+            for row in conn.execute(
+                f"SELECT bucket, sentiment, count FROM rollup_sentiments WHERE {where}",
+                params,
+            ):
+                if row["bucket"] in buckets:
+                    sentiments = buckets[row["bucket"]]["sentiments"]
+                    sentiments[row["sentiment"]] = row["count"]
+            for row in conn.execute(
+                f"SELECT bucket, theme, count FROM rollup_themes WHERE {where}",
+                params,
+            ):
+                if row["bucket"] in buckets:
+                    buckets[row["bucket"]]["themes"][row["theme"]] = row["count"]
+
+        return list(buckets.values())
+
+    def get_reflections_by_hashes(self, hashes: List[str]) -> List[ReflectionRecord]:
+        """
+        Ruft mehrere Reflexionen in einer Abfrage pro Block ab
+
+        Args:
+            hashes: Liste von Reflexions-Hashes
+
+        Returns:
+            List[ReflectionRecord]: Records in der Reihenfolge von hashes
+        """
+        records_by_hash = {}
+        with self.get_connection() as conn:
+            for start in range(0, len(hashes), self.MAX_QUERY_PARAMS):
+                end = start + self.MAX_QUERY_PARAMS
+                chunk = hashes[start:end]
+                placeholders = ",".join("?" * len(chunk))
+                cursor = conn.execute(
+                    f"SELECT {self._record_columns()} FROM reflections "
+                    f"WHERE hash IN ({placeholders})",
+                    chunk,
                 )
-                records.append(record)
+                for row in cursor.fetchall():
+                    records_by_hash[row["hash"]] = self._row_to_record(row)
+
+        return [records_by_hash[h] for h in hashes if h in records_by_hash]
 
-            return records
+    def get_reflection_hashes(self, after_id: int = 0) -> List[str]:
+        """
+        Ruft die Reflexions-Hashes ab
+
+        Args:
+            after_id: Nur Reflexionen mit höherer ID (0: alle)
+
+        Returns:
+            List[str]: Hashes der gespeicherten Reflexionen
+        """
+        with self.get_connection() as conn:
+            cursor = conn.execute(
+                "SELECT hash FROM reflections WHERE id > ? ORDER BY id", (after_id,)
+            )
+            return [row["hash"] for row in cursor.fetchall()]
+
+    def iter_reflection_batches(self, chunk_size: int = 512) -> Iterator[List[Dict]]:
+        """
+        Liefert alle Reflexionen blockweise, ohne die Tabelle komplett zu laden
+
+        Args:
+            chunk_size: Anzahl Reflexionen pro Block
+
+        Returns:
+            Iterator[List[Dict]]: Blöcke mit id, hash, content und timestamp
+        """
+        last_id = 0
+        while True:
+            with self.get_connection() as conn:
+                cursor = conn.execute(
+                    """
+                    SELECT id, hash, full_content, content_preview, timestamp
+                    FROM reflections WHERE id > ? ORDER BY id LIMIT ?
+                    """,
+                    (last_id, chunk_size),
+                )
+                rows = cursor.fetchall()
+
+            if not rows:
+                return
+
+            last_id = rows[-1]["id"]
+            yield [
+                {
+                    "id": row["id"],
+                    "hash": row["hash"],
+                    "content": row["full_content"] or row["content_preview"] or "",
+                    "timestamp": row["timestamp"],
+                }
+                for row in rows
+            ]
+
+    def get_change_signature(self) -> Tuple[int, int]:
+        """
+        Liefert eine günstige Signatur des Tabellenzustands
+
+        Ändert sich bei jedem Einfügen oder Löschen von Reflexionen und
+        erlaubt abgeleiteten Indizes, unnötige Abgleiche zu überspringen.
+        Die Anzahl stammt aus den Statistik-Zählern, die höchste ID aus dem
+        Primärschlüssel – beides ohne Tabellenscan.
+
+        Returns:
+            Tuple[int, int]: (Anzahl Reflexionen, höchste ID)
+        """
+        with self.get_connection() as conn:
+            row = conn.execute(
+                """
+                SELECT
+                    (SELECT value FROM statistics_counters
+                     WHERE scope = 'reflections' AND key = 'count' AND subkey = '')
+                        AS count,
+                    (SELECT MAX(id) FROM reflections) AS max_id
+            """
+            ).fetchone()
+            return row["count"] or 0, row["max_id"] or 0
+
+    def _row_to_record(self, row: sqlite3.Row) -> ReflectionRecord:
+        """Konvertiert eine Datenbankzeile in einen ReflectionRecord (lazy)"""
+        return ReflectionRecord(
+            row["id"],
+            row["hash"],
+            row["content_preview"],
+            row["timestamp"],
+            row["privacy_level"],
+            row["ipfs_hash"],
+            row["arweave_tx"],
+            row["tags"],
+            row["themes"],
+            row["sentiment"],
+            row["state_value"],
+            row["state_name"],
+        )
 
     def get_reflection_by_hash(self, reflection_hash: str) -> Optional[Dict]:
         """
@@ -265,7 +1143,9 @@ class LocalDatabase:
         """
         with self.get_connection() as conn:
             cursor = conn.execute(
-                "SELECT * FROM reflections WHERE hash = ?", (reflection_hash,)
+                f"SELECT {self._record_columns()}, full_content, word_count "
+                f"FROM reflections WHERE hash = ?",
+                (reflection_hash,),
             )
             row = cursor.fetchone()
 
@@ -283,6 +1163,8 @@ class LocalDatabase:
                     "themes": json.loads(row["themes"]) if row["themes"] else [],
                     "sentiment": row["sentiment"],
                     "word_count": row["word_count"],
+                    "state_value": row["state_value"],
+                    "state_name": row["state_name"],
                 }
 
             return None
@@ -373,97 +1255,115 @@ class LocalDatabase:
         """
         Ruft Datenbank-Statistiken ab
 
+        Summen und Verteilungen stammen aus den per Trigger gepflegten
+        Zählern, die 7-Tage-Anzahl aus den Tages-Rollups plus einer
+        Indexabfrage für den angeschnittenen ersten Tag. Kein Full-Table-Scan.
+
         Returns:
             Dict: Statistiken
         """
-        with self.get_connection() as conn:
-            stats = {}
-
-            # Gesamtanzahl Reflexionen
-            cursor = conn.execute("SELECT COUNT(*) as count FROM reflections")
-            stats["total_reflections"] = cursor.fetchone()["count"]
+        cutoff = datetime.now() - timedelta(days=7)
+        first_day = cutoff.date()
+        next_day = (first_day + timedelta(days=1)).isoformat()
 
-            # Reflexionen der letzten 7 Tage
-            cursor = conn.execute(
-                """
-                SELECT COUNT(*) as count FROM reflections 
-                WHERE timestamp >= datetime('now', '-7 days')
-            """
-            )
-            stats["reflections_last_7_days"] = cursor.fetchone()["count"]
+        with self.get_connection() as conn:
+            counters = read_counters(conn)
 
-            # Privacy-Level Verteilung
-            cursor = conn.execute(
+            # Reflexionen der letzten 7 Tage: volle Tage aus den Rollups,
+            # der erste Tag ab dem Stichzeitpunkt über den Zeitstempel-Index
+            full_days = conn.execute(
                 """
-                SELECT privacy_level, COUNT(*) as count 
-                FROM reflections 
-                GROUP BY privacy_level
-            """
-            )
-            stats["privacy_distribution"] = {
-                row["privacy_level"]: row["count"] for row in cursor.fetchall()
-            }
+                SELECT COALESCE(SUM(reflection_count), 0) FROM reflection_rollups
+                WHERE period = 'day' AND bucket >= ?
+            """,
+                (next_day,),
+            ).fetchone()[0]
+            partial_day = conn.execute(
+                "SELECT COUNT(*) FROM reflections "
+                "WHERE timestamp >= ? AND timestamp < ?",
+                (cutoff.isoformat(), next_day),
+            ).fetchone()[0]
+
+        return {
+            "total_reflections": counters["reflections"].get("count", 0),
+            "reflections_last_7_days": full_days + partial_day,
+            "privacy_distribution": counters["privacy"],
+            "upload_status": counters["upload"],
+            "total_words": counters["reflections"].get("words", 0),
+        }
+
+    def cleanup_old_data(self, days_to_keep: int = 365, batch_size: int = 500) -> Dict:
+        """
+        Bereinigt alte Daten
 
-            # Upload-Status
-            cursor = conn.execute(
-                """
-                SELECT storage_type, status, COUNT(*) as count 
-                FROM upload_status 
-                GROUP BY storage_type, status
-            """
-            )
-            upload_stats = {}
-            for row in cursor.fetchall():
-                if row["storage_type"] not in upload_stats:
-                    upload_stats[row["storage_type"]] = {}
-                upload_stats[row["storage_type"]][row["status"]] = row["count"]
-            stats["upload_status"] = upload_stats
+        Löscht blockweise in kurzen Transaktionen (siehe RetentionJob), statt
+        die Schreibsperre für den gesamten Bestand zu halten.
 
-            # Gesamte Wortanzahl
-            cursor = conn.execute("SELECT SUM(word_count) as total FROM reflections")
-            result = cursor.fetchone()
-            stats["total_words"] = result["total"] if result["total"] else 0
+        Args:
+            days_to_keep: Tage die behalten werden sollen
+            batch_size: Zeilen pro Transaktion
 
-            return stats
+        Returns:
+            Dict: Fortschritt und Metriken des Durchlaufs
+        """
+        return RetentionJob(
+            self, days_to_keep=days_to_keep, batch_size=batch_size
+        ).run_once()
 
-    def cleanup_old_data(self, days_to_keep: int = 365):
+    def schedule_retention(
+        self, interval_seconds: float = 24 * 3600, **options
+    ) -> RetentionJob:
         """
-        Bereinigt alte Daten
+        Plant die Aufbewahrungs-Bereinigung im Hintergrund ein
+
+        Ein bereits geplanter Job wird ersetzt; close() beendet ihn.
 
         Args:
-            days_to_keep: Tage die behalten werden sollen
+            interval_seconds: Abstand zwischen zwei Durchläufen
+            **options: days_to_keep, batch_size, pause, vacuum_pages
+
+        Returns:
+            RetentionJob: Gestarteter Job (Fortschritt über get_stats())
         """
-        with self.get_connection() as conn:
-            cutoff_date = datetime.now() - timedelta(days=days_to_keep)
+        self.stop_retention()
+        self._retention_job = RetentionJob(self, **options)
+        self._retention_job.start(interval_seconds)
+        return self._retention_job
+
+    def stop_retention(self):
+        """Beendet eine eingeplante Aufbewahrung (ohne Wirkung, wenn keine läuft)"""
+        if self._retention_job is not None:
+            self._retention_job.stop()
+            self._retention_job = None
+
+    def get_retention_stats(self) -> Optional[Dict]:
+        """
+        Liefert Fortschritt und Metriken der eingeplanten Aufbewahrung
 
-            # Alte Reflexionen entfernen (außer die mit permanenter Speicherung)
-            conn.execute(
-                """
-                DELETE FROM reflections 
-                WHERE timestamp < ? AND arweave_tx IS NULL
-            """,
-                (cutoff_date.isoformat(),),
-            )
+        Returns:
+            Optional[Dict]: Stats des RetentionJob oder None, wenn keiner läuft
+        """
+        if self._retention_job is None:
+            return None
+        return self._retention_job.get_stats()
 
-            # Alte Upload-Status Einträge
-            conn.execute(
-                """
-                DELETE FROM upload_status 
-                WHERE created_at < ?
-            """,
-                (cutoff_date.isoformat(),),
-            )
+    def enable_incremental_vacuum(self) -> bool:
+        """
+        Stellt eine bestehende Datenbank auf auto_vacuum=INCREMENTAL um
 
-            # Alte Insights
-            conn.execute(
-                """
-                DELETE FROM insights 
-                WHERE created_at < ?
-            """,
-                (cutoff_date.isoformat(),),
-            )
+        Neue Datenbanken werden so angelegt; ältere Dateien brauchen dafür
+        einmalig ein vollständiges VACUUM (sperrt die Datenbank für die
+        Dauer, daher nur gezielt aufrufen).
 
-            conn.commit()
+        Returns:
+            bool: True wenn eine Umstellung nötig war
+        """
+        conn = self.get_connection()
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+            return False
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+        return True
 
 
 if __name__ == "__main__":
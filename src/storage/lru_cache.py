@@ -0,0 +1,182 @@
+"""
+ASI Core - LRU Cache
+Größenbegrenzter In-Process-Cache mit Byte-Budget und Schreib-Generation
+"""
+
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+def json_size(value: Any) -> int:
+    """
+    Schätzt den Speicherbedarf eines Werts über seine JSON-Länge
+
+    Args:
+        value: JSON-serialisierbarer Wert
+
+    Returns:
+        int: Länge der JSON-Darstellung in Bytes
+    """
+    return len(json.dumps(value, default=str).encode("utf-8"))
+
+
+class LRUCache:
+    """
+    LRU-Cache mit Eintrags- und Byte-Budget
+
+    Treffer verschieben den Eintrag ans Ende, Verdrängung nimmt den am
+    längsten nicht genutzten vom Anfang. Die Größe eines Eintrags bestimmt
+    sizeof beim Einfügen.
+
+    Die Schreib-Generation wird Teil jedes Schlüssels: bump_generation()
+    macht alle bisherigen Einträge in O(1) unerreichbar, ohne den Cache
+    zu durchlaufen; sie altern anschließend regulär heraus. len() zählt
+    nur Einträge der aktuellen Generation. put() mit der beim Lesen
+    gültigen Generation legt keine Werte ab, die vor einem Schreiben
+    gelesen wurden.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1000,
+        max_bytes: int = 16 * 1024 * 1024,
+        sizeof: Callable[[Any], int] = json_size,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+
+        self._entries: "OrderedDict[Tuple[int, Hashable], Tuple[Any, int]]" = (
+            OrderedDict()
+        )
+        self._bytes = 0
+        self._live = 0
+        self._generation = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    # === PUBLIC INTERFACE ===
+
+    @property
+    def generation(self) -> int:
+        """Aktuelle Schreib-Generation"""
+        return self._generation
+
+    def bump_generation(self) -> int:
+        """
+        Invalidiert alle Einträge durch Erhöhen der Schreib-Generation
+
+        Returns:
+            int: Neue Generation
+        """
+        with self._lock:
+            self._generation += 1
+            self._live = 0
+            return self._generation
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Liest einen Eintrag der aktuellen Generation
+
+        Args:
+            key: Schlüssel
+
+        Returns:
+            Optional[Any]: Gecachter Wert oder None
+        """
+        with self._lock:
+            full_key = (self._generation, key)
+            entry = self._entries.get(full_key)
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(full_key)
+            self._hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any, generation: Optional[int] = None):
+        """
+        Legt einen Eintrag ab und verdrängt bei Bedarf die ältesten
+
+        Args:
+            key: Schlüssel
+            value: Wert
+            generation: Generation, in der der Wert gelesen wurde; ist sie
+                inzwischen überholt, wird nichts gespeichert
+        """
+        size = self.sizeof(value)
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            full_key = (self._generation, key)
+            self._pop(full_key)
+            if size > self.max_bytes:
+                return
+
+            self._entries[full_key] = (value, size)
+            self._bytes += size
+            self._live += 1
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                (evicted_generation, _), (_, evicted_size) = self._entries.popitem(
+                    last=False
+                )
+                self._bytes -= evicted_size
+                if evicted_generation == self._generation:
+                    self._live -= 1
+                self._evictions += 1
+
+    def discard(self, key: Hashable):
+        """
+        Entfernt einen Eintrag der aktuellen Generation
+
+        Args:
+            key: Schlüssel
+        """
+        with self._lock:
+            self._pop((self._generation, key))
+
+    def clear(self):
+        """Leert den Cache (Zähler und Generation bleiben erhalten)"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._live = 0
+
+    def __len__(self) -> int:
+        return self._live
+
+    def get_stats(self) -> Dict:
+        """
+        Liefert Cache-Kennzahlen
+
+        Returns:
+            Dict: Einträge (gültige und veraltete), Bytes, Generation,
+            Treffer, Fehlzugriffe, Verdrängungen, Trefferquote
+        """
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": self._live,
+                "stale_entries": len(self._entries) - self._live,
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "generation": self._generation,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+            }
+
+    # === INTERNAL METHODS ===
+
+    def _pop(self, full_key: Tuple[int, Hashable]):
+        """Entfernt einen Eintrag der aktuellen Generation (Lock gehalten)"""
+        entry = self._entries.pop(full_key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+            self._live -= 1
@@ -0,0 +1,122 @@
+"""
+ASI Core - Query Planner
+Übersetzt Such-Filter in indizierte SQL-Prädikate
+"""
+
+import base64
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+
+def glob_prefix(text: str) -> str:
+    """
+    Erstellt ein GLOB-Präfixmuster mit maskierten Sonderzeichen
+
+    GLOB ist case-sensitiv und kann daher einen normalen Index nutzen.
+
+    Args:
+        text: Präfix
+
+    Returns:
+        str: Muster, z.B. "positive*"
+    """
+    escaped = "".join(f"[{c}]" if c in "*?[" else c for c in text)
+    return escaped + "*"
+
+
+def encode_cursor(timestamp: str, row_id: int) -> str:
+    """
+    Kodiert die Keyset-Position (timestamp, id) als URL-sichere Marke
+
+    Args:
+        timestamp: Gespeicherter ISO-Zeitstempel der letzten Zeile
+        row_id: ID der letzten Zeile
+
+    Returns:
+        str: Fortsetzungsmarke
+    """
+    raw = json.dumps([timestamp, row_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """
+    Dekodiert eine Fortsetzungsmarke
+
+    Args:
+        cursor: Marke aus encode_cursor
+
+    Returns:
+        Tuple[str, int]: (timestamp, id)
+
+    Raises:
+        ValueError: Bei ungültiger Marke
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        timestamp, row_id = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Ungültige Fortsetzungsmarke: {cursor}") from e
+    if not isinstance(timestamp, str) or not isinstance(row_id, int):
+        raise ValueError(f"Ungültige Fortsetzungsmarke: {cursor}")
+    return timestamp, row_id
+
+
+@dataclass
+class ReflectionFilter:
+    """
+    Filter über der reflections-Tabelle
+
+    Alle gesetzten Bedingungen werden UND-verknüpft und laufen über Indizes.
+    themes trifft Reflexionen mit mindestens einem der Themen (über die
+    Tabelle reflection_themes), sentiment ist das Präfix des gespeicherten
+    Labels ("positive").
+    """
+
+    date_range: Optional[Tuple[datetime, datetime]] = None
+    privacy_level: Optional[str] = None
+    themes: Optional[List[str]] = None
+    sentiment: Optional[str] = None
+
+    def is_empty(self) -> bool:
+        """Gibt an, ob keine Bedingung gesetzt ist"""
+        return not (
+            self.date_range or self.privacy_level or self.themes or self.sentiment
+        )
+
+    def to_sql(self, alias: str = "r") -> Tuple[str, List]:
+        """
+        Erzeugt die WHERE-Bedingung samt Parametern
+
+        Args:
+            alias: Tabellenalias der reflections-Tabelle
+
+        Returns:
+            Tuple[str, List]: (Bedingung ohne WHERE, Parameter)
+        """
+        clauses = []
+        params: List = []
+
+        if self.date_range:
+            clauses.append(f"{alias}.timestamp BETWEEN ? AND ?")
+            params.extend(d.isoformat() for d in self.date_range)
+
+        if self.privacy_level:
+            clauses.append(f"{alias}.privacy_level = ?")
+            params.append(self.privacy_level)
+
+        if self.sentiment:
+            clauses.append(f"{alias}.sentiment GLOB ?")
+            params.append(glob_prefix(self.sentiment))
+
+        if self.themes:
+            placeholders = ",".join("?" * len(self.themes))
+            clauses.append(
+                f"{alias}.id IN (SELECT reflection_id FROM reflection_themes "
+                f"WHERE theme IN ({placeholders}))"
+            )
+            params.extend(self.themes)
+
+        return " AND ".join(clauses) or "1=1", params
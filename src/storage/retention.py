@@ -0,0 +1,228 @@
+"""
+ASI Core - Aufbewahrung
+Blockweises Löschen alter Daten mit schrittweisem Incremental Vacuum
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Löschschritte: (Tabelle, Bedingung, Zeitformat der Vergleichsspalte)
+# timestamp ist lokale ISO-Zeit, created_at ist CURRENT_TIMESTAMP (UTC)
+RETENTION_STEPS = [
+    ("reflections", "timestamp < ? AND arweave_tx IS NULL", "iso"),
+    ("upload_status", "created_at < ?", "sql_utc"),
+    ("insights", "created_at < ?", "sql_utc"),
+]
+
+
+class RetentionJob:
+    """
+    Löscht Daten jenseits der Aufbewahrungsfrist in kleinen Blöcken
+
+    Jeder Block von höchstens batch_size Zeilen läuft in einer eigenen
+    kurzen Transaktion; zwischen den Blöcken gibt der Job die Schreibsperre
+    für pause Sekunden frei, damit Web-Requests nicht warten. Danach werden
+    freie Seiten per PRAGMA incremental_vacuum in Schritten von
+    vacuum_pages an das Dateisystem zurückgegeben (nur bei
+    auto_vacuum=INCREMENTAL, siehe LocalDatabase.enable_incremental_vacuum).
+
+    run_once() führt einen Durchlauf aus, start() wiederholt ihn in einem
+    Hintergrund-Thread. get_stats() liefert Fortschritt und Metriken.
+    """
+
+    def __init__(
+        self,
+        local_db,
+        days_to_keep: int = 365,
+        batch_size: int = 500,
+        pause: float = 0.05,
+        vacuum_pages: int = 256,
+    ):
+        self.local_db = local_db
+        self.days_to_keep = days_to_keep
+        self.batch_size = batch_size
+        self.pause = pause
+        self.vacuum_pages = vacuum_pages
+
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._runs = 0
+        self._progress = self._empty_progress("idle")
+
+    # === PUBLIC INTERFACE ===
+
+    def run_once(self, should_stop: Optional[Callable[[], bool]] = None) -> Dict:
+        """
+        Führt einen vollständigen Aufbewahrungs-Durchlauf aus
+
+        Args:
+            should_stop: Optionale Abbruchbedingung, vor jedem Block geprüft
+
+        Returns:
+            Dict: Fortschritt und Metriken des Durchlaufs
+        """
+        should_stop = should_stop or self._stop_event.is_set
+        now = datetime.now()
+        cutoffs = {
+            "iso": (now - timedelta(days=self.days_to_keep)).isoformat(),
+            "sql_utc": (
+                datetime.now(timezone.utc) - timedelta(days=self.days_to_keep)
+            ).strftime("%Y-%m-%d %H:%M:%S"),
+        }
+
+        with self._lock:
+            self._runs += 1
+            self._progress = self._empty_progress("running")
+            self._progress["started_at"] = now.isoformat()
+        started = time.perf_counter()
+
+        try:
+            for table, condition, time_format in RETENTION_STEPS:
+                self._delete_in_batches(
+                    table, condition, cutoffs[time_format], should_stop
+                )
+            self._vacuum_incrementally(should_stop)
+            status = "stopped" if should_stop() else "done"
+        except Exception as e:
+            logger.error(f"Aufbewahrungs-Durchlauf fehlgeschlagen: {e}")
+            with self._lock:
+                self._progress["error"] = str(e)
+            status = "failed"
+
+        with self._lock:
+            self._progress["status"] = status
+            self._progress["duration_seconds"] = time.perf_counter() - started
+            self._progress["finished_at"] = datetime.now().isoformat()
+            return dict(self._progress, deleted=dict(self._progress["deleted"]))
+
+    def start(self, interval_seconds: float = 24 * 3600):
+        """
+        Startet wiederholte Durchläufe in einem Hintergrund-Thread
+
+        Args:
+            interval_seconds: Abstand zwischen zwei Durchläufen
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._loop,
+            args=(interval_seconds,),
+            name="asi-retention",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """
+        Beendet den Hintergrund-Thread nach dem laufenden Block
+
+        Args:
+            timeout: Maximale Wartezeit in Sekunden
+        """
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def get_stats(self) -> Dict:
+        """
+        Liefert Fortschritt und Metriken des letzten Durchlaufs
+
+        Returns:
+            Dict: Status, gelöschte Zeilen je Tabelle, Blöcke, längste
+            Sperrdauer, zurückgegebene Seiten und Laufzeit
+        """
+        with self._lock:
+            return dict(
+                self._progress,
+                deleted=dict(self._progress["deleted"]),
+                runs=self._runs,
+                scheduled=self._thread is not None and self._thread.is_alive(),
+            )
+
+    # === INTERNAL METHODS ===
+
+    def _loop(self, interval_seconds: float):
+        """Hintergrund-Schleife: Durchlauf, dann warten bis zum nächsten"""
+        while not self._stop_event.is_set():
+            self.run_once()
+            self._stop_event.wait(interval_seconds)
+
+    def _delete_in_batches(
+        self, table: str, condition: str, cutoff: str, should_stop: Callable[[], bool]
+    ):
+        """Löscht passende Zeilen einer Tabelle blockweise mit Pausen"""
+        sql = (
+            f"DELETE FROM {table} WHERE rowid IN "
+            f"(SELECT rowid FROM {table} WHERE {condition} LIMIT ?)"
+        )
+        while not should_stop():
+            batch_started = time.perf_counter()
+            with self.local_db.get_connection() as conn:
+                deleted = conn.execute(sql, (cutoff, self.batch_size)).rowcount
+            batch_seconds = time.perf_counter() - batch_started
+
+            with self._lock:
+                progress = self._progress
+                progress["deleted"][table] = progress["deleted"].get(table, 0) + deleted
+                progress["batches"] += 1
+                progress["max_batch_seconds"] = max(
+                    progress["max_batch_seconds"], batch_seconds
+                )
+
+            if deleted < self.batch_size:
+                return
+            time.sleep(self.pause)
+
+    def _vacuum_incrementally(self, should_stop: Callable[[], bool]):
+        """Gibt freie Seiten schrittweise an das Dateisystem zurück"""
+        conn = self.local_db.get_connection()
+        auto_vacuum = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+        free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        with self._lock:
+            self._progress["incremental_vacuum"] = auto_vacuum == 2
+            self._progress["free_pages_before"] = free_pages
+
+        if auto_vacuum != 2:
+            # Ohne auto_vacuum=INCREMENTAL bleiben freie Seiten zur Wiederverwendung
+            with self._lock:
+                self._progress["free_pages_after"] = free_pages
+            return
+
+        while free_pages > 0 and not should_stop():
+            # executescript führt das Pragma vollständig aus (execute nur einen Schritt)
+            conn.executescript(f"PRAGMA incremental_vacuum({int(self.vacuum_pages)})")
+            remaining = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            with self._lock:
+                self._progress["vacuumed_pages"] += free_pages - remaining
+            free_pages = remaining
+            if free_pages > 0:
+                time.sleep(self.pause)
+
+        with self._lock:
+            self._progress["free_pages_after"] = free_pages
+
+    @staticmethod
+    def _empty_progress(status: str) -> Dict:
+        """Ausgangszustand der Fortschrittsdaten"""
+        return {
+            "status": status,
+            "started_at": None,
+            "finished_at": None,
+            "deleted": {},
+            "batches": 0,
+            "max_batch_seconds": 0.0,
+            "incremental_vacuum": None,
+            "free_pages_before": 0,
+            "free_pages_after": 0,
+            "vacuumed_pages": 0,
+            "duration_seconds": 0.0,
+            "error": None,
+        }
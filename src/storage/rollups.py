@@ -0,0 +1,204 @@
+"""
+ASI Core - Zeit-Rollups
+Materialisierte Tages- und Wochenaggregate über der reflections-Tabelle
+"""
+
+import sqlite3
+from datetime import date, datetime, timedelta
+from typing import Union
+
+# Bucket-Ausdruck je Periode; Wochen beginnen am Montag (ISO 8601)
+ROLLUP_PERIODS = {
+    "day": "date({ts})",
+    "week": "date({ts}, 'weekday 0', '-6 days')",
+}
+
+# "positive(0.85)" -> "positive"
+_SENTIMENT_LABEL = (
+    "trim(CASE WHEN instr({s}, '(') > 0 "
+    "THEN substr({s}, 1, instr({s}, '(') - 1) ELSE {s} END)"
+)
+
+_THEMES_JSON = "CASE WHEN json_valid({t}) THEN {t} ELSE '[]' END"
+
+
+def bucket_key(period: str, day: Union[date, datetime, str]) -> str:
+    """
+    Berechnet den Bucket-Schlüssel eines Datums
+
+    Args:
+        period: "day" oder "week"
+        day: Datum, Zeitpunkt oder ISO-String
+
+    Returns:
+        str: Tag bzw. Montag der Woche als YYYY-MM-DD
+    """
+    if period not in ROLLUP_PERIODS:
+        raise ValueError(f"Unbekannte Rollup-Periode: {period}")
+    if isinstance(day, str):
+        day = datetime.fromisoformat(day)
+    if isinstance(day, datetime):
+        day = day.date()
+    if period == "week":
+        day = day - timedelta(days=day.weekday())
+    return day.isoformat()
+
+
+def iso_week_label(bucket: str) -> str:
+    """
+    Wandelt einen Wochen-Bucket in die ISO-Wochenbezeichnung um
+
+    Args:
+        bucket: Montag der Woche als YYYY-MM-DD
+
+    Returns:
+        str: z.B. "2024-W05"
+    """
+    year, week, _ = date.fromisoformat(bucket).isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def create_rollup_tables(conn: sqlite3.Connection, table: str = "reflections"):
+    """
+    Legt die Rollup-Tabellen samt Sync-Triggern an
+
+    Pro Periode und Bucket werden Anzahl und Wortsumme sowie die Verteilung
+    der Sentiment-Labels und Themen geführt. Trigger halten die Aggregate bei
+    INSERT, UPDATE und DELETE in derselben Transaktion aktuell; neu angelegte
+    Tabellen werden einmalig aus dem Bestand gefüllt.
+
+    Args:
+        conn: Offene Datenbankverbindung
+        table: Name der Reflexionstabelle
+    """
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master "
+        "WHERE type = 'table' AND name = 'reflection_rollups'"
+    ).fetchone()
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS reflection_rollups (
+            period TEXT NOT NULL,  -- day, week
+            bucket TEXT NOT NULL,  -- YYYY-MM-DD (Wochen: Montag)
+            reflection_count INTEGER NOT NULL DEFAULT 0,
+            word_total INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (period, bucket)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS rollup_sentiments (
+            period TEXT NOT NULL,
+            bucket TEXT NOT NULL,
+            sentiment TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (period, bucket, sentiment)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS rollup_themes (
+            period TEXT NOT NULL,
+            bucket TEXT NOT NULL,
+            theme TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (period, bucket, theme)
+        ) WITHOUT ROWID
+    """)
+
+    if not exists:
+        _backfill(conn, table)
+
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_rollup_ai AFTER INSERT ON {table} BEGIN
+            {_increment_sql("new")}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_rollup_ad AFTER DELETE ON {table} BEGIN
+            {_decrement_sql("old")}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_rollup_au
+        AFTER UPDATE OF timestamp, word_count, sentiment, themes ON {table} BEGIN
+            {_decrement_sql("old")}
+            {_increment_sql("new")}
+        END
+    """)
+
+
+def _increment_sql(row: str) -> str:
+    """Trigger-Anweisungen, die eine Zeile in alle Perioden einrechnen"""
+    label = _SENTIMENT_LABEL.format(s=f"{row}.sentiment")
+    themes = _THEMES_JSON.format(t=f"{row}.themes")
+    statements = []
+    for period, expression in ROLLUP_PERIODS.items():
+        bucket = expression.format(ts=f"{row}.timestamp")
+        statements.append(f"""
+            INSERT INTO reflection_rollups
+                (period, bucket, reflection_count, word_total)
+            SELECT '{period}', {bucket}, 1, COALESCE({row}.word_count, 0)
+            WHERE {bucket} IS NOT NULL
+            ON CONFLICT (period, bucket) DO UPDATE SET
+                reflection_count = reflection_count + 1,
+                word_total = word_total + excluded.word_total;
+            INSERT INTO rollup_sentiments (period, bucket, sentiment, count)
+            SELECT '{period}', {bucket}, {label}, 1
+            WHERE {bucket} IS NOT NULL AND {label} <> ''
+            ON CONFLICT (period, bucket, sentiment) DO UPDATE SET count = count + 1;
+            INSERT INTO rollup_themes (period, bucket, theme, count)
+            SELECT DISTINCT '{period}', {bucket}, value, 1 FROM json_each({themes})
+            WHERE {bucket} IS NOT NULL
+            ON CONFLICT (period, bucket, theme) DO UPDATE SET count = count + 1;
+        """)
+    return "".join(statements)
+
+
+def _decrement_sql(row: str) -> str:
+    """Trigger-Anweisungen, die eine Zeile aus allen Perioden herausrechnen"""
+    label = _SENTIMENT_LABEL.format(s=f"{row}.sentiment")
+    themes = _THEMES_JSON.format(t=f"{row}.themes")
+    statements = []
+    for period, expression in ROLLUP_PERIODS.items():
+        bucket = expression.format(ts=f"{row}.timestamp")
+        match = f"period = '{period}' AND bucket = {bucket}"
+        statements.append(f"""
+            UPDATE reflection_rollups SET
+                reflection_count = reflection_count - 1,
+                word_total = word_total - COALESCE({row}.word_count, 0)
+            WHERE {match};
+            DELETE FROM reflection_rollups WHERE {match} AND reflection_count <= 0;
+            UPDATE rollup_sentiments SET count = count - 1
+            WHERE {match} AND sentiment = {label};
+            DELETE FROM rollup_sentiments WHERE {match} AND count <= 0;
+            UPDATE rollup_themes SET count = count - 1
+            WHERE {match} AND theme IN (SELECT value FROM json_each({themes}));
+            DELETE FROM rollup_themes WHERE {match} AND count <= 0;
+        """)
+    return "".join(statements)
+
+
+def _backfill(conn: sqlite3.Connection, table: str):
+    """Füllt die Rollups aus bereits vorhandenen Reflexionen"""
+    label = _SENTIMENT_LABEL.format(s="r.sentiment")
+    themes = _THEMES_JSON.format(t="r.themes")
+    for period, expression in ROLLUP_PERIODS.items():
+        bucket = expression.format(ts="r.timestamp")
+        conn.execute(f"""
+            INSERT INTO reflection_rollups
+                (period, bucket, reflection_count, word_total)
+            SELECT '{period}', {bucket} AS b,
+                COUNT(*), SUM(COALESCE(r.word_count, 0))
+            FROM {table} r WHERE b IS NOT NULL GROUP BY b
+        """)
+        conn.execute(f"""
+            INSERT INTO rollup_sentiments (period, bucket, sentiment, count)
+            SELECT '{period}', {bucket} AS b, {label} AS l, COUNT(*)
+            FROM {table} r WHERE b IS NOT NULL AND l <> '' GROUP BY b, l
+        """)
+        conn.execute(f"""
+            INSERT INTO rollup_themes (period, bucket, theme, count)
+            SELECT '{period}', b, value, COUNT(*) FROM (
+                SELECT DISTINCT r.id, {bucket} AS b, j.value AS value
+                FROM {table} r, json_each({themes}) j
+            ) WHERE b IS NOT NULL GROUP BY b, value
+        """)
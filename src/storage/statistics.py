@@ -0,0 +1,136 @@
+"""
+ASI Core - Statistik-Zähler
+Per Trigger gepflegte Zähler für Dashboard-Statistiken
+"""
+
+import sqlite3
+from typing import Dict
+
+# Zähler je Reflexion: (scope, key, subkey, Wert-Ausdruck)
+_REFLECTION_COUNTERS = [
+    ("'reflections'", "'count'", "''", "1"),
+    ("'reflections'", "'words'", "''", "COALESCE({row}.word_count, 0)"),
+    ("'privacy'", "{row}.privacy_level", "''", "1"),
+]
+
+# Zähler je Upload-Status: Matrix Speichertyp x Status
+_UPLOAD_COUNTERS = [
+    ("'upload'", "{row}.storage_type", "{row}.status", "1"),
+]
+
+
+def create_statistics_table(conn: sqlite3.Connection):
+    """
+    Legt die Zählertabelle samt Sync-Triggern an
+
+    statistics_counters hält je (scope, key, subkey) einen Zählerstand:
+    Gesamtzahl und Wortsumme der Reflexionen, die Privacy-Verteilung und
+    die Upload-Matrix (Speichertyp x Status). Trigger auf reflections und
+    upload_status rechnen jede Änderung in derselben Transaktion ein, so
+    dass Statistiken unabhängig von der Datenbankgröße nur eine Handvoll
+    Zeilen lesen. Eine neu angelegte Tabelle wird aus dem Bestand gefüllt.
+
+    Args:
+        conn: Offene Datenbankverbindung
+    """
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master "
+        "WHERE type = 'table' AND name = 'statistics_counters'"
+    ).fetchone()
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS statistics_counters (
+            scope TEXT NOT NULL,  -- reflections, privacy, upload
+            key TEXT NOT NULL,
+            subkey TEXT NOT NULL DEFAULT '',
+            value INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (scope, key, subkey)
+        ) WITHOUT ROWID
+    """)
+
+    if not exists:
+        _backfill(conn)
+
+    _create_triggers(
+        conn, "reflections", _REFLECTION_COUNTERS, "privacy_level, word_count"
+    )
+    _create_triggers(conn, "upload_status", _UPLOAD_COUNTERS, "storage_type, status")
+
+
+def read_counters(conn: sqlite3.Connection) -> Dict:
+    """
+    Liest alle Zählerstände
+
+    Args:
+        conn: Offene Datenbankverbindung
+
+    Returns:
+        Dict: scope -> key -> Wert (upload: key -> subkey -> Wert)
+    """
+    counters: Dict = {"reflections": {}, "privacy": {}, "upload": {}}
+    for scope, key, subkey, value in conn.execute(
+        "SELECT scope, key, subkey, value FROM statistics_counters"
+    ):
+        if scope == "upload":
+            counters[scope].setdefault(key, {})[subkey] = value
+        else:
+            counters.setdefault(scope, {})[key] = value
+    return counters
+
+
+def _create_triggers(
+    conn: sqlite3.Connection, table: str, counters, update_columns: str
+):
+    """Legt Insert-, Delete- und Update-Trigger für eine Tabelle an"""
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_stats_ai AFTER INSERT ON {table} BEGIN
+            {_adjust_sql(counters, "new", 1)}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_stats_ad AFTER DELETE ON {table} BEGIN
+            {_adjust_sql(counters, "old", -1)}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_stats_au
+        AFTER UPDATE OF {update_columns} ON {table} BEGIN
+            {_adjust_sql(counters, "old", -1)}
+            {_adjust_sql(counters, "new", 1)}
+        END
+    """)
+
+
+def _adjust_sql(counters, row: str, sign: int) -> str:
+    """Trigger-Anweisungen, die eine Zeile in die Zähler ein- bzw. herausrechnen"""
+    statements = []
+    for scope, key, subkey, value in counters:
+        key, subkey, value = (part.format(row=row) for part in (key, subkey, value))
+        statements.append(f"""
+            INSERT INTO statistics_counters (scope, key, subkey, value)
+            VALUES ({scope}, {key}, {subkey}, {sign} * ({value}))
+            ON CONFLICT (scope, key, subkey) DO UPDATE SET
+                value = value + excluded.value;
+        """)
+    if sign < 0:
+        statements.append(
+            "DELETE FROM statistics_counters "
+            "WHERE value <= 0 AND scope <> 'reflections';"
+        )
+    return "".join(statements)
+
+
+def _backfill(conn: sqlite3.Connection):
+    """Füllt die Zähler aus bereits vorhandenen Zeilen"""
+    conn.execute("""
+        INSERT INTO statistics_counters (scope, key, subkey, value)
+        SELECT 'reflections', 'count', '', COUNT(*) FROM reflections
+        UNION ALL
+        SELECT 'reflections', 'words', '', COALESCE(SUM(word_count), 0) FROM reflections
+        UNION ALL
+        SELECT 'privacy', privacy_level, '', COUNT(*) FROM reflections
+        GROUP BY privacy_level
+        UNION ALL
+        SELECT 'upload', storage_type, status, COUNT(*) FROM upload_status
+        GROUP BY storage_type, status
+    """)
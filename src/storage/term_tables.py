@@ -0,0 +1,89 @@
+"""
+ASI Core - Begriffstabellen
+Normalisierte Join-Tabellen für Tags und Themen aus JSON-Spalten
+"""
+
+import sqlite3
+
+
+def create_term_table(
+    conn: sqlite3.Connection,
+    table: str,
+    json_column: str,
+    term_table: str,
+    term_column: str,
+    id_column: str = "id",
+    id_type: str = "INTEGER",
+):
+    """
+    Legt eine normalisierte Begriffstabelle samt Sync-Triggern an
+
+    Die JSON-Spalte bleibt die Quelle (Records, Volltextindex); die Tabelle
+    <term_table>(<term_column>, reflection_id) hält je Reflexion jeden
+    Begriff einmal. Der Primärschlüssel (Begriff, ID) bedient Filter und
+    Häufigkeiten, der Index (ID, Begriff) Lookups pro Reflexion und
+    Co-Occurrence-Joins – beide ohne Zugriff auf die Haupttabelle.
+    Trigger pflegen die Tabelle bei jedem Schreiben; eine neu angelegte
+    Tabelle wird aus dem Bestand gefüllt.
+
+    Args:
+        conn: Offene Datenbankverbindung
+        table: Name der Reflexionstabelle
+        json_column: JSON-Array-Spalte mit den Begriffen
+        term_table: Name der Begriffstabelle
+        term_column: Spaltenname des Begriffs
+        id_column: Schlüsselspalte der Reflexionstabelle
+        id_type: SQL-Typ des Schlüssels
+    """
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (term_table,)
+    ).fetchone()
+
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {term_table} (
+            {term_column} TEXT NOT NULL,
+            reflection_id {id_type} NOT NULL,
+            PRIMARY KEY ({term_column}, reflection_id)
+        ) WITHOUT ROWID
+    """)
+    conn.execute(
+        f"CREATE INDEX IF NOT EXISTS idx_{term_table}_reflection "
+        f"ON {term_table} (reflection_id, {term_column})"
+    )
+
+    def insert_terms(row: str) -> str:
+        return (
+            f"INSERT OR IGNORE INTO {term_table} ({term_column}, reflection_id) "
+            f"SELECT value, {row}.{id_column} FROM json_each("
+            f"CASE WHEN json_valid({row}.{json_column}) "
+            f"THEN {row}.{json_column} ELSE '[]' END"
+            f") WHERE type = 'text';"
+        )
+
+    if not exists:
+        conn.execute(f"""
+            INSERT OR IGNORE INTO {term_table} ({term_column}, reflection_id)
+            SELECT j.value, r.{id_column} FROM {table} r, json_each(
+                CASE WHEN json_valid(r.{json_column}) THEN r.{json_column} ELSE '[]' END
+            ) j WHERE j.type = 'text'
+        """)
+
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_{term_table}_ai
+        AFTER INSERT ON {table} BEGIN
+            {insert_terms("new")}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_{term_table}_ad
+        AFTER DELETE ON {table} BEGIN
+            DELETE FROM {term_table} WHERE reflection_id = old.{id_column};
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_{term_table}_au
+        AFTER UPDATE OF {json_column} ON {table} BEGIN
+            DELETE FROM {term_table} WHERE reflection_id = old.{id_column};
+            {insert_terms("new")}
+        END
+    """)
@@ -3,6 +3,7 @@ ASI Core - Web Interface
 Flask-basierte Web-Anwendung für ASI Core
 """
 
+import atexit
 import json
 import os
 import sys
@@ -64,17 +65,35 @@ def init_asi_system():
     try:
         # Storage-Module
         local_db = LocalDatabase("data/asi_local.db")
+        atexit.register(local_db.close)
+
+        # Aufbewahrung löscht Daten endgültig, daher nur auf ausdrücklichen
+        # Wunsch (ASI_RETENTION_DAYS > 0); standardmäßig abgeschaltet
+        retention_days = int(os.getenv("ASI_RETENTION_DAYS", "0"))
+        if retention_days > 0:
+            print(
+                f"🧹 Aufbewahrung aktiv: Reflexionen ohne Arweave-TX, die älter "
+                f"als {retention_days} Tage sind, werden endgültig gelöscht"
+            )
+            local_db.schedule_retention(days_to_keep=retention_days)
+
         ipfs_client = IPFSClient()
         arweave_client = ArweaveClient()
 
         # AI-Module
         embedding_system = ReflectionEmbedding()
-        search_engine = SemanticSearchEngine(embedding_system, local_db)
+        search_engine = SemanticSearchEngine(
+            embedding_system,
+            local_db,
+            cluster_dir="data/embeddings/clusters",
+            knn_dir="data/embeddings/knn",
+            suggestion_dir="data/embeddings/suggestions",
+        )
 
         # Core-Module
         input_handler = InputHandler()
         processor = ReflectionProcessor(embedding_system, local_db)
-        output_generator = OutputGenerator()
+        output_generator = OutputGenerator(local_db=local_db)
 
         # Blockchain-Module
         smart_contract = ASISmartContract()
@@ -134,6 +153,8 @@ def api_health():
                 "local_db": "ok",
                 "search_engine": "ok",
             }
+            status["query_cache"] = asi_system["search_engine"].query_cache.get_stats()
+            status["retention"] = asi_system["local_db"].get_retention_stats()
 
         return jsonify(status)
     except Exception as e:
@@ -191,8 +212,18 @@ def api_reflect():
         processed_reflection = processor.process_reflection(reflection_data)
         exported_data = processor.export_processed(processed_reflection)
 
-        # 3. Speicherung
-        reflection_id = local_db.store_reflection(exported_data)
+        # Optionaler ASI-Zustand (0-255) wird indiziert mitgespeichert
+        if data.get("state_value") is not None:
+            exported_data["state_value"] = int(data["state_value"])
+            exported_data["state_name"] = data.get("state_name")
+
+        # 3. Speicherung (Embedding in derselben Transaktion wie die Zeile)
+        search_engine = asi_system["search_engine"]
+        embedding = search_engine.embed_reflection(exported_data)
+        reflection_id = local_db.store_reflection(
+            exported_data, embedding=embedding, embedding_model=search_engine.model_id
+        )
+        search_engine.index_reflection(exported_data, embedding)
 
         # 4. Lokale Ausgabe
         local_file = output_generator.save_local_copy(exported_data)
@@ -276,12 +307,16 @@ def api_search():
     try:
         query = request.args.get("q", "").strip()
         limit = int(request.args.get("limit", 10))
+        mode = request.args.get("mode", "semantic")
 
         if not query:
             return jsonify({"error": "Suchanfrage ist erforderlich"}), 400
 
         search_engine = asi_system["search_engine"]
-        results = search_engine.search_by_text(query, limit=limit)
+        if mode == "hybrid":
+            results = search_engine.search_hybrid(query, limit=limit)
+        else:
+            results = search_engine.search_by_text(query, limit=limit)
 
         # Ergebnisse für JSON serialisieren
         search_results = []
@@ -308,49 +343,25 @@ def api_search():
 
     except Exception as e:
         print(f"Suchfehler: {e}")
-        # Fallback: Einfache Textsuche
+        # Fallback: BM25-Stichwortsuche über den Volltextindex
         try:
             local_db = asi_system["local_db"]
-            all_reflections = local_db.get_reflections(limit=100)
-
-            search_results = []
-            query_lower = query.lower()
-
-            for reflection in all_reflections:
-                content = local_db.get_reflection_by_hash(reflection.hash).get(
-                    "content", ""
-                )
-                content_lower = content.lower()
-
-                # Einfache Textübereinstimmung
-                if query_lower in content_lower:
-                    similarity = 0.8
-                else:
-                    query_words = set(query_lower.split())
-                    content_words = set(content_lower.split())
-                    common_words = query_words.intersection(content_words)
-                    similarity = (
-                        len(common_words) / len(query_words) if query_words else 0
-                    )
-
-                if similarity > 0.3:
-                    search_results.append(
-                        {
-                            "hash": reflection.hash,
-                            "preview": (
-                                content[:200] + "..." if len(content) > 200 else content
-                            ),
-                            "similarity": round(similarity, 3),
-                            "themes": reflection.themes or [],
-                            "timestamp": reflection.timestamp.strftime(
-                                "%Y-%m-%d %H:%M"
-                            ),
-                            "privacy_level": reflection.privacy_level,
-                        }
-                    )
-
-            search_results.sort(key=lambda x: x["similarity"], reverse=True)
-            search_results = search_results[:limit]
+            matches = local_db.text_search(query, limit=limit)
+
+            # BM25 ist unbeschränkt, relativ zum besten Treffer skalieren
+            best_score = max((score for _, score in matches), default=0.0)
+            scale = 1.0 / best_score if best_score > 0 else 0.0
+            search_results = [
+                {
+                    "hash": reflection.hash,
+                    "preview": reflection.content_preview,
+                    "similarity": round(score * scale, 3),
+                    "themes": reflection.themes or [],
+                    "timestamp": reflection.timestamp.strftime("%Y-%m-%d %H:%M"),
+                    "privacy_level": reflection.privacy_level,
+                }
+                for reflection, score in matches
+            ]
 
             return jsonify(
                 {
@@ -378,9 +389,13 @@ def reflections():
 
     try:
         local_db = asi_system["local_db"]
-        reflections = local_db.get_reflections(limit=50)
+        reflections, next_cursor = local_db.get_reflections_page(
+            limit=50, cursor=request.args.get("cursor")
+        )
 
-        return render_template("reflections.html", reflections=reflections)
+        return render_template(
+            "reflections.html", reflections=reflections, next_cursor=next_cursor
+        )
 
     except Exception as e:
         flash(f"Fehler beim Laden der Reflexionen: {str(e)}", "error")
@@ -622,22 +637,30 @@ def api_export():
 
     try:
         local_db = asi_system["local_db"]
-        reflections = local_db.get_reflections(limit=1000)
+        limit = min(request.args.get("limit", 1000, type=int), 1000)
+
+        # Seitenweise mit Volltext in einer Abfrage statt N+1
+        try:
+            reflections, next_cursor = local_db.get_reflections_page(
+                limit=limit, cursor=request.args.get("cursor"), include_content=True
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
 
         # Export-Daten vorbereiten
         export_data = {
             "export_timestamp": datetime.now().isoformat(),
             "version": "1.0",
             "total_reflections": len(reflections),
+            "next_cursor": next_cursor,
             "reflections": [],
         }
 
         for reflection in reflections:
-            full_reflection = local_db.get_reflection_by_hash(reflection.hash)
             export_data["reflections"].append(
                 {
                     "hash": reflection.hash,
-                    "content": full_reflection["content"],
+                    "content": reflection.content,
                     "timestamp": reflection.timestamp.isoformat(),
                     "themes": reflection.themes,
                     "tags": reflection.tags,
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+ASI Core - ANN Index Tests
+Tests für den IVF-Flat Index und seine Anbindung an die Suchmaschine
+"""
+
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.ai.ann_index import IVFIndex
+from src.ai.embedding import ReflectionEmbedding
+from src.ai.search import SemanticSearchEngine
+from src.ai.vector_store import EmbeddingMatrix
+from src.storage.local_db import LocalDatabase
+
+
+def _clustered_vectors(count: int, dim: int = 16, clusters: int = 20, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim))
+    labels = rng.integers(0, clusters, count)
+    return (centers[labels] + 0.3 * rng.standard_normal((count, dim))).astype(
+        np.float32
+    )
+
+
+class TestIVFIndex:
+    """Test Suite für IVFIndex."""
+
+    def test_untrained_index_is_exact(self):
+        """Test: Unterhalb der Trainingsgröße entspricht die Suche der exakten."""
+        vectors = _clustered_vectors(200)
+        index = IVFIndex(16, min_train_size=1000)
+        exact = EmbeddingMatrix(16)
+        keys = [f"k{i}" for i in range(200)]
+        index.add_many(keys, vectors)
+        for key, vector in zip(keys, vectors):
+            exact.add(key, vector)
+
+        query = vectors[3]
+        assert not index.is_trained
+        assert [k for k, _ in index.search(query, 5)] == [
+            k for k, _ in exact.search(query, 5)
+        ]
+
+    def test_trained_index_recall(self):
+        """Test: Nach dem Training bleibt der Recall@10 hoch."""
+        vectors = _clustered_vectors(3000)
+        keys = [f"k{i}" for i in range(3000)]
+        index = IVFIndex(16, min_train_size=1000, nprobe=4)
+        index.add_many(keys, vectors)
+        exact = EmbeddingMatrix(16)
+        for key, vector in zip(keys, vectors):
+            exact.add(key, vector)
+
+        hits = 0
+        for query in vectors[:50]:
+            approx = {k for k, _ in index.search(query, 10)}
+            hits += len(approx & {k for k, _ in exact.search(query, 10)})
+
+        assert index.is_trained
+        assert index.get_stats()["nlist"] > 1
+        assert hits / 500 >= 0.9
+
+    def test_update_and_remove(self):
+        """Test: Ersetzen und Löschen halten die Zellen konsistent."""
+        index = IVFIndex(2)
+        index.add("a", [1.0, 0.0])
+        index.add("b", [0.0, 1.0])
+        index.add("a", [0.0, 1.0])
+
+        assert len(index) == 2
+        assert index.remove("b")
+        assert not index.remove("b")
+        assert index.search([0.0, 1.0], k=5) == [("a", pytest.approx(1.0))]
+
+    def test_persistence_with_journal(self, tmp_path):
+        """Test: Snapshot und Journal werden beim Öffnen wieder eingespielt."""
+        vectors = _clustered_vectors(1500)
+        keys = [f"k{i}" for i in range(1500)]
+        index = IVFIndex(16, storage_dir=str(tmp_path), min_train_size=1000)
+        index.add_many(keys[:1000], vectors[:1000])
+        index.add_many(keys[1000:], vectors[1000:])
+        index.remove("k0")
+
+        with open(tmp_path / "journal.bin", "ab") as f:
+            f.write(b"\x01\x05\x00")  # abgeschnittener Record
+
+        reopened = IVFIndex(16, storage_dir=str(tmp_path), min_train_size=1000)
+
+        assert reopened.is_trained
+        assert len(reopened) == 1499
+        assert "k0" not in reopened
+        assert reopened.search(vectors[1200], 1)[0][0] == "k1200"
+
+    def test_model_change_discards_index(self, tmp_path):
+        """Test: Ein anderes Modell verwirft den gespeicherten Index."""
+        IVFIndex(2, storage_dir=str(tmp_path), model_id="m1").add("a", [1.0, 0.0])
+
+        assert len(IVFIndex(2, storage_dir=str(tmp_path), model_id="m2")) == 0
+
+
+class TestANNSearchEngine:
+    """Test Suite für SemanticSearchEngine mit ANN-Index."""
+
+    @pytest.fixture
+    def engine(self, tmp_path):
+        """Suchmaschine mit ANN-Index in temporärem Verzeichnis."""
+        local_db = LocalDatabase(str(tmp_path / "asi.db"))
+        embedding_system = ReflectionEmbedding()
+        dim = embedding_system.model.embedding_dim
+        return SemanticSearchEngine(
+            embedding_system,
+            local_db,
+            embedding_matrix=EmbeddingMatrix(dim),
+            ann_index=IVFIndex(dim),
+        )
+
+    def _store(self, engine, reflection_hash, content):
+        reflection = {
+            "hash": reflection_hash,
+            "content": content,
+            "timestamp": datetime.now().isoformat(),
+            "themes": [],
+        }
+        engine.local_db.store_reflection(reflection)
+        engine.index_reflection(reflection)
+
+    def test_search_and_related_use_ann(self, engine):
+        """Test: Text- und Verwandten-Suche liefern Treffer über den Index."""
+        self._store(engine, "h1", "arbeit stress projekt")
+        self._store(engine, "h2", "arbeit stress team")
+        self._store(engine, "h3", "urlaub strand sonne")
+
+        results = engine.search_by_text("arbeit stress", min_similarity=0.6)
+        related = engine.get_related_reflections("h1", limit=2)
+
+        assert len(engine.ann_index) == 3
+        assert results[0].reflection_hash in {"h1", "h2"}
+        assert [r.reflection_hash for r in related] == ["h2"]
+
+    def test_sync_backfills_ann_index(self, engine):
+        """Test: Der Abgleich trägt fehlende Einträge in den Index nach."""
+        engine.local_db.store_reflection({"hash": "h1", "content": "lernen wachstum"})
+
+        engine.sync_index()
+
+        assert engine.ann_index.keys() == ["h1"]
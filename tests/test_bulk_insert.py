@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+ASI Core - Massenimport Tests
+Tests für store_reflections_bulk und ReflectionProcessor.batch_store
+"""
+
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.core.processor import ReflectionProcessor
+from src.storage.local_db import LocalDatabase
+
+
+@pytest.fixture
+def local_db(tmp_path):
+    local_db = LocalDatabase(str(tmp_path / "asi.db"))
+    yield local_db
+    local_db.close()
+
+
+class TestBulkInsert:
+    """Test Suite für LocalDatabase.store_reflections_bulk."""
+
+    def test_ids_and_conflicts(self, local_db):
+        """Test: Konflikte werden pro Zeile gemeldet, der Block läuft weiter."""
+        existing_id = local_db.store_reflection({"hash": "x", "content": "alt"})
+        rows = [{"hash": h, "content": f"neu {h}"} for h in ["a", "x", "b", "a", "c"]]
+
+        result = local_db.store_reflections_bulk(rows, batch_size=2)
+
+        assert result.conflicts == [(1, "x"), (3, "a")]
+        assert result.inserted == 3
+        assert result.ids[1] is None and result.ids[3] is None
+        for position, h in [(0, "a"), (2, "b"), (4, "c")]:
+            assert local_db.get_reflection_by_hash(h)["id"] == result.ids[position]
+        assert local_db.get_reflection_by_hash("x")["content"] == "alt"
+        assert existing_id not in result.ids
+
+    def test_generator_input_is_streamed(self, local_db):
+        """Test: Ein Generator wird blockweise verbraucht."""
+        consumed = []
+
+        def rows():
+            for i in range(25):
+                consumed.append(i)
+                yield {"hash": f"h{i}", "content": "x"}
+
+        result = local_db.store_reflections_bulk(rows(), batch_size=10)
+        assert result.inserted == len(consumed) == 25
+        assert local_db.get_statistics()["total_reflections"] == 25
+
+    def test_bulk_matches_single_inserts(self, tmp_path, local_db):
+        """Test: Volltextindex und Rollups entsprechen Einzel-Inserts."""
+        base = datetime(2024, 3, 1)
+        rows = [
+            {
+                "hash": f"h{i}",
+                "content": f"garten eintrag {i}",
+                "timestamp": (base + timedelta(days=i)).isoformat(),
+                "themes": ["natur"],
+                "sentiment": "positive(0.8)",
+                "structure": {"word_count": 3},
+            }
+            for i in range(12)
+        ]
+        single = LocalDatabase(str(tmp_path / "single.db"))
+        for row in rows:
+            single.store_reflection(row)
+        local_db.store_reflections_bulk(rows, batch_size=5)
+
+        assert local_db.get_rollups("week") == single.get_rollups("week")
+        assert len(local_db.text_search("garten", limit=20)) == 12
+        single.close()
+
+
+class TestProcessorBatchStore:
+    """Test Suite für ReflectionProcessor.batch_store."""
+
+    def test_batch_store_keeps_source_timestamps(self, local_db):
+        """Test: Verarbeitete Einträge behalten ihren Zeitstempel."""
+        processor = ReflectionProcessor()
+        entries = [
+            {
+                "content": "Heute war die Arbeit anstrengend.",
+                "timestamp": "2023-05-01T20:00:00",
+            },
+            {
+                "content": "Ein ruhiger Tag mit der Familie.",
+                "timestamp": "2023-05-02T21:00:00",
+            },
+            {
+                "content": "Heute war die Arbeit anstrengend.",
+                "timestamp": "2023-05-03T20:00:00",
+            },
+        ]
+
+        result = processor.batch_store(entries, local_db, batch_size=2)
+
+        # Gleicher Inhalt ergibt denselben Hash
+        assert [position for position, _ in result.conflicts] == [2]
+        stored = local_db.get_reflections(limit=10)
+        assert sorted(r.timestamp.isoformat() for r in stored) == [
+            "2023-05-01T20:00:00",
+            "2023-05-02T21:00:00",
+        ]
+        assert "arbeit" in stored[-1].themes
+
+    def test_batch_store_normalizes_datetime(self, local_db):
+        """Test: datetime-Zeitstempel werden als ISO-String mit "T" gespeichert."""
+        processor = ReflectionProcessor()
+        processor.batch_store(
+            [
+                {
+                    "content": "Ein Spaziergang am See.",
+                    "timestamp": datetime(2023, 5, 1, 8),
+                }
+            ],
+            local_db,
+        )
+
+        with local_db.get_connection() as conn:
+            stored = conn.execute("SELECT timestamp FROM reflections").fetchone()[0]
+        assert stored == "2023-05-01T08:00:00"
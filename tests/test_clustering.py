@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+ASI Core - Clustering Tests
+Tests für Mini-Batch k-Means und die Themen-Cluster der Suchmaschine
+"""
+
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.ai.clustering import MiniBatchKMeans, kmeans_plusplus
+from src.ai.embedding import ReflectionEmbedding
+from src.ai.search import SemanticSearchEngine
+from src.ai.vector_store import EmbeddingMatrix
+from src.storage.local_db import LocalDatabase
+
+
+def _blobs(count: int, clusters: int = 4, dim: int = 8, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    centers = 10 * rng.standard_normal((clusters, dim))
+    labels = rng.integers(0, clusters, count)
+    data = centers[labels] + 0.1 * rng.standard_normal((count, dim))
+    return data.astype(np.float32), labels
+
+
+def _same_partition(labels_a, labels_b) -> bool:
+    pairs = set(zip(labels_a.tolist(), labels_b.tolist()))
+    return len(pairs) == len(set(labels_a.tolist())) == len(set(labels_b.tolist()))
+
+
+class TestMiniBatchKMeans:
+    """Test Suite für MiniBatchKMeans."""
+
+    def test_kmeans_plusplus_picks_distinct_points(self):
+        """Test: k-Means++ wählt bei getrennten Gruppen je einen Punkt pro Gruppe."""
+        data, labels = _blobs(400)
+        centroids = kmeans_plusplus(data, 4, np.random.default_rng(1))
+        rows = [int(np.flatnonzero((data == c).all(axis=1))[0]) for c in centroids]
+        assert len(set(labels[rows].tolist())) == 4
+
+    def test_fit_recovers_blobs(self):
+        """Test: fit trennt gut separierte Gruppen vollständig."""
+        data, labels = _blobs(2000)
+        model = MiniBatchKMeans(4, batch_size=128, max_iter=50).fit(data)
+        assert _same_partition(model.predict(data), labels)
+
+    def test_fit_is_deterministic(self):
+        """Test: Gleicher Seed liefert gleiche Zentroide ohne globalen Zufall."""
+        data, _ = _blobs(500)
+        first = MiniBatchKMeans(4, seed=7).fit(data).centroids
+        np.random.seed(0)
+        second = MiniBatchKMeans(4, seed=7).fit(data).centroids
+        np.testing.assert_array_equal(first, second)
+
+    def test_partial_fit_buffers_until_initialized(self):
+        """Test: partial_fit sammelt Punkte, bis die Initialisierung möglich ist."""
+        data, labels = _blobs(1000)
+        model = MiniBatchKMeans(4)
+        model.partial_fit(data[:2])
+        assert not model.is_fitted
+
+        for start in range(2, 1000, 50):
+            model.partial_fit(data[start:][:50])
+        assert model.is_fitted
+        assert model.counts.sum() == 1000
+        assert _same_partition(model.predict(data), labels)
+
+    def test_centroids_persist(self, tmp_path):
+        """Test: Zentroide werden gespeichert und nur bei gleichem Modell geladen."""
+        data, _ = _blobs(300)
+        model = MiniBatchKMeans(4, storage_dir=str(tmp_path), model_id="m1").fit(data)
+
+        reloaded = MiniBatchKMeans(4, storage_dir=str(tmp_path), model_id="m1")
+        np.testing.assert_array_equal(reloaded.centroids, model.centroids)
+        assert not MiniBatchKMeans(
+            4, storage_dir=str(tmp_path), model_id="m2"
+        ).is_fitted
+        assert not MiniBatchKMeans(
+            5, storage_dir=str(tmp_path), model_id="m1"
+        ).is_fitted
+
+    def test_small_corpus_centroids_persist(self, tmp_path):
+        """Test: Bei wenigen Punkten verkleinerte Modelle werden wieder geladen."""
+        data, _ = _blobs(3)
+        model = MiniBatchKMeans(8, storage_dir=str(tmp_path), model_id="m1").fit(data)
+        assert model.num_clusters == 3
+
+        reloaded = MiniBatchKMeans(8, storage_dir=str(tmp_path), model_id="m1")
+        assert reloaded.num_clusters == 3
+        np.testing.assert_array_equal(reloaded.centroids, model.centroids)
+
+        # Mit mehr Daten lernt fit() wieder die angeforderte Clusterzahl
+        assert reloaded.fit(_blobs(300)[0]).num_clusters == 8
+
+
+class TestReflectionClustering:
+    """Test Suite für Reflexions-Cluster."""
+
+    def test_cluster_reflections_groups_by_topic(self):
+        """Test: cluster_reflections behält das Ausgabeformat und trennt Themen."""
+        reflections = [
+            {"content": f"arbeit stress projekt termin {i}", "themes": ["arbeit"]}
+            for i in range(5)
+        ] + [
+            {"content": f"familie kinder urlaub garten {i}", "themes": ["familie"]}
+            for i in range(5)
+        ]
+        clusters = ReflectionEmbedding().cluster_reflections(
+            reflections, num_clusters=2
+        )
+
+        assert sorted(info["size"] for info in clusters.values()) == [5, 5]
+        assert sorted(info["top_themes"][0] for info in clusters.values()) == [
+            "arbeit",
+            "familie",
+        ]
+
+    def test_cluster_reflections_handles_few_items(self):
+        """Test: Weniger Reflexionen als Cluster und leere Eingabe."""
+        embedding = ReflectionEmbedding()
+        assert embedding.cluster_reflections([]) == {}
+        clusters = embedding.cluster_reflections([{"content": "nur eine"}], 5)
+        assert list(clusters.values())[0]["size"] == 1
+
+    def test_engine_clusters_update_incrementally(self, tmp_path):
+        """Test: Die Suchmaschine lernt Cluster beim Indizieren und cacht sie."""
+        local_db = LocalDatabase(str(tmp_path / "asi.db"))
+        embedding_system = ReflectionEmbedding()
+        engine = SemanticSearchEngine(
+            embedding_system,
+            local_db,
+            embedding_matrix=EmbeddingMatrix(embedding_system.model.embedding_dim),
+            num_clusters=2,
+            cluster_dir=str(tmp_path / "clusters"),
+        )
+
+        for i in range(6):
+            theme = "arbeit" if i % 2 else "natur"
+            content = "arbeit büro meeting" if i % 2 else "wald berge wandern"
+            reflection = {
+                "hash": f"h{i}",
+                "content": f"{content} {i}",
+                "timestamp": datetime.now().isoformat(),
+                "privacy": "private",
+                "themes": [theme],
+            }
+            local_db.store_reflection(reflection)
+            engine.index_reflection(reflection)
+
+        clusters = engine.get_topic_clusters()
+        assert sum(info["size"] for info in clusters.values()) == 6
+        assert sorted(info["top_themes"][0] for info in clusters.values()) == [
+            "arbeit",
+            "natur",
+        ]
+        assert engine.get_topic_clusters() is clusters
+        assert (tmp_path / "clusters" / "centroids.npz").exists()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+ASI Core - Connection Pool Tests
+Tests für threadlokale SQLite-Verbindungen der LocalDatabase
+"""
+
+import sqlite3
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.storage.local_db import LocalDatabase
+
+
+def _in_thread(func):
+    """Führt func in einem eigenen Thread aus und liefert das Ergebnis"""
+    result = []
+    thread = threading.Thread(target=lambda: result.append(func()))
+    thread.start()
+    thread.join()
+    return result[0]
+
+
+class TestConnectionPool:
+    """Test Suite für SQLiteConnectionPool über LocalDatabase."""
+
+    @pytest.fixture
+    def local_db(self, tmp_path):
+        local_db = LocalDatabase(str(tmp_path / "asi.db"))
+        yield local_db
+        local_db.close()
+
+    def test_pragmas(self, local_db):
+        """Test: WAL, synchronous=NORMAL und busy_timeout sind gesetzt."""
+        conn = local_db.get_connection()
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1
+        assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+
+    def test_connection_per_thread(self, local_db):
+        """Test: Ein Thread nutzt seine Verbindung wieder, andere nicht."""
+        conn = local_db.get_connection()
+        assert local_db.get_connection() is conn
+        assert _in_thread(local_db.get_connection) is not conn
+
+    def test_dead_thread_connection_is_reused(self, local_db):
+        """Test: Verbindungen beendeter Threads werden weitergegeben."""
+        first = _in_thread(local_db.get_connection)
+        second = _in_thread(local_db.get_connection)
+        assert second is first
+        # Hauptthread (init_database) und der zweite Worker
+        assert local_db.pool.get_stats()["thread_connections"] == 2
+
+    def test_close_and_reconnect(self, local_db):
+        """Test: close() schließt alle Verbindungen, danach wird neu verbunden."""
+        conn = local_db.get_connection()
+        local_db.close()
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+
+        local_db.store_reflection({"hash": "a", "content": "nach close"})
+        assert local_db.get_reflection_by_hash("a")["content"] == "nach close"
+
+    def test_unpooled_mode(self, tmp_path):
+        """Test: pooled=False öffnet pro Aufruf eine neue Verbindung."""
+        local_db = LocalDatabase(str(tmp_path / "asi.db"), pooled=False)
+        assert local_db.get_connection() is not local_db.get_connection()
+        local_db.store_reflection({"hash": "a", "content": "x"})
+        assert local_db.get_reflection_by_hash("a") is not None
+
+    def test_concurrent_writers(self, local_db):
+        """Test: Parallele Schreiber laufen ohne 'database is locked'."""
+        errors = []
+
+        def writer(worker):
+            try:
+                for i in range(25):
+                    local_db.store_reflection(
+                        {"hash": f"w{worker}-{i}", "content": "x"}
+                    )
+                    local_db.get_reflections(limit=5)
+            except sqlite3.Error as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=writer, args=(w,)) for w in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        assert local_db.get_statistics()["total_reflections"] == 100
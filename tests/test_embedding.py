@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+ASI Core - Embedding Tests
+Tests für den Feature-Hashing Encoder des lokalen Embedding-Modells
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.ai.embedding import LocalEmbeddingModel
+
+
+class TestLocalEmbeddingModel:
+    """Test Suite für LocalEmbeddingModel."""
+
+    @pytest.fixture
+    def model(self):
+        """Modell mit kleiner Dimension."""
+        return LocalEmbeddingModel(embedding_dim=32, num_buckets=256)
+
+    def test_encode_many_matches_encode_text(self, model):
+        """Test: Batch-Encoding entspricht dem Einzel-Encoding."""
+        texts = ["Heute war ein guter Tag", "", "ab", "Arbeit und Stress, Arbeit!"]
+
+        batch = model.encode_many(texts)
+
+        assert batch.shape == (4, 32)
+        for row, text in zip(batch, texts):
+            assert np.allclose(row, model.encode_text(text))
+        assert not batch[1].any() and not batch[2].any()
+        assert np.linalg.norm(batch[0]) == pytest.approx(1.0, abs=1e-6)
+
+    def test_deterministic_without_global_rng(self, model):
+        """Test: Gleiche Texte, gleiche Vektoren; der globale RNG bleibt unberührt."""
+        state = np.random.get_state()[1].copy()
+
+        other = LocalEmbeddingModel(embedding_dim=32, num_buckets=256)
+        first = other.encode_text("neues wort")
+        second = model.encode_text("neues wort")
+
+        assert np.array_equal(first, second)
+        assert np.array_equal(np.random.get_state()[1], state)
+
+    def test_memory_stays_bounded(self, model):
+        """Test: Unbekannte Wörter vergrößern das Modell nicht."""
+        model.encode_many([f"wort{i} token{i}" for i in range(1000)])
+
+        assert model.projection.shape == (256, 32)
+        assert model.projection.nbytes == 256 * 32 * 4
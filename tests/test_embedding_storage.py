@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+ASI Core - Embedding-Speicher Tests
+Tests für Embeddings als BLOB-Spalte der Reflexionstabelle
+"""
+
+import sqlite3
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.ai.embedding import ReflectionEmbedding
+from src.ai.search import SemanticSearchEngine
+from src.ai.vector_store import EmbeddingMatrix
+from src.main.modules.storage_module import StorageModule
+from src.storage.local_db import LocalDatabase
+
+
+@pytest.fixture
+def local_db(tmp_path):
+    local_db = LocalDatabase(str(tmp_path / "asi.db"))
+    yield local_db
+    local_db.close()
+
+
+class TestEmbeddingColumns:
+    """Test Suite für das Speichern und Laden der Embedding-BLOBs."""
+
+    def test_roundtrip_as_contiguous_matrix(self, local_db):
+        """Test: Gespeicherte Vektoren kommen als eine float32-Matrix zurück."""
+        vectors = np.arange(12, dtype=np.float64).reshape(3, 4) / 10
+        for i, vector in enumerate(vectors):
+            local_db.store_reflection(
+                {"hash": f"h{i}", "content": "x"}, embedding=vector, embedding_model="m"
+            )
+
+        hashes, matrix = local_db.load_embedding_matrix("m", 4)
+
+        assert hashes == ["h0", "h1", "h2"]
+        assert matrix.dtype == np.float32 and matrix.flags["C_CONTIGUOUS"]
+        np.testing.assert_allclose(matrix, vectors, rtol=1e-6)
+        assert local_db.load_embedding_matrix("m", 4, hashes=["h2", "fehlt"])[0] == [
+            "h2"
+        ]
+
+    def test_other_model_or_dimension_is_skipped(self, local_db):
+        """Test: Fremde Modelle und falsche Längen werden nicht geladen."""
+        local_db.store_reflection({"hash": "a", "content": "x"}, np.ones(4), "alt")
+        local_db.store_reflection({"hash": "b", "content": "y"}, np.ones(3), "m")
+        local_db.store_reflection({"hash": "c", "content": "z"})
+
+        hashes, matrix = local_db.load_embedding_matrix("m", 4)
+        assert hashes == [] and matrix.shape == (0, 4)
+
+        assert (
+            local_db.store_embeddings([("a", np.ones(4)), ("c", np.zeros(4))], "m") == 2
+        )
+        assert local_db.load_embedding_matrix("m", 4)[0] == ["a", "c"]
+
+    def test_existing_database_gets_columns(self, tmp_path):
+        """Test: Ältere Datenbanken erhalten die Embedding-Spalten."""
+        db_path = tmp_path / "alt.db"
+        with sqlite3.connect(db_path) as conn:
+            conn.execute(
+                "CREATE TABLE reflections (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "hash TEXT UNIQUE NOT NULL, content_preview TEXT NOT NULL, "
+                "full_content TEXT NOT NULL, timestamp DATETIME NOT NULL, "
+                "privacy_level TEXT NOT NULL DEFAULT 'private', ipfs_hash TEXT, "
+                "arweave_tx TEXT, tags TEXT, themes TEXT, sentiment TEXT, "
+                "word_count INTEGER, created_at DATETIME DEFAULT CURRENT_TIMESTAMP)"
+            )
+
+        local_db = LocalDatabase(str(db_path))
+        local_db.store_reflection({"hash": "a", "content": "x"}, np.ones(2), "m")
+        assert local_db.load_embedding_matrix("m", 2)[0] == ["a"]
+        local_db.close()
+
+
+class TestSearchEngineSync:
+    """Test Suite für den Abgleich der Suchmatrix mit gespeicherten Embeddings."""
+
+    def _engine(self, local_db):
+        embedding_system = ReflectionEmbedding()
+        return SemanticSearchEngine(
+            embedding_system,
+            local_db,
+            embedding_matrix=EmbeddingMatrix(embedding_system.model.embedding_dim),
+        )
+
+    def test_stored_embeddings_are_not_recomputed(self, local_db, monkeypatch):
+        """Test: Der Abgleich lädt vorhandene Embeddings statt neu zu rechnen."""
+        engine = self._engine(local_db)
+        reflection = {"hash": "h1", "content": "garten blumen", "themes": ["natur"]}
+        embedding = engine.embed_reflection(reflection)
+        local_db.store_reflection(reflection, embedding, engine.model_id)
+
+        fresh = self._engine(local_db)
+        monkeypatch.setattr(fresh, "embed_reflection", pytest.fail)
+        assert fresh.sync_index() == 1
+        np.testing.assert_allclose(
+            fresh.embedding_matrix.get("h1"),
+            embedding / np.linalg.norm(embedding),
+            rtol=1e-5,
+        )
+
+    def test_missing_embeddings_are_backfilled(self, local_db):
+        """Test: Neu berechnete Embeddings werden in der Datenbank nachgetragen."""
+        local_db.store_reflection({"hash": "h1", "content": "auto motor", "themes": []})
+        engine = self._engine(local_db)
+
+        assert engine.sync_index() == 1
+        hashes, matrix = local_db.load_embedding_matrix(
+            engine.model_id, engine.embedding_matrix.embedding_dim
+        )
+        assert hashes == ["h1"]
+        np.testing.assert_allclose(
+            matrix[0] / np.linalg.norm(matrix[0]),
+            engine.embedding_matrix.get("h1"),
+            rtol=1e-5,
+        )
+
+
+def test_storage_module_embeddings(tmp_path):
+    """Test: StorageModule speichert Embeddings in derselben Zeile."""
+    storage = StorageModule({"storage": {"database_path": str(tmp_path / "s.db")}})
+    storage.initialize()
+    storage.store_reflection(
+        {"id": "r1", "content": "eins", "timestamp": "2024-01-01T00:00:00"},
+        embedding=np.array([1.0, 2.0]),
+        embedding_model="m",
+    )
+    storage.store_reflection(
+        {"id": "r2", "content": "zwei", "timestamp": "2024-01-01T00:00:00"}
+    )
+
+    rows = storage.db_connection.execute(
+        "SELECT id, vector_id, embedding FROM reflections ORDER BY id"
+    ).fetchall()
+    assert [(row[0], row[1]) for row in rows] == [("r1", "m"), ("r2", None)]
+    np.testing.assert_array_equal(np.frombuffer(rows[0][2], dtype="<f4"), [1.0, 2.0])
+    assert rows[1][2] is None
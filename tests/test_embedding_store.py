@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+ASI Core - Embedding Store Tests
+Tests für den segmentierten, append-only Embedding-Speicher
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from asi_core.embedding_store import SegmentedEmbeddingStore
+from asi_core.search import ASIEmbeddingGenerator, ASISemanticSearch
+from src.storage.local_db import LocalDatabase
+
+
+def _vector(value: float, dim: int = 4) -> bytes:
+    return np.full(dim, value, dtype=np.float32).tobytes()
+
+
+class TestSegmentedEmbeddingStore:
+    """Test Suite für SegmentedEmbeddingStore."""
+
+    @pytest.fixture
+    def store_dir(self, tmp_path):
+        """Verzeichnis für den Speicher."""
+        return tmp_path / "store"
+
+    def test_append_and_reopen(self, store_dir):
+        """Test: Einträge überleben das erneute Öffnen."""
+        store = SegmentedEmbeddingStore(store_dir, background_compaction=False)
+        store.append("cid1", _vector(1.0), {"text_preview": "eins"})
+        store.append("cid2", _vector(2.0), {"text_preview": "zwei"})
+        store.close()
+
+        reopened = SegmentedEmbeddingStore(store_dir, background_compaction=False)
+
+        assert len(reopened) == 2
+        assert reopened["cid2"] == _vector(2.0)
+        assert reopened.metadata["cid1"]["text_preview"] == "eins"
+
+    def test_overwrite_keeps_latest(self, store_dir):
+        """Test: Ein erneutes Insert überschreibt den Eintrag logisch."""
+        store = SegmentedEmbeddingStore(store_dir, background_compaction=False)
+        store.append("cid1", _vector(1.0))
+        store.append("cid1", _vector(3.0))
+
+        assert len(store) == 1
+        assert store["cid1"] == _vector(3.0)
+        assert store.get_stats()["dead_records"] == 1
+
+    def test_rejects_wrong_record_size(self, store_dir):
+        """Test: Records müssen die feste Größe haben."""
+        store = SegmentedEmbeddingStore(store_dir, background_compaction=False)
+        store.append("cid1", _vector(1.0))
+
+        with pytest.raises(Exception):
+            store.append("cid2", _vector(1.0, dim=8))
+
+    def test_tail_recovery_drops_partial_writes(self, store_dir):
+        """Test: Abgebrochene Schreibvorgänge am Ende werden verworfen."""
+        store = SegmentedEmbeddingStore(store_dir, background_compaction=False)
+        store.append("cid1", _vector(1.0))
+        store.append("cid2", _vector(2.0))
+        store.close()
+
+        segment_log = next(store_dir.glob("segment-*.log"))
+        segment_vec = next(store_dir.glob("segment-*.vec"))
+        with open(segment_vec, "ab") as f:
+            f.write(_vector(9.0)[:7])  # halber Vektor ohne Log-Eintrag
+        with open(segment_log, "ab") as f:
+            f.write(b'{"cid": "cid3", "row": 2')  # abgeschnittene Log-Zeile
+
+        reopened = SegmentedEmbeddingStore(store_dir, background_compaction=False)
+        reopened.append("cid4", _vector(4.0))
+
+        assert sorted(reopened) == ["cid1", "cid2", "cid4"]
+        assert reopened["cid4"] == _vector(4.0)
+
+    def test_segments_roll_over_and_vectors(self, store_dir):
+        """Test: Mehrere Segmente werden zu einer Matrix zusammengeführt."""
+        store = SegmentedEmbeddingStore(
+            store_dir, segment_max_records=2, background_compaction=False
+        )
+        store.append_many((f"cid{i}", _vector(float(i)), {}) for i in range(5))
+
+        cids, matrix = store.vectors(np.float32)
+
+        assert store.get_stats()["segments"] == 3
+        assert cids == [f"cid{i}" for i in range(5)]
+        assert matrix.shape == (5, 4)
+        assert np.allclose(matrix[:, 0], np.arange(5))
+
+    def test_compaction_removes_dead_records(self, store_dir):
+        """Test: Kompaktierung entfernt überschriebene Records."""
+        store = SegmentedEmbeddingStore(
+            store_dir,
+            compaction_threshold=0.5,
+            compaction_min_dead=2,
+            background_compaction=True,
+        )
+        store.append_many((f"cid{i}", _vector(float(i)), {}) for i in range(3))
+        store.append_many((f"cid{i}", _vector(float(i + 10)), {}) for i in range(3))
+        store.wait_for_compaction()
+
+        stats = store.get_stats()
+        assert stats["dead_records"] == 0
+        assert store["cid2"] == _vector(12.0)
+
+        reopened = SegmentedEmbeddingStore(store_dir, background_compaction=False)
+        assert sorted(reopened) == ["cid0", "cid1", "cid2"]
+        assert reopened["cid0"] == _vector(10.0)
+
+
+class _CountingModel:
+    """Ersatzmodell, das die Anzahl der encode-Aufrufe zählt."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True):
+        self.calls += 1
+        if isinstance(texts, str):
+            return np.full(4, float(len(texts)), dtype=np.float32)
+        return np.array([[float(len(t))] * 4 for t in texts], dtype=np.float32)
+
+
+class _FakeGenerator(ASIEmbeddingGenerator):
+    def _load_model(self):
+        self.model = _CountingModel()
+        self.embedding_dim = 4
+        self.embedding_dtype = np.dtype(np.float32)
+
+
+class TestBulkReindex:
+    """Test Suite für den Bulk-Re-Index aus der LocalDatabase."""
+
+    def test_reindex_from_database(self, tmp_path):
+        """Test: Alle Reflexionen werden blockweise und gebatcht indiziert."""
+        local_db = LocalDatabase(str(tmp_path / "asi.db"))
+        for i in range(5):
+            local_db.store_reflection({"hash": f"h{i}", "content": "x" * (i + 1)})
+
+        generator = _FakeGenerator(model_name="fake")
+        search = ASISemanticSearch(generator, store_dir=str(tmp_path / "store"))
+        calls_before = generator.model.calls
+
+        assert search.reindex_from_database(local_db, chunk_size=2) == 5
+        assert generator.model.calls - calls_before == 3
+        assert sorted(search.store) == [f"h{i}" for i in range(5)]
+        assert search.store["h4"] == _vector(5.0)
+
+    def test_search_with_ann_index(self, tmp_path):
+        """Test: Mit ANN-Index wird über den Index gesucht und nachgetragen."""
+        from src.ai.ann_index import IVFIndex
+
+        generator = _FakeGenerator(model_name="fake")
+        search = ASISemanticSearch(generator, store_dir=str(tmp_path / "store"))
+        search.store.append("cid0", _vector(1.0), {"text_preview": "alt"})
+        search.ann_index = IVFIndex(4)
+        search.store_embeddings([("cid1", _vector(2.0), "neu")])
+
+        results = search.search_ASI_memory("abc", num_results=5)
+
+        assert sorted(search.ann_index.keys()) == ["cid0", "cid1"]
+        assert {r["cid"] for r in results} == {"cid0", "cid1"}
+
+
+class TestMatrixSync:
+    """Test Suite für den Abgleich der Suchmatrix mit EMBEDDING_CACHE."""
+
+    def test_matrix_follows_writes_of_other_writers(self, tmp_path):
+        """Test: Überschreibungen und fremde Inserts machen die Matrix ungültig."""
+        generator = _FakeGenerator(model_name="fake")
+        search = ASISemanticSearch(generator, store_dir=str(tmp_path / "store"))
+        axis = np.array([1.0, 0.0, 0.0, 0.0], dtype=np.float32).tobytes()
+        search.store_embedding("cid0", axis, "achse")
+        assert search.search_ASI_memory("abc")[0]["similarity"] == pytest.approx(0.5)
+
+        # Anderer Schreiber überschreibt eine vorhandene CID (Länge bleibt gleich)
+        search.store.append("cid0", _vector(1.0))
+        assert search.search_ASI_memory("abc")[0]["similarity"] == pytest.approx(1.0)
+
+        # Eigener Schreibzugriff verdeckt keinen fremden davor
+        search.store.append("cid1", axis)
+        search.store_embedding("cid2", axis, "eigen")
+        results = search.search_ASI_memory("abc", num_results=5)
+        assert {r["cid"] for r in results} == {"cid0", "cid1", "cid2"}
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+ASI Core - Volltextsuche Tests
+Tests für FTS5-Index, BM25-Ranking und hybride Suche
+"""
+
+import sqlite3
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.ai.embedding import ReflectionEmbedding
+from src.ai.search import SemanticSearchEngine, reciprocal_rank_fusion
+from src.ai.vector_store import EmbeddingMatrix
+from src.main.modules.storage_module import StorageModule
+from src.storage.fts import build_match_query
+from src.storage.local_db import LocalDatabase
+
+
+def _reflection(reflection_hash, content, privacy="private", themes=None):
+    return {
+        "hash": reflection_hash,
+        "content": content,
+        "timestamp": datetime.now().isoformat(),
+        "privacy": privacy,
+        "themes": themes or [],
+    }
+
+
+class TestFTSIndex:
+    """Test Suite für den Volltextindex der LocalDatabase."""
+
+    @pytest.fixture
+    def local_db(self, tmp_path):
+        return LocalDatabase(str(tmp_path / "asi.db"))
+
+    def test_match_query_neutralizes_syntax(self):
+        """Test: FTS5-Operatoren im Suchtext werden als Wörter zitiert."""
+        assert build_match_query('arbeit AND "stress" NEAR(x)') == (
+            '"arbeit" OR "AND" OR "stress" OR "NEAR" OR "x"'
+        )
+        assert build_match_query("  ?! ") is None
+
+    def test_bm25_ranks_better_matches_first(self, local_db):
+        """Test: Mehr Treffer und kürzere Texte ranken höher."""
+        local_db.store_reflection(_reflection("h1", "arbeit " + "füllwort " * 30))
+        local_db.store_reflection(_reflection("h2", "arbeit stress heute"))
+        local_db.store_reflection(_reflection("h3", "urlaub am meer"))
+
+        results = local_db.text_search("arbeit stress")
+        assert [record.hash for record, _ in results] == ["h2", "h1"]
+        assert results[0][1] > results[1][1]
+
+    def test_diacritics_and_themes_are_searchable(self, local_db):
+        """Test: Umlaute werden gefaltet und Themen mit durchsucht."""
+        local_db.store_reflection(
+            _reflection("h1", "Gespräch mit dem Team", themes=["kommunikation"])
+        )
+        assert [r.hash for r, _ in local_db.text_search("gesprach")] == ["h1"]
+        assert [r.hash for r, _ in local_db.text_search("kommunikation")] == ["h1"]
+
+    def test_triggers_keep_index_in_sync(self, local_db):
+        """Test: UPDATE und DELETE werden in den Index übernommen."""
+        local_db.store_reflection(_reflection("h1", "alter inhalt"))
+        with local_db.get_connection() as conn:
+            conn.execute(
+                "UPDATE reflections SET full_content = 'neuer text' WHERE hash = 'h1'"
+            )
+        assert local_db.text_search("alter") == []
+        assert len(local_db.text_search("neuer")) == 1
+
+        with local_db.get_connection() as conn:
+            conn.execute("DELETE FROM reflections WHERE hash = 'h1'")
+        assert local_db.text_search("neuer") == []
+
+    def test_existing_rows_are_indexed_on_upgrade(self, tmp_path):
+        """Test: Bestehende Datenbanken ohne Index werden beim Öffnen gefüllt."""
+        db_path = str(tmp_path / "asi.db")
+        local_db = LocalDatabase(db_path)
+        local_db.store_reflection(_reflection("h1", "garten blumen"))
+        with local_db.get_connection() as conn:
+            conn.execute("DROP TABLE reflections_fts")
+            for suffix in ("ai", "ad", "au"):
+                conn.execute(f"DROP TRIGGER reflections_fts_{suffix}")
+
+        assert [r.hash for r, _ in LocalDatabase(db_path).text_search("garten")] == [
+            "h1"
+        ]
+
+    def test_privacy_filter(self, local_db):
+        """Test: Der Privacy-Filter wird in SQL angewendet."""
+        local_db.store_reflection(_reflection("h1", "projekt", privacy="private"))
+        local_db.store_reflection(_reflection("h2", "projekt", privacy="public"))
+        results = local_db.text_search("projekt", privacy_level="public")
+        assert [r.hash for r, _ in results] == ["h2"]
+
+
+class TestHybridSearch:
+    """Test Suite für die hybride Suche der SemanticSearchEngine."""
+
+    def test_reciprocal_rank_fusion(self):
+        """Test: Einträge in beiden Rankings werden nach vorne gezogen."""
+        fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "d"]], k=60)
+        assert [key for key, _ in fused] == ["b", "a", "d", "c"]
+
+    def test_hybrid_combines_lexical_and_semantic(self, tmp_path):
+        """Test: Die hybride Suche liefert lexikalische Treffer mit Score 0-1."""
+        local_db = LocalDatabase(str(tmp_path / "asi.db"))
+        embedding_system = ReflectionEmbedding()
+        engine = SemanticSearchEngine(
+            embedding_system,
+            local_db,
+            embedding_matrix=EmbeddingMatrix(embedding_system.model.embedding_dim),
+        )
+        for reflection in (
+            _reflection("h1", "deadline projekt abgabe morgen"),
+            _reflection("h2", "spaziergang im wald"),
+            _reflection("h3", "projekt planung mit team"),
+        ):
+            local_db.store_reflection(reflection)
+            engine.index_reflection(reflection)
+
+        results = engine.search_hybrid("projekt deadline", limit=2)
+
+        assert results[0].reflection_hash == "h1"
+        assert {r.reflection_hash for r in results} == {"h1", "h3"}
+        assert all(0 < r.similarity_score <= 1 for r in results)
+
+
+class TestStorageModuleTextSearch:
+    """Test Suite für StorageModule.text_search über FTS5."""
+
+    def test_text_search_uses_bm25(self, tmp_path):
+        """Test: Treffer im Inhalt und in Tags, sortiert nach Relevanz."""
+        storage = StorageModule({"storage": {"database_path": str(tmp_path / "s.db")}})
+        storage.initialize()
+        now = datetime.now().isoformat()
+        storage.store_reflection(
+            {"id": "r1", "content": "notizen " * 20 + "meditation", "timestamp": now}
+        )
+        storage.store_reflection(
+            {"id": "r2", "content": "meditation am morgen", "timestamp": now}
+        )
+        storage.store_reflection(
+            {"id": "r3", "content": "einkauf", "tags": ["meditation"], "timestamp": now}
+        )
+        storage.store_reflection({"id": "r4", "content": "sport", "timestamp": now})
+
+        results = storage.text_search("meditation")
+        assert results[0]["id"] == "r2"
+        assert {r["id"] for r in results} == {"r1", "r2", "r3"}
+        storage.shutdown()
+
+    def test_index_survives_vacuum(self, tmp_path):
+        """Test: Der FTS-Index hängt an seq und überlebt VACUUM."""
+        storage = StorageModule({"storage": {"database_path": str(tmp_path / "s.db")}})
+        storage.initialize()
+        now = datetime.now().isoformat()
+        for i, content in enumerate(["apfel", "birne", "kirsche", "apfel birne"]):
+            storage.store_reflection(
+                {"id": f"r{i}", "content": content, "timestamp": now}
+            )
+        storage.db_connection.execute(
+            "DELETE FROM reflections WHERE id IN ('r0', 'r1')"
+        )
+        storage.db_connection.commit()
+        storage.db_connection.execute("VACUUM")
+
+        assert [r["id"] for r in storage.text_search("apfel")] == ["r3"]
+        assert [r["id"] for r in storage.text_search("kirsche")] == ["r2"]
+        fts_sql = storage.db_connection.execute(
+            "SELECT sql FROM sqlite_master WHERE name = 'reflections_fts'"
+        ).fetchone()[0]
+        assert "content_rowid='seq'" in fts_sql
+        storage.shutdown()
+
+    def test_existing_table_is_migrated(self, tmp_path):
+        """Test: Tabellen ohne seq werden samt FTS-Index umgebaut."""
+        db_path = tmp_path / "s.db"
+        conn = sqlite3.connect(db_path)
+        conn.execute(
+            "CREATE TABLE reflections (id TEXT PRIMARY KEY, content TEXT NOT NULL, "
+            "content_hash TEXT NOT NULL, tags TEXT NOT NULL DEFAULT '[]', "
+            "state INTEGER NOT NULL DEFAULT 0, timestamp TEXT NOT NULL, "
+            "created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP, "
+            "metadata TEXT DEFAULT '{}', vector_id TEXT, ipfs_hash TEXT, "
+            "arweave_id TEXT)"
+        )
+        conn.execute(
+            "INSERT INTO reflections (id, content, content_hash, timestamp) "
+            "VALUES ('alt', 'garten blumen', 'x', '2024-01-01T00:00:00')"
+        )
+        conn.commit()
+        conn.close()
+
+        storage = StorageModule({"storage": {"database_path": str(db_path)}})
+        storage.initialize()
+        columns = [
+            row["name"]
+            for row in storage.db_connection.execute("PRAGMA table_info(reflections)")
+        ]
+
+        assert columns[0] == "seq" and "embedding" in columns
+        assert [r["id"] for r in storage.text_search("garten")] == ["alt"]
+        storage.shutdown()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+ASI Core - Gruppen-Commit Tests
+Tests für GroupCommitWriter und die Schreib-Queue des StorageModule
+"""
+
+import queue
+import sys
+import threading
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.main.modules.storage_module import StorageError, StorageModule
+from src.storage.group_commit import GroupCommitWriter
+
+
+class TestGroupCommitWriter:
+    """Test Suite für GroupCommitWriter."""
+
+    def test_batches_by_size(self):
+        """Test: Eingereihte Aufträge werden bis batch_size gebündelt."""
+        release = threading.Event()
+        batches = []
+
+        def apply_batch(items):
+            release.wait(5)
+            batches.append(list(items))
+            return [item * 2 for item in items]
+
+        writer = GroupCommitWriter(apply_batch, batch_size=4, max_delay=0.2)
+        futures = [writer.submit(i) for i in range(9)]
+        release.set()
+
+        assert [future.result(5) for future in futures] == [i * 2 for i in range(9)]
+        # Volle Blöcke sofort, der Rest nach Ablauf der Wartezeit
+        assert [len(batch) for batch in batches] == [4, 4, 1]
+        assert writer.get_stats()["largest_batch"] == 4
+        writer.close()
+
+    def test_backpressure(self):
+        """Test: Bei voller Queue blockiert submit bis zum Timeout."""
+        release = threading.Event()
+        writer = GroupCommitWriter(
+            lambda items: [release.wait(5) for _ in items], batch_size=1, max_queue=2
+        )
+        writer.submit("läuft")
+        # Warten, bis der Schreib-Thread den ersten Auftrag übernommen hat
+        while writer.get_stats()["queued"]:
+            pass
+        writer.submit("a")
+        writer.submit("b")
+
+        with pytest.raises(queue.Full):
+            writer.submit("c", timeout=0.05)
+        release.set()
+        writer.close()
+
+    def test_errors_reach_futures(self):
+        """Test: Ergebnis-Exceptions treffen nur ihren Auftrag, Block-Fehler alle."""
+
+        def apply_batch(items):
+            if "alles" in items:
+                raise RuntimeError("Block")
+            return [ValueError(item) if item == "schlecht" else item for item in items]
+
+        writer = GroupCommitWriter(apply_batch, batch_size=1)
+        good, bad, broken = (writer.submit(x) for x in ("gut", "schlecht", "alles"))
+
+        assert good.result(5) == "gut"
+        with pytest.raises(ValueError):
+            bad.result(5)
+        with pytest.raises(RuntimeError):
+            broken.result(5)
+
+        writer.close()
+        with pytest.raises(RuntimeError):
+            writer.submit("zu spät")
+
+
+class TestStorageModuleWriteQueue:
+    """Test Suite für store_reflection über den Schreib-Thread."""
+
+    @pytest.fixture
+    def storage(self, tmp_path):
+        storage = StorageModule(
+            {
+                "storage": {
+                    "database_path": str(tmp_path / "s.db"),
+                    "batch_size": 50,
+                    "commit_delay_ms": 20,
+                }
+            }
+        )
+        storage.initialize()
+        yield storage
+        storage.shutdown()
+
+    def _reflection(self, i, content=None, state=1):
+        return {
+            "id": f"r{i}",
+            "content": content or f"eintrag {i}",
+            "state": state,
+            "timestamp": datetime.now().isoformat(),
+        }
+
+    def test_concurrent_writers_share_commits(self, storage):
+        """Test: Parallele Schreiber landen in gemeinsamen Commits."""
+
+        def writer(offset):
+            for i in range(offset, offset + 25):
+                storage.store_reflection(self._reflection(i, state=i % 2))
+
+        threads = [threading.Thread(target=writer, args=(n * 25,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = storage.health_check()
+        assert stats["reflection_count"] == 200
+        assert stats["writer"]["batches"] < 200
+        assert storage.get_state_statistics()["total_reflections"] == 200
+
+    def test_duplicates_and_failures_are_isolated(self, storage):
+        """Test: Duplikate und fehlerhafte Einträge betreffen nur ihr Future."""
+        futures = [
+            storage.store_reflection_async(self._reflection(1, "gleich")),
+            storage.store_reflection_async(self._reflection(2, "gleich")),
+            storage.store_reflection_async({"id": "r3", "content": "ohne zeit"}),
+            storage.store_reflection_async(self._reflection(4)),
+        ]
+
+        assert futures[0].result(5)["id"] == "r1"
+        assert futures[1].result(5)["id"] == "r1"
+        with pytest.raises(StorageError):
+            futures[2].result(5)
+        assert futures[3].result(5)["id"] == "r4"
+        assert storage.health_check()["reflection_count"] == 2
+
+        with pytest.raises(StorageError):
+            storage.store_reflection({"id": "r5", "content": "ohne zeit"})
+
+    def test_shutdown_flushes_queue(self, tmp_path):
+        """Test: shutdown schreibt alle eingereihten Reflexionen fest."""
+        db_path = str(tmp_path / "s.db")
+        storage = StorageModule({"storage": {"database_path": db_path}})
+        storage.initialize()
+        futures = [
+            storage.store_reflection_async(self._reflection(i)) for i in range(30)
+        ]
+        storage.shutdown()
+
+        assert all(future.done() for future in futures)
+        reopened = StorageModule({"storage": {"database_path": db_path}})
+        reopened.initialize()
+        assert reopened.health_check()["reflection_count"] == 30
+        reopened.shutdown()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+ASI Core - Hamming Search Tests
+Tests für die bit-gepackte Popcount-Suche und die binäre Quantisierung
+"""
+
+import importlib.util
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+
+def _load_search_package():
+    """Lädt src/asi_core/search über den Pfad (src/asi_core.py verdeckt das Paket)."""
+    package_dir = Path(__file__).parent.parent / "src" / "asi_core" / "search"
+    spec = importlib.util.spec_from_file_location(
+        "asi_hash_search",
+        package_dir / "__init__.py",
+        submodule_search_locations=[str(package_dir)],
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+hash_search = _load_search_package()
+ASIEmbeddingGenerator = hash_search.ASIEmbeddingGenerator
+ASISemanticSearch = hash_search.ASISemanticSearch
+
+from asi_hash_search.hamming import (  # noqa: E402
+    BinaryQuantizedIndex,
+    _POPCOUNT_TABLE,
+    binary_quantize,
+    hamming_top_k,
+    pack_embeddings,
+)
+
+
+class TestHammingSearch:
+    """Test Suite für die Popcount-Suche über 128-byte Embeddings."""
+
+    @pytest.fixture
+    def search(self, tmp_path):
+        """Suche mit Cache in temporärem Verzeichnis."""
+        return ASISemanticSearch(cache_file=str(tmp_path / "cache.json"))
+
+    def test_similarity_counts_matching_bits(self, search):
+        """Test: Ähnlichkeit ist der Anteil übereinstimmender Bits."""
+        a = bytes(128)
+        b = bytes([0xFF]) + bytes(127)
+
+        assert search._calculate_similarity(a, a) == 1.0
+        assert search._calculate_similarity(a, b) == pytest.approx(1 - 8 / 1024)
+        assert search._calculate_similarity(a, bytes([0xFF]) * 128) == 0.0
+
+    def test_search_matches_pairwise_similarity(self, search):
+        """Test: Top-k entspricht der paarweisen Berechnung."""
+        generator = search.embedding_generator
+        texts = [f"reflexion nummer {i}" for i in range(50)]
+        for i, text in enumerate(texts):
+            search.store_embedding(f"cid{i}", generator.generate_embedding(text), text)
+
+        results = search.search_ASI_memory("reflexion nummer 7", num_results=5)
+        query = generator.generate_embedding("reflexion nummer 7")
+        expected = sorted(
+            (
+                search._calculate_similarity(query, generator.generate_embedding(t))
+                for t in texts
+            ),
+            reverse=True,
+        )[:5]
+
+        assert results[0]["cid"] == "cid7"
+        assert [r["similarity"] for r in results] == pytest.approx(expected)
+
+    def test_reload_builds_packed_matrix(self, tmp_path):
+        """Test: Der JSON-Cache wird beim Laden einmalig gepackt."""
+        cache_file = str(tmp_path / "cache.json")
+        generator = ASIEmbeddingGenerator()
+        ASISemanticSearch(generator, cache_file).store_embedding(
+            "cid1", generator.generate_embedding("hallo welt"), "hallo welt"
+        )
+
+        reloaded = ASISemanticSearch(generator, cache_file)
+
+        assert reloaded._packed.shape == (1, 16)
+        assert reloaded.search_ASI_memory("hallo welt", 1)[0]["similarity"] == 1.0
+
+    def test_popcount_lookup_table_fallback(self):
+        """Test: Die Byte-Tabelle zählt wie np.unpackbits."""
+        rng = np.random.default_rng(0)
+        packed = pack_embeddings([rng.bytes(128) for _ in range(10)], 128)
+
+        expected = np.unpackbits(packed.view(np.uint8), axis=1).sum(axis=1)
+        assert np.array_equal(
+            _POPCOUNT_TABLE[packed.view(np.uint8)].sum(axis=1), expected
+        )
+
+        order, distances = hamming_top_k(packed, packed[3], 3)
+        assert order[0] == 3 and distances[0] == 0
+
+
+class TestBinaryQuantizedIndex:
+    """Test Suite für den binären Vorfilter mit exakter Nachbewertung."""
+
+    def test_binary_quantize_sign_bits(self):
+        """Test: Positive Komponenten werden zu gesetzten Bits."""
+        codes = binary_quantize([[1.0, -1.0, 0.5] + [-1.0] * 61 + [2.0]])
+
+        assert codes.shape == (1, 2)
+        bits = np.unpackbits(codes.view(np.uint8), axis=1)[0]
+        assert list(np.flatnonzero(bits)) == [0, 2, 64]
+
+    def test_prefilter_recall_and_exact_scores(self):
+        """Test: Nachbewertete Scores sind exakte Cosinus-Werte."""
+        rng = np.random.default_rng(1)
+        vectors = rng.standard_normal((500, 64)).astype(np.float32)
+        index = BinaryQuantizedIndex(64, oversample=10)
+        index.add_many([f"k{i}" for i in range(500)], vectors)
+
+        query = vectors[42] + 0.1 * rng.standard_normal(64).astype(np.float32)
+        results = index.search(query, k=5)
+
+        normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        exact = normalized @ (query / np.linalg.norm(query))
+        assert results[0][0] == "k42"
+        assert results[0][1] == pytest.approx(float(exact[42]), abs=1e-5)
+        assert index.remove("k42") and "k42" not in index
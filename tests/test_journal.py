@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+ASI Core - Snapshot-Journal Tests
+Tests für atomares Schreiben und das Einspielen von Journalen
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.ai.journal import Journal, atomic_write
+
+
+class TestJournal:
+    """Test Suite für Journal und atomic_write."""
+
+    def test_atomic_write_replaces_file(self, tmp_path):
+        """Test: Der neue Inhalt ersetzt die Datei, ohne Temp-Datei zurückzulassen."""
+        path = tmp_path / "snapshot.json"
+        atomic_write(path, b"alt")
+        atomic_write(path, b"neu")
+
+        assert path.read_bytes() == b"neu"
+        assert list(tmp_path.iterdir()) == [path]
+
+    def test_replay_json_truncates_partial_tail(self, tmp_path):
+        """Test: Vollständige Zeilen werden eingespielt, ein halber Record gekürzt."""
+        path = tmp_path / "journal.jsonl"
+        journal = Journal(path, "Test")
+        journal.append_json({"op": "add", "key": "a"})
+        journal.append_json({"op": "add", "key": "b"})
+        with open(path, "ab") as f:
+            f.write(b'{"op": "add", "ke')
+        size = path.stat().st_size
+
+        replayed = Journal(path, "Test")
+        records = []
+        replayed.replay_json(records.append)
+
+        assert [r["key"] for r in records] == ["a", "b"]
+        assert replayed.ops == 2
+        assert path.stat().st_size < size
+        replayed.append_json({"op": "add", "key": "c"})
+        records.clear()
+        Journal(path, "Test").replay_json(records.append)
+        assert [r["key"] for r in records] == ["a", "b", "c"]
+
+    def test_due_and_clear(self, tmp_path):
+        """Test: Ein Snapshot ist erst nach max(minimum, Größe) Operationen fällig."""
+        journal = Journal(tmp_path / "journal.bin", "Test")
+        journal.append(b"xy", ops=2)
+
+        assert not journal.due(minimum=3, size=1)
+        assert journal.due(minimum=1, size=2)
+        journal.clear()
+        assert journal.ops == 0 and journal.path.read_bytes() == b""
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+ASI Core - kNN Graph Tests
+Tests für den inkrementellen kNN-Graphen und verwandte Reflexionen
+"""
+
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.ai.embedding import ReflectionEmbedding
+from src.ai.knn_graph import KNNGraph
+from src.ai.search import SemanticSearchEngine
+from src.ai.vector_store import EmbeddingMatrix
+from src.storage.local_db import LocalDatabase
+
+
+class TestKNNGraph:
+    """Test Suite für KNNGraph."""
+
+    def test_insert_updates_neighbour_lists(self):
+        """Test: Ein neuer Knoten wird in die Listen seiner Nachbarn übernommen."""
+        graph = KNNGraph(k=2)
+        graph.insert("a", [])
+        graph.insert("b", [("a", 0.5)])
+        graph.insert("c", [("a", 0.9), ("b", 0.1)])
+
+        assert graph.neighbours("a") == [("c", 0.9), ("b", 0.5)]
+        assert graph.neighbours("b") == [("a", 0.5), ("c", 0.1)]
+        assert graph.neighbours("c") == [("a", 0.9), ("b", 0.1)]
+
+    def test_insert_keeps_only_k_best(self):
+        """Test: Rückkanten verdrängen nur schwächere Nachbarn."""
+        graph = KNNGraph(k=1)
+        graph.insert("a", [])
+        graph.insert("b", [("a", 0.3)])
+        graph.insert("c", [("a", 0.2)])
+
+        assert graph.neighbours("a") == [("b", 0.3)]
+        graph.insert("d", [("a", 0.8)])
+        assert graph.neighbours("a") == [("d", 0.8)]
+
+    def test_remove_marks_referencing_nodes_stale(self):
+        """Test: Nach dem Löschen liefern Knoten None bis zum Neuberechnen."""
+        graph = KNNGraph(k=2)
+        graph.insert("a", [])
+        graph.insert("b", [("a", 0.5)])
+        graph.insert("c", [("b", 0.4)])
+
+        assert graph.remove("a")
+        assert not graph.remove("a")
+        assert graph.is_stale("b")
+        assert graph.neighbours("b") is None
+        assert graph.neighbours("c") == [("b", 0.4)]
+
+        graph.insert("b", [("c", 0.4)])
+        assert graph.neighbours("b") == [("c", 0.4)]
+
+    def test_persistence_replays_journal(self, tmp_path):
+        """Test: Snapshot plus Journal ergeben nach dem Neuladen denselben Graphen."""
+        graph = KNNGraph(k=2, storage_dir=str(tmp_path), model_id="m1")
+        graph.insert("a", [])
+        graph.insert("b", [("a", 0.5)])
+        graph.save()
+        graph.insert("c", [("a", 0.7), ("b", 0.2)])
+        graph.remove("b")
+
+        with open(tmp_path / "journal.jsonl", "a", encoding="utf-8") as f:
+            f.write('{"op": "insert", "key": "x"')
+
+        reloaded = KNNGraph(k=2, storage_dir=str(tmp_path), model_id="m1")
+        assert reloaded.keys() == graph.keys()
+        assert reloaded.get_stats()["edges"] == graph.get_stats()["edges"] == 2
+        assert reloaded.is_stale("a") and reloaded.is_stale("c")
+        reloaded.insert("c", [("a", 0.7)])
+        assert reloaded.neighbours("c") == [("a", 0.7)]
+        assert len(KNNGraph(k=2, storage_dir=str(tmp_path), model_id="m2")) == 0
+
+
+class TestRelatedReflections:
+    """Test Suite für get_related_reflections über den kNN-Graphen."""
+
+    @pytest.fixture
+    def engine(self, tmp_path):
+        local_db = LocalDatabase(str(tmp_path / "asi.db"))
+        embedding_system = ReflectionEmbedding()
+        return SemanticSearchEngine(
+            embedding_system,
+            local_db,
+            embedding_matrix=EmbeddingMatrix(embedding_system.model.embedding_dim),
+            knn_k=3,
+            knn_dir=str(tmp_path / "knn"),
+        )
+
+    def _store(self, engine, reflection_hash, content):
+        reflection = {
+            "hash": reflection_hash,
+            "content": content,
+            "timestamp": datetime.now().isoformat(),
+            "themes": [],
+        }
+        engine.local_db.store_reflection(reflection)
+        engine.index_reflection(reflection)
+
+    def test_related_matches_exact_search(self, engine):
+        """Test: Verwandte Reflexionen aus dem Graphen entsprechen der exakten Suche."""
+        self._store(engine, "h1", "arbeit stress projekt")
+        self._store(engine, "h2", "arbeit stress team")
+        self._store(engine, "h3", "urlaub strand sonne")
+        self._store(engine, "h4", "arbeit projekt deadline")
+
+        related = engine.get_related_reflections("h1", limit=2)
+        exact = [
+            h
+            for h, cosine in engine.embedding_matrix.search(
+                engine.embedding_matrix.get("h1"), k=3, min_score=0.2
+            )
+            if h != "h1"
+        ][:2]
+
+        assert [r.reflection_hash for r in related] == exact
+        assert engine.knn_graph.neighbours("h1") is not None
+
+    def test_removed_reflection_is_not_related(self, engine):
+        """Test: Gelöschte Reflexionen verschwinden aus den Nachbarlisten."""
+        self._store(engine, "h1", "arbeit stress projekt")
+        self._store(engine, "h2", "arbeit stress team")
+        self._store(engine, "h3", "arbeit stress projekt team")
+        engine.sync_index()
+
+        engine.remove_from_index("h2")
+        related = engine.get_related_reflections("h1", limit=3)
+
+        assert "h2" not in [r.reflection_hash for r in related]
+        assert not engine.knn_graph.is_stale("h1")
+
+    def test_sync_touches_only_changed_nodes(self, engine):
+        """Test: Nach dem ersten Abgleich wird der Graph nicht mehr verglichen."""
+        self._store(engine, "h1", "arbeit stress projekt")
+        self._store(engine, "h2", "arbeit stress team")
+        engine.sync_index()
+        engine.knn_graph.keys = None  # Ein vollständiger Vergleich würde scheitern
+
+        engine.local_db.store_reflection({"hash": "h3", "content": "arbeit team"})
+        with engine.local_db.get_connection() as conn:
+            conn.execute("DELETE FROM reflections WHERE hash = 'h2'")
+        related = engine.get_related_reflections("h1", limit=3)
+
+        assert [r.reflection_hash for r in related] == ["h3"]
+        assert "h2" not in engine.knn_graph
+
+    def test_graph_backfilled_from_matrix(self, tmp_path):
+        """Test: Ein leerer Graph wird beim Abgleich aus der Matrix nachgezogen."""
+        local_db = LocalDatabase(str(tmp_path / "asi.db"))
+        embedding_system = ReflectionEmbedding()
+        matrix = EmbeddingMatrix(embedding_system.model.embedding_dim)
+        for i, content in enumerate(["garten blumen", "garten gemüse", "auto motor"]):
+            reflection = {"hash": f"h{i}", "content": content, "themes": []}
+            local_db.store_reflection(reflection)
+            matrix.add(f"h{i}", embedding_system.embed_reflection(reflection))
+
+        engine = SemanticSearchEngine(
+            embedding_system, local_db, embedding_matrix=matrix
+        )
+        related = engine.get_related_reflections("h0", limit=1)
+
+        assert len(engine.knn_graph) == 3
+        assert [r.reflection_hash for r in related] == ["h1"]
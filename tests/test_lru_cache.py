@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+ASI Core - LRU Cache Tests
+Tests für LRUCache und die Caches des StorageModule
+"""
+
+import sqlite3
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.main.modules.storage_module import StorageModule
+from src.storage.lru_cache import LRUCache
+
+
+class TestLRUCache:
+    """Test Suite für LRUCache."""
+
+    def test_evicts_least_recently_used(self):
+        """Test: Ein Treffer schützt den Eintrag vor der Verdrängung."""
+        cache = LRUCache(max_entries=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        assert cache.get("a") == 1
+        cache.put("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1 and cache.get("c") == 3
+        assert cache.get_stats()["evictions"] == 1
+
+    def test_byte_budget(self):
+        """Test: Das Byte-Budget begrenzt den Cache, Übergroßes wird verworfen."""
+        cache = LRUCache(max_entries=100, max_bytes=10, sizeof=len)
+        cache.put("a", "xxxx")
+        cache.put("b", "yyyy")
+        cache.put("c", "zzzz")
+        cache.put("riesig", "x" * 11)
+
+        stats = cache.get_stats()
+        assert stats["bytes"] == 8 and stats["entries"] == 2
+        assert cache.get("a") is None and cache.get("riesig") is None
+
+    def test_generation_invalidates(self):
+        """Test: Eine neue Generation macht alte Einträge unerreichbar."""
+        cache = LRUCache()
+        generation = cache.generation
+        cache.put("q", ["alt"])
+        cache.bump_generation()
+
+        assert cache.get("q") is None
+        # Vor dem Schreiben gelesene Werte werden nicht mehr abgelegt
+        cache.put("q", ["veraltet"], generation)
+        assert cache.get("q") is None
+        assert len(cache) == 0 and cache.get_stats()["entries"] == 0
+
+    def test_stale_generations_age_out(self):
+        """Test: Veraltete Einträge bleiben bis zur regulären Verdrängung."""
+        cache = LRUCache(max_entries=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.bump_generation()
+        assert cache.get_stats()["stale_entries"] == 2
+
+        cache.put("a", 3)
+        cache.put("c", 4)
+        stats = cache.get_stats()
+        assert stats["entries"] == 2 and stats["stale_entries"] == 0
+        assert cache.get("a") == 3 and cache.get("b") is None
+
+
+class TestStorageModuleCache:
+    """Test Suite für die Caches des StorageModule."""
+
+    @pytest.fixture
+    def storage(self, tmp_path):
+        storage = StorageModule(
+            {"storage": {"database_path": str(tmp_path / "s.db"), "cache_size": 2}}
+        )
+        storage.initialize()
+        for i, content in enumerate(["garten blumen", "garten gemüse", "auto motor"]):
+            storage.store_reflection(
+                {
+                    "id": f"r{i}",
+                    "content": content,
+                    "timestamp": datetime.now().isoformat(),
+                }
+            )
+        yield storage
+        storage.shutdown()
+
+    def test_write_invalidates_search(self, storage):
+        """Test: Neue Reflexionen erscheinen sofort in gecachten Suchen."""
+        assert [r["id"] for r in storage.text_search("garten")] == ["r0", "r1"]
+        storage.store_reflection(
+            {
+                "id": "r3",
+                "content": "garten teich",
+                "timestamp": datetime.now().isoformat(),
+            }
+        )
+        assert sorted(r["id"] for r in storage.text_search("garten")) == [
+            "r0",
+            "r1",
+            "r3",
+        ]
+
+    def test_cache_hit_does_not_write(self, storage):
+        """Test: Cache-Treffer lösen keine Schreibzugriffe aus."""
+        storage.text_search("garten")
+        before = storage.db_connection.total_changes
+        storage.db_connection.set_authorizer(
+            lambda action, *args: (
+                sqlite3.SQLITE_DENY
+                if action
+                in (sqlite3.SQLITE_INSERT, sqlite3.SQLITE_UPDATE, sqlite3.SQLITE_DELETE)
+                else sqlite3.SQLITE_OK
+            )
+        )
+
+        assert len(storage.text_search("Garten ")) == 2
+        assert storage.db_connection.total_changes == before
+        assert storage._search_cache.get_stats()["hits"] == 1
+
+    def test_results_are_copies(self, storage):
+        """Test: Veränderte Ergebnisse wirken sich nicht auf den Cache aus."""
+        storage.text_search("garten")[0]["content"] = "verändert"
+        storage.get_reflection("r0")["content"] = "verändert"
+
+        assert storage.text_search("garten")[0]["content"] == "garten blumen"
+        assert storage.get_reflection("r0")["content"] == "garten blumen"
+
+    def test_nested_fields_are_copies(self, storage):
+        """Test: Auch tags und metadata der Ergebnisse teilen nichts mit dem Cache."""
+        storage.store_reflection(
+            {
+                "id": "r9",
+                "content": "garten zaun",
+                "tags": ["holz"],
+                "metadata": {"ort": "hof"},
+                "timestamp": datetime.now().isoformat(),
+            }
+        )
+        for _ in range(2):
+            hit = storage.get_reflection("r9")
+            hit["tags"].append("MUT")
+            hit["metadata"]["ort"] = "MUT"
+            found = storage.text_search("zaun")[0]
+            found["tags"].append("MUT")
+            found["metadata"]["ort"] = "MUT"
+
+        assert storage.get_reflection("r9")["tags"] == ["holz"]
+        assert storage.text_search("zaun")[0]["metadata"] == {"ort": "hof"}
+
+    def test_limit_is_part_of_key(self, storage):
+        """Test: Ein kleineres Limit verkürzt spätere Suchen nicht."""
+        assert len(storage.text_search("garten", limit=1)) == 1
+        assert len(storage.text_search("garten", limit=10)) == 2
+
+    def test_reflection_cache_is_lru(self, storage):
+        """Test: get_reflection verdrängt den am längsten ungenutzten Eintrag."""
+        storage.get_reflection("r0")
+        storage.get_reflection("r1")
+        storage.get_reflection("r0")
+        storage.get_reflection("r2")
+
+        assert storage._cache.get("r0") is not None
+        assert storage._cache.get("r1") is None
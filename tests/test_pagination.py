@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+ASI Core - Pagination Tests
+Tests für Keyset-Pagination und lazy dekodierte ReflectionRecords
+"""
+
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.storage.local_db import LocalDatabase, ReflectionRecord
+from src.storage.query_planner import decode_cursor, encode_cursor
+
+
+@pytest.fixture
+def local_db(tmp_path):
+    local_db = LocalDatabase(str(tmp_path / "asi.db"))
+    base = datetime.now() - timedelta(hours=1)
+    for i in range(7):
+        # Je zwei Reflexionen teilen sich einen Zeitstempel
+        local_db.store_reflection(
+            {
+                "hash": f"h{i}",
+                "content": f"inhalt {i}",
+                "timestamp": (base + timedelta(minutes=i // 2)).isoformat(),
+                "themes": ["arbeit"],
+                "privacy": "private" if i % 3 == 0 else "public",
+            }
+        )
+    yield local_db
+    local_db.close()
+
+
+class TestKeysetPagination:
+    """Test Suite für LocalDatabase.get_reflections_page."""
+
+    def test_pages_cover_all_rows_once(self, local_db):
+        """Test: Seiten sind lückenlos, auch bei gleichen Zeitstempeln."""
+        seen, cursor = [], None
+        while True:
+            page, cursor = local_db.get_reflections_page(limit=3, cursor=cursor)
+            seen.extend(record.hash for record in page)
+            if cursor is None:
+                break
+
+        assert seen == [r.hash for r in local_db.get_reflections(limit=100)]
+        assert sorted(seen) == [f"h{i}" for i in range(7)]
+        assert seen[:2] == ["h6", "h5"]
+
+    def test_filters_apply_across_pages(self, local_db):
+        """Test: Privacy-Filter gilt auf jeder Seite."""
+        first, cursor = local_db.get_reflections_page(limit=2, privacy_level="private")
+        rest, end = local_db.get_reflections_page(
+            limit=2, privacy_level="private", cursor=cursor
+        )
+        assert [r.hash for r in first + rest] == ["h6", "h3", "h0"]
+        assert end is None
+
+    def test_seek_uses_index(self, local_db):
+        """Test: Die Fortsetzung sucht im Zeitstempel-Index statt zu sortieren."""
+        with local_db.get_connection() as conn:
+            plan = " ".join(
+                row[3]
+                for row in conn.execute(
+                    "EXPLAIN QUERY PLAN SELECT id FROM reflections "
+                    "WHERE (timestamp, id) < (?, ?) "
+                    "ORDER BY timestamp DESC, id DESC LIMIT 3",
+                    ("2100-01-01", 1),
+                )
+            )
+        assert "idx_reflections_timestamp" in plan and "TEMP B-TREE" not in plan
+
+    def test_include_content(self, local_db):
+        """Test: Volltext wird nur auf Anforderung mitgeladen."""
+        page, _ = local_db.get_reflections_page(limit=1)
+        assert page[0].content is None
+        page, _ = local_db.get_reflections_page(limit=1, include_content=True)
+        assert page[0].content == "inhalt 6"
+
+    def test_invalid_cursor(self, local_db):
+        """Test: Ungültige Marken werden als ValueError gemeldet."""
+        assert decode_cursor(encode_cursor("2024-01-01T00:00:00", 5)) == (
+            "2024-01-01T00:00:00",
+            5,
+        )
+        for cursor in ["kaputt", encode_cursor("2024", 1)[:-2], "WzEsMl0"]:
+            with pytest.raises(ValueError):
+                local_db.get_reflections_page(cursor=cursor)
+
+
+class TestLazyRecord:
+    """Test Suite für den lazy dekodierten ReflectionRecord."""
+
+    def test_raw_values_decoded_on_access(self):
+        """Test: JSON und Zeitstempel werden erst beim Zugriff dekodiert."""
+        record = ReflectionRecord(
+            1,
+            "h",
+            "vorschau",
+            "2024-05-01T10:00:00",
+            "private",
+            None,
+            None,
+            '["a"]',
+            None,
+            None,
+        )
+        assert record._tags == '["a"]'
+        assert record.tags == ["a"] and record.themes == []
+        assert record.timestamp == datetime(2024, 5, 1, 10, 0)
+        assert not hasattr(record, "__dict__")
+
+    def test_equality_with_decoded_values(self, local_db):
+        """Test: Rohe und dekodierte Records sind gleich."""
+        stored = local_db.get_reflections(limit=1)[0]
+        decoded = ReflectionRecord(
+            stored.id,
+            stored.hash,
+            stored.content_preview,
+            stored.timestamp,
+            stored.privacy_level,
+            None,
+            None,
+            [],
+            ["arbeit"],
+            "",
+        )
+        assert local_db.get_reflections(limit=1)[0] == decoded
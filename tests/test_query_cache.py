@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+ASI Core - Query Cache Tests
+Tests für den geteilten LRU-Cache der Query-Embeddings
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.ai.embedding import ReflectionEmbedding
+from src.ai.query_cache import QueryEmbeddingCache
+from src.ai.search import SemanticSearchEngine
+from src.ai.vector_store import EmbeddingMatrix
+from src.storage.local_db import LocalDatabase
+
+
+class TestQueryEmbeddingCache:
+    """Test Suite für QueryEmbeddingCache."""
+
+    def test_normalized_key_and_model_identity(self):
+        """Test: Schreibweise egal, Modell-Kennung trennt Einträge."""
+        cache = QueryEmbeddingCache()
+        calls = []
+
+        def compute(text):
+            calls.append(text)
+            return np.ones(4)
+
+        cache.get_or_compute("Arbeit  Stress", "m1", compute)
+        cache.get_or_compute("arbeit stress ", "m1", compute)
+        cache.get_or_compute("arbeit stress", "m2", compute)
+
+        stats = cache.get_stats()
+        assert len(calls) == 2
+        assert stats["hits"] == 1 and stats["misses"] == 2
+        assert stats["hit_rate"] == pytest.approx(1 / 3)
+
+    def test_lru_eviction_by_bytes(self):
+        """Test: Das Byte-Budget verdrängt den am längsten ungenutzten Eintrag."""
+        cache = QueryEmbeddingCache(max_bytes=2 * 32)
+        cache.put("a", "m", np.zeros(4))
+        cache.put("b", "m", np.zeros(4))
+        cache.get("a", "m")
+        cache.put("c", "m", np.zeros(4))
+
+        assert cache.get("b", "m") is None
+        assert cache.get("a", "m") is not None
+        assert cache.get_stats()["evictions"] == 1
+        assert cache.get_stats()["bytes"] == 64
+
+    def test_cached_vectors_are_read_only(self):
+        """Test: Gecachte Vektoren können nicht verändert werden."""
+        cache = QueryEmbeddingCache()
+        embedding = cache.put("a", "m", np.zeros(4))
+
+        with pytest.raises(ValueError):
+            embedding[0] = 1.0
+
+
+class TestEngineQueryCache:
+    """Test Suite für die Cache-Nutzung der Suchmaschine."""
+
+    def test_index_and_repeated_search_hit_cache(self, tmp_path):
+        """Test: Indizierter Inhalt und wiederholte Queries kommen aus dem Cache."""
+        embedding_system = ReflectionEmbedding()
+        cache = QueryEmbeddingCache()
+        engine = SemanticSearchEngine(
+            embedding_system,
+            LocalDatabase(str(tmp_path / "asi.db")),
+            embedding_matrix=EmbeddingMatrix(embedding_system.model.embedding_dim),
+            query_cache=cache,
+        )
+        reflection = {"hash": "h1", "content": "arbeit stress projekt", "themes": []}
+        engine.local_db.store_reflection(reflection)
+        engine.index_reflection(reflection)
+
+        engine.search_by_text("arbeit stress projekt")
+        engine.search_by_text("Arbeit Stress Projekt")
+
+        assert cache.get_stats()["hits"] == 2
+        assert engine.get_search_analytics()["query_cache"]["misses"] == 1
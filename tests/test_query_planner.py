@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+ASI Core - Query Planner Tests
+Tests für Filter-Pushdown nach SQL und vorgefilterte Vektorsuche
+"""
+
+import json
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.ai.embedding import ReflectionEmbedding
+from src.ai.search import SemanticSearchEngine
+from src.ai.vector_store import EmbeddingMatrix, QuantizedEmbeddingMatrix
+from src.storage.local_db import LocalDatabase
+from src.storage.query_planner import ReflectionFilter, glob_prefix
+
+BASE_TIME = datetime(2024, 1, 1)
+
+
+def _bulk_insert(local_db, rows):
+    """Fügt (hash, content, days_offset, privacy, themes, sentiment) direkt ein"""
+    with local_db.get_connection() as conn:
+        conn.executemany(
+            """
+            INSERT INTO reflections (
+                hash, content_preview, full_content, timestamp,
+                privacy_level, tags, themes, sentiment
+            ) VALUES (?, ?, ?, ?, ?, '[]', ?, ?)
+        """,
+            [
+                (
+                    h,
+                    content[:100],
+                    content,
+                    (BASE_TIME + timedelta(days=days)).isoformat(),
+                    privacy,
+                    json.dumps(themes),
+                    sentiment,
+                )
+                for h, content, days, privacy, themes, sentiment in rows
+            ],
+        )
+
+
+class TestReflectionFilter:
+    """Test Suite für ReflectionFilter."""
+
+    def test_empty_filter(self):
+        """Test: Ein leerer Filter erzeugt eine immer wahre Bedingung."""
+        where, params = ReflectionFilter().to_sql()
+        assert ReflectionFilter().is_empty()
+        assert (where, params) == ("1=1", [])
+
+    def test_glob_prefix_escapes_wildcards(self):
+        """Test: GLOB-Sonderzeichen im Präfix werden maskiert."""
+        assert glob_prefix("positive") == "positive*"
+        assert glob_prefix("a*b?[") == "a[*]b[?][[]*"
+
+    def test_sentiment_filter_uses_index(self, tmp_path):
+        """Test: Der Sentiment-Filter läuft über den Index statt eines Table-Scans."""
+        local_db = LocalDatabase(str(tmp_path / "asi.db"))
+        where, params = ReflectionFilter(sentiment="positive").to_sql()
+        with local_db.get_connection() as conn:
+            plan = conn.execute(
+                f"EXPLAIN QUERY PLAN SELECT r.hash FROM reflections r WHERE {where}",
+                params,
+            ).fetchall()
+        assert "idx_reflections_sentiment" in " ".join(row[3] for row in plan)
+
+
+class TestFilterPushdown:
+    """Test Suite für die SQL-seitigen Filter der LocalDatabase."""
+
+    @pytest.fixture
+    def local_db(self, tmp_path):
+        local_db = LocalDatabase(str(tmp_path / "asi.db"))
+        # Der gesuchte Eintrag ist älter als die neuesten 1000
+        rows = [("old", "alt", 0, "private", ["reise"], "positive(0.95)")]
+        rows += [
+            (f"h{i}", f"eintrag {i}", 10 + i, "private", ["arbeit"], "neutral(0.50)")
+            for i in range(1100)
+        ]
+        _bulk_insert(local_db, rows)
+        return local_db
+
+    def test_candidates_respect_all_predicates(self, local_db):
+        """Test: Datum, Privacy-Level und Themen werden gemeinsam angewendet."""
+        filters = ReflectionFilter(
+            date_range=(BASE_TIME + timedelta(days=10), BASE_TIME + timedelta(days=14)),
+            privacy_level="private",
+            themes=["arbeit", "sport"],
+        )
+        assert sorted(local_db.get_candidate_hashes(filters)) == [
+            "h0",
+            "h1",
+            "h2",
+            "h3",
+            "h4",
+        ]
+
+    def test_theme_search_is_not_limited_to_newest(self, local_db):
+        """Test: Themen-Treffer außerhalb der neuesten 1000 werden gefunden."""
+        matches = local_db.find_by_themes(["reise"], limit=5)
+        assert [(record.hash, count) for record, count in matches] == [("old", 1)]
+
+    def test_sentiment_search_orders_by_confidence(self, local_db):
+        """Test: Sentiment-Suche liefert Konfidenz aus dem Label."""
+        matches = local_db.find_by_sentiment("positive", limit=5)
+        assert [(record.hash, confidence) for record, confidence in matches] == [
+            ("old", 0.95)
+        ]
+        assert len(local_db.find_by_sentiment("neutral", limit=3)) == 3
+
+
+class TestCandidateVectorSearch:
+    """Test Suite für die auf Kandidaten beschränkte Vektorsuche."""
+
+    @pytest.mark.parametrize(
+        "matrix_class", [EmbeddingMatrix, QuantizedEmbeddingMatrix]
+    )
+    def test_candidates_match_filtered_exact_search(self, matrix_class):
+        """Test: Die Kandidatensuche entspricht der gefilterten vollständigen Suche."""
+        rng = np.random.default_rng(0)
+        vectors = rng.standard_normal((500, 16)).astype(np.float32)
+        matrix = matrix_class(16)
+        for i, vector in enumerate(vectors):
+            matrix.add(f"k{i}", vector)
+
+        allowed = {f"k{i}" for i in range(0, 500, 7)} | {"unbekannt"}
+        query = rng.standard_normal(16)
+        expected = [
+            (key, score)
+            for key, score in EmbeddingMatrix.search(matrix, query, k=None)
+            if key in allowed
+        ][:5]
+        found = matrix.search(query, k=5, candidates=allowed)
+
+        assert [key for key, _ in found] == [key for key, _ in expected]
+        assert matrix.search(query, k=5, candidates=[]) == []
+
+    def test_filtered_text_search_uses_sql_candidates(self, tmp_path):
+        """Test: Gefilterte Textsuche findet auch ältere Reflexionen."""
+        local_db = LocalDatabase(str(tmp_path / "asi.db"))
+        embedding_system = ReflectionEmbedding()
+        engine = SemanticSearchEngine(
+            embedding_system,
+            local_db,
+            embedding_matrix=EmbeddingMatrix(embedding_system.model.embedding_dim),
+        )
+        _bulk_insert(
+            local_db,
+            [
+                ("a", "garten blumen sommer", 0, "public", [], ""),
+                ("b", "garten blumen sommer", 5, "private", [], ""),
+                ("c", "garten blumen", 40, "public", [], ""),
+            ],
+        )
+
+        results = engine.search_by_text(
+            "garten blumen",
+            min_similarity=0.5,
+            privacy_filter="public",
+            date_range=(BASE_TIME, BASE_TIME + timedelta(days=10)),
+        )
+        assert [r.reflection_hash for r in results] == ["a"]
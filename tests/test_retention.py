@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+ASI Core - Aufbewahrung Tests
+Tests für die blockweise Bereinigung mit Incremental Vacuum
+"""
+
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.main.core_manager import ASICoreManager
+from src.storage.local_db import LocalDatabase
+from src.storage.retention import RetentionJob
+
+
+def _fill(local_db, old=30, recent=5):
+    """Legt alte (400 Tage) und aktuelle Reflexionen an"""
+    rows = []
+    for i in range(old + recent):
+        age = 400 if i < old else 1
+        rows.append(
+            {
+                "hash": f"h{i}",
+                "content": "x" * 2000,
+                "timestamp": (datetime.now() - timedelta(days=age)).isoformat(),
+                "themes": ["alt" if i < old else "neu"],
+            }
+        )
+    local_db.store_reflections_bulk(rows)
+
+
+@pytest.fixture
+def local_db(tmp_path):
+    local_db = LocalDatabase(str(tmp_path / "asi.db"))
+    yield local_db
+    local_db.close()
+
+
+class TestRetentionJob:
+    """Test Suite für RetentionJob."""
+
+    def test_deletes_in_batches(self, local_db):
+        """Test: Alte Reflexionen werden blockweise entfernt, Archiviertes bleibt."""
+        _fill(local_db)
+        local_db.update_storage_reference("h0", "arweave", "tx0")
+
+        stats = RetentionJob(local_db, batch_size=7, pause=0).run_once()
+
+        assert stats["status"] == "done"
+        assert stats["deleted"]["reflections"] == 29
+        assert stats["batches"] >= 5
+        remaining = {h for h in local_db.get_reflection_hashes()}
+        assert remaining == {"h0"} | {f"h{i}" for i in range(30, 35)}
+        # Abgeleitete Tabellen folgen per Trigger
+        assert local_db.get_statistics()["total_reflections"] == 6
+        assert dict(local_db.get_top_themes()) == {"alt": 1, "neu": 5}
+
+    def test_old_upload_status_and_insights(self, local_db):
+        """Test: created_at (UTC) wird mit passendem Format verglichen."""
+        with local_db.get_connection() as conn:
+            conn.execute(
+                "INSERT INTO upload_status "
+                "(reflection_hash, storage_type, status, created_at) "
+                "VALUES ('a', 'ipfs', 'failed', datetime('now', '-400 days')), "
+                "('b', 'ipfs', 'failed', datetime('now', '-1 days'))"
+            )
+            conn.execute(
+                "INSERT INTO insights "
+                "(type, title, description, confidence, created_at) "
+                "VALUES ('t', 'alt', 'd', 0.5, datetime('now', '-400 days'))"
+            )
+
+        stats = local_db.cleanup_old_data(days_to_keep=365)
+
+        assert stats["deleted"] == {"reflections": 0, "upload_status": 1, "insights": 1}
+        assert local_db.get_statistics()["upload_status"] == {"ipfs": {"failed": 1}}
+
+    def test_incremental_vacuum_returns_pages(self, local_db):
+        """Test: Freie Seiten werden schrittweise zurückgegeben."""
+        _fill(local_db, old=200)
+        with local_db.get_connection() as conn:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        size_before = Path(local_db.db_path).stat().st_size
+
+        stats = RetentionJob(local_db, pause=0, vacuum_pages=16).run_once()
+
+        assert stats["incremental_vacuum"] is True
+        assert stats["free_pages_before"] > 16
+        assert stats["vacuumed_pages"] == stats["free_pages_before"]
+        assert stats["free_pages_after"] == 0
+        with local_db.get_connection() as conn:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        assert Path(local_db.db_path).stat().st_size < size_before
+
+    def test_existing_database_without_auto_vacuum(self, tmp_path):
+        """Test: Ältere Dateien schrumpfen erst nach enable_incremental_vacuum."""
+        db_path = tmp_path / "alt.db"
+        sqlite3.connect(db_path).execute("CREATE TABLE altlast (x)").connection.close()
+        local_db = LocalDatabase(str(db_path))
+        _fill(local_db)
+
+        stats = local_db.cleanup_old_data()
+        assert stats["incremental_vacuum"] is False
+        assert stats["free_pages_after"] == stats["free_pages_before"] > 0
+
+        assert local_db.enable_incremental_vacuum() is True
+        assert local_db.enable_incremental_vacuum() is False
+        local_db.close()
+
+    def test_stop_interrupts_run(self, local_db):
+        """Test: Eine Abbruchbedingung beendet den Durchlauf nach dem Block."""
+        _fill(local_db)
+        stats = RetentionJob(local_db, batch_size=5, pause=0).run_once(
+            should_stop=lambda: len(local_db.get_reflection_hashes()) <= 25
+        )
+        assert stats["status"] == "stopped"
+        assert stats["deleted"]["reflections"] == 10
+
+
+class TestRetentionScheduling:
+    """Test Suite für die Einplanung über LocalDatabase und Core Manager."""
+
+    def test_local_db_schedules_job(self, tmp_path):
+        """Test: Die Datenbank startet, meldet und stoppt den Job."""
+        local_db = LocalDatabase(str(tmp_path / "asi.db"))
+        _fill(local_db)
+        assert local_db.get_retention_stats() is None
+
+        job = local_db.schedule_retention(60, days_to_keep=365, pause=0)
+        deadline = time.time() + 5
+        while job.get_stats()["status"] != "done" and time.time() < deadline:
+            time.sleep(0.01)
+
+        retention = local_db.get_retention_stats()
+        assert retention["status"] == "done" and retention["scheduled"]
+        assert retention["deleted"]["reflections"] == 30
+
+        local_db.close()
+        assert not job.get_stats()["scheduled"]
+
+    def test_core_manager_uses_retention_config(self, local_db):
+        """Test: Der Core Manager reicht seine Konfiguration durch und stoppt."""
+        _fill(local_db)
+        manager = ASICoreManager(
+            {
+                "features": {},
+                "ai": {},
+                "storage": {
+                    "retention": {
+                        "enabled": True,
+                        "days_to_keep": 365,
+                        "pause": 0,
+                        "interval_seconds": 60,
+                    }
+                },
+            },
+            {},
+        )
+        assert manager.health_check()["retention"] is None
+
+        job = manager.schedule_retention(local_db)
+        assert job.days_to_keep == 365
+        deadline = time.time() + 5
+        while job.get_stats()["status"] != "done" and time.time() < deadline:
+            time.sleep(0.01)
+
+        retention = manager.health_check()["retention"]
+        assert retention["status"] == "done" and retention["scheduled"]
+        assert retention["deleted"]["reflections"] == 30
+
+        manager.shutdown()
+        assert not job.get_stats()["scheduled"]
+        assert local_db.get_retention_stats() is None
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+ASI Core - Rollup Tests
+Tests für materialisierte Tages-/Wochenaggregate und ihre Nutzer
+"""
+
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.ai.embedding import ReflectionEmbedding
+from src.ai.search import SemanticSearchEngine
+from src.ai.vector_store import EmbeddingMatrix
+from src.core.output import OutputGenerator
+from src.storage.local_db import LocalDatabase
+from src.storage.rollups import bucket_key, iso_week_label
+
+
+def _reflection(hash_value, timestamp, sentiment="", themes=(), words=0, content=None):
+    return {
+        "hash": hash_value,
+        "content": content or f"reflexion {hash_value}",
+        "timestamp": timestamp.isoformat(),
+        "sentiment": sentiment,
+        "themes": list(themes),
+        "structure": {"word_count": words},
+    }
+
+
+@pytest.fixture
+def local_db(tmp_path):
+    local_db = LocalDatabase(str(tmp_path / "asi.db"))
+    # 2024-05-01 ist ein Mittwoch, 2024-05-06 ein Montag
+    local_db.store_reflection(
+        _reflection(
+            "a", datetime(2024, 5, 1, 9), "positive(0.90)", ["arbeit", "arbeit"], 10
+        )
+    )
+    local_db.store_reflection(
+        _reflection("b", datetime(2024, 5, 1, 21), "negative(0.60)", ["arbeit"], 5)
+    )
+    local_db.store_reflection(
+        _reflection("c", datetime(2024, 5, 6, 8), "positive(0.70)", ["sport"], 7)
+    )
+    return local_db
+
+
+class TestRollupMaintenance:
+    """Test Suite für die trigger-gepflegten Rollups."""
+
+    def test_bucket_keys(self):
+        """Test: Wochen-Buckets beginnen am Montag und tragen ISO-Wochen."""
+        assert bucket_key("day", "2024-05-05T23:59:00") == "2024-05-05"
+        assert bucket_key("week", datetime(2024, 5, 5)) == "2024-04-29"
+        assert iso_week_label("2024-12-30") == "2025-W01"
+
+    def test_insert_updates_rollups(self, local_db):
+        """Test: Einfügen aktualisiert Tages- und Wochenaggregate."""
+        days = local_db.get_rollups("day")
+        assert [
+            (d["bucket"], d["reflection_count"], d["word_total"]) for d in days
+        ] == [
+            ("2024-05-01", 2, 15),
+            ("2024-05-06", 1, 7),
+        ]
+        assert days[0]["sentiments"] == {"positive": 1, "negative": 1}
+        # Doppelte Themen einer Reflexion zählen einmal
+        assert days[0]["themes"] == {"arbeit": 2}
+
+        weeks = local_db.get_rollups("week")
+        assert [w["bucket"] for w in weeks] == ["2024-04-29", "2024-05-06"]
+
+    def test_delete_and_update_adjust_rollups(self, local_db):
+        """Test: Löschen und Verschieben rechnen Reflexionen wieder heraus."""
+        with local_db.get_connection() as conn:
+            conn.execute("DELETE FROM reflections WHERE hash = 'a'")
+            conn.execute(
+                "UPDATE reflections SET timestamp = '2024-05-07T10:00:00' "
+                "WHERE hash = 'b'"
+            )
+
+        days = local_db.get_rollups("day")
+        assert [(d["bucket"], d["reflection_count"]) for d in days] == [
+            ("2024-05-06", 1),
+            ("2024-05-07", 1),
+        ]
+        assert local_db.get_rollups("week")[0]["themes"] == {"sport": 1, "arbeit": 1}
+
+    def test_range_filter(self, local_db):
+        """Test: start/end werden auf Buckets der Periode abgebildet."""
+        weeks = local_db.get_rollups("week", datetime(2024, 5, 8), datetime(2024, 5, 9))
+        assert [w["bucket"] for w in weeks] == ["2024-05-06"]
+
+    def test_existing_database_is_backfilled(self, tmp_path):
+        """Test: Bestehende Reflexionen werden beim ersten Öffnen aggregiert."""
+        db_path = tmp_path / "alt.db"
+        LocalDatabase(str(db_path)).store_reflection(
+            _reflection("x", datetime(2024, 1, 3), "neutral(0.50)", ["ruhe"], 4)
+        )
+        with sqlite3.connect(db_path) as conn:
+            for table in ("reflection_rollups", "rollup_sentiments", "rollup_themes"):
+                conn.execute(f"DROP TABLE {table}")
+
+        rollups = LocalDatabase(str(db_path)).get_rollups("day")
+        assert rollups == [
+            {
+                "period": "day",
+                "bucket": "2024-01-03",
+                "reflection_count": 1,
+                "word_total": 4,
+                "sentiments": {"neutral": 1},
+                "themes": {"ruhe": 1},
+            }
+        ]
+
+
+class TestRollupConsumers:
+    """Test Suite für Timeline und Ausgabe auf Basis der Rollups."""
+
+    def test_search_timeline_reads_week_rollups(self, tmp_path):
+        """Test: Die Timeline zeigt Wochenaggregate und Treffer je Woche."""
+        local_db = LocalDatabase(str(tmp_path / "asi.db"))
+        embedding_system = ReflectionEmbedding()
+        engine = SemanticSearchEngine(
+            embedding_system,
+            local_db,
+            embedding_matrix=EmbeddingMatrix(embedding_system.model.embedding_dim),
+        )
+        now = datetime.now()
+        local_db.store_reflection(
+            _reflection("g", now, "positive(0.8)", ["garten"], content="garten blumen")
+        )
+        local_db.store_reflection(
+            _reflection("w", now - timedelta(days=14), "negative(0.6)", ["arbeit"])
+        )
+        engine.sync_index()
+
+        timeline = engine.search_timeline("garten blumen", days_back=20)
+        current = timeline["weeks"][iso_week_label(bucket_key("week", now))]
+        assert timeline["total_results"] == 1
+        assert (current["count"], current["reflection_count"]) == (1, 1)
+        assert current["top_themes"] == ["garten"]
+        assert current["results"][0]["hash"] == "g"
+        assert sum(w["reflection_count"] for w in timeline["weeks"].values()) == 2
+
+    def test_daily_summary_matches_list_version(self, local_db, tmp_path):
+        """Test: Die Tages-Zusammenfassung aus Rollups entspricht der Listen-Version."""
+        output = OutputGenerator(str(tmp_path / "local"), local_db=local_db)
+        day = datetime(2024, 5, 1)
+        reflections = [
+            _reflection("a", day, "positive(0.90)", ["arbeit"], 10),
+            _reflection("b", day, "negative(0.60)", ["arbeit"], 5),
+        ]
+
+        from_rollups = output.create_daily_summary(day=day)
+        from_list = output.create_daily_summary(reflections, day=day)
+        assert from_rollups["reflection_count"] == from_list["reflection_count"] == 2
+        assert from_rollups["total_words"] == from_list["total_words"] == 15
+        assert from_rollups["top_themes"] == from_list["top_themes"] == ["arbeit"]
+        assert sorted(from_rollups["emotions"]) == sorted(from_list["emotions"])
+        assert "message" in output.create_daily_summary(day=datetime(2024, 6, 1))
+
+    def test_emotional_trend_from_rollups(self, tmp_path):
+        """Test: Der Trend nutzt die häufigste Emotion der letzten Tage."""
+        local_db = LocalDatabase(str(tmp_path / "asi.db"))
+        now = datetime.now()
+        for i, sentiment in enumerate(["negative", "positive", "positive", "positive"]):
+            local_db.store_reflection(
+                _reflection(
+                    f"t{i}", now - timedelta(days=2 - min(i, 2)), f"{sentiment}(0.7)"
+                )
+            )
+
+        output = OutputGenerator(str(tmp_path / "local"), local_db=local_db)
+        insight = output.analyze_emotional_trends()
+        assert insight.title == "Positive emotionale Entwicklung"
+        assert (
+            OutputGenerator(str(tmp_path / "leer")).analyze_emotional_trends() is None
+        )
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+ASI Core - Statistik Tests
+Tests für die per Trigger gepflegten Statistik-Zähler
+"""
+
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.storage.local_db import LocalDatabase
+
+
+def _aggregate_statistics(local_db):
+    """Statistiken wie vor Einführung der Zähler, per Aggregat-Abfrage"""
+    cutoff = (datetime.now() - timedelta(days=7)).isoformat()
+    with local_db.get_connection() as conn:
+        upload = {}
+        for storage_type, status, count in conn.execute(
+            "SELECT storage_type, status, COUNT(*) FROM upload_status "
+            "GROUP BY storage_type, status"
+        ):
+            upload.setdefault(storage_type, {})[status] = count
+        return {
+            "total_reflections": conn.execute(
+                "SELECT COUNT(*) FROM reflections"
+            ).fetchone()[0],
+            "reflections_last_7_days": conn.execute(
+                "SELECT COUNT(*) FROM reflections WHERE timestamp >= ?", (cutoff,)
+            ).fetchone()[0],
+            "privacy_distribution": dict(
+                conn.execute(
+                    "SELECT privacy_level, COUNT(*) FROM reflections "
+                    "GROUP BY privacy_level"
+                ).fetchall()
+            ),
+            "upload_status": upload,
+            "total_words": conn.execute(
+                "SELECT COALESCE(SUM(word_count), 0) FROM reflections"
+            ).fetchone()[0],
+        }
+
+
+@pytest.fixture
+def local_db(tmp_path):
+    local_db = LocalDatabase(str(tmp_path / "asi.db"))
+    now = datetime.now()
+    for i in range(10):
+        local_db.store_reflection(
+            {
+                "hash": f"h{i}",
+                "content": "x",
+                # Stundenabstände über die 7-Tage-Grenze hinweg
+                "timestamp": (
+                    now - timedelta(days=6, hours=20) - timedelta(hours=i)
+                ).isoformat(),
+                "privacy": ["private", "public", "anonymous"][i % 3],
+                "structure": {"word_count": i},
+            }
+        )
+    yield local_db
+    local_db.close()
+
+
+class TestStatisticsCounters:
+    """Test Suite für statistics_counters und get_statistics."""
+
+    def test_matches_aggregates(self, local_db):
+        """Test: Zähler entsprechen den Aggregat-Abfragen."""
+        stats = local_db.get_statistics()
+        assert stats == _aggregate_statistics(local_db)
+        assert stats["total_reflections"] == 10 and stats["total_words"] == 45
+        assert 0 < stats["reflections_last_7_days"] < 10
+
+    def test_updates_and_deletes(self, local_db):
+        """Test: Ändern und Löschen halten die Zähler synchron."""
+        with local_db.get_connection() as conn:
+            conn.execute(
+                "UPDATE reflections SET privacy_level = 'public' WHERE hash = 'h0'"
+            )
+            conn.execute("UPDATE reflections SET word_count = NULL WHERE hash = 'h9'")
+            conn.execute("DELETE FROM reflections WHERE privacy_level = 'anonymous'")
+
+        stats = local_db.get_statistics()
+        assert stats == _aggregate_statistics(local_db)
+        assert "anonymous" not in stats["privacy_distribution"]
+
+    def test_upload_status_matrix(self, local_db):
+        """Test: Upload-Einträge werden je Speichertyp und Status gezählt."""
+        local_db.update_storage_reference("h1", "ipfs", "Qm1")
+        local_db.update_storage_reference("h2", "ipfs", "Qm2")
+        local_db.update_storage_reference("h3", "arweave", "tx3")
+        with local_db.get_connection() as conn:
+            conn.execute(
+                "UPDATE upload_status SET status = 'failed' WHERE storage_hash = 'Qm2'"
+            )
+
+        stats = local_db.get_statistics()
+        assert stats["upload_status"] == {
+            "ipfs": {"uploaded": 1, "failed": 1},
+            "arweave": {"uploaded": 1},
+        }
+        assert stats == _aggregate_statistics(local_db)
+
+    def test_existing_database_is_backfilled(self, tmp_path, local_db):
+        """Test: Beim ersten Öffnen werden die Zähler aus dem Bestand gefüllt."""
+        local_db.update_storage_reference("h1", "ipfs", "Qm1")
+        expected = _aggregate_statistics(local_db)
+        with local_db.get_connection() as conn:
+            conn.execute("DROP TABLE statistics_counters")
+            for table in ("reflections", "upload_status"):
+                for suffix in ("ai", "ad", "au"):
+                    conn.execute(f"DROP TRIGGER {table}_stats_{suffix}")
+
+        reopened = LocalDatabase(local_db.db_path)
+        assert reopened.get_statistics() == expected
+        reopened.close()
+
+    def test_no_full_table_scan(self, local_db):
+        """Test: Die 7-Tage-Abfrage liest über den Zeitstempel-Index."""
+        with local_db.get_connection() as conn:
+            plan = " ".join(
+                row[3]
+                for row in conn.execute(
+                    "EXPLAIN QUERY PLAN SELECT COUNT(*) FROM reflections "
+                    "WHERE timestamp >= ? AND timestamp < ?",
+                    ("2024-01-01", "2024-01-02"),
+                )
+            )
+        assert "idx_reflections_timestamp" in plan
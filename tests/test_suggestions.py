@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+ASI Core - Suchvorschlag Tests
+Tests für den häufigkeitsgewichteten Präfix-Index
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.ai.embedding import ReflectionEmbedding
+from src.ai.search import SemanticSearchEngine
+from src.ai.suggestions import SuggestionIndex
+from src.ai.vector_store import EmbeddingMatrix
+from src.storage.local_db import LocalDatabase
+
+
+class TestSuggestionIndex:
+    """Test Suite für SuggestionIndex."""
+
+    def test_completions_are_weighted(self):
+        """Test: Häufigere Begriffe stehen vorne, Groß-/Kleinschreibung egal."""
+        index = SuggestionIndex()
+        index.add_reflection("a", ["Arbeit", "Alltag"])
+        index.add_reflection("b", ["arbeit", "Sport"])
+        index.record_query("Arbeitsplatz")
+
+        assert index.suggest("ar") == ["Arbeit", "Arbeitsplatz"]
+        assert index.suggest("A", limit=1) == ["Arbeit"]
+        assert index.suggest("x") == []
+
+    def test_multiword_terms_match_each_word(self):
+        """Test: Mehrwortige Begriffe sind ab jedem Wort erreichbar."""
+        index = SuggestionIndex()
+        index.record_query("blumen im garten")
+        assert index.suggest("gar") == ["blumen im garten"]
+        assert index.suggest("blumen i") == ["blumen im garten"]
+
+    def test_removal_matches_fresh_index(self):
+        """Test: Nach Entfernen entspricht der Index einem Neuaufbau."""
+        index = SuggestionIndex(top_k=3)
+        for i in range(6):
+            index.add_reflection(f"h{i}", [f"thema{i % 4}", "thema neu"])
+        index.remove_reflection("h0")
+        index.remove_reflection("h4")
+        index.add_reflection("h1", ["thema3"])
+
+        fresh = SuggestionIndex(top_k=3)
+        for key in ["h2", "h3", "h5"]:
+            fresh.add_reflection(key, [f"thema{int(key[1]) % 4}", "thema neu"])
+        fresh.add_reflection("h1", ["thema3"])
+
+        for prefix in ["", "t", "thema", "thema1", "neu"]:
+            assert index.suggest(prefix) == fresh.suggest(prefix)
+        assert index.suggest("thema0") == []
+
+    def test_repeated_word_term(self):
+        """Test: Begriffe mit wiederholtem Wort lassen sich wieder entfernen."""
+        index = SuggestionIndex()
+        index.add_reflection("h1", ["gut gut"])
+        index.add_reflection("h2", ["gut"])
+        index.remove_reflection("h1")
+
+        assert index.suggest("gu") == ["gut"]
+        assert index.suggest("gut g") == []
+        index.remove_reflection("h2")
+        assert index.suggest("") == []
+
+    def test_bulk_add_matches_incremental(self):
+        """Test: Der Massenimport liefert dieselben Vorschläge."""
+        items = [(f"h{i}", [f"wort{i % 7}", f"wo{i % 3}"]) for i in range(50)]
+        incremental = SuggestionIndex(top_k=4)
+        for key, terms in items:
+            incremental.add_reflection(key, terms)
+        bulk = SuggestionIndex(top_k=4)
+        bulk.add_reflections(items)
+
+        for prefix in ["", "w", "wo", "wort", "wort3"]:
+            assert bulk.suggest(prefix) == incremental.suggest(prefix)
+
+    def test_snapshot_and_journal_roundtrip(self, tmp_path):
+        """Test: Snapshot und Journal stellen den Index wieder her."""
+        index = SuggestionIndex(storage_dir=str(tmp_path))
+        index.add_reflection("a", ["Ruhe"])
+        index.save()
+        index.record_query("Ruhepuls")
+        index.record_query("ruhepuls")
+        index.remove_reflection("a")
+        index.add_reflection("b", ["Reise"])
+
+        restored = SuggestionIndex(storage_dir=str(tmp_path))
+        assert restored.suggest("r") == index.suggest("r") == ["Ruhepuls", "Reise"]
+        assert restored.get_stats()["queries"] == 2
+
+
+class TestEngineSuggestions:
+    """Test Suite für Suchvorschläge der SemanticSearchEngine."""
+
+    @pytest.fixture
+    def engine(self, tmp_path):
+        local_db = LocalDatabase(str(tmp_path / "asi.db"))
+        embedding_system = ReflectionEmbedding()
+        return SemanticSearchEngine(
+            embedding_system,
+            local_db,
+            embedding_matrix=EmbeddingMatrix(embedding_system.model.embedding_dim),
+        )
+
+    def test_suggestions_follow_reflections_and_searches(self, engine):
+        """Test: Vorschläge aus Themen, Tags und Suchen ohne DB-Zugriff."""
+        engine.local_db.store_reflection(
+            {"hash": "a", "content": "x", "themes": ["familie"], "tags": ["ferien"]}
+        )
+        engine.sync_index()
+        engine.search_by_text("familienfest", min_similarity=0.0)
+
+        engine.local_db.get_connection = None  # Jeder DB-Zugriff würde scheitern
+        assert engine.get_search_suggestions("f") == [
+            "familie",
+            "familienfest",
+            "ferien",
+        ]
+
+    def test_sync_removes_deleted_reflections(self, engine):
+        """Test: Gelöschte Reflexionen verschwinden aus den Vorschlägen."""
+        engine.local_db.store_reflection(
+            {"hash": "a", "content": "x", "themes": ["reise"]}
+        )
+        engine.sync_index()
+        with engine.local_db.get_connection() as conn:
+            conn.execute("DELETE FROM reflections WHERE hash = 'a'")
+        engine.sync_index()
+        assert engine.get_search_suggestions("rei") == []
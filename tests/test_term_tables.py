@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+ASI Core - Begriffstabellen Tests
+Tests für die normalisierten Tabellen reflection_themes und reflection_tags
+"""
+
+import json
+import sqlite3
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.main.modules.storage_module import StorageModule
+from src.storage.local_db import LocalDatabase
+from src.storage.query_planner import ReflectionFilter
+
+
+def _terms(local_db, table, column):
+    with local_db.get_connection() as conn:
+        return sorted(
+            (row[0], row[1])
+            for row in conn.execute(
+                f"SELECT r.hash, t.{column} FROM {table} t "
+                f"JOIN reflections r ON r.id = t.reflection_id"
+            )
+        )
+
+
+@pytest.fixture
+def local_db(tmp_path):
+    local_db = LocalDatabase(str(tmp_path / "asi.db"))
+    for h, themes, tags in [
+        ("a", ["arbeit", "stress", "arbeit"], ["büro"]),
+        ("b", ["arbeit", "familie"], []),
+        ("c", ["familie", "urlaub"], ["sommer"]),
+        ("d", ["arbeit", "stress"], ["büro"]),
+    ]:
+        local_db.store_reflection(
+            {"hash": h, "content": h, "themes": themes, "tags": tags}
+        )
+    yield local_db
+    local_db.close()
+
+
+class TestTermMaintenance:
+    """Test Suite für die Trigger-Pflege der Begriffstabellen."""
+
+    def test_terms_follow_writes(self, local_db):
+        """Test: Einfügen, Ändern und Löschen halten die Tabellen synchron."""
+        assert ("a", "arbeit") in _terms(local_db, "reflection_themes", "theme")
+        assert _terms(local_db, "reflection_tags", "tag") == [
+            ("a", "büro"),
+            ("c", "sommer"),
+            ("d", "büro"),
+        ]
+
+        with local_db.get_connection() as conn:
+            conn.execute(
+                """UPDATE reflections SET themes = '["ruhe"]' WHERE hash = 'b'"""
+            )
+            conn.execute("DELETE FROM reflections WHERE hash = 'c'")
+
+        themes = _terms(local_db, "reflection_themes", "theme")
+        assert [t for h, t in themes if h == "b"] == ["ruhe"]
+        assert all(h != "c" for h, _ in themes)
+
+    def test_existing_database_is_migrated(self, tmp_path):
+        """Test: Bestehende JSON-Spalten werden beim ersten Öffnen übernommen."""
+        db_path = tmp_path / "alt.db"
+        LocalDatabase(str(db_path)).close()
+        with sqlite3.connect(db_path) as conn:
+            # Stand vor Einführung der Begriffstabellen
+            for table in ("reflection_themes", "reflection_tags"):
+                conn.execute(f"DROP TABLE {table}")
+                for suffix in ("ai", "ad", "au"):
+                    conn.execute(f"DROP TRIGGER reflections_{table}_{suffix}")
+            conn.execute(
+                "INSERT INTO reflections (hash, content_preview, full_content, "
+                "timestamp, themes, tags) VALUES ('x', 'x', 'x', ?, ?, 'kein json')",
+                (datetime.now().isoformat(), json.dumps(["reise", 3])),
+            )
+
+        local_db = LocalDatabase(str(db_path))
+        assert _terms(local_db, "reflection_themes", "theme") == [("x", "reise")]
+        assert _terms(local_db, "reflection_tags", "tag") == []
+        local_db.close()
+
+
+class TestTermQueries:
+    """Test Suite für indizierte Themen-Abfragen."""
+
+    def test_theme_filter_uses_index(self, local_db):
+        """Test: Der Themen-Filter liest die Begriffstabelle statt JSON."""
+        where, params = ReflectionFilter(themes=["urlaub"]).to_sql()
+        with local_db.get_connection() as conn:
+            plan = " ".join(
+                row[3]
+                for row in conn.execute(
+                    "EXPLAIN QUERY PLAN SELECT r.hash FROM reflections r "
+                    f"WHERE {where}",
+                    params,
+                )
+            )
+        assert "reflection_themes" in plan and "json_each" not in plan
+        assert local_db.get_candidate_hashes(ReflectionFilter(themes=["urlaub"])) == [
+            "c"
+        ]
+
+    def test_find_by_themes_counts_common_themes(self, local_db):
+        """Test: Trefferzahl gemeinsamer Themen, doppelte Themen zählen einmal."""
+        matches = local_db.find_by_themes(["arbeit", "stress"], limit=10)
+        counts = {record.hash: count for record, count in matches}
+        assert counts == {"a": 2, "d": 2, "b": 1}
+        assert [record.hash for record, _ in matches][-1] == "b"
+
+    def test_top_terms_and_cooccurrence(self, local_db):
+        """Test: Häufigkeiten und gemeinsame Themen als SQL-Aggregate."""
+        assert local_db.get_top_themes(limit=2) == [("arbeit", 3), ("familie", 2)]
+        assert local_db.get_top_tags() == [("büro", 2), ("sommer", 1)]
+        assert local_db.get_top_themes(filters=ReflectionFilter(themes=["urlaub"])) == [
+            ("familie", 1),
+            ("urlaub", 1),
+        ]
+        assert local_db.get_theme_cooccurrence("arbeit") == [
+            ("stress", 2),
+            ("familie", 1),
+        ]
+
+    def test_themes_by_hashes(self, local_db):
+        """Test: Themen mehrerer Reflexionen in einer Abfrage."""
+        themes = local_db.get_themes_by_hashes(["a", "c", "fehlt"])
+        assert {h: sorted(t) for h, t in themes.items()} == {
+            "a": ["arbeit", "stress"],
+            "c": ["familie", "urlaub"],
+        }
+
+    def test_storage_module_tag_fallback(self, tmp_path):
+        """Test: Die LIKE-Suche des StorageModule trifft Tags über die Tabelle."""
+        storage = StorageModule({"storage": {"database_path": str(tmp_path / "s.db")}})
+        storage.initialize()
+        storage._fts_enabled = False
+        storage.store_reflection(
+            {
+                "id": "r1",
+                "content": "ohne treffer",
+                "tags": ["fokus"],
+                "timestamp": datetime.now().isoformat(),
+            }
+        )
+        assert [r["id"] for r in storage.text_search("fokus")] == ["r1"]
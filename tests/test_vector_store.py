@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+ASI Core - Vector Store Tests
+Tests für die persistente Embedding-Matrix und die Matrix-basierte Suche
+"""
+
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.ai.embedding import ReflectionEmbedding
+from src.ai.search import SemanticSearchEngine
+from src.ai.vector_store import (
+    EmbeddingMatrix,
+    QuantizedEmbeddingMatrix,
+    top_k_indices,
+)
+from src.storage.local_db import LocalDatabase
+
+
+class TestEmbeddingMatrix:
+    """Test Suite für EmbeddingMatrix."""
+
+    def test_top_k_indices_sorted(self):
+        """Test: Top-k liefert absteigend sortierte Indizes."""
+        scores = np.array([0.1, 0.9, 0.5, 0.7, 0.3], dtype=np.float32)
+
+        assert list(top_k_indices(scores, 3)) == [1, 3, 2]
+        assert list(top_k_indices(scores, 10)) == [1, 3, 2, 4, 0]
+        assert len(top_k_indices(scores, 0)) == 0
+
+    def test_search_returns_nearest(self):
+        """Test: Suche liefert den ähnlichsten Vektor zuerst."""
+        matrix = EmbeddingMatrix(3)
+        matrix.add("a", [1.0, 0.0, 0.0])
+        matrix.add("b", [0.0, 1.0, 0.0])
+        matrix.add("c", [1.0, 1.0, 0.0])
+
+        results = matrix.search([1.0, 0.1, 0.0], k=2)
+
+        assert [key for key, _ in results] == ["a", "c"]
+        assert results[0][1] == pytest.approx(0.995, abs=1e-3)
+
+    def test_zero_vector_scores_minus_one(self):
+        """Test: Nullvektoren werden nie als ähnlich gewertet."""
+        matrix = EmbeddingMatrix(2)
+        matrix.add("zero", [0.0, 0.0])
+
+        assert matrix.search([1.0, 0.0], k=1) == [("zero", -1.0)]
+
+    def test_update_and_remove(self):
+        """Test: Aktualisieren und Entfernen halten den Index konsistent."""
+        matrix = EmbeddingMatrix(2, initial_capacity=1)
+        matrix.add("a", [1.0, 0.0])
+        matrix.add("b", [0.0, 1.0])
+        matrix.add("a", [0.0, 1.0])
+
+        assert len(matrix) == 2
+        assert matrix.remove("a")
+        assert not matrix.remove("a")
+        assert matrix.keys() == ["b"]
+        assert matrix.search([0.0, 1.0], k=5)[0][0] == "b"
+
+    def test_persistence_roundtrip(self, tmp_path):
+        """Test: Inkrementell geschriebene Daten werden wieder geladen."""
+        matrix = EmbeddingMatrix(2, storage_dir=str(tmp_path), model_id="m1")
+        matrix.add("a", [1.0, 0.0])
+        matrix.add("b", [0.0, 1.0])
+        matrix.add("c", [1.0, 1.0])
+        matrix.remove("a")
+        matrix.add("b", [1.0, 0.0])
+
+        reloaded = EmbeddingMatrix(2, storage_dir=str(tmp_path), model_id="m1")
+
+        assert sorted(reloaded.keys()) == ["b", "c"]
+        assert np.allclose(reloaded.get("b"), [1.0, 0.0])
+
+    def test_model_change_discards_vectors(self, tmp_path):
+        """Test: Ein anderes Modell verwirft die gespeicherten Vektoren."""
+        matrix = EmbeddingMatrix(2, storage_dir=str(tmp_path), model_id="m1")
+        matrix.add("a", [1.0, 0.0])
+
+        reloaded = EmbeddingMatrix(2, storage_dir=str(tmp_path), model_id="m2")
+
+        assert len(reloaded) == 0
+
+
+class TestMatrixSearch:
+    """Test Suite für SemanticSearchEngine mit Embedding-Matrix."""
+
+    @pytest.fixture
+    def search_setup(self, tmp_path):
+        """Erstellt Datenbank und Suchmaschine in temporärem Verzeichnis."""
+        local_db = LocalDatabase(str(tmp_path / "asi.db"))
+        embedding_system = ReflectionEmbedding()
+        engine = SemanticSearchEngine(
+            embedding_system,
+            local_db,
+            embedding_matrix=EmbeddingMatrix(
+                embedding_system.model.embedding_dim,
+                storage_dir=str(tmp_path / "embeddings"),
+            ),
+        )
+        return local_db, engine
+
+    def _store(self, local_db, engine, reflection_hash, content, privacy="private"):
+        reflection = {
+            "hash": reflection_hash,
+            "content": content,
+            "timestamp": datetime.now().isoformat(),
+            "privacy": privacy,
+            "themes": [],
+        }
+        local_db.store_reflection(reflection)
+        engine.index_reflection(reflection)
+
+    def test_search_finds_matching_reflection(self, search_setup):
+        """Test: Textsuche findet die inhaltlich passende Reflexion."""
+        local_db, engine = search_setup
+        self._store(local_db, engine, "h1", "arbeit stress arbeit")
+        self._store(local_db, engine, "h2", "familie freunde urlaub")
+
+        results = engine.search_by_text("arbeit stress", limit=5, min_similarity=0.6)
+
+        assert results[0].reflection_hash == "h1"
+        assert all(r.reflection_hash != "h2" for r in results)
+
+    def test_search_matches_reference_similarity(self, search_setup):
+        """Test: Scores entsprechen compute_similarity des Embedding-Systems."""
+        local_db, engine = search_setup
+        self._store(local_db, engine, "h1", "heute war ein guter tag")
+        reflection = local_db.get_reflection_by_hash("h1")
+
+        expected = engine.embedding_system.compute_similarity(
+            engine.embedding_system.model.encode_text("guter tag").tolist(),
+            engine.embedding_system.create_reflection_embedding(reflection)[
+                "combined_embedding"
+            ],
+        )
+        results = engine.search_by_text("guter tag", min_similarity=0.0)
+
+        assert results[0].similarity_score == pytest.approx(expected, abs=1e-5)
+
+    def test_sync_index_backfills_and_prunes(self, search_setup):
+        """Test: Abgleich indiziert fehlende Reflexionen aus der Datenbank."""
+        local_db, engine = search_setup
+        local_db.store_reflection({"hash": "h1", "content": "lernen wachstum"})
+        engine.embedding_matrix.add(
+            "gone", np.ones(engine.embedding_matrix.embedding_dim)
+        )
+
+        assert engine.sync_index() == 1
+        assert engine.embedding_matrix.keys() == ["h1"]
+        assert engine.sync_index() == 0
+
+    def test_own_writes_skip_resync(self, search_setup):
+        """Test: Selbst indizierte Schreibzugriffe lösen keinen Abgleich aus."""
+        local_db, engine = search_setup
+        engine.sync_index()
+        calls = []
+        get_hashes = local_db.get_reflection_hashes
+        local_db.get_reflection_hashes = lambda after_id=0: (
+            calls.append(after_id) or get_hashes(after_id)
+        )
+
+        self._store(local_db, engine, "h1", "arbeit projekt")
+        self._store(local_db, engine, "h2", "familie urlaub")
+        calls.clear()
+        assert engine.sync_index() == 0
+        assert calls == []
+
+        # Fremde Einfügung: nur neue IDs werden gelesen
+        local_db.store_reflection({"hash": "h3", "content": "sport laufen"})
+        assert engine.sync_index() == 1
+        assert all(after_id > 0 for after_id in calls)
+
+        # Fremdes Löschen: vollständiger Abgleich
+        with local_db.get_connection() as conn:
+            conn.execute("DELETE FROM reflections WHERE hash = 'h1'")
+        engine.sync_index()
+        assert calls[-1] == 0
+        assert sorted(engine.embedding_matrix.keys()) == ["h2", "h3"]
+
+        # Eigenes Löschen schreibt die Signatur ebenfalls fort
+        with local_db.get_connection() as conn:
+            conn.execute("DELETE FROM reflections WHERE hash = 'h2'")
+        assert engine.remove_from_index("h2")
+        calls.clear()
+        engine.sync_index()
+        assert calls == []
+
+    def test_privacy_filter(self, search_setup):
+        """Test: Privacy-Filter wird auf die Kandidaten angewendet."""
+        local_db, engine = search_setup
+        self._store(local_db, engine, "h1", "arbeit projekt", privacy="private")
+        self._store(local_db, engine, "h2", "arbeit projekt team", privacy="public")
+
+        results = engine.search_by_text(
+            "arbeit projekt", min_similarity=0.5, privacy_filter="public"
+        )
+
+        assert [r.reflection_hash for r in results] == ["h2"]
+
+
+class TestQuantizedEmbeddingMatrix:
+    """Test Suite für QuantizedEmbeddingMatrix."""
+
+    @pytest.fixture
+    def vectors(self):
+        """Zufällige Vektoren mit fester Saat."""
+        return np.random.default_rng(0).standard_normal((300, 32)).astype(np.float32)
+
+    @pytest.mark.parametrize("codec", ["int8", "float16"])
+    def test_rescored_search_matches_exact(self, tmp_path, vectors, codec):
+        """Test: Nachbewertete Treffer entsprechen der exakten Suche."""
+        exact = EmbeddingMatrix(32)
+        quantized = QuantizedEmbeddingMatrix(32, storage_dir=str(tmp_path), codec=codec)
+        for i, vector in enumerate(vectors):
+            exact.add(f"k{i}", vector)
+            quantized.add(f"k{i}", vector)
+
+        query = vectors[7] + 0.2
+        expected = exact.search(query, k=5)
+        results = quantized.search(query, k=5)
+
+        assert [key for key, _ in results] == [key for key, _ in expected]
+        assert [score for _, score in results] == pytest.approx(
+            [score for _, score in expected], abs=1e-6
+        )
+
+    def test_persistence_and_remove(self, tmp_path, vectors):
+        """Test: Gleiches Dateiformat, Entfernen hält die Zeilen konsistent."""
+        quantized = QuantizedEmbeddingMatrix(32, storage_dir=str(tmp_path))
+        for i, vector in enumerate(vectors[:10]):
+            quantized.add(f"k{i}", vector)
+        quantized.remove("k0")
+
+        reloaded = QuantizedEmbeddingMatrix(32, storage_dir=str(tmp_path))
+        plain = EmbeddingMatrix(32, storage_dir=str(tmp_path))
+
+        assert sorted(reloaded.keys()) == sorted(f"k{i}" for i in range(1, 10))
+        assert reloaded.search(vectors[9], k=1)[0][0] == "k9"
+        assert np.allclose(reloaded.get("k9"), plain.get("k9"))
+        assert reloaded.get_memory_stats()["code_bytes"] < 9 * 32 * 4 / 3
+
+    def test_threshold_search_without_k(self, vectors):
+        """Test: Schwellen-Suche prüft die Mindestähnlichkeit exakt."""
+        quantized = QuantizedEmbeddingMatrix(32)
+        quantized.add("a", vectors[0])
+        quantized.add("zero", np.zeros(32))
+
+        results = quantized.search(vectors[0], k=None, min_score=0.99)
+
+        assert results == [("a", pytest.approx(1.0, abs=1e-6))]
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+ASI Core - Web Reflexionsliste Tests
+Tests für die Keyset-Pagination der Route /reflections
+"""
+
+import importlib
+import re
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parent.parent
+sys.path.append(str(ROOT))
+
+from src.storage.local_db import LocalDatabase
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    # Die App initialisiert beim Import relative data/-Pfade
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.syspath_prepend(str(ROOT / "src" / "web"))
+    web_app = importlib.import_module("src.web.app")
+
+    local_db = LocalDatabase(str(tmp_path / "liste.db"))
+    start = datetime(2024, 1, 1)
+    local_db.store_reflections_bulk(
+        [
+            {
+                "hash": f"h{i:02d}",
+                "content": f"Reflexion {i:02d}",
+                "timestamp": (start + timedelta(hours=i)).isoformat(),
+            }
+            for i in range(60)
+        ]
+    )
+    monkeypatch.setitem(web_app.asi_system, "local_db", local_db)
+    yield web_app.app.test_client()
+    local_db.close()
+
+
+class TestReflectionsPage:
+    """Test Suite für die Reflexions-Übersicht."""
+
+    def test_pages_follow_next_cursor(self, client):
+        """Test: Der Link zur nächsten Seite setzt lückenlos fort."""
+        first = client.get("/reflections")
+        assert first.status_code == 200
+        html = first.get_data(as_text=True)
+        assert "Reflexion 59" in html and "Reflexion 10" in html
+        assert "Reflexion 09" not in html
+
+        link = re.search(r'id="next-page" href="([^"]+)"', html)
+        assert link is not None
+        second = client.get(link.group(1).replace("&amp;", "&"))
+        assert second.status_code == 200
+        html = second.get_data(as_text=True)
+        assert "Reflexion 09" in html and "Reflexion 00" in html
+        assert "Reflexion 10" not in html
+        assert 'id="next-page"' not in html